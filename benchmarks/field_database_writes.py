@@ -0,0 +1,264 @@
+"""
+应力场数据库写入基准测试
+比较批量事务改造前后 1000 点布点保存和整场更换基准点（写回所有测点应力值）的耗时和 fsync 次数
+
+- 改造前：回滚日志 + synchronous=FULL，布点逐行 INSERT，更换基准点逐点 SELECT 状态 + UPDATE + commit，
+  没有 (experiment_id, point_index) 索引（按改造前 FieldDatabaseManager 的 SQL 重放）
+- 改造后：FieldDatabaseManager（WAL + synchronous=NORMAL，save_point_layout / update_stress_values 各一个事务）
+
+fsync 次数通过包装 SQLite 默认 VFS 的 xSync 统计（每次 xSync 对应一次 fsync/fdatasync），
+删除回滚日志时的目录同步也计入；SQLite 静态链接等无法包装的环境只报告耗时。
+WAL 模式下提交不 fsync，同步推迟到检查点，所以单独列出一次检查点的开销。
+测试数据库放在 --dir 下（默认 data/，与实际数据库同一磁盘；放在 tmpfs 上 fsync 没有开销）。
+
+用法:
+    python benchmarks/field_database_writes.py [--points 1000] [--dir data]
+"""
+
+import argparse
+import ctypes
+import ctypes.util
+import json
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.stress_detection_uniaxial.field_database import FieldDatabaseManager
+
+
+class _Vfs(ctypes.Structure):
+    """sqlite3_vfs（iVersion 3），只用到 xOpen / xDelete"""
+    _fields_ = [
+        ('iVersion', ctypes.c_int),
+        ('szOsFile', ctypes.c_int),
+        ('mxPathname', ctypes.c_int),
+        ('pNext', ctypes.c_void_p),
+        ('zName', ctypes.c_char_p),
+        ('pAppData', ctypes.c_void_p),
+        ('xOpen', ctypes.c_void_p),
+        ('xDelete', ctypes.c_void_p),
+        ('rest', ctypes.c_void_p * 14),
+    ]
+
+
+_XOPEN = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.c_void_p, ctypes.c_void_p, ctypes.c_void_p,
+                          ctypes.c_int, ctypes.c_void_p)
+_XDELETE = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.c_void_p, ctypes.c_void_p, ctypes.c_int)
+_XSYNC = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.c_void_p, ctypes.c_int)
+
+# sqlite3_io_methods：iVersion（按指针对齐）之后依次是 xClose、xRead、xWrite、xTruncate、xSync ...
+_PTR = ctypes.sizeof(ctypes.c_void_p)
+_IO_METHOD_SLOTS = {1: 12, 2: 16, 3: 18}
+_XSYNC_OFFSET = _PTR + 4 * _PTR
+
+
+class FsyncCounter:
+    """把包装了 xSync 的 VFS 注册为 SQLite 默认 VFS，统计之后打开的连接的同步次数"""
+    
+    def __init__(self):
+        self.count = 0
+        self.available = False
+        self._keep = []            # 回调和结构体的引用（被 SQLite 持有期间不能回收）
+        self._wrapped = {}         # 原 io_methods 地址 -> 包装后的 io_methods 缓冲区
+        self._orig_sync = {}       # 包装后的 io_methods 地址 -> 原 xSync
+    
+    def install(self) -> bool:
+        lib = self._load_sqlite()
+        if lib is None:
+            return False
+        
+        lib.sqlite3_vfs_find.restype = ctypes.c_void_p
+        lib.sqlite3_vfs_find.argtypes = [ctypes.c_char_p]
+        lib.sqlite3_vfs_register.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        orig_ptr = lib.sqlite3_vfs_find(None)
+        if not orig_ptr:
+            return False
+        
+        orig = _Vfs.from_address(orig_ptr)
+        orig_open = _XOPEN(orig.xOpen)
+        orig_delete = _XDELETE(orig.xDelete)
+        
+        def x_sync(file_ptr, flags):
+            self.count += 1
+            methods = ctypes.c_void_p.from_address(file_ptr).value
+            return self._orig_sync[methods](file_ptr, flags)
+        
+        sync_cb = _XSYNC(x_sync)
+        
+        def x_open(vfs, name, file_ptr, flags, out_flags):
+            rc = orig_open(orig_ptr, name, file_ptr, flags, out_flags)
+            methods = ctypes.c_void_p.from_address(file_ptr).value
+            if rc == 0 and methods:
+                ctypes.c_void_p.from_address(file_ptr).value = ctypes.addressof(self._wrap_methods(methods, sync_cb))
+            return rc
+        
+        def x_delete(vfs, name, sync_dir):
+            rc = orig_delete(orig_ptr, name, sync_dir)
+            if rc == 0 and sync_dir:
+                self.count += 1
+            return rc
+        
+        open_cb, delete_cb = _XOPEN(x_open), _XDELETE(x_delete)
+        hooked = _Vfs.from_buffer_copy(ctypes.string_at(orig_ptr, ctypes.sizeof(_Vfs)))
+        hooked.zName = b'fsync-counter'
+        hooked.pNext = None
+        hooked.xOpen = ctypes.cast(open_cb, ctypes.c_void_p).value
+        hooked.xDelete = ctypes.cast(delete_cb, ctypes.c_void_p).value
+        self._keep += [lib, orig_open, orig_delete, sync_cb, open_cb, delete_cb, hooked]
+        if lib.sqlite3_vfs_register(ctypes.byref(hooked), 1) != 0:
+            return False
+        
+        # 自检：sqlite3 模块与这里加载的可能不是同一个 SQLite（静态链接），此时统计不到同步
+        probe_dir = tempfile.mkdtemp()
+        try:
+            conn = sqlite3.connect(os.path.join(probe_dir, 'probe.db'))
+            conn.execute('PRAGMA synchronous=FULL')
+            conn.execute('CREATE TABLE t (x)')
+            conn.commit()
+            conn.close()
+        finally:
+            shutil.rmtree(probe_dir, ignore_errors=True)
+        self.available = self.count > 0
+        return self.available
+    
+    def _wrap_methods(self, methods, sync_cb):
+        wrapped = self._wrapped.get(methods)
+        if wrapped is None:
+            version = ctypes.c_int.from_address(methods).value
+            size = _PTR + _IO_METHOD_SLOTS.get(version, 18) * _PTR
+            wrapped = ctypes.create_string_buffer(ctypes.string_at(methods, size), size)
+            self._orig_sync[ctypes.addressof(wrapped)] = _XSYNC(
+                ctypes.c_void_p.from_address(methods + _XSYNC_OFFSET).value
+            )
+            ctypes.c_void_p.from_buffer(wrapped, _XSYNC_OFFSET).value = ctypes.cast(sync_cb, ctypes.c_void_p).value
+            self._wrapped[methods] = wrapped
+        return wrapped
+    
+    @staticmethod
+    def _load_sqlite():
+        """加载 sqlite3 模块使用的 SQLite 动态库"""
+        import _sqlite3
+        candidates = [os.path.join(os.path.dirname(_sqlite3.__file__), 'sqlite3.dll'),
+                      ctypes.util.find_library('sqlite3')]
+        for path in candidates:
+            if path:
+                try:
+                    return ctypes.CDLL(path)
+                except OSError:
+                    continue
+        return None
+
+
+def make_layout(n_points):
+    """n_points 个测点的方形网格布点"""
+    side = int(n_points ** 0.5 + 0.999)
+    return [{'x': float(i % side), 'y': float(i // side)} for i in range(n_points)]
+
+
+def create_experiment(db_path):
+    """用 FieldDatabaseManager 建表并创建实验，返回 (管理器, 实验ID)"""
+    db = FieldDatabaseManager(db_path)
+    result = db.create_experiment({'name': 'benchmark', 'stress_direction': 'x'})
+    return db, result['data']['exp_id']
+
+
+def legacy_save_layout(conn, exp_id, points):
+    """改造前的 save_point_layout：逐行 INSERT，最后提交一次"""
+    cursor = conn.cursor()
+    cursor.execute('SELECT status FROM field_experiments WHERE id = ?', (exp_id,))
+    cursor.fetchone()
+    cursor.execute('DELETE FROM field_points WHERE experiment_id = ?', (exp_id,))
+    for idx, point in enumerate(points):
+        cursor.execute('''
+            INSERT INTO field_points (
+                experiment_id, point_index, x_coord, y_coord,
+                r_coord, theta_coord, status
+            ) VALUES (?, ?, ?, ?, ?, ?, 'pending')
+        ''', (exp_id, idx + 1, point['x'], point['y'], None, None))
+    cursor.execute('UPDATE field_experiments SET point_layout = ? WHERE id = ?',
+                   (json.dumps(points, ensure_ascii=False), exp_id))
+    conn.commit()
+
+
+def legacy_rebaseline(conn, exp_id, rows, baseline_point_id):
+    """改造前的更换基准点：先提交 baseline_point_id，再逐点 update_point（SELECT 状态 + UPDATE + commit）"""
+    cursor = conn.cursor()
+    cursor.execute('UPDATE field_experiments SET baseline_point_id = ? WHERE id = ?', (baseline_point_id, exp_id))
+    conn.commit()
+    for point_index, time_diff, stress in rows:
+        cursor.execute('SELECT status FROM field_experiments WHERE id = ?', (exp_id,))
+        cursor.fetchone()
+        cursor.execute('UPDATE field_points SET time_diff = ?, stress_value = ? '
+                       'WHERE experiment_id = ? AND point_index = ?',
+                       (time_diff, stress, exp_id, point_index))
+        conn.commit()
+
+
+def measure(counter, func, *args):
+    """返回 (耗时秒, 同步次数)"""
+    before = counter.count
+    t0 = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - t0, counter.count - before
+
+
+def run(n_points, directory):
+    counter = FsyncCounter()
+    counter.install()
+    
+    os.makedirs(directory, exist_ok=True)
+    work_dir = tempfile.mkdtemp(prefix='field_db_bench_', dir=directory)
+    try:
+        points = make_layout(n_points)
+        rows = [(i + 1, 1e-9 * (i % 7), 0.5 * (i % 11)) for i in range(n_points)]
+        results = []
+        
+        # 改造前：回滚日志 + synchronous=FULL，去掉批量改造时加的索引
+        legacy_path = os.path.join(work_dir, 'legacy.db')
+        db, exp_id = create_experiment(legacy_path)
+        db.close()
+        conn = sqlite3.connect(legacy_path)
+        conn.execute('PRAGMA journal_mode=DELETE')
+        conn.execute('PRAGMA synchronous=FULL')
+        conn.execute('DROP INDEX IF EXISTS idx_field_points_exp_index')
+        conn.commit()
+        results.append(('layout save', 'before', *measure(counter, legacy_save_layout, conn, exp_id, points)))
+        results.append(('re-baseline', 'before', *measure(counter, legacy_rebaseline, conn, exp_id, rows, 1)))
+        conn.close()
+        
+        # 改造后
+        db, exp_id = create_experiment(os.path.join(work_dir, 'batched.db'))
+        results.append(('layout save', 'after', *measure(counter, db.save_point_layout, exp_id, points)))
+        results.append(('re-baseline', 'after', *measure(counter, db.update_stress_values, exp_id, rows, 1)))
+        results.append(('WAL checkpoint', 'after', *measure(counter, db.conn.execute, 'PRAGMA wal_checkpoint(TRUNCATE)')))
+        db.close()
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    
+    print(f"points={n_points}  dir={os.path.abspath(directory)}  sqlite={sqlite3.sqlite_version}")
+    if not counter.available:
+        print("(无法包装 SQLite VFS，fsync 次数不可用)")
+    print(f"{'case':<16}{'':<8}{'wall (ms)':>12}{'fsyncs':>10}{'fsyncs/sec':>14}")
+    for case, variant, elapsed, syncs in results:
+        if counter.available:
+            sync_text, rate_text = f"{syncs}", f"{syncs / elapsed:.0f}"
+        else:
+            sync_text = rate_text = 'n/a'
+        print(f"{case:<16}{variant:<8}{elapsed * 1e3:>12.2f}{sync_text:>10}{rate_text:>14}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--points', type=int, default=1000)
+    parser.add_argument('--dir', default='data', help='测试数据库所在目录（应与实际数据库在同一磁盘）')
+    args = parser.parse_args()
+    run(args.points, args.dir)
+
+
+if __name__ == '__main__':
+    main()
@@ -7,10 +7,18 @@ from .oscilloscope import OscilloscopeBase
 from .signal_processing_wrapper import SignalProcessingWrapper
 from .ultrasonic_pulser import UltrasonicPulserController
 from . import signal_processing
+from . import echo_gate
+from . import binary_transport
+from . import waveform_pyramid
+from . import db_pool
 
 __all__ = [
     'OscilloscopeBase',
     'SignalProcessingWrapper',
     'UltrasonicPulserController',
-    'signal_processing'
+    'signal_processing',
+    'echo_gate',
+    'binary_transport',
+    'waveform_pyramid',
+    'db_pool'
 ]
@@ -0,0 +1,363 @@
+"""
+二进制波形传输模块
+pywebview 桥接层的数组编码：把 numpy 数组编码为 base64 的 float32/int16 数据
+（附带 scale/offset 元数据），代替 tolist() + JSON 文本，并统计每次调用的字节数和耗时
+
+编码格式（JSON 对象）：
+    {"__array__": "base64", "dtype": "float32"|"int16"|..., "length": n,
+     "scale": s, "offset": o, "data": "<base64>"}      值 = 原始值 * scale + offset
+    {"__array__": "linear", "start": t0, "step": dt, "length": n}   值 = start + i * step
+    {"__array__": "series", "id": k, "length": n}   服务端保留的全分辨率数组（见 SeriesStore）
+"""
+
+import base64
+import functools
+import itertools
+import json
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+
+# 编码对象的标记键
+ARRAY_MARKER = '__array__'
+
+# 允许传输的数据类型（与 JS 端 TypedArray 一一对应）
+TRANSPORT_DTYPES = ('float32', 'float64', 'int16', 'uint16', 'int8', 'uint8', 'int32')
+
+# 估算大列表 JSON 长度时的采样点数
+SIZE_SAMPLE_LENGTH = 1000
+
+# 时间轴按等间隔编码时允许的最大偏差（相对采样间隔）
+LINEAR_TOLERANCE = 1e-3
+
+# 服务端保留的全分辨率序列数量上限（超出时释放最久未用的）
+SERIES_CAPACITY = 8
+
+# 服务端保留的全分辨率序列总字节数上限（超出时释放最久未用的；
+# 10 Mpt float64 约 80 MB，默认可同时保留一条波形的时间、电压和一两条处理结果）
+SERIES_MAX_BYTES = 256 * 1024 * 1024
+
+
+def encode_array(values, dtype='float32', scale=1.0, offset=0.0):
+    """
+    把数组编码为 base64 对象
+    
+    Args:
+        values: 数组或列表
+        dtype: 传输数据类型（float32 足够显示和互相关精度）
+        scale, offset: 还原系数，值 = 原始值 * scale + offset
+    
+    Returns:
+        dict: 编码对象
+    """
+    if dtype not in TRANSPORT_DTYPES:
+        raise ValueError(f'不支持的传输数据类型: {dtype}')
+    
+    # JS 端 TypedArray 为小端序
+    数组 = np.ascontiguousarray(values, dtype=np.dtype(dtype).newbyteorder('<'))
+    return {
+        ARRAY_MARKER: 'base64',
+        'dtype': dtype,
+        'length': int(数组.size),
+        'scale': float(scale),
+        'offset': float(offset),
+        'data': base64.b64encode(数组.tobytes()).decode('ascii')
+    }
+
+
+def encode_codes(codes, scale, offset):
+    """
+    编码 ADC 原始码值（无损）：值 = 码值 * scale + offset
+    
+    12bit WORD 码值和 8bit BYTE 码值都放得进 int16
+    """
+    return encode_array(codes, dtype='int16', scale=scale, offset=offset)
+
+
+def encode_linear(start, step, length):
+    """编码等间隔序列（时间轴），只传起点、步长和长度"""
+    return {
+        ARRAY_MARKER: 'linear',
+        'start': float(start),
+        'step': float(step),
+        'length': int(length)
+    }
+
+
+def encode_time_axis(values):
+    """
+    编码时间轴：等间隔（偏差不超过 LINEAR_TOLERANCE 个采样间隔）时按 linear 编码，
+    否则按 float64 传输
+    """
+    时间 = np.asarray(values, dtype=np.float64)
+    if 时间.size >= 2:
+        步长 = (时间[-1] - 时间[0]) / (时间.size - 1)
+        if 步长 > 0:
+            偏差 = np.max(np.abs(时间 - (时间[0] + np.arange(时间.size) * 步长)))
+            if 偏差 <= LINEAR_TOLERANCE * 步长:
+                return encode_linear(时间[0], 步长, 时间.size)
+    return encode_array(时间, dtype='float64')
+
+
+class SeriesStore:
+    """
+    服务端序列存储（线程安全，LRU）
+
+    大波形留在 Python 端，前端只持有 {"__array__": "series", "id": k} 引用，
+    按视窗请求抽取后的数据；处理接口收到引用时直接使用全分辨率数组。
+    数量和总字节数任一超限时释放最久未用的序列（最新保存的一条总是保留）
+    """
+    
+    def __init__(self, capacity=SERIES_CAPACITY, max_bytes=SERIES_MAX_BYTES):
+        self.capacity = capacity
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._series = OrderedDict()
+        self._nbytes = 0
+        self._ids = itertools.count(1)
+    
+    def store(self, values):
+        """保存数组，返回引用对象"""
+        数组 = np.asarray(values)
+        with self._lock:
+            序号 = next(self._ids)
+            self._series[序号] = 数组
+            self._nbytes += 数组.nbytes
+            while len(self._series) > 1 and (
+                    len(self._series) > self.capacity or self._nbytes > self.max_bytes):
+                _, 释放 = self._series.popitem(last=False)
+                self._nbytes -= 释放.nbytes
+        return {ARRAY_MARKER: 'series', 'id': 序号, 'length': int(数组.size)}
+    
+    def get(self, ref):
+        """按引用对象或序号取回数组"""
+        序号 = ref['id'] if isinstance(ref, dict) else ref
+        with self._lock:
+            if 序号 not in self._series:
+                raise ValueError('服务端序列已释放，请重新加载波形')
+            self._series.move_to_end(序号)
+            return self._series[序号]
+    
+    def release(self, ref):
+        """释放序列"""
+        序号 = ref['id'] if isinstance(ref, dict) else ref
+        with self._lock:
+            释放 = self._series.pop(序号, None)
+            if 释放 is not None:
+                self._nbytes -= 释放.nbytes
+    
+    @property
+    def nbytes(self):
+        """当前保留的总字节数"""
+        with self._lock:
+            return self._nbytes
+    
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+            self._nbytes = 0
+
+
+# 全局序列存储（WebAPI 各方法共用）
+series_store = SeriesStore()
+
+
+def is_series(obj):
+    """判断是否为服务端序列引用"""
+    return isinstance(obj, dict) and obj.get(ARRAY_MARKER) == 'series'
+
+
+def is_encoded(obj):
+    """判断是否为编码对象"""
+    return isinstance(obj, dict) and ARRAY_MARKER in obj
+
+
+def decode_array(obj, dtype=np.float64):
+    """
+    把编码对象（或普通列表/数组）还原为 numpy 数组
+    
+    Args:
+        obj: 编码对象、列表或 numpy 数组
+        dtype: 输出数据类型
+    
+    Returns:
+        np.ndarray
+    """
+    if not is_encoded(obj):
+        return np.asarray(obj, dtype=dtype)
+    
+    kind = obj[ARRAY_MARKER]
+    if kind == 'series':
+        return series_store.get(obj).astype(dtype, copy=False)
+    if kind == 'linear':
+        return (obj['start'] + np.arange(obj['length']) * obj['step']).astype(dtype, copy=False)
+    
+    if kind != 'base64' or obj.get('dtype') not in TRANSPORT_DTYPES:
+        raise ValueError(f'无法解码的数组格式: {kind}')
+    
+    原始 = np.frombuffer(base64.b64decode(obj['data']), dtype=np.dtype(obj['dtype']).newbyteorder('<'))
+    数组 = 原始.astype(dtype)
+    scale = obj.get('scale', 1.0)
+    offset = obj.get('offset', 0.0)
+    if scale != 1.0:
+        数组 *= scale
+    if offset != 0.0:
+        数组 += offset
+    return 数组
+
+
+def decode_codes(obj):
+    """
+    从 ADC 码值编码对象（见 encode_codes）中取出码值和换算系数
+    
+    Returns:
+        dict: {"codes", "y_increment", "y_origin", "y_reference"}，
+              电压 = (codes - y_origin - y_reference) * y_increment；
+              obj 不是码值编码时返回 None
+    """
+    if not is_encoded(obj) or obj[ARRAY_MARKER] != 'base64' or obj.get('dtype') != 'int16':
+        return None
+    scale = obj.get('scale', 1.0)
+    if not scale:
+        return None
+    return {
+        'codes': np.frombuffer(base64.b64decode(obj['data']), dtype=np.dtype('int16').newbyteorder('<')),
+        'y_increment': float(scale),
+        'y_origin': -float(obj.get('offset', 0.0)) / scale,
+        'y_reference': 0.0
+    }
+
+
+def encode_fields(data, keys, dtype='float32'):
+    """
+    返回 data 的浅拷贝，其中 keys 对应的数组字段被编码
+    
+    已编码或不存在的字段保持不变，等间隔的时间轴可预先用 encode_linear 编码
+    """
+    结果 = dict(data)
+    for key in keys:
+        value = 结果.get(key)
+        if value is None or is_encoded(value):
+            continue
+        结果[key] = encode_array(value, dtype=dtype)
+    return 结果
+
+
+def encode_waveform(waveform):
+    """
+    把 RawWaveform 编码为与 to_dict() 字段一致的二进制字典
+    
+    时间轴按等间隔编码，电压直接传 ADC 码值（无损、每点 2 字节）
+    """
+    y_increment = waveform.y_increment
+    结果 = {
+        "time": encode_linear(
+            waveform.x_origin + waveform.first_index * waveform.x_increment,
+            waveform.x_increment,
+            waveform.points
+        ),
+        "voltage": encode_codes(
+            waveform.codes,
+            y_increment,
+            -(waveform.y_origin + waveform.y_reference) * y_increment
+        ),
+        "vScale": waveform.v_scale,
+        "vOffset": waveform.v_offset,
+        "hScale": waveform.h_scale,
+        "points": waveform.points,
+    }
+    if waveform.memory_depth is not None:
+        结果["memoryDepth"] = waveform.memory_depth
+    结果["sample_rate"] = waveform.sample_rate
+    return 结果
+
+
+def payload_size(obj):
+    """
+    估算对象序列化为 JSON 后的字节数
+    
+    base64 字符串按长度精确计算；超长数值列表按前 SIZE_SAMPLE_LENGTH 个元素外推，
+    避免为统计而把旧格式的大列表完整序列化一遍
+    """
+    if isinstance(obj, str):
+        return len(obj) + 2
+    if isinstance(obj, dict):
+        return 2 + sum(len(str(k)) + 3 + payload_size(v) + 1 for k, v in obj.items())
+    if isinstance(obj, (list, tuple)):
+        if len(obj) > SIZE_SAMPLE_LENGTH:
+            样本 = payload_size(list(obj[:SIZE_SAMPLE_LENGTH]))
+            return int(样本 * len(obj) / SIZE_SAMPLE_LENGTH)
+        return 2 + sum(payload_size(v) + 1 for v in obj)
+    if isinstance(obj, np.ndarray):
+        return payload_size(obj.tolist()) if obj.size <= SIZE_SAMPLE_LENGTH else int(
+            payload_size(obj[:SIZE_SAMPLE_LENGTH].tolist()) * obj.size / SIZE_SAMPLE_LENGTH)
+    try:
+        return len(json.dumps(obj, default=str))
+    except (TypeError, ValueError):
+        return len(str(obj))
+
+
+class TransportStats:
+    """按 API 名称累计调用次数、收发字节数和耗时（线程安全）"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+    
+    def record(self, name, bytes_in, bytes_out, elapsed_ms):
+        with self._lock:
+            项 = self._stats.setdefault(name, {
+                'calls': 0, 'bytes_in': 0, 'bytes_out': 0, 'total_ms': 0.0,
+                'last_bytes_in': 0, 'last_bytes_out': 0, 'last_ms': 0.0
+            })
+            项['calls'] += 1
+            项['bytes_in'] += bytes_in
+            项['bytes_out'] += bytes_out
+            项['total_ms'] += elapsed_ms
+            项['last_bytes_in'] = bytes_in
+            项['last_bytes_out'] = bytes_out
+            项['last_ms'] = elapsed_ms
+    
+    def summary(self):
+        """返回每个 API 的统计（含平均值）"""
+        with self._lock:
+            结果 = {}
+            for name, 项 in self._stats.items():
+                次数 = max(项['calls'], 1)
+                结果[name] = {
+                    **项,
+                    'avg_bytes_in': 项['bytes_in'] / 次数,
+                    'avg_bytes_out': 项['bytes_out'] / 次数,
+                    'avg_ms': 项['total_ms'] / 次数
+                }
+            return 结果
+    
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+
+# 全局传输统计（WebAPI 各方法共用）
+transport_stats = TransportStats()
+
+
+def measure_transport(func):
+    """
+    WebAPI 方法装饰器：记录请求/响应的估算字节数和 Python 端耗时
+    """
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        开始 = time.perf_counter()
+        结果 = func(self, *args, **kwargs)
+        耗时 = (time.perf_counter() - 开始) * 1000
+        transport_stats.record(
+            func.__name__,
+            payload_size(list(args)) + payload_size(kwargs),
+            payload_size(结果),
+            耗时
+        )
+        return 结果
+    return wrapper
@@ -0,0 +1,163 @@
+"""
+SQLite 连接池模块
+data/experiments.db 由标定模块（ExperimentDataManager）和应力场模块（FieldDatabaseManager）共用，
+pywebview 的每次 API 调用都在独立的工作线程中执行，这里统一管理连接：
+- 每个线程使用自己的连接（不在线程之间共享同一个连接）
+- 线程结束后连接归还空闲队列，供后续 API 调用复用（不必每次重新打开、重新建表）
+- 所有连接启用 WAL 日志和忙等待超时，读写并发时不再直接报 "database is locked"
+- 建表、迁移等初始化在每个进程中只执行一次
+
+用法:
+    pool = get_pool('data/experiments.db')
+    pool.run_once('schema', 初始化函数)   # 初始化函数(conn)
+    conn = pool.connection()             # 当前线程的连接
+"""
+
+import atexit
+import os
+import sqlite3
+import threading
+import weakref
+
+
+# 忙等待超时（毫秒）：其他连接持有写锁时最多等待的时间
+BUSY_TIMEOUT_MS = 5000
+
+# 空闲队列中最多保留的连接数（超出时直接关闭）
+MAX_IDLE_CONNECTIONS = 4
+
+
+class _ThreadSlot:
+    """线程局部的连接占位：线程结束、占位被回收时把连接归还连接池"""
+    
+    def __init__(self, pool, conn):
+        self.conn = conn
+        weakref.finalize(self, pool._release, conn)
+
+
+class ConnectionPool:
+    """单个数据库文件的连接池（线程安全）"""
+    
+    def __init__(self, db_path, row_factory=None, busy_timeout_ms=BUSY_TIMEOUT_MS,
+                 max_idle=MAX_IDLE_CONNECTIONS):
+        self.db_path = db_path
+        self.row_factory = row_factory
+        self.busy_timeout_ms = busy_timeout_ms
+        self.max_idle = max_idle
+        self._lock = threading.Lock()
+        self._init_lock = threading.RLock()
+        self._local = threading.local()
+        self._idle = []
+        self._all = []  # 所有未关闭的连接（使用中和空闲）
+        self._initialized = set()
+        self._closed = False
+    
+    def _open(self):
+        """打开新连接并设置 WAL、同步级别和忙等待超时"""
+        # 连接可能在归还后被其他线程复用，所以关闭同线程检查（同一时刻只属于一个线程）
+        conn = sqlite3.connect(self.db_path, timeout=self.busy_timeout_ms / 1000, check_same_thread=False)
+        conn.execute(f'PRAGMA busy_timeout={int(self.busy_timeout_ms)}')
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        if self.row_factory is not None:
+            conn.row_factory = self.row_factory
+        return conn
+    
+    def connection(self):
+        """获取当前线程的连接（首次调用时从空闲队列取出或新建）"""
+        slot = getattr(self._local, 'slot', None)
+        if slot is not None:
+            return slot.conn
+        
+        with self._lock:
+            if self._closed:
+                raise sqlite3.ProgrammingError(f'连接池已关闭: {self.db_path}')
+            conn = self._idle.pop() if self._idle else None
+        if conn is None:
+            conn = self._open()
+            with self._lock:
+                self._all.append(conn)
+        
+        self._local.slot = _ThreadSlot(self, conn)
+        return conn
+    
+    def _release(self, conn):
+        """归还连接：回滚线程遗留的未提交事务后放回空闲队列"""
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            return
+        with self._lock:
+            if not self._closed and len(self._idle) < self.max_idle:
+                self._idle.append(conn)
+                return
+            if conn in self._all:
+                self._all.remove(conn)
+        conn.close()
+    
+    def run_once(self, name, func):
+        """
+        每个进程只执行一次的初始化（建表、迁移、清理等）
+        
+        Args:
+            name: 初始化名称（同一连接池内唯一）
+            func: 初始化函数 func(conn)
+        
+        Returns:
+            bool: 本次是否执行了初始化
+        """
+        # 初始化期间持有锁，其他线程等待初始化完成后再使用数据库
+        with self._init_lock:
+            if name in self._initialized:
+                return False
+            func(self.connection())
+            self._initialized.add(name)
+            return True
+    
+    def close_all(self):
+        """关闭所有连接（程序退出时调用）"""
+        with self._lock:
+            self._closed = True
+            self._idle.clear()
+            conns = list(self._all)
+            self._all.clear()
+        for conn in conns:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+
+
+# 连接池注册表：(绝对路径, row_factory) -> ConnectionPool
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path, row_factory=None):
+    """
+    获取数据库文件的连接池（同一文件、同一 row_factory 共用一个连接池）
+    
+    Args:
+        db_path: 数据库文件路径
+        row_factory: 连接的 row_factory（如 sqlite3.Row），None 表示返回元组
+    """
+    key = (os.path.abspath(db_path), row_factory)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None or pool._closed:
+            pool = ConnectionPool(db_path, row_factory)
+            _pools[key] = pool
+        return pool
+
+
+def close_all_pools():
+    """关闭所有连接池"""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close_all()
+
+
+atexit.register(close_all_pools)
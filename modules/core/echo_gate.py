@@ -0,0 +1,124 @@
+"""
+回波门控模块
+在互相关之前检测目标回波并截取带余量的时间窗口，
+去掉始波（initial bang）和无关噪声，缩短 FFT 长度并提高峰值插值精度
+"""
+
+import numpy as np
+
+
+# 默认门控配置
+DEFAULT_GATE_CONFIG = {
+    'enabled': False,         # 默认关闭（保持向后兼容）
+    'method': 'envelope',     # 'envelope'（Hilbert包络）、'threshold'（阈值穿越）、'manual'（手动时间窗）
+    'threshold_ratio': 0.3,   # 相对于最大幅值的阈值比例
+    'skip_us': 0.0,           # 从波形起点跳过的时间（微秒），用于屏蔽始波
+    'pad_us': 3.0,            # 回波两侧保留的余量（微秒），须大于最大声时差
+    'start_us': None,         # 手动模式：门控起始时间（微秒，示波器时间轴）
+    'end_us': None            # 手动模式：门控结束时间（微秒，示波器时间轴）
+}
+
+
+def detect_echo_gate(signal, sample_rate, config=None):
+    """
+    检测目标回波并给出门控索引范围
+    
+    Args:
+        signal: 输入信号数组
+        sample_rate: 采样率 (Hz)
+        config: 门控配置（缺省项使用 DEFAULT_GATE_CONFIG）
+    
+    Returns:
+        dict: {
+            'success': bool,
+            'start_index': int,  # 门控起始索引（含余量）
+            'stop_index': int,   # 门控结束索引（不含，含余量）
+            'peak_index': int,   # 回波峰值索引
+            'message': str       # 错误信息（如果失败）
+        }
+    
+    算法说明：
+        - envelope: 计算 Hilbert 包络，取峰值两侧连续高于阈值的区间
+        - threshold: 取 |x| 第一次与最后一次超过阈值的区间
+        两种方法都会在区间两侧各加 pad_us 的余量
+    """
+    try:
+        from scipy.signal import hilbert
+        from scipy.fft import next_fast_len
+        
+        cfg = {**DEFAULT_GATE_CONFIG, **(config or {})}
+        
+        x = np.asarray(signal, dtype=float)
+        n = len(x)
+        if n < 2 or sample_rate <= 0:
+            return {'success': False, 'message': '信号过短或采样率无效'}
+        
+        skip = min(max(int(round(cfg['skip_us'] * 1e-6 * sample_rate)), 0), n - 1)
+        pad = max(int(round(cfg['pad_us'] * 1e-6 * sample_rate)), 0)
+        
+        segment = x[skip:] - np.mean(x[skip:])
+        
+        if cfg['method'] == 'threshold':
+            amplitude = np.abs(segment)
+        else:
+            # 补零到快速长度计算解析信号，再截回原长度
+            amplitude = np.abs(hilbert(segment, N=next_fast_len(len(segment))))[:len(segment)]
+        
+        peak = int(np.argmax(amplitude))
+        level = cfg['threshold_ratio'] * amplitude[peak]
+        if level <= 0:
+            return {'success': False, 'message': '信号幅值为零，无法检测回波'}
+        
+        above = amplitude >= level
+        
+        if cfg['method'] == 'threshold':
+            crossings = np.flatnonzero(above)
+            lo, hi = crossings[0], crossings[-1] + 1
+        else:
+            # 峰值两侧连续高于阈值的区间
+            left_below = np.flatnonzero(~above[:peak])
+            right_below = np.flatnonzero(~above[peak:])
+            lo = left_below[-1] + 1 if len(left_below) > 0 else 0
+            hi = peak + right_below[0] if len(right_below) > 0 else len(segment)
+        
+        return {
+            'success': True,
+            'start_index': int(max(0, skip + lo - pad)),
+            'stop_index': int(min(n, skip + hi + pad)),
+            'peak_index': int(skip + peak)
+        }
+    except Exception as e:
+        return {'success': False, 'message': f'回波检测失败: {str(e)}'}
+
+
+def get_gate_time_window(time_array, signal, sample_rate, config=None):
+    """
+    根据门控配置计算时间窗口
+    
+    Args:
+        time_array: 时间数组（秒）
+        signal: 信号数组（自动检测时使用）
+        sample_rate: 采样率 (Hz)
+        config: 门控配置
+    
+    Returns:
+        tuple or None: (t_start, t_end) 单位秒；门控未启用或检测失败时返回 None
+    """
+    cfg = {**DEFAULT_GATE_CONFIG, **(config or {})}
+    
+    if not cfg.get('enabled', False):
+        return None
+    
+    if cfg['method'] == 'manual':
+        if cfg.get('start_us') is None or cfg.get('end_us') is None:
+            return None
+        return (cfg['start_us'] * 1e-6, cfg['end_us'] * 1e-6)
+    
+    if len(time_array) == 0:
+        return None
+    
+    result = detect_echo_gate(signal, sample_rate, cfg)
+    if not result['success']:
+        return None
+    
+    return (float(time_array[result['start_index']]), float(time_array[result['stop_index'] - 1]))
@@ -3,9 +3,149 @@
 负责设备连接、基础SCPI命令和波形数据获取
 """
 
+import os
+import time
+import threading
 import pyvisa
 import numpy as np
 
+from .simulated_scope import SIMULATED_ADDRESS, SimulatedOscilloscope, is_simulated_address
+
+
+# RAW模式单次 :WAV:DATA? 读取的最大点数
+RAW_BLOCK_SIZE = 250000
+
+# NORM模式屏幕点数
+NORM_POINTS = 1200
+
+# 设置该环境变量后，搜索设备会列出模拟示波器地址
+SIMULATOR_ENV_VAR = 'OSC_SIMULATOR'
+
+# 设置缓存有效期（秒）：程序内的设置方法会立即使缓存失效，
+# 有效期只用于兜底发现面板旋钮等外部修改；None 表示永不过期
+SETTINGS_CACHE_TTL = 1.0
+
+
+def _解析块头(原始数据):
+    """
+    解析IEEE-488.2定长块头 #N<长度><数据>
+    
+    Returns:
+        tuple: (头部长度, 数据字节数)
+    """
+    位数 = int(chr(原始数据[1]))
+    头部长度 = 2 + 位数
+    字节数 = int(原始数据[2:头部长度]) if 位数 > 0 else len(原始数据) - 头部长度 - 1
+    return 头部长度, 字节数
+
+
+class _LockedResource:
+    """
+    给 VISA 资源的每次读写加锁
+    
+    后台采集线程与 Web API 线程共用同一个会话，单条命令由这里保证原子性；
+    需要连续多条命令（如 :WAV:DATA? + read_raw）的操作再持有同一把可重入锁
+    """
+    
+    def __init__(self, resource, lock):
+        self._resource = resource
+        self._lock = lock
+    
+    def write(self, command):
+        with self._lock:
+            return self._resource.write(command)
+    
+    def query(self, command):
+        with self._lock:
+            return self._resource.query(command)
+    
+    def read_raw(self, *args, **kwargs):
+        with self._lock:
+            return self._resource.read_raw(*args, **kwargs)
+    
+    def close(self):
+        with self._lock:
+            return self._resource.close()
+    
+    def __getattr__(self, name):
+        return getattr(self._resource, name)
+
+
+class RawWaveform:
+    """
+    numpy 存储的示波器波形
+    
+    只保存 ADC 原始码值和前导信息，电压与时间轴在首次访问时计算并缓存，
+    to_dict() 生成与旧接口一致的列表格式（Web 层使用）
+    """
+    
+    def __init__(self, codes, x_increment, x_origin, first_index=0,
+                 y_increment=1.0, y_origin=0.0, y_reference=0.0,
+                 v_scale=None, v_offset=None, h_scale=None, memory_depth=None):
+        self.codes = codes
+        self.x_increment = x_increment
+        self.x_origin = x_origin
+        self.first_index = first_index  # 第一个点在采集存储器中的索引（0起始）
+        self.y_increment = y_increment
+        self.y_origin = y_origin
+        self.y_reference = y_reference
+        self.v_scale = v_scale
+        self.v_offset = v_offset
+        self.h_scale = h_scale
+        self.memory_depth = memory_depth
+        self._voltage = None
+        self._time = None
+    
+    def __len__(self):
+        return len(self.codes)
+    
+    @property
+    def points(self):
+        return len(self.codes)
+    
+    @property
+    def sample_rate(self):
+        return 1.0 / self.x_increment if self.x_increment > 0 else 1e9
+    
+    @property
+    def voltage(self):
+        """电压数组 (V)，首次访问时由码值换算"""
+        if self._voltage is None:
+            self._voltage = self.fill_voltage(np.empty(len(self.codes), dtype=np.float64))
+        return self._voltage
+    
+    def fill_voltage(self, out):
+        """把电压换算结果写入预分配数组 out（长度等于点数），返回 out"""
+        # 与 (码值 - y起点 - y参考) * y增量 的运算顺序一致，原地计算不产生临时数组
+        np.subtract(self.codes, self.y_origin, out=out)
+        out -= self.y_reference
+        out *= self.y_increment
+        return out
+    
+    @property
+    def time(self):
+        """时间数组 (s)，由 x增量/x起点 按需生成"""
+        if self._time is None:
+            self._time = self.x_origin + np.arange(
+                self.first_index, self.first_index + len(self.codes)
+            ) * self.x_increment
+        return self._time
+    
+    def to_dict(self):
+        """转换为旧接口的字典格式（time/voltage 为列表）"""
+        数据 = {
+            "time": self.time.tolist(),
+            "voltage": self.voltage.tolist(),
+            "vScale": self.v_scale,
+            "vOffset": self.v_offset,
+            "hScale": self.h_scale,
+            "points": self.points,
+        }
+        if self.memory_depth is not None:
+            数据["memoryDepth"] = self.memory_depth
+        数据["sample_rate"] = self.sample_rate  # 添加采样率
+        return 数据
+
 
 class OscilloscopeBase:
     """示波器通信基础类"""
@@ -14,6 +154,63 @@ class OscilloscopeBase:
         self.rm = None
         self.示波器 = None
         self.已连接 = False
+        
+        # 设置缓存：查询命令 -> 返回字符串（通道档位、时基、前导信息等）
+        self.设置缓存有效期 = SETTINGS_CACHE_TTL
+        self._设置缓存 = {}
+        self._缓存时间 = None
+        self._波形设置 = None  # 最近一次写入的 (通道, 模式, 格式)
+        
+        # 通信锁：后台采集线程和 Web API 线程共用一个 VISA 会话
+        self.通信锁 = threading.RLock()
+        
+        # 设置版本号：每次设置变化时递增，后台采集据此丢弃变化前的帧
+        self.设置版本 = 0
+    
+    # ==================== 设置缓存 ====================
+    
+    def 清除设置缓存(self):
+        """清空所有缓存的设置（下次读取时重新查询示波器）"""
+        with self.通信锁:
+            self._设置缓存.clear()
+            self._缓存时间 = None
+            self._波形设置 = None
+            self.设置版本 += 1
+    
+    def _使缓存失效(self, *命令前缀):
+        """删除以指定前缀开头的缓存项，前导信息总是一并失效"""
+        with self.通信锁:
+            self.设置版本 += 1
+            for 命令 in list(self._设置缓存):
+                if 命令 == ':WAV:PRE?' or 命令.startswith(命令前缀):
+                    del self._设置缓存[命令]
+    
+    def 查询设置(self, 命令):
+        """带缓存的 SCPI 设置查询，返回去掉首尾空白的字符串（缓存由后台采集线程和 Web API 线程共用，持有通信锁）"""
+        with self.通信锁:
+            if self._缓存时间 is not None and self.设置缓存有效期 is not None:
+                if time.monotonic() - self._缓存时间 > self.设置缓存有效期:
+                    self._设置缓存.clear()
+            
+            if 命令 not in self._设置缓存:
+                if not self._设置缓存:
+                    self._缓存时间 = time.monotonic()
+                self._设置缓存[命令] = self.示波器.query(命令).strip()
+            return self._设置缓存[命令]
+    
+    def _设置波形读取(self, 通道, 模式, 格式):
+        """写入 :WAV:SOUR/MODE/FORM，与上次相同则跳过"""
+        状态 = (通道, 模式, 格式)
+        if self._波形设置 != 状态:
+            self.示波器.write(f':WAV:SOUR CHAN{通道}')
+            self.示波器.write(f':WAV:MODE {模式}')
+            self.示波器.write(f':WAV:FORM {格式}')
+            if 模式 == 'NORM':
+                # RAW分块读取会修改读取范围，切回NORM时恢复整屏
+                self.示波器.write(':WAV:STAR 1')
+                self.示波器.write(f':WAV:STOP {NORM_POINTS}')
+            self._波形设置 = 状态
+            self._设置缓存.pop(':WAV:PRE?', None)
     
     def 搜索设备(self):
         """搜索可用的VISA设备"""
@@ -22,6 +219,8 @@ class OscilloscopeBase:
                 self.rm = pyvisa.ResourceManager()
             
             设备列表 = list(self.rm.list_resources())
+            if os.environ.get(SIMULATOR_ENV_VAR):
+                设备列表.append(SIMULATED_ADDRESS)
             if 设备列表:
                 return {"success": True, "devices": 设备列表}
             else:
@@ -32,6 +231,14 @@ class OscilloscopeBase:
     def 连接示波器(self, 设备地址=None):
         """连接到指定的示波器"""
         try:
+            # 模拟示波器（SIM:: 地址）不经过 VISA 库
+            if is_simulated_address(设备地址):
+                self.示波器 = _LockedResource(SimulatedOscilloscope(设备地址), self.通信锁)
+                self.清除设置缓存()
+                self.示波器.query('*IDN?')
+                self.已连接 = True
+                return {"success": True, "message": "模拟示波器连接成功"}
+            
             if self.rm is None:
                 self.rm = pyvisa.ResourceManager()
             
@@ -41,8 +248,10 @@ class OscilloscopeBase:
                     return {"success": False, "message": "未找到任何VISA设备"}
                 设备地址 = 设备列表[0]
             
-            self.示波器 = self.rm.open_resource(设备地址)
-            self.示波器.timeout = 5000
+            资源 = self.rm.open_resource(设备地址)
+            资源.timeout = 5000
+            self.示波器 = _LockedResource(资源, self.通信锁)
+            self.清除设置缓存()
             
             设备信息 = self.示波器.query('*IDN?')
             self.已连接 = True
@@ -59,6 +268,7 @@ class OscilloscopeBase:
                 self.示波器.close()
                 self.示波器 = None
             self.已连接 = False
+            self.清除设置缓存()
             return {"success": True, "message": "已断开连接"}
         except Exception as e:
             return {"success": False, "message": f"断开失败: {str(e)}"}
@@ -67,60 +277,66 @@ class OscilloscopeBase:
         """
         获取NORM模式波形数据（用于实时显示，1000点）
         """
+        结果 = self.采集NORM波形(通道)
+        if not 结果['success']:
+            return 结果
+        
+        return {"success": True, "data": 结果['waveform'].to_dict()}
+    
+    def 采集NORM波形(self, 通道=1):
+        """
+        读取NORM模式屏幕波形（8bit），返回 numpy 波形对象
+        
+        Returns:
+            dict: {"success": bool, "waveform": RawWaveform, "message": str}
+        """
         try:
             if not self.已连接 or self.示波器 is None:
                 return {"success": False, "message": "示波器未连接"}
             
-            # 获取通道档位和偏移
-            垂直档位 = float(self.示波器.query(f':CHAN{通道}:SCAL?').strip())
-            垂直偏移 = float(self.示波器.query(f':CHAN{通道}:OFFS?').strip())
-            时基档位 = float(self.示波器.query(':TIM:MAIN:SCAL?').strip())
-            
-            # 设置波形源和模式
-            self.示波器.write(f':WAV:SOUR CHAN{通道}')
-            self.示波器.write(':WAV:MODE NORM')
-            self.示波器.write(':WAV:FORM BYTE')
-            
-            # 获取波形前导信息
-            前导信息 = self.示波器.query(':WAV:PRE?').split(',')
-            
-            点数 = int(前导信息[2])
-            x增量 = float(前导信息[4])
-            x起点 = float(前导信息[5])
-            y增量 = float(前导信息[7])
-            y起点 = float(前导信息[8])
-            y参考 = float(前导信息[9])
-            
-            # 读取波形数据
-            self.示波器.write(':WAV:DATA?')
-            原始数据 = self.示波器.read_raw()
+            with self.通信锁:
+                # 获取通道档位和偏移（稳定状态下全部来自缓存）
+                垂直档位 = float(self.查询设置(f':CHAN{通道}:SCAL?'))
+                垂直偏移 = float(self.查询设置(f':CHAN{通道}:OFFS?'))
+                时基档位 = float(self.查询设置(':TIM:MAIN:SCAL?'))
+                
+                # 设置波形源和模式（与上次相同时不重复写入）
+                self._设置波形读取(通道, 'NORM', 'BYTE')
+                
+                # 获取波形前导信息
+                前导信息 = self.查询设置(':WAV:PRE?').split(',')
+                
+                x增量 = float(前导信息[4])
+                x起点 = float(前导信息[5])
+                y增量 = float(前导信息[7])
+                y起点 = float(前导信息[8])
+                y参考 = float(前导信息[9])
+                
+                # 读取波形数据
+                self.示波器.write(':WAV:DATA?')
+                原始数据 = self.示波器.read_raw()
+                
+                # 获取存储深度
+                存储深度 = self.查询设置(':ACQ:MEMD?')
             
             # 解析数据
             头部长度 = 2 + int(chr(原始数据[1]))
             波形数据 = np.frombuffer(原始数据[头部长度:-1], dtype=np.uint8)
             
-            # 转换为电压值
-            电压 = (波形数据 - y起点 - y参考) * y增量
-            时间 = np.arange(len(电压)) * x增量 + x起点
-            
-            # 获取存储深度
-            存储深度 = self.示波器.query(':ACQ:MEMD?').strip()
-            
-            # 计算采样率
-            采样率 = 1.0 / x增量 if x增量 > 0 else 1e9
-            
-            数据 = {
-                "time": 时间.tolist(),
-                "voltage": 电压.tolist(),
-                "vScale": 垂直档位,
-                "vOffset": 垂直偏移,
-                "hScale": 时基档位,
-                "points": len(电压),
-                "memoryDepth": 存储深度,
-                "sample_rate": 采样率  # 添加采样率
-            }
-            
-            return {"success": True, "data": 数据}
+            波形 = RawWaveform(
+                codes=波形数据,
+                x_increment=x增量,
+                x_origin=x起点,
+                y_increment=y增量,
+                y_origin=y起点,
+                y_reference=y参考,
+                v_scale=垂直档位,
+                v_offset=垂直偏移,
+                h_scale=时基档位,
+                memory_depth=存储深度
+            )
+            
+            return {"success": True, "waveform": 波形}
         except Exception as e:
             return {"success": False, "message": f"获取数据失败: {str(e)}"}
     
@@ -128,7 +344,32 @@ class OscilloscopeBase:
         """
         使用RAW模式读取屏幕显示范围的高密度波形数据（12bit精度）
         只保存屏幕显示范围对应的采集存储器数据
+        
+        返回值为可直接 JSON 序列化的列表格式（Web 层使用），
+        后端内部请使用 采集RAW波形_屏幕范围 获取 numpy 波形对象
+        """
+        结果 = self.采集RAW波形_屏幕范围(通道)
+        if not 结果['success']:
+            return 结果
+        
+        return {"success": True, "data": 结果['waveform'].to_dict()}
+    
+    def 采集RAW波形_屏幕范围(self, 通道=1):
         """
+        流式读取屏幕显示范围的RAW模式波形（12bit精度）
+        
+        按最终点数预分配一个 uint16 缓冲区，逐块把 :WAV:DATA? 的数据
+        直接解析写入对应切片（不拼接、不转列表），时间轴和电压按需计算
+        
+        Returns:
+            dict: {"success": bool, "waveform": RawWaveform, "message": str}
+        """
+        # 整个 STOP → 分块读取 → RUN 过程独占通信，避免与后台采集交错
+        with self.通信锁:
+            return self._采集RAW波形(通道)
+    
+    def _采集RAW波形(self, 通道):
+        """采集RAW波形_屏幕范围 的实现（调用方持有通信锁）"""
         try:
             if not self.已连接 or self.示波器 is None:
                 return {"success": False, "message": "示波器未连接"}
@@ -136,22 +377,20 @@ class OscilloscopeBase:
             # RAW模式必须在STOP状态下读取
             self.示波器.write(':STOP')
             
-            import time
             time.sleep(0.2)
             
             # 获取参数
-            垂直档位 = float(self.示波器.query(f':CHAN{通道}:SCAL?').strip())
-            垂直偏移 = float(self.示波器.query(f':CHAN{通道}:OFFS?').strip())
-            时基档位 = float(self.示波器.query(':TIM:MAIN:SCAL?').strip())
-            水平偏移 = float(self.示波器.query(':TIM:MAIN:OFFS?').strip())
+            垂直档位 = float(self.查询设置(f':CHAN{通道}:SCAL?'))
+            垂直偏移 = float(self.查询设置(f':CHAN{通道}:OFFS?'))
+            时基档位 = float(self.查询设置(':TIM:MAIN:SCAL?'))
+            水平偏移 = float(self.查询设置(':TIM:MAIN:OFFS?'))
             
             # 设置波形源和模式
-            self.示波器.write(f':WAV:SOUR CHAN{通道}')
-            self.示波器.write(':WAV:MODE RAW')
-            self.示波器.write(':WAV:FORM WORD')  # 使用WORD格式获取12bit精度
+            self._设置波形读取(通道, 'RAW', 'WORD')  # 使用WORD格式获取12bit精度
             
-            # 获取波形前导信息
-            前导信息 = self.示波器.query(':WAV:PRE?').split(',')
+            # 获取波形前导信息（停止后的存储器状态，始终重新查询）
+            self._设置缓存.pop(':WAV:PRE?', None)
+            前导信息 = self.查询设置(':WAV:PRE?').split(',')
             总点数 = int(前导信息[2])
             x增量 = float(前导信息[4])
             x起点 = float(前导信息[5])
@@ -178,55 +417,26 @@ class OscilloscopeBase:
             起始索引 = max(1, min(起始索引, 总点数))
             结束索引 = max(起始索引, min(结束索引, 总点数))
             
-            读取点数 = 结束索引 - 起始索引 + 1
-            
-            # 分块读取屏幕范围的数据
-            块大小 = 250000
-            所有波形数据 = []
-            
-            当前起点 = 起始索引
-            while 当前起点 <= 结束索引:
-                当前终点 = min(当前起点 + 块大小 - 1, 结束索引)
-                
-                self.示波器.write(f':WAV:STAR {当前起点}')
-                self.示波器.write(f':WAV:STOP {当前终点}')
-                
-                self.示波器.write(':WAV:DATA?')
-                原始数据 = self.示波器.read_raw()
-                
-                # 解析WORD格式数据（16bit小端序）
-                头部长度 = 2 + int(chr(原始数据[1]))
-                块数据 = np.frombuffer(原始数据[头部长度:-1], dtype='<u2')
-                所有波形数据.append(块数据)
-                
-                当前起点 = 当前终点 + 1
-            
-            # 合并所有数据
-            波形数据 = np.concatenate(所有波形数据)
-            
-            # 转换为电压值
-            电压 = (波形数据 - y起点 - y参考) * y增量
-            
-            # 计算对应的时间轴
-            时间 = 采集起点时间 + (np.arange(起始索引 - 1, 起始索引 - 1 + len(电压))) * x增量
-            
-            # 计算采样率
-            采样率 = 1.0 / x增量 if x增量 > 0 else 1e9
-            
-            数据 = {
-                "time": 时间.tolist(),
-                "voltage": 电压.tolist(),
-                "vScale": 垂直档位,
-                "vOffset": 垂直偏移,
-                "hScale": 时基档位,
-                "points": len(电压),
-                "sample_rate": 采样率  # 添加采样率
-            }
+            # 分块流式读取到预分配缓冲区
+            波形数据 = self._流式读取RAW数据(起始索引, 结束索引)
+            
+            波形 = RawWaveform(
+                codes=波形数据,
+                x_increment=x增量,
+                x_origin=采集起点时间,
+                first_index=起始索引 - 1,
+                y_increment=y增量,
+                y_origin=y起点,
+                y_reference=y参考,
+                v_scale=垂直档位,
+                v_offset=垂直偏移,
+                h_scale=时基档位
+            )
             
             # 恢复示波器运行
             self.示波器.write(':RUN')
             
-            return {"success": True, "data": 数据}
+            return {"success": True, "waveform": 波形}
             
         except Exception as e:
             try:
@@ -236,6 +446,40 @@ class OscilloscopeBase:
             
             return {"success": False, "message": f"RAW模式读取失败: {str(e)}"}
     
+    def _流式读取RAW数据(self, 起始索引, 结束索引, 块大小=RAW_BLOCK_SIZE):
+        """
+        分块读取采集存储器 [起始索引, 结束索引]（1起始，含两端）的 WORD 数据
+        
+        Returns:
+            np.ndarray: uint16 原始码值，长度为 结束索引 - 起始索引 + 1
+        """
+        读取点数 = 结束索引 - 起始索引 + 1
+        缓冲区 = np.empty(读取点数, dtype=np.uint16)
+        
+        已读点数 = 0
+        当前起点 = 起始索引
+        while 当前起点 <= 结束索引:
+            当前终点 = min(当前起点 + 块大小 - 1, 结束索引)
+            
+            self.示波器.write(f':WAV:STAR {当前起点}')
+            self.示波器.write(f':WAV:STOP {当前终点}')
+            
+            self.示波器.write(':WAV:DATA?')
+            原始数据 = self.示波器.read_raw()
+            
+            # 解析IEEE-488.2块头（#N + N位长度），用 offset 直接视图读取，避免切片复制
+            头部长度, 字节数 = _解析块头(原始数据)
+            块点数 = min(字节数 // 2, 读取点数 - 已读点数)
+            缓冲区[已读点数:已读点数 + 块点数] = np.frombuffer(
+                原始数据, dtype='<u2', count=块点数, offset=头部长度
+            )
+            已读点数 += 块点数
+            
+            当前起点 = 当前终点 + 1
+        
+        # 示波器返回点数少于请求时截掉未填充部分
+        return 缓冲区[:已读点数]
+    
     def 设置存储深度(self, 深度):
         """设置存储深度"""
         try:
@@ -243,6 +487,7 @@ class OscilloscopeBase:
                 return {"success": False, "message": "示波器未连接"}
             
             self.示波器.write(f':ACQ:MDEP {深度}')
+            self._使缓存失效(':ACQ:')
             return {"success": True, "message": f"存储深度已设置为 {深度}"}
         except Exception as e:
             return {"success": False, "message": f"设置失败: {str(e)}"}
@@ -254,6 +499,7 @@ class OscilloscopeBase:
                 return {"success": False, "message": "示波器未连接"}
             
             self.示波器.write(f':TIM:MAIN:SCAL {时基值}')
+            self._使缓存失效(':TIM:', ':ACQ:')
             return {"success": True, "message": f"时基已设置"}
         except Exception as e:
             return {"success": False, "message": f"设置失败: {str(e)}"}
@@ -265,6 +511,7 @@ class OscilloscopeBase:
                 return {"success": False, "message": "示波器未连接"}
             
             self.示波器.write(f':TIM:MAIN:OFFS {偏移量}')
+            self._使缓存失效(':TIM:MAIN:OFFS')
             return {"success": True, "message": f"水平位置已设置"}
         except Exception as e:
             return {"success": False, "message": f"设置失败: {str(e)}"}
@@ -275,7 +522,7 @@ class OscilloscopeBase:
             if not self.已连接 or self.示波器 is None:
                 return {"success": False, "message": "示波器未连接"}
             
-            偏移量 = float(self.示波器.query(':TIM:MAIN:OFFS?').strip())
+            偏移量 = float(self.查询设置(':TIM:MAIN:OFFS?'))
             return {"success": True, "offset": 偏移量}
         except Exception as e:
             return {"success": False, "message": f"查询失败: {str(e)}"}
@@ -287,6 +534,7 @@ class OscilloscopeBase:
                 return {"success": False, "message": "示波器未连接"}
             
             self.示波器.write(f':CHAN{通道}:OFFS {偏移量}')
+            self._使缓存失效(f':CHAN{通道}:OFFS')
             return {"success": True, "message": f"垂直位置已设置"}
         except Exception as e:
             return {"success": False, "message": f"设置失败: {str(e)}"}
@@ -297,9 +545,9 @@ class OscilloscopeBase:
             if not self.已连接 or self.示波器 is None:
                 return {"success": False, "message": "示波器未连接"}
             
-            采样率 = float(self.示波器.query(':ACQ:SRAT?').strip())
-            时基 = float(self.示波器.query(':TIM:MAIN:SCAL?').strip())
-            存储深度 = self.示波器.query(':ACQ:MEMD?').strip()
+            采样率 = float(self.查询设置(':ACQ:SRAT?'))
+            时基 = float(self.查询设置(':TIM:MAIN:SCAL?'))
+            存储深度 = self.查询设置(':ACQ:MEMD?')
             
             # 检测活动通道（有信号的通道）
             活动通道 = self.检测活动通道()
@@ -362,8 +610,8 @@ class OscilloscopeBase:
                 return {"success": False, "message": "示波器未连接"}
             
             self.示波器.write(':AUT')
-            import time
             time.sleep(1.5)
+            self.清除设置缓存()
             return {"success": True, "message": "自动设置完成"}
         except Exception as e:
             return {"success": False, "message": f"自动设置失败: {str(e)}"}
@@ -424,6 +672,7 @@ class OscilloscopeBase:
                 return {"success": False, "message": "示波器未连接"}
             
             self.示波器.write(f':CHAN{通道}:SCAL {灵敏度}')
+            self._使缓存失效(f':CHAN{通道}:SCAL')
             return {"success": True, "message": f"垂直灵敏度已设置为 {灵敏度} V/div"}
         except Exception as e:
             return {"success": False, "message": f"设置失败: {str(e)}"}
@@ -434,7 +683,7 @@ class OscilloscopeBase:
             if not self.已连接 or self.示波器 is None:
                 return {"success": False, "message": "示波器未连接"}
             
-            灵敏度 = float(self.示波器.query(f':CHAN{通道}:SCAL?').strip())
+            灵敏度 = float(self.查询设置(f':CHAN{通道}:SCAL?'))
             return {"success": True, "value": 灵敏度}
         except Exception as e:
             return {"success": False, "message": f"查询失败: {str(e)}"}
@@ -4,11 +4,24 @@
 整合自 WaveDealer 项目
 """
 
+import threading
 import numpy as np
 import pywt
+from functools import lru_cache
 
 
-def apply_wavelet_denoising(signal, wavelet='sym6', level=5, threshold_method='soft', threshold_mode='heursure'):
+# 带通滤波器设计缓存的最大组数（LRU 淘汰）
+BANDPASS_SOS_CACHE_SIZE = 32
+
+# 补零上采样估计器取峰值两侧的片段半宽（采样点）
+UPSAMPLE_HALF_WIDTH = 32
+
+# 片段 Tukey 窗的渐变比例（两端各 1/4 渐变到零，中间一半为 1）
+UPSAMPLE_TAPER = 0.5
+
+
+def apply_wavelet_denoising(signal, wavelet='sym6', level=5, threshold_method='soft', threshold_mode='heursure',
+                            exact_sure=True):
     """
     应用小波降噪
     
@@ -18,6 +31,8 @@ def apply_wavelet_denoising(signal, wavelet='sym6', level=5, threshold_method='s
         level: 分解层数
         threshold_method: 阈值方法 ('soft' 或 'hard')
         threshold_mode: 阈值模式 ('universal', 'heursure', 'minimax')
+        exact_sure: True 时在全部候选阈值上求 SURE 最小值；
+                    False 时沿用旧版约100个降采样候选阈值（兼容旧结果）
         
     Returns:
         dict: {'success': bool, 'denoised': array, 'threshold': float, 'sigma': float}
@@ -60,12 +75,11 @@ def apply_wavelet_denoising(signal, wavelet='sym6', level=5, threshold_method='s
             if threshold_mode == 'heursure':
                 # Heursure: 自适应选择 Universal 或 SURE 阈值
                 thr_universal = sigma * np.sqrt(2 * np.log(N))
-                thr_sure = _calculate_sure_threshold(detail_coeffs, sigma)
+                thr_sure, risk_sure = _search_sure_threshold(detail_coeffs, sigma, exact=exact_sure)
                 
                 # 计算两种阈值的风险
                 risk_universal = (N - 2 * np.sum(np.abs(detail_coeffs) < thr_universal) + 
                                 np.sum(np.minimum(np.abs(detail_coeffs), thr_universal)**2))
-                risk_sure = _calculate_sure_risk(detail_coeffs, thr_sure, sigma)
                 
                 # 选择风险更小的阈值
                 threshold = thr_sure if risk_sure < risk_universal else thr_universal
@@ -104,25 +118,178 @@ def apply_wavelet_denoising(signal, wavelet='sym6', level=5, threshold_method='s
         return {'success': False, 'message': f'小波降噪失败: {str(e)}'}
 
 
-def _calculate_sure_threshold(coeffs, sigma):
+def apply_wavelet_denoising_batch(signals, wavelet='sym6', level=5, threshold_method='soft',
+                                  threshold_mode='heursure', exact_sure=True):
+    """
+    批量小波降噪（多条等长波形一次处理）
+    
+    与 apply_wavelet_denoising 使用相同的阈值规则，但沿 axis=-1 做分解/重构，
+    每行、每层的噪声估计和阈值选择均以向量化方式完成。
+    
+    Args:
+        signals: 二维数组 (n_waveforms, n_samples)，一维输入视为单行
+        wavelet: 小波类型 (如 'db4', 'sym6', 'coif2')
+        level: 分解层数
+        threshold_method: 阈值方法 ('soft' 或 'hard')
+        threshold_mode: 阈值模式 ('universal', 'heursure', 'minimax')
+        exact_sure: 同 apply_wavelet_denoising
+        
+    Returns:
+        dict: {
+            'success': bool,
+            'denoised': ndarray (n_waveforms, n_samples),
+            'threshold': ndarray (n_waveforms,),  # 每行各层中的最大阈值
+            'sigma': ndarray (n_waveforms,)       # 每行各层中的最大噪声估计
+        }
+    """
+    try:
+        # 参数验证和默认值设置（与单条版本一致）
+        if not wavelet or wavelet == '' or wavelet is None:
+            wavelet = 'sym6'
+        
+        if not isinstance(level, int) or level < 1:
+            level = 5
+        
+        if threshold_method not in ['soft', 'hard']:
+            threshold_method = 'soft'
+        
+        if threshold_mode not in ['universal', 'heursure', 'minimax']:
+            threshold_mode = 'heursure'
+        
+        signals = np.atleast_2d(np.asarray(signals, dtype=float))
+        n_rows, n_samples = signals.shape
+        
+        coeffs = pywt.wavedec(signals, wavelet, level=level, axis=-1)
+        
+        coeffs_thresh = [coeffs[0]]  # 保留近似系数
+        threshold_used = np.zeros(n_rows)
+        sigma_used = np.zeros(n_rows)
+        
+        for i in range(1, len(coeffs)):
+            detail_coeffs = coeffs[i]
+            N = detail_coeffs.shape[1]
+            abs_coeffs = np.abs(detail_coeffs)
+            
+            # 每行估计该层的噪声标准差
+            sigma = np.median(abs_coeffs, axis=1) / 0.6745
+            sigma_used = np.maximum(sigma_used, sigma)
+            
+            if threshold_mode == 'heursure':
+                thr_universal = sigma * np.sqrt(2 * np.log(N))
+                thr_sure, risk_sure = _search_sure_threshold_rows(detail_coeffs, sigma, exact=exact_sure)
+                
+                risk_universal = (N - 2 * np.sum(abs_coeffs < thr_universal[:, np.newaxis], axis=1) +
+                                  np.sum(np.minimum(abs_coeffs, thr_universal[:, np.newaxis])**2, axis=1))
+                
+                threshold = np.where(risk_sure < risk_universal, thr_sure, thr_universal)
+            elif threshold_mode == 'minimax':
+                if N > 32:
+                    threshold = sigma * (0.3936 + 0.1829 * np.log2(N))
+                else:
+                    threshold = np.zeros(n_rows)
+            else:
+                threshold = sigma * np.sqrt(2 * np.log(N))
+            
+            # sigma 过小的行不做阈值处理（与单条版本的跳过逻辑一致）
+            skipped = sigma < 1e-10
+            threshold = np.where(skipped, 0.0, threshold)
+            threshold_used = np.maximum(threshold_used, threshold)
+            
+            with np.errstate(divide='ignore', invalid='ignore'):
+                thresholded = pywt.threshold(detail_coeffs, threshold[:, np.newaxis], mode=threshold_method)
+            thresholded[skipped] = detail_coeffs[skipped]
+            coeffs_thresh.append(thresholded)
+        
+        denoised = pywt.waverec(coeffs_thresh, wavelet, axis=-1)
+        
+        # 确保长度一致
+        if denoised.shape[1] > n_samples:
+            denoised = denoised[:, :n_samples]
+        elif denoised.shape[1] < n_samples:
+            denoised = np.pad(denoised, ((0, 0), (0, n_samples - denoised.shape[1])), mode='edge')
+        
+        return {
+            'success': True,
+            'denoised': denoised,
+            'threshold': threshold_used,
+            'sigma': sigma_used
+        }
+    except Exception as e:
+        return {'success': False, 'message': f'批量小波降噪失败: {str(e)}'}
+
+
+def _calculate_sure_threshold(coeffs, sigma, exact=True):
     """计算 SURE 阈值"""
-    N = len(coeffs)
-    abs_coeffs = np.abs(coeffs)
-    sorted_coeffs = np.sort(abs_coeffs)
+    return _search_sure_threshold(coeffs, sigma, exact=exact)[0]
+
+
+def _search_sure_threshold(coeffs, sigma, exact=True):
+    """
+    基于排序累加和的 SURE 阈值搜索
     
-    # 计算每个可能阈值的 SURE 风险
-    risks = []
-    thresholds = sorted_coeffs[::max(1, N//100)]
+    对 |coeffs| 排序后，以 sorted[k] 为阈值时：
+        小于阈值的个数 = 第一个等于 sorted[k] 的位置 left
+        sum(min(|c|, t)^2) = cumsum(sorted^2)[left] + (N - left) * t^2
+    因此一次 O(N log N) 排序即可得到所有候选阈值的精确风险，
+    与逐个调用 _calculate_sure_risk 的结果一致。
+    
+    Args:
+        coeffs: 细节系数数组
+        sigma: 噪声标准差估计
+        exact: True 使用全部 N 个候选阈值；
+               False 复现旧版降采样候选集 sorted[::max(1, N//100)]
+        
+    Returns:
+        tuple: (threshold, risk) - 风险最小的阈值及其 SURE 风险
+    """
+    if len(coeffs) == 0:
+        return 0.0, 0.0
     
-    for thr in thresholds:
-        risk = _calculate_sure_risk(coeffs, thr, sigma)
-        risks.append(risk)
+    thresholds, risks = _search_sure_threshold_rows(
+        np.asarray(coeffs)[np.newaxis, :], np.array([sigma]), exact=exact
+    )
+    return thresholds[0], risks[0]
+
+
+def _search_sure_threshold_rows(coeffs, sigmas, exact=True):
+    """
+    按行批量搜索 SURE 阈值（_search_sure_threshold 的二维版本）
     
-    if len(risks) > 0:
-        min_idx = np.argmin(risks)
-        return thresholds[min_idx]
+    Args:
+        coeffs: 细节系数二维数组 (n_rows, N)
+        sigmas: 每行的噪声标准差估计 (n_rows,)
+        exact: 同 _search_sure_threshold
+        
+    Returns:
+        tuple: (thresholds, risks) - 每行的最优阈值及其风险，形状均为 (n_rows,)
+    """
+    n_rows, N = coeffs.shape
+    
+    sorted_coeffs = np.sort(np.abs(coeffs), axis=1)
+    squared = sorted_coeffs ** 2
+    cumsum_squared = np.zeros((n_rows, N + 1))
+    np.cumsum(squared, axis=1, out=cumsum_squared[:, 1:])
+    
+    # 每个位置上第一个相同值的索引（即严格小于该值的元素个数），用于处理重复值
+    positions = np.arange(N)
+    is_first = np.ones((n_rows, N), dtype=bool)
+    is_first[:, 1:] = sorted_coeffs[:, 1:] != sorted_coeffs[:, :-1]
+    below_all = np.maximum.accumulate(np.where(is_first, positions, 0), axis=1)
+    
+    if exact:
+        candidates = positions
     else:
-        return sigma * np.sqrt(2 * np.log(N))
+        candidates = positions[::max(1, N // 100)]
+    
+    thresholds = sorted_coeffs[:, candidates]
+    below_thr = below_all[:, candidates]
+    cumsum_below = np.take_along_axis(cumsum_squared, below_thr, axis=1)
+    risks = (N - 2 * below_thr +
+             (cumsum_below + (N - below_thr) * squared[:, candidates]) / (sigmas[:, np.newaxis]**2 + 1e-10))
+    
+    rows = np.arange(n_rows)
+    min_idx = np.argmin(risks, axis=1)
+    return thresholds[rows, min_idx], risks[rows, min_idx]
 
 
 def _calculate_sure_risk(coeffs, threshold, sigma):
@@ -170,6 +337,96 @@ def calculate_cross_correlation(signal1, signal2):
 
 
 
+class BaselineCorrelator:
+    """
+    基准波形互相关器
+    
+    针对"一条基准波形 vs 多条测量波形"的场景：
+    - 基准波形（去均值后）的补零 FFT 按 (起点, 终点, FFT长度) 缓存，只计算一次
+    - FFT 长度取 scipy.fft.next_fast_len，避免质数长度导致的慢速 FFT
+    - 只返回 ±max_lag 窗口内的滞后值，补零长度只需 N + max_lag 而不是 2N-1
+    
+    结果与 calculate_cross_correlation(baseline, measurement) 在窗口内逐点一致。
+    """
+    
+    # 最多缓存的基准频谱个数（不同对齐区间/FFT长度）
+    SPECTRUM_CACHE_SIZE = 8
+    
+    def __init__(self, baseline, max_lag=None):
+        """
+        Args:
+            baseline: 基准信号数组
+            max_lag: 默认的最大滞后（采样点数），None 表示返回完整滞后范围
+        """
+        self.baseline = np.asarray(baseline, dtype=float)
+        self.max_lag = max_lag
+        self._spectrum_cache = {}
+        self._cache_lock = threading.Lock()  # 多线程共用同一基准时保护频谱缓存
+    
+    def _baseline_spectrum(self, start, stop, n_fft):
+        """获取基准区间 [start, stop) 去均值后的补零频谱（带缓存）"""
+        from scipy import fft as sp_fft
+        
+        key = (start, stop, n_fft)
+        with self._cache_lock:
+            spectrum = self._spectrum_cache.get(key)
+        if spectrum is None:
+            segment = self.baseline[start:stop]
+            spectrum = sp_fft.rfft(segment - np.mean(segment), n_fft)
+            
+            with self._cache_lock:
+                if len(self._spectrum_cache) >= self.SPECTRUM_CACHE_SIZE:
+                    self._spectrum_cache.pop(next(iter(self._spectrum_cache)))
+                self._spectrum_cache[key] = spectrum
+        
+        return spectrum
+    
+    def correlate(self, measurement, start=0, stop=None, max_lag=None):
+        """
+        计算基准区间与测量信号的互相关
+        
+        Args:
+            measurement: 测量信号数组
+            start: 基准信号起始索引（时域对齐后使用的区间）
+            stop: 基准信号结束索引（不含），None 表示到末尾
+            max_lag: 最大滞后（采样点数），None 时使用构造参数
+            
+        Returns:
+            tuple: (correlation, lags) - 与 calculate_cross_correlation 相同的约定，
+                   lag > 0 表示基准信号相对测量信号滞后
+        """
+        from scipy import fft as sp_fft
+        
+        if stop is None:
+            stop = len(self.baseline)
+        if max_lag is None:
+            max_lag = self.max_lag
+        
+        s2 = np.asarray(measurement, dtype=float)
+        n1 = stop - start
+        n2 = len(s2)
+        
+        # 窗口内的滞后范围
+        lag_min = -(n2 - 1)
+        lag_max = n1 - 1
+        if max_lag is not None:
+            lag_min = max(lag_min, -int(max_lag))
+            lag_max = min(lag_max, int(max_lag))
+        
+        # 循环互相关不发生混叠所需的最小长度
+        n_fft = sp_fft.next_fast_len(max(n1, n2) + max(-lag_min, lag_max), real=True)
+        
+        spectrum1 = self._baseline_spectrum(start, stop, n_fft)
+        spectrum2 = sp_fft.rfft(s2 - np.mean(s2), n_fft)
+        circular = sp_fft.irfft(spectrum1 * np.conj(spectrum2), n_fft)
+        
+        # 循环结果中负滞后位于末尾
+        lags = np.arange(lag_min, lag_max + 1)
+        correlation = circular[lags % n_fft]
+        
+        return correlation, lags
+
+
 def find_peak_with_parabolic_interpolation(correlation):
     """
     使用抛物线插值查找互相关峰值的精确位置（亚采样点精度）
@@ -221,6 +478,185 @@ def find_peak_with_parabolic_interpolation(correlation):
 
 
 
+
+def _three_point_neighbours(correlation):
+    """取整数峰值及其左右两点，峰值在边界时返回 None"""
+    峰值索引 = int(np.argmax(correlation))
+    if 1 < 峰值索引 < len(correlation) - 2:
+        return 峰值索引, correlation[峰值索引 - 1], correlation[峰值索引], correlation[峰值索引 + 1]
+    return 峰值索引, None, None, None
+
+
+def find_peak_with_gaussian_interpolation(correlation):
+    """
+    三点高斯拟合查找互相关峰值（亚采样点精度）
+    
+    对峰值附近三点取对数后做抛物线插值，等价于拟合高斯曲线；
+    适合主瓣接近高斯形状的窄带脉冲。三点中存在非正值时退回抛物线插值。
+    
+    Args:
+        correlation: 互相关结果数组
+        
+    Returns:
+        tuple: (peak_index, peak_value)
+    """
+    峰值索引, y1, y2, y3 = _three_point_neighbours(correlation)
+    if y1 is None:
+        return float(峰值索引), correlation[峰值索引]
+    
+    if min(y1, y2, y3) <= 0:
+        return find_peak_with_parabolic_interpolation(correlation)
+    
+    l1, l2, l3 = np.log(y1), np.log(y2), np.log(y3)
+    分母 = l1 - 2*l2 + l3
+    if abs(分母) < 1e-12:
+        return float(峰值索引), y2
+    
+    return 峰值索引 + 0.5 * (l1 - l3) / 分母, y2
+
+
+def find_peak_with_cosine_interpolation(correlation):
+    """
+    三点余弦拟合查找互相关峰值（亚采样点精度）
+    
+    用 A·cos(ω(x - x0)) 拟合峰值附近三点：
+        ω = arccos((y1 + y3) / (2·y2))
+        θ = arctan((y1 - y3) / (2·y2·sin ω))
+        精确偏移 = -θ / ω
+    对过采样的窄带超声信号，抛物线插值存在系统偏差，余弦拟合偏差更小。
+    
+    Args:
+        correlation: 互相关结果数组
+        
+    Returns:
+        tuple: (peak_index, peak_value)
+    """
+    峰值索引, y1, y2, y3 = _three_point_neighbours(correlation)
+    if y1 is None:
+        return float(峰值索引), correlation[峰值索引]
+    
+    if y2 <= 0:
+        return find_peak_with_parabolic_interpolation(correlation)
+    
+    比值 = (y1 + y3) / (2 * y2)
+    if not -1 < 比值 < 1:
+        return find_peak_with_parabolic_interpolation(correlation)
+    
+    omega = np.arccos(比值)
+    theta = np.arctan((y1 - y3) / (2 * y2 * np.sin(omega)))
+    
+    return 峰值索引 - theta / omega, y2
+
+
+@lru_cache(maxsize=16)
+def _upsample_taper(length):
+    """补零上采样片段的 Tukey 窗（按长度缓存）"""
+    from scipy.signal.windows import tukey
+    窗 = tukey(length, UPSAMPLE_TAPER)
+    窗.flags.writeable = False
+    return 窗
+
+
+def find_peak_with_upsampled_fft(correlation, factor=32, half_width=UPSAMPLE_HALF_WIDTH):
+    """
+    局部频域补零上采样查找互相关峰值（亚采样点精度）
+    
+    只取整数峰值 ±half_width 个采样点的一小段，乘以 Tukey 窗（中间平坦、两端渐变到零，
+    避免 FFT 把片段当作周期信号时首尾不连续），对其 FFT 补零到 factor 倍长度后逆变换，
+    得到步长 1/factor 的带限插值；在峰值 ±1 个采样点内取细网格最大值，再做一次抛物线插值。
+    窗在峰值附近为 1，不改变主瓣形状，计算量只与片段长度有关，与互相关长度无关。
+    
+    Args:
+        correlation: 互相关结果数组
+        factor: 上采样倍数
+        half_width: 片段半宽（采样点），峰值靠近边界时自动缩小
+        
+    Returns:
+        tuple: (peak_index, peak_value)
+    """
+    correlation = np.asarray(correlation, dtype=float)
+    峰值索引 = int(np.argmax(correlation))
+    K = min(int(half_width), 峰值索引, len(correlation) - 1 - 峰值索引)
+    if K < 2:
+        return find_peak_with_parabolic_interpolation(correlation)
+    
+    # 奇数长度片段，补零时没有需要拆分的奈奎斯特频点
+    L = 2 * K + 1
+    片段 = correlation[峰值索引 - K:峰值索引 + K + 1] * _upsample_taper(L)
+    细 = np.fft.irfft(np.fft.rfft(片段), n=L * factor) * factor
+    
+    # 片段中心（整数峰值）在细网格中的位置为 K·factor，只在其 ±1 个采样点内找最大值
+    起点 = (K - 1) * factor
+    局部 = 细[起点:(K + 1) * factor + 1]
+    精确索引, 峰值 = find_peak_with_parabolic_interpolation(局部)
+    
+    return 峰值索引 - K + (起点 + 精确索引) / factor, 峰值
+
+
+def find_peak_with_phase_slope(correlation, magnitude_ratio=0.1):
+    """
+    互谱相位斜率法查找互相关峰值（亚采样点精度）
+    
+    互相关是互谱的逆变换：把整数峰值循环平移到原点后做 FFT，
+    其相位 φ(k) = -2π·k·δ/M 与频率成线性关系，对幅值足够大的频点
+    （即信号通带）做加权最小二乘（过原点）即可得到小数偏移 δ。
+    
+    Args:
+        correlation: 互相关结果数组
+        magnitude_ratio: 参与回归的频点幅值下限（相对最大幅值）
+        
+    Returns:
+        tuple: (peak_index, peak_value)
+    """
+    峰值索引 = int(np.argmax(correlation))
+    峰值 = correlation[峰值索引]
+    M = len(correlation)
+    if M < 4:
+        return find_peak_with_parabolic_interpolation(correlation)
+    
+    # 整数峰值移到索引0，剩余相位只由小数偏移决定
+    频谱 = np.fft.rfft(np.roll(np.asarray(correlation, dtype=float), -峰值索引))
+    k = np.arange(len(频谱))
+    幅值 = np.abs(频谱)
+    
+    有效 = (k > 0) & (幅值 >= magnitude_ratio * 幅值.max())
+    if not np.any(有效):
+        return float(峰值索引), 峰值
+    
+    相位 = np.angle(频谱[有效])
+    权重 = 幅值[有效]
+    斜率 = np.sum(权重 * 相位 * k[有效]) / np.sum(权重 * k[有效]**2)
+    
+    return 峰值索引 - 斜率 * M / (2 * np.pi), 峰值
+
+
+# 亚采样点时延估计器注册表（名称 -> 估计函数）
+# 所有估计函数签名一致：estimator(correlation) -> (peak_index, peak_value)
+SUBSAMPLE_ESTIMATORS = {
+    'parabolic': find_peak_with_parabolic_interpolation,
+    'gaussian': find_peak_with_gaussian_interpolation,
+    'cosine': find_peak_with_cosine_interpolation,
+    'upsampled_fft': find_peak_with_upsampled_fft,
+    'phase_slope': find_peak_with_phase_slope,
+}
+
+DEFAULT_SUBSAMPLE_ESTIMATOR = 'parabolic'
+
+
+def find_peak_subsample(correlation, method=DEFAULT_SUBSAMPLE_ESTIMATOR):
+    """
+    使用注册表中的估计器查找互相关峰值的精确位置
+    
+    Args:
+        correlation: 互相关结果数组
+        method: 估计器名称（见 SUBSAMPLE_ESTIMATORS），未知名称使用抛物线插值
+        
+    Returns:
+        tuple: (peak_index, peak_value)
+    """
+    estimator = SUBSAMPLE_ESTIMATORS.get(method, find_peak_with_parabolic_interpolation)
+    return estimator(correlation)
+
 def apply_bandpass_filter(signal, sampling_rate, lowcut, highcut, order=6):
     """
     应用巴特沃斯带通滤波器
@@ -243,66 +679,123 @@ def apply_bandpass_filter(signal, sampling_rate, lowcut, highcut, order=6):
         - 使用 scipy.signal.butter 设计滤波器
         - 使用 sosfiltfilt 进行零相位滤波（前向-后向滤波）
         - 自动验证频率范围的有效性
+        - 返回 Python 列表（兼容旧接口），模块内部请使用 apply_bandpass_filter_array
+    """
+    result = apply_bandpass_filter_array(signal, sampling_rate, lowcut, highcut, order)
+    
+    if result['success']:
+        result['filtered'] = result['filtered'].tolist()
+    
+    return result
+
+
+def apply_bandpass_filter_array(signal, sampling_rate, lowcut, highcut, order=6, inplace=False, dtype=None):
+    """
+    应用巴特沃斯带通滤波器（ndarray 输入/输出版本）
+    
+    滤波器系数由 design_bandpass_sos 缓存，同一组参数只设计一次；
+    结果保持为 ndarray，不做列表转换。
+    
+    Args:
+        signal: 输入信号（电压数组）
+        sampling_rate: 采样率 (Hz)
+        lowcut: 低频截止频率 (Hz)
+        highcut: 高频截止频率 (Hz)
+        order: 滤波器阶数（默认6）
+        inplace: 是否将结果写回输入数组（输入须为可写 ndarray，且 dtype 与计算精度一致）
+        dtype: 计算精度，np.float32 可减少内存占用，默认 float64
+        
+    Returns:
+        dict: {
+            'success': bool,
+            'filtered': ndarray,  # 滤波后的信号
+            'message': str        # 错误信息（如果失败）
+        }
     """
     try:
         from scipy import signal as scipy_signal
         
-        # 参数验证
-        if sampling_rate <= 0:
+        try:
+            sos = design_bandpass_sos(sampling_rate, lowcut, highcut, order)
+        except ValueError as e:
+            # 参数验证失败
             return {
                 'success': False,
-                'message': f'采样率无效: {sampling_rate} Hz'
+                'message': str(e)
             }
         
-        if lowcut <= 0 or highcut <= 0:
-            return {
-                'success': False,
-                'message': f'截止频率必须为正数: lowcut={lowcut}, highcut={highcut}'
-            }
-        
-        if lowcut >= highcut:
-            return {
-                'success': False,
-                'message': f'低频截止必须小于高频截止: lowcut={lowcut}, highcut={highcut}'
-            }
-        
-        # 计算归一化频率
-        nyquist = sampling_rate / 2
-        low = lowcut / nyquist
-        high = highcut / nyquist
-        
-        # 验证归一化频率范围
-        if low <= 0 or low >= 1:
-            return {
-                'success': False,
-                'message': f'低频截止超出有效范围: {lowcut} Hz (Nyquist: {nyquist} Hz)'
-            }
-        
-        if high <= 0 or high >= 1:
-            return {
-                'success': False,
-                'message': f'高频截止超出有效范围: {highcut} Hz (Nyquist: {nyquist} Hz)'
-            }
-        
-        if low >= high:
-            return {
-                'success': False,
-                'message': f'归一化频率范围无效: low={low}, high={high}'
-            }
-        
-        # 设计巴特沃斯带通滤波器（使用 SOS 格式以提高数值稳定性）
-        sos = scipy_signal.butter(order, [low, high], btype='band', output='sos')
+        dtype = np.dtype(dtype) if dtype is not None else np.dtype(np.float64)
+        data = np.asarray(signal, dtype=dtype)
         
         # 应用零相位滤波（前向-后向滤波）
-        filtered_signal = scipy_signal.sosfiltfilt(sos, signal)
+        filtered_signal = scipy_signal.sosfiltfilt(sos.astype(dtype), data)
+        
+        if inplace and isinstance(signal, np.ndarray) and signal.dtype == dtype:
+            signal[...] = filtered_signal
+            filtered_signal = signal
         
         return {
             'success': True,
-            'filtered': filtered_signal.tolist() if hasattr(filtered_signal, 'tolist') else filtered_signal
+            'filtered': filtered_signal
         }
-        
+    
     except Exception as e:
         return {
             'success': False,
             'message': f'带通滤波失败: {str(e)}'
         }
+
+
+@lru_cache(maxsize=BANDPASS_SOS_CACHE_SIZE)
+def design_bandpass_sos(sampling_rate, lowcut, highcut, order=6):
+    """
+    设计巴特沃斯带通滤波器（SOS 格式，带 LRU 缓存）
+    
+    以 (sampling_rate, lowcut, highcut, order) 为键缓存设计结果，
+    最多保留 BANDPASS_SOS_CACHE_SIZE 组，超出时淘汰最久未使用的一组。
+    
+    Args:
+        sampling_rate: 采样率 (Hz)
+        lowcut: 低频截止频率 (Hz)
+        highcut: 高频截止频率 (Hz)
+        order: 滤波器阶数
+        
+    Returns:
+        ndarray: 只读的 SOS 系数 (order, 6)
+        
+    Raises:
+        ValueError: 参数无效或频率超出有效范围
+    """
+    from scipy import signal as scipy_signal
+    
+    # 参数验证
+    if sampling_rate <= 0:
+        raise ValueError(f'采样率无效: {sampling_rate} Hz')
+    
+    if lowcut <= 0 or highcut <= 0:
+        raise ValueError(f'截止频率必须为正数: lowcut={lowcut}, highcut={highcut}')
+    
+    if lowcut >= highcut:
+        raise ValueError(f'低频截止必须小于高频截止: lowcut={lowcut}, highcut={highcut}')
+    
+    # 计算归一化频率
+    nyquist = sampling_rate / 2
+    low = lowcut / nyquist
+    high = highcut / nyquist
+    
+    # 验证归一化频率范围
+    if low <= 0 or low >= 1:
+        raise ValueError(f'低频截止超出有效范围: {lowcut} Hz (Nyquist: {nyquist} Hz)')
+    
+    if high <= 0 or high >= 1:
+        raise ValueError(f'高频截止超出有效范围: {highcut} Hz (Nyquist: {nyquist} Hz)')
+    
+    if low >= high:
+        raise ValueError(f'归一化频率范围无效: low={low}, high={high}')
+    
+    # 设计巴特沃斯带通滤波器（使用 SOS 格式以提高数值稳定性）
+    sos = scipy_signal.butter(order, [low, high], btype='band', output='sos')
+    
+    # 缓存对象被多处共享，设为只读防止被意外修改
+    sos.setflags(write=False)
+    return sos
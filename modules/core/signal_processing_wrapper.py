@@ -5,6 +5,7 @@
 
 import numpy as np
 from . import signal_processing
+from .binary_transport import decode_array, encode_array, is_encoded, is_series, series_store
 from ..waveform_analysis import waveform_processing
 
 
@@ -15,12 +16,28 @@ class SignalProcessingWrapper:
         """初始化"""
         pass
     
+    @staticmethod
+    def _编码输出(结果, 键, 输入):
+        """
+        按输入的传输格式返回结果中的数组字段：
+        服务端序列引用 → 结果也保存为序列；二进制编码 → float32 编码；列表 → 列表
+        """
+        if not 结果.get('success') or 结果.get(键) is None:
+            return 结果
+        if is_series(输入):
+            结果[键] = series_store.store(np.asarray(结果[键]))
+        elif is_encoded(输入):
+            结果[键] = encode_array(结果[键], dtype='float32')
+        elif isinstance(结果[键], np.ndarray):
+            结果[键] = 结果[键].tolist()
+        return 结果
+    
     def 小波降噪(self, 信号数据, 小波类型='sym6', 分解层数=5, 阈值方法='soft', 阈值模式='heursure'):
         """
         应用小波降噪（Web API 包装）
         
         参数:
-            信号数据: 信号数组（可能是列表或numpy数组）
+            信号数据: 信号数组（列表、numpy数组或二进制编码对象）
             小波类型: 小波类型字符串
             分解层数: 分解层数（可能是字符串或整数）
             阈值方法: 阈值方法
@@ -30,8 +47,8 @@ class SignalProcessingWrapper:
             {"success": bool, "denoised_signal": array, ...}
         """
         try:
-            # 类型转换：JavaScript 数组 → numpy 数组
-            信号 = np.array(信号数据)
+            # 类型转换：JavaScript 数组或二进制编码 → numpy 数组
+            信号 = decode_array(信号数据)
             
             # 参数验证和类型转换
             if not 小波类型 or 小波类型 == '':
@@ -47,9 +64,10 @@ class SignalProcessingWrapper:
                 阈值模式 = 'heursure'
             
             # 调用底层信号处理函数
-            return signal_processing.apply_wavelet_denoising(
+            结果 = signal_processing.apply_wavelet_denoising(
                 信号, 小波类型, 分解层数, 阈值方法, 阈值模式
             )
+            return self._编码输出(结果, 'denoised', 信号数据)
         except Exception as e:
             return {
                 'success': False,
@@ -61,7 +79,7 @@ class SignalProcessingWrapper:
         应用带通滤波（Web API 包装）
         
         参数:
-            信号数据: 信号数组（可能是列表或numpy数组）
+            信号数据: 信号数组（列表、numpy数组或二进制编码对象）
             采样率: 采样率（Hz）
             低频截止: 低频截止频率（Hz）
             高频截止: 高频截止频率（Hz）
@@ -71,8 +89,8 @@ class SignalProcessingWrapper:
             {"success": bool, "filtered": array, ...}
         """
         try:
-            # 类型转换：JavaScript 数组 → numpy 数组
-            信号 = np.array(信号数据)
+            # 类型转换：JavaScript 数组或二进制编码 → numpy 数组
+            信号 = decode_array(信号数据)
             
             # 参数验证和类型转换
             采样率 = float(采样率)
@@ -82,10 +100,12 @@ class SignalProcessingWrapper:
             if not isinstance(滤波器阶数, int):
                 滤波器阶数 = int(滤波器阶数) if 滤波器阶数 else 6
             
-            # 调用底层信号处理函数
-            return signal_processing.apply_bandpass_filter(
+            # 调用底层信号处理函数（ndarray 版本），在 Web 边界转换输出格式
+            结果 = signal_processing.apply_bandpass_filter_array(
                 信号, 采样率, 低频截止, 高频截止, 滤波器阶数
             )
+            
+            return self._编码输出(结果, 'filtered', 信号数据)
         except Exception as e:
             return {
                 'success': False,
@@ -104,10 +124,11 @@ class SignalProcessingWrapper:
         """
         try:
             # 类型转换
-            信号 = np.array(信号数据)
+            信号 = decode_array(信号数据)
             
             # 调用波形分析模块的信号处理函数
-            return waveform_processing.calculate_hilbert_envelope(信号)
+            结果 = waveform_processing.calculate_hilbert_envelope(信号)
+            return self._编码输出(结果, 'envelope', 信号数据)
         except Exception as e:
             return {
                 'success': False,
@@ -129,8 +150,8 @@ class SignalProcessingWrapper:
         """
         try:
             # 类型转换
-            信号 = np.array(信号数据)
-            时间 = np.array(时间数据) if 时间数据 else None
+            信号 = decode_array(信号数据)
+            时间 = decode_array(时间数据) if 时间数据 else None
             
             # 调用波形分析模块的信号处理函数
             return waveform_processing.detect_peaks(信号, 时间, 最小距离, 突出度)
@@ -155,8 +176,8 @@ class SignalProcessingWrapper:
         """
         try:
             # 类型转换
-            时间 = np.array(时间数据)
-            信号 = np.array(信号数据)
+            时间 = decode_array(时间数据)
+            信号 = decode_array(信号数据)
             
             # 调用波形分析模块的信号处理函数
             return waveform_processing.find_peak_near_time(时间, 信号, 目标时间, 窗口大小)
@@ -0,0 +1,357 @@
+"""
+模拟示波器模块
+进程内的 VISA 资源替身，实现 OscilloscopeBase 用到的 SCPI 子集，
+生成合成超声回波，用于脱离真实 RIGOL 示波器的吞吐量和流程测试
+
+使用方法：连接示波器时传入以 SIM:: 开头的设备地址，例如
+    SIM::INSTR
+    SIM::INSTR?delay_us=20&noise=0.01&latency_ms=2
+"""
+
+import time
+import threading
+from urllib.parse import parse_qsl
+
+import numpy as np
+
+
+# 模拟设备地址前缀
+SIMULATED_ADDRESS_PREFIX = 'SIM::'
+SIMULATED_ADDRESS = 'SIM::INSTR'
+
+# 默认模拟参数（均可在设备地址的查询串中覆盖）
+DEFAULT_SIM_CONFIG = {
+    'freq_mhz': 2.5,              # 回波中心频率 (MHz)
+    'cycles': 3.0,                # 猝发音高斯包络宽度（周期数）
+    'delay_us': 20.0,             # 一次回波延迟 (μs)
+    'drift_ns': 0.0,              # 每次采集回波延迟的漂移量 (ns)，模拟应力变化
+    'amplitude': 1.0,             # 一次回波幅值 (V)
+    'echo_decay': 0.4,            # 相邻回波的幅值比
+    'echoes': 2,                  # 回波次数
+    'bang': 2.0,                  # 始波幅值 (V)，0 表示没有始波
+    'noise': 0.01,                # 高斯噪声标准差 (V)
+    'max_srate': 1e9,             # 最大采样率 (Sa/s)
+    'latency_ms': 0.0,            # 每条命令的往返延迟 (ms)
+    'bandwidth_mbps': 0.0,        # 数据传输带宽 (MB/s)，0 表示不限
+    'seed': None                  # 随机种子
+}
+
+# NORM 模式屏幕点数（与 RIGOL DS1000Z 一致）
+NORM_POINTS = 1200
+
+# 水平方向屏幕格数（与 OscilloscopeBase 计算屏幕范围时一致）
+HORIZONTAL_DIVISIONS = 10
+
+
+def is_simulated_address(address):
+    """判断设备地址是否指向模拟示波器"""
+    return isinstance(address, str) and address.upper().startswith(SIMULATED_ADDRESS_PREFIX)
+
+
+def parse_simulated_address(address):
+    """
+    解析模拟设备地址中的参数
+    
+    Args:
+        address: 形如 SIM::INSTR?delay_us=20&noise=0.01 的地址
+    
+    Returns:
+        dict: 合并默认值后的模拟参数
+    """
+    config = dict(DEFAULT_SIM_CONFIG)
+    if '?' in address:
+        for key, value in parse_qsl(address.split('?', 1)[1]):
+            if key not in config:
+                continue
+            if key == 'echoes':
+                config[key] = int(value)
+            elif key == 'seed':
+                config[key] = int(value) if value else None
+            else:
+                config[key] = float(value)
+    return config
+
+
+class SimulatedOscilloscope:
+    """
+    模拟的 RIGOL 示波器 VISA 资源
+    
+    提供与 pyvisa 资源相同的 write/query/read_raw/close 接口。
+    支持的命令：
+        *IDN?  :RUN  :STOP  :SING  :AUT  :TRIG:STAT?
+        :CHAN<n>:SCAL(?)  :CHAN<n>:OFFS(?)  :CHAN<n>:DISP(?)
+        :TIM:MAIN:SCAL(?)  :TIM:MAIN:OFFS(?)
+        :ACQ:MDEP  :ACQ:MEMD?  :ACQ:SRAT?
+        :WAV:SOUR  :WAV:MODE  :WAV:FORM  :WAV:STAR  :WAV:STOP  :WAV:PRE?  :WAV:DATA?
+    """
+    
+    def __init__(self, address=SIMULATED_ADDRESS, config=None):
+        self.resource_name = address
+        self.config = {**parse_simulated_address(address), **(config or {})}
+        self.timeout = 5000
+        
+        self._rng = np.random.default_rng(self.config['seed'])
+        self._lock = threading.Lock()
+        self._response = b''
+        
+        # 仪器状态
+        self.running = True
+        self.channels = {
+            n: {'scale': 0.5, 'offset': 0.0, 'display': n == 1}
+            for n in range(1, 5)
+        }
+        self.timebase = 5e-6
+        self.time_offset = 20e-6
+        self.memory_depth = 'AUTO'
+        self.wave_source = 1
+        self.wave_mode = 'NORM'
+        self.wave_format = 'BYTE'
+        self.wave_start = 1
+        self.wave_stop = NORM_POINTS
+        
+        # 采集计数（用于回波延迟漂移）和 STOP 后冻结的存储器
+        self.acquisitions = 0
+        self._frozen = None
+    
+    # ==================== VISA 资源接口 ====================
+    
+    def write(self, command):
+        """执行一条命令（查询命令的结果在下一次 read_raw/read 时返回）"""
+        with self._lock:
+            self._wait(0.5)
+            response = self._execute(command.strip())
+            if response is not None:
+                self._response = response
+    
+    def read_raw(self):
+        """读取上一条查询命令的原始响应"""
+        with self._lock:
+            response, self._response = self._response, b''
+            self._wait(0.5, len(response))
+            return response
+    
+    def read(self):
+        return self.read_raw().decode('ascii', errors='replace')
+    
+    def query(self, command):
+        self.write(command)
+        return self.read()
+    
+    def close(self):
+        self._response = b''
+    
+    # ==================== 采集参数 ====================
+    
+    @property
+    def sample_rate(self):
+        """当前时基和存储深度下的采样率"""
+        window = HORIZONTAL_DIVISIONS * self.timebase
+        if self.memory_depth == 'AUTO':
+            return self.config['max_srate']
+        return min(self.config['max_srate'], int(self.memory_depth) / window)
+    
+    @property
+    def acquisition_points(self):
+        """采集存储器点数（覆盖整个屏幕时间范围）"""
+        return max(NORM_POINTS, int(round(self.sample_rate * HORIZONTAL_DIVISIONS * self.timebase)))
+    
+    def _preamble_values(self):
+        """
+        返回 (format, type, points, x_increment, x_origin, y_increment, y_origin, y_reference)
+        
+        电压换算关系与 OscilloscopeBase 一致：V = (码值 - y_origin - y_reference) * y_increment
+        """
+        channel = self.channels[self.wave_source]
+        window = HORIZONTAL_DIVISIONS * self.timebase
+        x_origin = self.time_offset - window / 2
+        
+        if self.wave_mode == 'RAW':
+            points = self.acquisition_points
+            x_increment = 1.0 / self.sample_rate
+        else:
+            points = NORM_POINTS
+            x_increment = window / NORM_POINTS
+        
+        if self.wave_format == 'WORD':
+            # 12bit ADC：垂直 8 格对应 3200 个码值
+            y_increment = channel['scale'] / 400
+            y_reference = 2048
+        else:
+            # 8bit ADC：垂直 8 格对应 200 个码值
+            y_increment = channel['scale'] / 25
+            y_reference = 127
+        y_origin = channel['offset'] / y_increment
+        
+        fmt = 1 if self.wave_format == 'WORD' else 0
+        wave_type = 2 if self.wave_mode == 'RAW' else 0
+        return fmt, wave_type, points, x_increment, x_origin, y_increment, y_origin, y_reference
+    
+    # ==================== 合成信号 ====================
+    
+    def _synthesize(self, t):
+        """按时间数组 (s) 生成一次采集的合成超声信号 (V)"""
+        cfg = self.config
+        freq = cfg['freq_mhz'] * 1e6
+        width = cfg['cycles'] / freq
+        delay = cfg['delay_us'] * 1e-6 + self.acquisitions * cfg['drift_ns'] * 1e-9
+        
+        signal = self._rng.normal(0.0, cfg['noise'], len(t)) if cfg['noise'] > 0 else np.zeros(len(t))
+        
+        # 始波：t=0 处的短脉冲
+        if cfg['bang'] > 0:
+            lo, hi = np.searchsorted(t, [-1.0 / freq, 1.0 / freq])
+            tau = t[lo:hi]
+            signal[lo:hi] += cfg['bang'] * np.exp(-(tau / (0.25 / freq))**2) * np.cos(2 * np.pi * freq * tau)
+        
+        # 多次回波，只在包络有效范围内计算
+        amplitude = cfg['amplitude']
+        for k in range(1, cfg['echoes'] + 1):
+            center = k * delay
+            lo, hi = np.searchsorted(t, [center - 4 * width, center + 4 * width])
+            if hi > lo:
+                tau = t[lo:hi] - center
+                signal[lo:hi] += amplitude * np.exp(-(tau / width)**2) * np.sin(2 * np.pi * freq * tau)
+            amplitude *= cfg['echo_decay']
+        
+        return signal
+    
+    def _acquire(self, points, x_increment, x_origin):
+        """完成一次采集，返回电压数组"""
+        self.acquisitions += 1
+        return self._synthesize(x_origin + np.arange(points) * x_increment)
+    
+    def _waveform_codes(self):
+        """按当前 :WAV 设置生成 STAR..STOP 范围的码值"""
+        fmt, _, points, x_increment, x_origin, y_increment, y_origin, y_reference = self._preamble_values()
+        
+        if self.wave_mode == 'RAW':
+            # RAW 模式读取 STOP 时冻结的完整存储器
+            key = (points, x_increment, x_origin)
+            if self._frozen is None or self._frozen[0] != key:
+                self._frozen = (key, self._acquire(points, x_increment, x_origin))
+            voltage = self._frozen[1]
+        elif self.running or self._frozen is None:
+            voltage = self._acquire(points, x_increment, x_origin)
+        else:
+            # 停止状态下 NORM 模式从冻结的存储器抽取屏幕点
+            frozen = self._frozen[1]
+            voltage = frozen[np.linspace(0, len(frozen) - 1, points).astype(int)]
+        
+        start = min(max(self.wave_start, 1), points)
+        stop = min(max(self.wave_stop, start), points)
+        voltage = voltage[start - 1:stop]
+        
+        max_code = 4095 if fmt == 1 else 255
+        codes = np.rint(voltage / y_increment + y_origin + y_reference)
+        np.clip(codes, 0, max_code, out=codes)
+        return codes.astype('<u2' if fmt == 1 else np.uint8)
+    
+    # ==================== 命令解析 ====================
+    
+    def _wait(self, round_trips, n_bytes=0):
+        """模拟命令延迟和传输耗时"""
+        delay = round_trips * self.config['latency_ms'] * 1e-3
+        if n_bytes and self.config['bandwidth_mbps'] > 0:
+            delay += n_bytes / (self.config['bandwidth_mbps'] * 1e6)
+        if delay > 0:
+            time.sleep(delay)
+    
+    def _execute(self, command):
+        """执行命令，查询命令返回响应字节串，设置命令返回 None"""
+        header, _, argument = command.partition(' ')
+        header = header.upper()
+        argument = argument.strip()
+        
+        if header == '*IDN?':
+            return b'RIGOL TECHNOLOGIES,SIMULATED,SIM00000000,00.04.05\n'
+        if header == ':RUN':
+            self.running = True
+            return None
+        if header in (':STOP', ':SING'):
+            if self.running:
+                # 停止时冻结一帧完整存储器
+                self.running = False
+                self._frozen = None
+            return None
+        if header == ':AUT':
+            self.timebase = 5e-6
+            self.time_offset = 20e-6
+            for channel in self.channels.values():
+                channel['scale'] = 0.5
+                channel['offset'] = 0.0
+            return None
+        if header == ':TRIG:STAT?':
+            return b'TD\n' if self.running else b'STOP\n'
+        
+        if header.startswith(':CHAN'):
+            return self._execute_channel(header, argument)
+        if header.startswith(':TIM'):
+            return self._execute_timebase(header, argument)
+        if header.startswith(':ACQ'):
+            return self._execute_acquire(header, argument)
+        if header.startswith(':WAV'):
+            return self._execute_waveform(header, argument)
+        
+        # 未实现的查询返回 0，设置命令忽略
+        return b'0\n' if header.endswith('?') else None
+    
+    def _execute_channel(self, header, argument):
+        name, _, item = header.partition(':')[2].partition(':')
+        channel = self.channels.get(int(name[4:] or 1), self.channels[1])
+        
+        if item.startswith('SCAL'):
+            if header.endswith('?'):
+                return f"{channel['scale']:.6e}\n".encode()
+            channel['scale'] = float(argument)
+        elif item.startswith('OFFS'):
+            if header.endswith('?'):
+                return f"{channel['offset']:.6e}\n".encode()
+            channel['offset'] = float(argument)
+        elif item.startswith('DISP'):
+            if header.endswith('?'):
+                return b'1\n' if channel['display'] else b'0\n'
+            channel['display'] = argument.upper() in ('1', 'ON')
+        return b'0\n' if header.endswith('?') else None
+    
+    def _execute_timebase(self, header, argument):
+        if header.endswith('SCAL?'):
+            return f'{self.timebase:.6e}\n'.encode()
+        if header.endswith('OFFS?'):
+            return f'{self.time_offset:.6e}\n'.encode()
+        if header.endswith('SCAL'):
+            self.timebase = float(argument)
+        elif header.endswith('OFFS'):
+            self.time_offset = float(argument)
+        return b'0\n' if header.endswith('?') else None
+    
+    def _execute_acquire(self, header, argument):
+        if header in (':ACQ:MEMD?', ':ACQ:MDEP?'):
+            return f'{self.memory_depth}\n'.encode()
+        if header == ':ACQ:SRAT?':
+            return f'{self.sample_rate:.6e}\n'.encode()
+        if header in (':ACQ:MDEP', ':ACQ:MEMD'):
+            self.memory_depth = 'AUTO' if argument.upper() == 'AUTO' else str(int(float(argument)))
+            self._frozen = None
+        return b'0\n' if header.endswith('?') else None
+    
+    def _execute_waveform(self, header, argument):
+        if header == ':WAV:PRE?':
+            fmt, wave_type, points, x_inc, x_org, y_inc, y_org, y_ref = self._preamble_values()
+            values = [fmt, wave_type, points, 1, x_inc, x_org, 0, y_inc, y_org, y_ref]
+            return (','.join(f'{v:.6e}' if isinstance(v, float) else str(v) for v in values) + '\n').encode()
+        if header == ':WAV:DATA?':
+            payload = self._waveform_codes().tobytes()
+            length = str(len(payload)).encode()
+            # IEEE-488.2 定长块：#N<长度><数据>\n
+            return b'#' + str(len(length)).encode() + length + payload + b'\n'
+        if header == ':WAV:SOUR':
+            self.wave_source = int(argument.upper().replace('CHAN', '') or 1)
+        elif header == ':WAV:MODE':
+            self.wave_mode = 'RAW' if argument.upper().startswith('RAW') else 'NORM'
+        elif header == ':WAV:FORM':
+            self.wave_format = 'WORD' if argument.upper().startswith('WORD') else 'BYTE'
+        elif header == ':WAV:STAR':
+            self.wave_start = int(argument)
+        elif header == ':WAV:STOP':
+            self.wave_stop = int(argument)
+        return b'0\n' if header.endswith('?') else None
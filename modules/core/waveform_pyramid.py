@@ -0,0 +1,254 @@
+"""
+波形多分辨率金字塔模块
+保存 HDF5 波形时同时写入逐级 ÷4 的最小/最大值金字塔（÷4、÷16、÷64 …），
+预览时只读取满足显示点数的最粗一级（KB 级），不必读取完整数据集；
+桶数超过 PYRAMID_MAX_BUCKETS 的细层级不保存（预览用不到，只会让文件变大）
+
+HDF5 结构（与波形数据集位于同一组）:
+    pyramid/                    attrs: source, source_points, factors, x_origin, x_increment
+        level_4/minmax          (m, 2) float32，每桶的最小值和最大值
+        level_4/time            (m,) float64，每桶中心时间（仅时间轴非等间隔时保存）
+        level_16/...
+"""
+
+import numpy as np
+
+
+# 金字塔组名
+PYRAMID_GROUP = 'pyramid'
+
+# 相邻两级之间的抽取倍数
+PYRAMID_FACTOR = 4
+
+# 最粗一级的最少桶数（再粗对预览没有意义）
+PYRAMID_MIN_BUCKETS = 256
+
+# 保存的最细一级的最多桶数（每桶两点，足够 8192 点的预览）
+PYRAMID_MAX_BUCKETS = 4096
+
+# 默认预览点数
+PREVIEW_POINTS = 2000
+
+# 时间轴按等间隔处理时允许的最大偏差（相对采样间隔）
+UNIFORM_TOLERANCE = 1e-3
+
+
+def build_pyramid(values):
+    """
+    逐级计算最小/最大值金字塔
+    
+    每一级由上一级每 PYRAMID_FACTOR 个桶合并得到，总计算量约为一次遍历；
+    只返回桶数不超过 PYRAMID_MAX_BUCKETS 的层级
+    
+    Args:
+        values: 一维数据数组
+    
+    Returns:
+        list: [(抽取倍数, (m, 2) float32 数组), ...]，由细到粗
+    """
+    数据 = np.asarray(values)
+    层级 = []
+    
+    倍数 = PYRAMID_FACTOR
+    桶数 = len(数据) // 倍数
+    if 桶数 < PYRAMID_MIN_BUCKETS:
+        return 层级
+    
+    分桶 = 数据[:桶数 * 倍数].reshape(桶数, 倍数)
+    当前 = np.column_stack((分桶.min(axis=1), 分桶.max(axis=1)))
+    if 桶数 <= PYRAMID_MAX_BUCKETS:
+        层级.append((倍数, 当前.astype(np.float32)))
+    
+    while len(当前) // PYRAMID_FACTOR >= PYRAMID_MIN_BUCKETS:
+        桶数 = len(当前) // PYRAMID_FACTOR
+        分桶 = 当前[:桶数 * PYRAMID_FACTOR].reshape(桶数, PYRAMID_FACTOR, 2)
+        当前 = np.column_stack((分桶[:, :, 0].min(axis=1), 分桶[:, :, 1].max(axis=1)))
+        倍数 *= PYRAMID_FACTOR
+        if 桶数 <= PYRAMID_MAX_BUCKETS:
+            层级.append((倍数, 当前.astype(np.float32)))
+    
+    return 层级
+
+
+def uniform_axis(time):
+    """时间轴等间隔时返回 (x_origin, x_increment)，否则返回 None"""
+    时间 = np.asarray(time, dtype=np.float64)
+    if 时间.size < 2:
+        return None
+    步长 = (时间[-1] - 时间[0]) / (时间.size - 1)
+    if 步长 <= 0:
+        return None
+    偏差 = np.max(np.abs(时间 - (时间[0] + np.arange(时间.size) * 步长)))
+    if 偏差 > UNIFORM_TOLERANCE * 步长:
+        return None
+    return float(时间[0]), float(步长)
+
+
+def write_pyramid(group, values, time=None, source='voltage'):
+    """
+    在 group 中写入（或重写）金字塔
+    
+    Args:
+        group: h5py Group 或 File（与波形数据集同级）
+        values: 波形数据
+        time: 时间轴（可选，等间隔时只保存起点和步长）
+        source: 对应的数据集名称
+    
+    Returns:
+        int: 写入的层数（数据太短时为 0，不创建金字塔）
+    """
+    if PYRAMID_GROUP in group:
+        del group[PYRAMID_GROUP]
+    
+    层级 = build_pyramid(values)
+    if not 层级:
+        return 0
+    
+    金字塔 = group.create_group(PYRAMID_GROUP)
+    金字塔.attrs['source'] = source
+    金字塔.attrs['source_points'] = len(values)
+    金字塔.attrs['factors'] = [倍数 for 倍数, _ in 层级]
+    
+    if time is not None and len(time) != len(values):
+        time = None
+    等间隔 = uniform_axis(time) if time is not None else None
+    if 等间隔:
+        金字塔.attrs['x_origin'], 金字塔.attrs['x_increment'] = 等间隔
+    
+    for 倍数, 最值 in 层级:
+        级 = 金字塔.create_group(f'level_{倍数}')
+        级.create_dataset('minmax', data=最值, compression='gzip', shuffle=True)
+        if time is not None and not 等间隔:
+            中心 = np.arange(len(最值)) * 倍数 + 倍数 // 2
+            级.create_dataset('time', data=np.asarray(time, dtype=np.float64)[中心], compression='gzip')
+    
+    return len(层级)
+
+
+def has_pyramid(group, source='voltage'):
+    """判断 group 中是否已有与数据集长度一致的金字塔"""
+    if PYRAMID_GROUP not in group or source not in group:
+        return False
+    return int(group[PYRAMID_GROUP].attrs.get('source_points', -1)) == len(group[source])
+
+
+def read_preview(group, max_points=PREVIEW_POINTS, source='voltage', time_name='time'):
+    """
+    读取预览数据：点数不超过 max_points 时读完整数据，否则读取满足点数的最细一级金字塔
+    
+    金字塔每桶输出最小值和最大值两个点（同一中心时间）
+    
+    Args:
+        group: 含波形数据集（和金字塔）的 h5py Group
+        max_points: 预览点数上限
+        source: 电压数据集名称
+        time_name: 时间数据集名称
+    
+    Returns:
+        dict: {"time", "voltage", "factor", "source_points", "decimated"}；
+              需要金字塔但不存在时返回 None
+    """
+    总点数 = len(group[source])
+    if 总点数 <= max_points:
+        if time_name in group:
+            时间 = group[time_name][:]
+        elif 'x_increment' in group.attrs:
+            # 等间隔时间轴只保存了起点和步长
+            时间 = group.attrs.get('x_origin', 0.0) + np.arange(总点数) * group.attrs['x_increment']
+        else:
+            时间 = np.arange(总点数, dtype=np.float64)
+        return {
+            "time": 时间,
+            "voltage": group[source][:],
+            "factor": 1,
+            "source_points": 总点数,
+            "decimated": False
+        }
+    
+    if not has_pyramid(group, source):
+        return None
+    
+    金字塔 = group[PYRAMID_GROUP]
+    倍数列表 = sorted(int(x) for x in 金字塔.attrs['factors'])
+    
+    # 选择桶数 * 2 不超过 max_points 的最细一级；都超过时用最粗一级
+    选中 = 倍数列表[-1]
+    for 倍数 in 倍数列表:
+        if 2 * (总点数 // 倍数) <= max_points:
+            选中 = 倍数
+            break
+    
+    级 = 金字塔[f'level_{选中}']
+    最值 = 级['minmax'][:]
+    if 'time' in 级:
+        中心时间 = 级['time'][:]
+    elif 'x_increment' in 金字塔.attrs:
+        中心 = np.arange(len(最值)) * 选中 + 选中 // 2
+        中心时间 = 金字塔.attrs['x_origin'] + 中心 * 金字塔.attrs['x_increment']
+    else:
+        中心时间 = (np.arange(len(最值)) * 选中 + 选中 // 2).astype(np.float64)
+    
+    return {
+        "time": np.repeat(中心时间, 2),
+        "voltage": 最值.ravel(),
+        "factor": 选中,
+        "source_points": 总点数,
+        "decimated": True
+    }
+
+
+def load_preview(file_path, group_path='/', max_points=PREVIEW_POINTS, source='voltage', time_name='time'):
+    """
+    打开 HDF5 文件读取预览；旧文件没有金字塔时在首次打开时补写（惰性升级）
+    
+    文件只读等原因无法补写时，在内存中计算金字塔后返回预览
+    
+    Args:
+        file_path: HDF5 文件路径
+        group_path: 波形数据集所在组
+        max_points: 预览点数上限
+        source: 电压数据集名称
+        time_name: 时间数据集名称
+    
+    Returns:
+        dict: {"success": bool, "data": {...}, "upgraded": bool}
+    """
+    import h5py
+    
+    try:
+        with h5py.File(file_path, 'r') as f:
+            if group_path not in f or source not in f[group_path]:
+                return {"success": False, "message": f"文件中没有波形数据: {group_path}/{source}"}
+            预览 = read_preview(f[group_path], max_points, source, time_name)
+        if 预览 is not None:
+            return {"success": True, "data": 预览, "upgraded": False}
+        
+        # 惰性升级：补写金字塔
+        try:
+            with h5py.File(file_path, 'a') as f:
+                组 = f[group_path]
+                时间 = 组[time_name][:] if time_name in 组 else None
+                write_pyramid(组, 组[source][:], 时间, source)
+                预览 = read_preview(组, max_points, source, time_name)
+            return {"success": True, "data": 预览, "upgraded": True}
+        except OSError:
+            # 无法写入时只在内存中计算（使用与金字塔相同的抽取）
+            from ..waveform_analysis.waveform_decimation import minmax_indices
+            with h5py.File(file_path, 'r') as f:
+                组 = f[group_path]
+                电压 = 组[source][:]
+                时间 = 组[time_name][:] if time_name in 组 else np.arange(len(电压), dtype=np.float64)
+            索引 = minmax_indices(电压, max_points)
+            return {
+                "success": True,
+                "data": {
+                    "time": 时间[索引],
+                    "voltage": 电压[索引],
+                    "factor": max(len(电压) // max(len(索引), 1), 1),
+                    "source_points": len(电压),
+                    "decimated": True
+                },
+                "upgraded": False
+            }
+    except Exception as e:
+        return {"success": False, "message": f"读取波形预览失败: {str(e)}"}
@@ -5,8 +5,39 @@
 
 import numpy as np
 import os
+import time
+import threading
 from datetime import datetime
 
+from ..waveform_analysis.waveform_decimation import minmax_indices
+from ..core.waveform_pyramid import write_pyramid
+
+
+# 环形缓冲区帧数（生产者写入下一帧时，消费者读取的帧不会被覆盖）
+RING_BUFFER_FRAMES = 4
+
+# 超过该时间（秒）没有前端取帧时，后台采集线程暂停，避免空转占用 VISA 会话
+CONSUMER_IDLE_TIMEOUT = 2.0
+
+
+def 抽取波形(时间, 电压, 最大点数):
+    """
+    按桶取最小/最大值抽取波形（保留尖峰，每桶输出两个点）
+    
+    Args:
+        时间: 时间数组
+        电压: 电压数组
+        最大点数: 输出点数上限，None 或不超过时原样返回
+    
+    Returns:
+        tuple: (时间, 电压)
+    """
+    if not 最大点数 or len(电压) <= 最大点数 or 最大点数 < 4:
+        return 时间, 电压
+    
+    索引 = minmax_indices(电压, 最大点数)
+    return 时间[索引], 电压[索引]
+
 
 class RealtimeCapture:
     """实时采集功能类"""
@@ -20,6 +51,19 @@ class RealtimeCapture:
         self.osc = oscilloscope
         self.window = window
         self.当前波形 = None  # 存储最新波形数据
+        
+        # 后台采集线程和环形缓冲区
+        self._采集线程 = None
+        self._停止事件 = threading.Event()
+        self._取帧事件 = threading.Event()
+        self._帧锁 = threading.Lock()
+        self._采集通道 = 1
+        self._最近取帧时间 = 0.0
+        self._环形电压 = None          # (RING_BUFFER_FRAMES, 点数) 预分配帧
+        self._环形信息 = [None] * RING_BUFFER_FRAMES
+        self._最新帧序号 = -1
+        self._采集帧率 = 0.0
+        self._采集错误 = None
     
     def 选择保存路径(self, 格式='npy'):
         """打开文件保存对话框"""
@@ -32,6 +76,10 @@ class RealtimeCapture:
                 default_name = f'waveform_{timestamp}.csv'
                 file_types = ('CSV文件 (*.csv)',)
                 扩展名 = '.csv'
+            elif 格式.lower() == 'h5':
+                default_name = f'waveform_{timestamp}.h5'
+                file_types = ('HDF5波形文件 (*.h5)',)
+                扩展名 = '.h5'
             else:
                 default_name = f'waveform_{timestamp}.npy'
                 file_types = ('NumPy波形文件 (*.npy)',)
@@ -63,24 +111,24 @@ class RealtimeCapture:
             return {"success": False, "message": f"打开对话框失败: {str(e)}"}
     
     def 保存波形到文件(self, 文件路径, 通道, 格式='npy'):
-        """保存波形数据到文件（支持NPY和CSV格式）"""
+        """保存波形数据到文件（支持NPY、CSV和HDF5格式，HDF5附带预览金字塔）"""
         try:
             # 获取完整深度的波形数据
-            结果 = self.osc.获取波形数据_RAW模式_屏幕范围(通道)
+            结果 = self.osc.采集RAW波形_屏幕范围(通道)
             
             if not 结果['success']:
                 return 结果
             
-            波形数据 = 结果['data']
+            波形 = 结果['waveform']
             
             # 获取当前状态信息
-            采样率 = float(self.osc.示波器.query(':ACQ:SRAT?').strip())
-            存储深度 = self.osc.示波器.query(':ACQ:MEMD?').strip()
+            采样率 = float(self.osc.查询设置(':ACQ:SRAT?'))
+            存储深度 = self.osc.查询设置(':ACQ:MEMD?')
             
             if 格式.lower() == 'csv':
                 # 保存为CSV格式（兼容示波器导出格式）
-                时间数据 = 波形数据['time']
-                电压数据 = 波形数据['voltage']
+                时间数据 = 波形.time
+                电压数据 = 波形.voltage
                 
                 # 计算时间参数
                 t0 = 时间数据[0] if len(时间数据) > 0 else 0
@@ -91,25 +139,45 @@ class RealtimeCapture:
                     f.write(f'Time(s),CH{通道}V,t0 ={t0:.6e}, tInc = {tInc:.6e},\n')
                     
                     # 写入数据
-                    for t, v in zip(时间数据, 电压数据):
-                        f.write(f'{t:.6e},{v:.6e},,\n')
+                    np.savetxt(f, np.column_stack((时间数据, 电压数据)), fmt='%.6e,%.6e,,')
                 
                 return {
                     "success": True,
-                    "message": f"波形已保存到: {文件路径}\n采样点数: {波形数据['points']:,}\n格式: CSV"
+                    "message": f"波形已保存到: {文件路径}\n采样点数: {波形.points:,}\n格式: CSV"
+                }
+            elif 格式.lower() == 'h5':
+                # 保存为HDF5格式（附带最小/最大值金字塔，大波形预览只读 KB 级数据）
+                import h5py
+                
+                with h5py.File(文件路径, 'w') as f:
+                    wf_grp = f.create_group('waveform')
+                    wf_grp.create_dataset('time', data=波形.time, compression='gzip', compression_opts=6)
+                    wf_grp.create_dataset('voltage', data=波形.voltage, compression='gzip', compression_opts=6)
+                    wf_grp.attrs['sample_rate'] = 采样率
+                    wf_grp.attrs['timebase'] = 波形.h_scale
+                    wf_grp.attrs['v_scale'] = 波形.v_scale
+                    wf_grp.attrs['v_offset'] = 波形.v_offset
+                    wf_grp.attrs['memory_depth'] = str(存储深度)
+                    wf_grp.attrs['channel'] = 通道
+                    wf_grp.attrs['timestamp'] = datetime.now().isoformat()
+                    write_pyramid(wf_grp, 波形.voltage, 波形.time)
+                
+                return {
+                    "success": True,
+                    "message": f"波形已保存到: {文件路径}\n采样点数: {波形.points:,}\n格式: HDF5"
                 }
             else:
                 # 保存为NPY格式（默认）
                 保存数据 = {
-                    'time': np.array(波形数据['time']),
-                    'voltage': np.array(波形数据['voltage']),
+                    'time': 波形.time,
+                    'voltage': 波形.voltage,
                     'sample_rate': 采样率,
-                    'timebase': 波形数据['hScale'],
-                    'v_scale': 波形数据['vScale'],
-                    'v_offset': 波形数据['vOffset'],
+                    'timebase': 波形.h_scale,
+                    'v_scale': 波形.v_scale,
+                    'v_offset': 波形.v_offset,
                     'memory_depth': 存储深度,
                     'channel': 通道,
-                    'points': 波形数据['points'],
+                    'points': 波形.points,
                     'timestamp': datetime.now().isoformat(),
                     'format_version': '1.0'
                 }
@@ -118,7 +186,7 @@ class RealtimeCapture:
                 
                 return {
                     "success": True,
-                    "message": f"波形已保存到: {文件路径}\n采样点数: {波形数据['points']:,}\n格式: NPY"
+                    "message": f"波形已保存到: {文件路径}\n采样点数: {波形.points:,}\n格式: NPY"
                 }
         except Exception as e:
             return {"success": False, "message": f"保存失败: {str(e)}"}
@@ -136,4 +204,188 @@ class RealtimeCapture:
         except Exception as e:
             return {"success": False, "message": f"获取目录失败: {str(e)}"}
     
-
+    # ==================== 后台采集 ====================
+    
+    def 开始后台采集(self, 通道=1):
+        """
+        启动后台采集线程（已在运行时只切换通道）
+        
+        线程持续读取 NORM 模式波形并写入环形缓冲区，前端通过 获取最新帧 取最新完成的一帧，
+        采集与显示并行，帧率取决于两者中较慢的一方而不是两者之和
+        """
+        通道 = int(通道)
+        with self._帧锁:
+            if 通道 != self._采集通道:
+                self._采集通道 = 通道
+                self._最新帧序号 = -1
+        self._最近取帧时间 = time.monotonic()
+        self._取帧事件.set()
+        
+        if self._采集线程 is not None and self._采集线程.is_alive() and not self._停止事件.is_set():
+            return {"success": True, "message": "后台采集已在运行"}
+        
+        # 每个线程使用自己的停止事件：未能及时退出的旧线程（阻塞在示波器读取中）保持停止状态
+        self._停止事件 = threading.Event()
+        self._采集线程 = threading.Thread(target=self._采集循环, args=(self._停止事件,),
+                                         name='RealtimeCapture', daemon=True)
+        self._采集线程.start()
+        return {"success": True, "message": "后台采集已启动"}
+    
+    def 停止后台采集(self):
+        """停止后台采集线程"""
+        线程 = self._采集线程
+        if 线程 is None:
+            return {"success": True, "message": "后台采集未运行"}
+        
+        self._停止事件.set()
+        self._取帧事件.set()
+        线程.join(timeout=5.0)
+        with self._帧锁:
+            self._最新帧序号 = -1
+        if 线程.is_alive():
+            return {"success": False, "message": "后台采集线程未能在 5 秒内停止（正在等待示波器返回数据），读取完成后退出"}
+        
+        self._采集线程 = None
+        return {"success": True, "message": "后台采集已停止"}
+    
+    def 获取最新帧(self, 通道=None, 最大点数=None, 上一帧序号=None, 二进制=False):
+        """
+        获取环形缓冲区中最新完成的一帧
+        
+        Args:
+            通道: 期望的通道（与后台采集通道不同时切换通道）
+            最大点数: 抽取后的点数上限（None 表示不抽取）
+            上一帧序号: 前端已显示的帧序号，没有新帧时不返回数据
+            二进制: True 时 time/voltage 以 base64 编码返回（见 core.binary_transport）
+        
+        Returns:
+            dict: {"success": bool, "data": {...} 或 None, "frame_id": int, "capture_fps": float}
+        """
+        self._最近取帧时间 = time.monotonic()
+        self._取帧事件.set()
+        
+        if 通道 is not None and int(通道) != self._采集通道:
+            self.开始后台采集(通道)
+        
+        if self._采集线程 is None or not self._采集线程.is_alive():
+            return {"success": False, "message": "后台采集未运行"}
+        
+        with self._帧锁:
+            帧序号 = self._最新帧序号
+            # 设置变化后，变化前采集的帧不再返回
+            if 帧序号 >= 0 and self._环形信息[帧序号 % RING_BUFFER_FRAMES]['设置版本'] != self.osc.设置版本:
+                帧序号 = -1
+            
+            if 帧序号 < 0 or 帧序号 == 上一帧序号:
+                结果 = {"success": True, "data": None, "frame_id": 帧序号, "capture_fps": self._采集帧率}
+                if self._采集错误:
+                    结果["message"] = self._采集错误
+                return 结果
+            
+            槽位 = 帧序号 % RING_BUFFER_FRAMES
+            信息 = self._环形信息[槽位]
+            电压 = self._环形电压[槽位, :信息['points']].copy()
+        
+        时间 = 信息['x_origin'] + np.arange(len(电压)) * 信息['x_increment']
+        抽取时间, 电压 = 抽取波形(时间, 电压, 最大点数)
+        
+        if 二进制:
+            from modules.core.binary_transport import encode_array, encode_linear
+            # 未抽取时时间轴等间隔，只传起点和步长
+            if 抽取时间 is 时间:
+                时间数据 = encode_linear(信息['x_origin'], 信息['x_increment'], len(时间))
+            else:
+                时间数据 = encode_array(抽取时间, dtype='float64')
+            电压数据 = encode_array(电压, dtype='float32')
+        else:
+            时间数据 = 抽取时间.tolist()
+            电压数据 = 电压.tolist()
+        
+        数据 = {
+            "time": 时间数据,
+            "voltage": 电压数据,
+            "vScale": 信息['vScale'],
+            "vOffset": 信息['vOffset'],
+            "hScale": 信息['hScale'],
+            "points": 信息['points'],
+            "memoryDepth": 信息['memoryDepth'],
+            "sample_rate": 信息['sample_rate']
+        }
+        
+        return {"success": True, "data": 数据, "frame_id": 帧序号, "capture_fps": self._采集帧率}
+    
+    def _采集循环(self, 停止事件):
+        """后台采集线程：持续读取波形写入环形缓冲区，直到本线程的停止事件置位"""
+        上次时间 = time.monotonic()
+        
+        while not 停止事件.is_set():
+            # 前端长时间不取帧（切换到其他页面）时暂停采集
+            if time.monotonic() - self._最近取帧时间 > CONSUMER_IDLE_TIMEOUT:
+                self._取帧事件.clear()
+                self._取帧事件.wait(0.5)
+                上次时间 = time.monotonic()
+                continue
+            
+            if not self.osc.已连接:
+                self._采集错误 = "示波器未连接"
+                停止事件.wait(0.2)
+                continue
+            
+            通道 = self._采集通道
+            设置版本 = self.osc.设置版本
+            结果 = self.osc.采集NORM波形(通道)
+            
+            if 停止事件.is_set():
+                break
+            
+            if not 结果['success']:
+                self._采集错误 = 结果.get('message')
+                停止事件.wait(0.2)
+                continue
+            
+            波形 = 结果['waveform']
+            
+            # 采集期间设置发生变化或通道已切换，丢弃这一帧
+            if 设置版本 != self.osc.设置版本 or 通道 != self._采集通道:
+                continue
+            
+            self._写入环形缓冲区(波形, 通道, 设置版本)
+            self._采集错误 = None
+            
+            现在 = time.monotonic()
+            间隔 = 现在 - 上次时间
+            上次时间 = 现在
+            if 间隔 > 0:
+                # 指数平滑的采集帧率
+                self._采集帧率 = 0.8 * self._采集帧率 + 0.2 / 间隔 if self._采集帧率 else 1.0 / 间隔
+    
+    def _写入环形缓冲区(self, 波形, 通道, 设置版本):
+        """把一帧写入下一个槽位后再发布（发布前消费者看不到该槽位）"""
+        点数 = len(波形)
+        
+        if self._环形电压 is None or self._环形电压.shape[1] < 点数:
+            with self._帧锁:
+                self._环形电压 = np.empty((RING_BUFFER_FRAMES, 点数), dtype=np.float64)
+                self._最新帧序号 = -1
+        
+        帧序号 = self._最新帧序号 + 1
+        槽位 = 帧序号 % RING_BUFFER_FRAMES
+        波形.fill_voltage(self._环形电压[槽位, :点数])
+        
+        信息 = {
+            'points': 点数,
+            'x_increment': 波形.x_increment,
+            'x_origin': 波形.x_origin,
+            'vScale': 波形.v_scale,
+            'vOffset': 波形.v_offset,
+            'hScale': 波形.h_scale,
+            'memoryDepth': 波形.memory_depth,
+            'sample_rate': 波形.sample_rate,
+            '设置版本': 设置版本
+        }
+        
+        with self._帧锁:
+            if 通道 != self._采集通道:
+                return
+            self._环形信息[槽位] = 信息
+            self._最新帧序号 = 帧序号
@@ -10,19 +10,37 @@ import numpy as np
 import h5py
 from datetime import datetime
 
+from ..core.db_pool import get_pool
+from ..core.waveform_pyramid import write_pyramid
+
 
 class ExperimentDataManager:
     """实验数据管理类"""
     
+    # 每个方向最新一次拟合结果（窗口函数，代替逐个方向查询）
+    _最新拟合结果SQL = '''
+        WITH 最新拟合 AS (
+            SELECT 方向ID, 斜率, 截距, R方,
+                   ROW_NUMBER() OVER (PARTITION BY 方向ID ORDER BY 计算时间 DESC, id DESC) AS 序号
+            FROM fitting_results
+        )
+    '''
+    
     def __init__(self, db_path='data/experiments.db'):
         """初始化数据库连接"""
         # 确保data目录存在
         os.makedirs(os.path.dirname(db_path) if os.path.dirname(db_path) else 'data', exist_ok=True)
         
         self.db_path = db_path
-        self.conn = sqlite3.connect(db_path, check_same_thread=False)
-        self._初始化数据库()
-        self._清理不完整数据()
+        
+        # 每个线程使用连接池中自己的连接，API 调用之间复用；建表和清理每个进程只执行一次
+        self._pool = get_pool(db_path)
+        self._pool.run_once('calibration_schema', lambda conn: (self._初始化数据库(), self._清理不完整数据()))
+    
+    @property
+    def conn(self):
+        """当前线程的数据库连接"""
+        return self._pool.connection()
     
     def _初始化数据库(self):
         """创建数据库表结构"""
@@ -80,6 +98,16 @@ class ExperimentDataManager:
             )
         ''')
         
+        # 索引：test_directions(实验ID) 和 stress_data(方向ID) 已由 UNIQUE 约束的自动索引覆盖
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_fitting_results_direction
+            ON fitting_results(方向ID, 计算时间)
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_experiments_created
+            ON experiments(创建时间)
+        ''')
+        
         self.conn.commit()
     
     def _清理不完整数据(self):
@@ -230,7 +258,7 @@ class ExperimentDataManager:
         except Exception as e:
             return {"success": False, "exists": False, "message": f"检查失败: {str(e)}"}
     
-    def 保存基准波形(self, 实验ID, 方向名称, 波形数据, 时间轴, 降噪配置=None, 带通滤波配置=None):
+    def 保存基准波形(self, 实验ID, 方向名称, 波形数据, 时间轴, 降噪配置=None, 带通滤波配置=None, 门控配置=None):
         """
         保存基准波形到HDF5
         
@@ -241,6 +269,7 @@ class ExperimentDataManager:
             时间轴: 时间轴数组
             降噪配置: 降噪配置字典（可选）
             带通滤波配置: 带通滤波配置字典（可选）
+            门控配置: 回波门控配置字典（可选）
         """
         方向ID = self.获取方向ID(实验ID, 方向名称)
         if not 方向ID:
@@ -252,8 +281,11 @@ class ExperimentDataManager:
         
         # 保存到HDF5
         with h5py.File(文件路径, 'w') as f:
-            f.create_dataset('waveform', data=np.array(波形数据), compression='gzip')
-            f.create_dataset('time', data=np.array(时间轴), compression='gzip')
+            波形数组 = np.array(波形数据)
+            时间数组 = np.array(时间轴)
+            f.create_dataset('waveform', data=波形数组, compression='gzip')
+            f.create_dataset('time', data=时间数组, compression='gzip')
+            write_pyramid(f, 波形数组, 时间数组, source='waveform')
             f.attrs['采集时间'] = datetime.now().isoformat()
             
             # 🆕 保存信号处理配置
@@ -271,6 +303,17 @@ class ExperimentDataManager:
                 bandpass_group = config_group.create_group('bandpass')
                 for key, value in 带通滤波配置.items():
                     bandpass_group.attrs[key] = value
+            
+            if 门控配置:
+                if 'signal_processing_config' not in f:
+                    config_group = f.create_group('signal_processing_config')
+                else:
+                    config_group = f['signal_processing_config']
+                gate_group = config_group.create_group('gate')
+                for key, value in 门控配置.items():
+                    # HDF5 属性不支持 None（手动门控未设置时间窗）
+                    if value is not None:
+                        gate_group.attrs[key] = value
         
         # 更新数据库
         cursor = self.conn.cursor()
@@ -282,7 +325,7 @@ class ExperimentDataManager:
         
         return {"success": True, "文件路径": 文件路径}
     
-    def 保存应力波形(self, 实验ID, 方向名称, 应力值, 波形数据, 时间轴, 降噪配置=None, 带通滤波配置=None):
+    def 保存应力波形(self, 实验ID, 方向名称, 应力值, 波形数据, 时间轴, 降噪配置=None, 带通滤波配置=None, 门控配置=None):
         """
         保存应力波形到HDF5
         
@@ -294,6 +337,7 @@ class ExperimentDataManager:
             时间轴: 时间轴数组
             降噪配置: 降噪配置字典（可选）
             带通滤波配置: 带通滤波配置字典（可选）
+            门控配置: 回波门控配置字典（可选）
         """
         方向ID = self.获取方向ID(实验ID, 方向名称)
         if not 方向ID:
@@ -305,8 +349,11 @@ class ExperimentDataManager:
         
         # 保存到HDF5
         with h5py.File(文件路径, 'w') as f:
-            f.create_dataset('waveform', data=np.array(波形数据), compression='gzip')
-            f.create_dataset('time', data=np.array(时间轴), compression='gzip')
+            波形数组 = np.array(波形数据)
+            时间数组 = np.array(时间轴)
+            f.create_dataset('waveform', data=波形数组, compression='gzip')
+            f.create_dataset('time', data=时间数组, compression='gzip')
+            write_pyramid(f, 波形数组, 时间数组, source='waveform')
             f.attrs['应力值'] = 应力值
             f.attrs['采集时间'] = datetime.now().isoformat()
             
@@ -325,6 +372,17 @@ class ExperimentDataManager:
                 bandpass_group = config_group.create_group('bandpass')
                 for key, value in 带通滤波配置.items():
                     bandpass_group.attrs[key] = value
+            
+            if 门控配置:
+                if 'signal_processing_config' not in f:
+                    config_group = f.create_group('signal_processing_config')
+                else:
+                    config_group = f['signal_processing_config']
+                gate_group = config_group.create_group('gate')
+                for key, value in 门控配置.items():
+                    # HDF5 属性不支持 None（手动门控未设置时间窗）
+                    if value is not None:
+                        gate_group.attrs[key] = value
         
         # 保存到数据库
         cursor = self.conn.cursor()
@@ -380,7 +438,7 @@ class ExperimentDataManager:
             文件路径: HDF5文件路径
         
         Returns:
-            dict: {"success": bool, "denoise_config": dict, "bandpass_config": dict}
+            dict: {"success": bool, "denoise_config": dict, "bandpass_config": dict, "gate_config": dict}
         """
         if not os.path.exists(文件路径):
             return {"success": False, "message": "文件不存在"}
@@ -389,6 +447,7 @@ class ExperimentDataManager:
             with h5py.File(文件路径, 'r') as f:
                 denoise_config = None
                 bandpass_config = None
+                gate_config = None
                 
                 if 'signal_processing_config' in f:
                     config_group = f['signal_processing_config']
@@ -414,11 +473,23 @@ class ExperimentDataManager:
                             if hasattr(value, 'item'):
                                 value = value.item()
                             bandpass_config[key] = value
+                    
+                    # 加载回波门控配置
+                    if 'gate' in config_group:
+                        gate_group = config_group['gate']
+                        gate_config = {}
+                        for key in gate_group.attrs:
+                            value = gate_group.attrs[key]
+                            # 处理numpy类型
+                            if hasattr(value, 'item'):
+                                value = value.item()
+                            gate_config[key] = value
                 
                 return {
                     "success": True,
                     "denoise_config": denoise_config,
-                    "bandpass_config": bandpass_config
+                    "bandpass_config": bandpass_config,
+                    "gate_config": gate_config
                 }
         except Exception as e:
             return {"success": False, "message": f"加载配置失败: {str(e)}"}
@@ -587,9 +658,12 @@ class ExperimentDataManager:
             return {"success": False, "message": f"删除失败: {str(e)}"}
     
     def 关闭(self):
-        """关闭数据库连接"""
-        if self.conn:
-            self.conn.close()
+        """
+        结束本次使用：提交未完成的更改
+        
+        连接由连接池管理，在后续 API 调用中复用，程序退出时统一关闭
+        """
+        self.conn.commit()
     
     def 重置方向(self, 实验ID, 方向名称):
         """
@@ -925,54 +999,46 @@ class ExperimentDataManager:
             WHERE 实验ID = ?
             ORDER BY id
         ''', (实验ID,))
+        方向行列表 = cursor.fetchall()
+        
+        # 一次查询该实验所有方向的应力数据
+        cursor.execute('''
+            SELECT sd.方向ID, sd.应力值, sd.时间差, sd.波形路径
+            FROM stress_data sd
+            JOIN test_directions d ON d.id = sd.方向ID
+            WHERE d.实验ID = ?
+            ORDER BY sd.方向ID, sd.应力值
+        ''', (实验ID,))
+        应力数据表 = {}
+        for 方向ID, 应力值, 时间差, 波形路径 in cursor.fetchall():
+            应力数据表.setdefault(方向ID, []).append({
+                '应力值': 应力值,
+                '时间差': 时间差,
+                '波形路径': 波形路径
+            })
+        
+        # 一次查询该实验所有方向的拟合结果，每个方向取最新一条
+        cursor.execute('''
+            SELECT f.方向ID, f.斜率, f.截距, f.R方
+            FROM fitting_results f
+            JOIN test_directions d ON d.id = f.方向ID
+            WHERE d.实验ID = ?
+            ORDER BY f.方向ID, f.计算时间 DESC, f.id DESC
+        ''', (实验ID,))
+        拟合结果表 = {}
+        for 方向ID, 斜率, 截距, R方 in cursor.fetchall():
+            拟合结果表.setdefault(方向ID, {'斜率': 斜率, '截距': 截距, 'R方': R方})
         
         测试方向列表 = []
-        for row in cursor.fetchall():
-            方向ID, 方向名称, 应力范围起始, 应力范围结束, 应力步长, 基准波形路径 = row
-            
-            # 获取该方向的所有应力数据
-            cursor.execute('''
-                SELECT 应力值, 时间差, 波形路径
-                FROM stress_data
-                WHERE 方向ID = ?
-                ORDER BY 应力值
-            ''', (方向ID,))
-            
-            应力数据 = []
-            for data_row in cursor.fetchall():
-                应力值, 时间差, 波形路径 = data_row
-                应力数据.append({
-                    '应力值': 应力值,
-                    '时间差': 时间差,
-                    '波形路径': 波形路径
-                })
-            
-            # 获取拟合结果
-            cursor.execute('''
-                SELECT 斜率, 截距, R方
-                FROM fitting_results
-                WHERE 方向ID = ?
-                ORDER BY 计算时间 DESC
-                LIMIT 1
-            ''', (方向ID,))
-            
-            拟合结果 = None
-            fit_row = cursor.fetchone()
-            if fit_row:
-                拟合结果 = {
-                    '斜率': fit_row[0],
-                    '截距': fit_row[1],
-                    'R方': fit_row[2]
-                }
-            
+        for 方向ID, 方向名称, 应力范围起始, 应力范围结束, 应力步长, 基准波形路径 in 方向行列表:
             测试方向列表.append({
                 '方向ID': 方向ID,
                 '方向名称': 方向名称,
                 '应力范围': [应力范围起始, 应力范围结束],
                 '应力步长': 应力步长,
                 '基准波形路径': 基准波形路径,
-                '应力数据': 应力数据,
-                '拟合结果': 拟合结果
+                '应力数据': 应力数据表.get(方向ID, []),
+                '拟合结果': 拟合结果表.get(方向ID)
             })
         
         return {
@@ -981,6 +1047,69 @@ class ExperimentDataManager:
             '测试方向列表': 测试方向列表
         }
     
+    def _查询实验列表(self, 实验ID列表=None):
+        """
+        一次 JOIN 查询实验、有基准波形的方向和最新拟合结果，组装为嵌套结构
+        
+        参数:
+            实验ID列表: 只查询这些实验（None 表示全部）
+        
+        返回:
+            list: 与 获取所有实验列表 相同的结构，按创建时间倒序
+        """
+        cursor = self.conn.cursor()
+        
+        条件 = ''
+        参数 = ()
+        if 实验ID列表 is not None:
+            if not 实验ID列表:
+                return []
+            条件 = f"AND e.id IN ({', '.join('?' * len(实验ID列表))})"
+            参数 = tuple(实验ID列表)
+        
+        cursor.execute(f'''
+            {self._最新拟合结果SQL}
+            SELECT e.id, e.材料名称, e.创建时间, d.id, d.方向名称, f.斜率, f.截距, f.R方
+            FROM experiments e
+            JOIN test_directions d ON d.实验ID = e.id
+            LEFT JOIN 最新拟合 f ON f.方向ID = d.id AND f.序号 = 1
+            WHERE d.基准波形路径 IS NOT NULL AND d.基准波形路径 != '' {条件}
+            ORDER BY e.创建时间 DESC, e.id DESC, d.id
+        ''', 参数)
+        
+        实验表 = {}
+        for 实验ID, 材料名称, 创建时间, 方向ID, 方向名称, 斜率, 截距, R方 in cursor.fetchall():
+            实验 = 实验表.get(实验ID)
+            if 实验 is None:
+                实验 = 实验表[实验ID] = {
+                    '实验ID': 实验ID,
+                    '材料名称': 材料名称,
+                    '创建时间': 创建时间,
+                    'directions': []
+                }
+            
+            拟合结果 = None
+            if 斜率 is not None:
+                # 计算应力系数 K (MPa/ns)
+                # 斜率单位是 s/MPa，需要转换为 ns/MPa，然后取倒数得到 MPa/ns
+                k = 1.0 / (斜率 * 1e9) if 斜率 != 0 else 0
+                
+                拟合结果 = {
+                    'k': k,  # 应力系数（保留正负号，复合材料可能为负）
+                    'slope': 斜率,
+                    'intercept': 截距,
+                    'r_squared': R方
+                }
+            
+            实验['directions'].append({
+                '方向ID': 方向ID,
+                '方向名称': 方向名称,
+                '拟合结果': 拟合结果
+            })
+        
+        # 只包含有方向数据的实验（JOIN 已保证）
+        return list(实验表.values())
+    
     def 获取所有实验列表(self):
         """
         获取所有实验列表（嵌套结构，包含方向和拟合结果）
@@ -988,75 +1117,50 @@ class ExperimentDataManager:
         返回:
             list: 实验列表 [{实验ID, 材料名称, 创建时间, directions: [{方向名称, 拟合结果}]}]
         """
+        return self._查询实验列表()
+    
+    def 获取实验列表分页(self, 页码=1, 每页数量=20, 仅已拟合=False):
+        """
+        分页获取实验列表（结构同 获取所有实验列表），用于实验选择界面
+        
+        参数:
+            页码: 从 1 开始
+            每页数量: 每页实验数
+            仅已拟合: True 时只统计和返回至少有一个方向已拟合的实验
+        
+        返回:
+            dict: {"实验列表": [...], "总数": int, "页码": int, "每页数量": int, "总页数": int}
+        """
+        页码 = max(int(页码), 1)
+        每页数量 = max(int(每页数量), 1)
         cursor = self.conn.cursor()
         
-        # 获取所有实验
-        cursor.execute('''
-            SELECT id, 材料名称, 创建时间
-            FROM experiments
-            ORDER BY 创建时间 DESC
-        ''')
+        拟合条件 = 'AND EXISTS (SELECT 1 FROM fitting_results f WHERE f.方向ID = d.id)' if 仅已拟合 else ''
+        筛选 = f'''
+            FROM experiments e
+            WHERE EXISTS (
+                SELECT 1 FROM test_directions d
+                WHERE d.实验ID = e.id AND d.基准波形路径 IS NOT NULL AND d.基准波形路径 != '' {拟合条件}
+            )
+        '''
         
-        实验列表 = []
-        for exp_row in cursor.fetchall():
-            实验ID, 材料名称, 创建时间 = exp_row
-            
-            # 获取该实验的所有方向
-            cursor.execute('''
-                SELECT id, 方向名称, 基准波形路径
-                FROM test_directions
-                WHERE 实验ID = ?
-                ORDER BY id
-            ''', (实验ID,))
-            
-            directions = []
-            for dir_row in cursor.fetchall():
-                方向ID, 方向名称, 基准波形路径 = dir_row
-                
-                # 只包含有基准波形的方向
-                if not 基准波形路径:
-                    continue
-                
-                # 获取拟合结果
-                cursor.execute('''
-                    SELECT 斜率, 截距, R方
-                    FROM fitting_results
-                    WHERE 方向ID = ?
-                    ORDER BY 计算时间 DESC
-                    LIMIT 1
-                ''', (方向ID,))
-                
-                拟合结果 = None
-                fit_row = cursor.fetchone()
-                if fit_row:
-                    斜率, 截距, R方 = fit_row
-                    # 计算应力系数 K (MPa/ns)
-                    # 斜率单位是 s/MPa，需要转换为 ns/MPa，然后取倒数得到 MPa/ns
-                    k = 1.0 / (斜率 * 1e9) if 斜率 != 0 else 0
-                    
-                    拟合结果 = {
-                        'k': k,  # 应力系数（保留正负号，复合材料可能为负）
-                        'slope': 斜率,
-                        'intercept': 截距,
-                        'r_squared': R方
-                    }
-                
-                directions.append({
-                    '方向ID': 方向ID,
-                    '方向名称': 方向名称,
-                    '拟合结果': 拟合结果
-                })
-            
-            # 只添加有方向数据的实验
-            if directions:
-                实验列表.append({
-                    '实验ID': 实验ID,
-                    '材料名称': 材料名称,
-                    '创建时间': 创建时间,
-                    'directions': directions
-                })
+        cursor.execute(f'SELECT COUNT(*) {筛选}')
+        总数 = cursor.fetchone()[0]
         
-        return 实验列表
+        cursor.execute(f'''
+            SELECT e.id {筛选}
+            ORDER BY e.创建时间 DESC, e.id DESC
+            LIMIT ? OFFSET ?
+        ''', (每页数量, (页码 - 1) * 每页数量))
+        实验ID列表 = [row[0] for row in cursor.fetchall()]
+        
+        return {
+            '实验列表': self._查询实验列表(实验ID列表),
+            '总数': 总数,
+            '页码': 页码,
+            '每页数量': 每页数量,
+            '总页数': (总数 + 每页数量 - 1) // 每页数量
+        }
     
     def 获取所有方向列表(self):
         """
@@ -1067,7 +1171,7 @@ class ExperimentDataManager:
         """
         cursor = self.conn.cursor()
         
-        # 获取所有方向及其实验信息
+        # 获取所有方向及其实验信息和数据点数（一次 GROUP BY 查询）
         cursor.execute('''
             SELECT 
                 e.id AS 实验ID,
@@ -1075,22 +1179,18 @@ class ExperimentDataManager:
                 e.创建时间,
                 d.id AS 方向ID,
                 d.方向名称,
-                d.基准波形路径
+                COUNT(sd.id) AS 数据点数
             FROM experiments e
             JOIN test_directions d ON e.id = d.实验ID
+            LEFT JOIN stress_data sd ON sd.方向ID = d.id
             WHERE d.基准波形路径 IS NOT NULL
+            GROUP BY d.id
             ORDER BY e.创建时间 DESC, d.id
         ''')
         
         方向列表 = []
         for row in cursor.fetchall():
-            实验ID, 材料名称, 创建时间, 方向ID, 方向名称, 基准波形路径 = row
-            
-            # 获取该方向的数据点数
-            cursor.execute('''
-                SELECT COUNT(*) FROM stress_data WHERE 方向ID = ?
-            ''', (方向ID,))
-            数据点数 = cursor.fetchone()[0]
+            实验ID, 材料名称, 创建时间, 方向ID, 方向名称, 数据点数 = row
             
             方向列表.append({
                 '实验ID': 实验ID,
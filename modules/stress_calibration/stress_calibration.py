@@ -6,6 +6,9 @@
 import numpy as np
 from datetime import datetime
 
+from ..core.echo_gate import DEFAULT_GATE_CONFIG, get_gate_time_window
+from ..core.signal_processing import DEFAULT_SUBSAMPLE_ESTIMATOR, SUBSAMPLE_ESTIMATORS
+
 
 class StressCalibration:
     """应力系数标定功能类"""
@@ -35,6 +38,12 @@ class StressCalibration:
             'highcut': 3.5,  # MHz
             'order': 6
         }
+        
+        # 回波门控配置（互相关前截取目标回波窗口）
+        self.gate_config = dict(DEFAULT_GATE_CONFIG)
+        
+        # 亚采样点时延估计方法（见 signal_processing.SUBSAMPLE_ESTIMATORS）
+        self.delay_estimator = DEFAULT_SUBSAMPLE_ESTIMATOR
     
     def set_denoise_config(self, config):
         """
@@ -80,6 +89,52 @@ class StressCalibration:
         """
         return {"success": True, "data": self.bandpass_config}
     
+    def set_gate_config(self, config):
+        """
+        设置回波门控配置
+        
+        Args:
+            config: 门控配置字典
+            
+        Returns:
+            dict: 操作结果
+        """
+        self.gate_config.update(config)
+        return {"success": True, "message": "回波门控配置已更新"}
+    
+    def get_gate_config(self):
+        """
+        获取当前回波门控配置
+        
+        Returns:
+            dict: 回波门控配置
+        """
+        return {"success": True, "data": self.gate_config}
+    
+    def set_delay_estimator(self, method):
+        """
+        设置亚采样点时延估计方法
+        
+        Args:
+            method: 估计方法名称（parabolic/gaussian/cosine/upsampled_fft/phase_slope）
+            
+        Returns:
+            dict: 操作结果
+        """
+        if method not in SUBSAMPLE_ESTIMATORS:
+            return {"success": False, "message": f"未知的时延估计方法: {method}"}
+        self.delay_estimator = method
+        return {"success": True, "message": "时延估计方法已更新"}
+    
+    def get_delay_estimator(self):
+        """
+        获取当前亚采样点时延估计方法
+        
+        Returns:
+            dict: {"success": True, "data": {"method": str, "available": list}}
+        """
+        return {"success": True, "data": {"method": self.delay_estimator, "available": list(SUBSAMPLE_ESTIMATORS)}}
+    
     def 计算互相关声时差(self, 基准波形, 测量波形, 采样率, 基准时间=None, 测量时间=None):
         """
         计算两个波形之间的声时差（使用互相关算法）
@@ -93,7 +148,7 @@ class StressCalibration:
             测量时间: 测量波形的时间数组（可选）
         """
         try:
-            from modules.core.signal_processing import calculate_cross_correlation, find_peak_with_parabolic_interpolation
+            from modules.core.signal_processing import calculate_cross_correlation, find_peak_subsample
             
             基准 = np.array(基准波形)
             测量 = np.array(测量波形)
@@ -108,6 +163,12 @@ class StressCalibration:
                     t_start = max(基准_time[0], 测量_time[0])
                     t_end = min(基准_time[-1], 测量_time[-1])
                     
+                    # 回波门控：只保留基准波形中目标回波附近的时间窗
+                    门控窗口 = get_gate_time_window(基准_time, 基准, 采样率, self.gate_config)
+                    if 门控窗口 is not None:
+                        t_start = max(t_start, 门控窗口[0])
+                        t_end = min(t_end, 门控窗口[1])
+                    
                     if t_start < t_end:
                         # 在基准波形中找到对应的索引范围
                         基准_mask = (基准_time >= t_start) & (基准_time <= t_end)
@@ -129,11 +190,11 @@ class StressCalibration:
             # 使用共享的互相关函数（FFT加速，mode='full'）
             相关, lags = calculate_cross_correlation(基准, 测量)
             
-            # 找到峰值位置（使用抛物线插值获得亚采样点精度）
-            精确峰值索引, 峰值相关性 = find_peak_with_parabolic_interpolation(相关)
+            # 找到峰值位置（按配置的估计方法获得亚采样点精度）
+            精确峰值索引, 峰值相关性 = find_peak_subsample(相关, self.delay_estimator)
             峰值索引 = int(精确峰值索引)  # 整数索引用于获取对应的lag值
             
-            # 计算精确的滞后值（使用抛物线插值的小数部分）
+            # 计算精确的滞后值（使用亚采样点估计的小数部分）
             精确滞后 = lags[峰值索引] + (精确峰值索引 - 峰值索引)
             
             # 转换为时间偏移（注意：负值表示测量信号相对于基准信号提前）
@@ -410,12 +471,12 @@ class StressCalibration:
                 highcut = self.bandpass_config.get('highcut', 3.5) * 1e6
                 order = self.bandpass_config.get('order', 6)
                 
-                滤波结果 = signal_processing.apply_bandpass_filter(
+                滤波结果 = signal_processing.apply_bandpass_filter_array(
                     处理后波形, 采样率, lowcut, highcut, order
                 )
                 
                 if 滤波结果['success']:
-                    处理后波形 = np.array(滤波结果['filtered'])
+                    处理后波形 = 滤波结果['filtered']
             
             # 2. 小波降噪（如果启用）- 从 self.denoise_config 读取
             if self.denoise_config.get('enabled', True):
@@ -437,7 +498,8 @@ class StressCalibration:
                 处理后波形,
                 时间数据,
                 self.denoise_config,
-                self.bandpass_config
+                self.bandpass_config,
+                self.gate_config
             )
             
             return 保存结果
@@ -492,12 +554,12 @@ class StressCalibration:
                 highcut = self.bandpass_config.get('highcut', 3.5) * 1e6
                 order = self.bandpass_config.get('order', 6)
                 
-                滤波结果 = signal_processing.apply_bandpass_filter(
+                滤波结果 = signal_processing.apply_bandpass_filter_array(
                     处理后波形, 采样率, lowcut, highcut, order
                 )
                 
                 if 滤波结果['success']:
-                    处理后波形 = np.array(滤波结果['filtered'])
+                    处理后波形 = 滤波结果['filtered']
             
             # 2. 小波降噪（如果启用）- 从 self.denoise_config 读取
             if self.denoise_config.get('enabled', True):
@@ -523,7 +585,8 @@ class StressCalibration:
                 处理后波形,
                 时间数据,
                 self.denoise_config,
-                self.bandpass_config
+                self.bandpass_config,
+                self.gate_config
             )
             
             if not 保存结果['success']:
@@ -644,7 +707,7 @@ class StressCalibration:
             方向名称: 方向名称
         
         Returns:
-            dict: {"success": bool, "data": {"denoise_config": dict, "bandpass_config": dict}}
+            dict: {"success": bool, "data": {"denoise_config": dict, "bandpass_config": dict, "gate_config": dict}}
         """
         try:
             dm = self._获取数据管理器()
@@ -667,11 +730,15 @@ class StressCalibration:
             if 配置结果.get('bandpass_config'):
                 self.bandpass_config.update(配置结果['bandpass_config'])
             
+            if 配置结果.get('gate_config'):
+                self.gate_config.update(配置结果['gate_config'])
+            
             return {
                 "success": True,
                 "data": {
                     "denoise_config": self.denoise_config,
-                    "bandpass_config": self.bandpass_config
+                    "bandpass_config": self.bandpass_config,
+                    "gate_config": self.gate_config
                 }
             }
         except Exception as e:
@@ -7,7 +7,7 @@ from .field_database import FieldDatabaseManager
 from .field_hdf5 import FieldExperimentHDF5
 from .shape_utils import ShapeUtils
 from .point_generator import PointGenerator
-from .interpolation import StressFieldInterpolation
+from .interpolation import StressFieldInterpolation, IncrementalFieldInterpolator
 from .contour_generator import ContourGenerator
 from .field_experiment import FieldExperiment
 from .field_capture import FieldCapture
@@ -23,6 +23,7 @@ __all__ = [
     'ShapeUtils',
     'PointGenerator',
     'StressFieldInterpolation',
+    'IncrementalFieldInterpolator',
     'ContourGenerator',
     
     # 业务逻辑
@@ -8,6 +8,9 @@ from typing import Dict, List, Any, Tuple, Optional
 import os
 from datetime import datetime
 
+from .grid_payload import decode_grid, decode_layer
+from ..core.binary_transport import encode_array
+
 # 尝试导入matplotlib
 try:
     import matplotlib
@@ -38,6 +41,10 @@ class ContourGenerator:
     # 默认色标：红(拉应力) -> 绿(零) -> 蓝(压应力)
     DEFAULT_COLORMAP = 'RdYlBu'
     
+    # 不确定度叠加层：颜色（白色"雾"覆盖不可靠区域）和最大不透明度
+    UNCERTAINTY_COLOR = (255, 255, 255)
+    UNCERTAINTY_MAX_ALPHA = 0.75
+    
     def __init__(self, exp_id: str):
         """
         初始化云图生成器
@@ -93,7 +100,7 @@ class ContourGenerator:
         生成云图数据
         
         Args:
-            grid_data: 插值网格数据 {xi, yi, zi}
+            grid_data: 插值网格数据（grid_payload 格式，或旧的 {xi, yi, zi} 2-D 列表）
             shape_config: 形状配置
             points: 测点列表 (可选，用于叠加显示)
             colormap: 色标名称
@@ -102,19 +109,15 @@ class ContourGenerator:
         Returns:
             dict: {
                 "success": bool,
-                "image_data": str (base64),
+                "colors": RGBA uint8 编码数组（按行展开）,
+                "shape": [ny, nx, 4],
                 "colorbar": {...},
                 "stats": {...}
             }
         """
         try:
-            xi = np.array(grid_data['xi'])
-            yi = np.array(grid_data['yi'])
-            
-            # 🆕 处理zi中的None值（从JSON转换来的）
-            zi_raw = grid_data['zi']
-            # 将None转换为np.nan
-            zi = np.array([[np.nan if v is None else v for v in row] for row in zi_raw], dtype=float)
+            # 网格传输格式或旧的 2-D 列表（None 为 NaN）
+            xi, yi, zi = decode_grid(grid_data)
             
             # 计算统计信息
             valid_z = zi[~np.isnan(zi)]
@@ -160,14 +163,15 @@ class ContourGenerator:
             # 更新缓存
             self.cache = {
                 'grid': grid_data,
-                'colors': colors_uint8.tolist(),
+                'colors': colors_uint8,
                 'stats': stats
             }
             self.last_stats = stats
             
             return {
                 "success": True,
-                "colors": colors_uint8.tolist(),
+                "colors": encode_array(colors_uint8.ravel(), dtype='uint8'),
+                "shape": list(colors_uint8.shape),
                 "stats": stats,
                 "colorbar": {
                     "vmin": vmin,
@@ -218,7 +222,8 @@ class ContourGenerator:
                             show_colorbar: bool = True,
                             show_contour_lines: bool = True,
                             contour_levels: int = 8,
-                            title: str = None) -> Dict[str, Any]:
+                            title: str = None,
+                            show_uncertainty: bool = False) -> Dict[str, Any]:
         """
         导出云图图片
         
@@ -236,6 +241,7 @@ class ContourGenerator:
             show_contour_lines: 是否显示等高线和数字标签
             contour_levels: 等高线数量
             title: 图片标题
+            show_uncertainty: 是否叠加不确定度（需要 grid_data 含 uncertainty）
         
         Returns:
             dict: {"success": bool, "file_path": str}
@@ -250,13 +256,8 @@ class ContourGenerator:
             # 配置中文字体支持
             self._configure_chinese_font()
             
-            xi = np.array(grid_data['xi'])
-            yi = np.array(grid_data['yi'])
-            
-            # 🆕 处理zi中的None值（从JSON转换来的）
-            zi_raw = grid_data['zi']
-            # 将None转换为np.nan
-            zi = np.array([[np.nan if v is None else v for v in row] for row in zi_raw], dtype=float)
+            # 网格传输格式或旧的 2-D 列表（None 为 NaN）
+            xi, yi, zi = decode_grid(grid_data)
             
             # 计算色标范围
             valid_z = zi[~np.isnan(zi)]
@@ -272,6 +273,11 @@ class ContourGenerator:
             cmap_name = self.COLORMAPS.get(colormap, self.COLORMAPS[self.DEFAULT_COLORMAP])
             im = ax.pcolormesh(xi, yi, zi, cmap=cmap_name, vmin=vmin, vmax=vmax, shading='auto')
             
+            # 叠加不确定度（白色半透明，越不可靠越白）
+            uncertainty = decode_layer(grid_data, 'uncertainty') if show_uncertainty else None
+            if uncertainty is not None:
+                self._draw_uncertainty_overlay(ax, xi, yi, uncertainty)
+            
             # 绘制等高线和数字标签
             if show_contour_lines:
                 self._draw_contour_lines_with_labels(ax, xi, yi, zi, vmin, vmax, contour_levels)
@@ -366,6 +372,19 @@ class ContourGenerator:
         except Exception as e:
             print(f"绘制等高线失败: {str(e)}")
     
+    def _draw_uncertainty_overlay(self, ax, xi: np.ndarray, yi: np.ndarray, uncertainty: np.ndarray):
+        """在图上叠加不确定度（透明 -> 白色，最大不透明度 UNCERTAINTY_MAX_ALPHA）"""
+        valid = uncertainty[~np.isnan(uncertainty)]
+        if len(valid) == 0:
+            return
+        
+        r, g, b = (c / 255 for c in self.UNCERTAINTY_COLOR)
+        cmap = mcolors.LinearSegmentedColormap.from_list(
+            'uncertainty', [(r, g, b, 0.0), (r, g, b, self.UNCERTAINTY_MAX_ALPHA)]
+        )
+        ax.pcolormesh(xi, yi, np.ma.masked_invalid(uncertainty), cmap=cmap,
+                      vmin=0, vmax=float(np.max(valid)) + 1e-10, shading='auto')
+    
     def _draw_shape_outline(self, ax, shape_config: Dict[str, Any]):
         """在图上绘制形状轮廓"""
         shape_type = shape_config.get('type', 'rectangle')
@@ -460,7 +479,7 @@ class ContourGenerator:
         生成等高线数据
         
         Args:
-            grid_data: 插值网格数据 {xi, yi, zi}
+            grid_data: 插值网格数据（grid_payload 格式，或旧的 {xi, yi, zi} 2-D 列表）
             levels: 等高线数量（默认8条）
         
         Returns:
@@ -469,13 +488,8 @@ class ContourGenerator:
         try:
             from .interpolation import StressFieldInterpolation
             
-            xi = np.array(grid_data['xi'])
-            yi = np.array(grid_data['yi'])
-            
-            # 🆕 处理zi中的None值（从JSON转换来的）
-            zi_raw = grid_data['zi']
-            # 将None转换为np.nan
-            zi = np.array([[np.nan if v is None else v for v in row] for row in zi_raw], dtype=float)
+            # 网格传输格式或旧的 2-D 列表（None 为 NaN）
+            xi, yi, zi = decode_grid(grid_data)
             
             # 调用插值模块的等高线生成函数
             result = StressFieldInterpolation.generate_contour_lines(zi, xi, yi, levels=levels)
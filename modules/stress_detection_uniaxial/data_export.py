@@ -923,15 +923,16 @@ class DataExporter:
                         baseline_grp.create_dataset('time', data=wf['time'], compression='gzip')
                         baseline_grp.create_dataset('voltage', data=wf['voltage'], compression='gzip')
                     
-                    # 复制测点波形
-                    for point in points:
-                        if point.get('status') == 'measured':
-                            wf_result = source_hdf5.load_point_waveform(point['point_index'])
-                            if wf_result['success']:
-                                point_grp = waveforms_grp.create_group(f"point_{point['point_index']:03d}")
-                                wf = wf_result['data']['waveform']
-                                point_grp.create_dataset('time', data=wf['time'], compression='gzip')
-                                point_grp.create_dataset('voltage', data=wf['voltage'], compression='gzip')
+                    # 复制测点波形（一次打开源文件批量读取）
+                    measured_ids = [p['point_index'] for p in points if p.get('status') == 'measured']
+                    bulk_result = source_hdf5.load_all_waveforms(measured_ids)
+                    if bulk_result['success']:
+                        bulk = bulk_result['data']
+                        for i, point_index in enumerate(bulk['point_ids']):
+                            point_grp = waveforms_grp.create_group(f"point_{int(point_index):03d}")
+                            wf_time = bulk['time'] if bulk['shared_time'] else bulk['time'][i]
+                            point_grp.create_dataset('time', data=wf_time, compression='gzip')
+                            point_grp.create_dataset('voltage', data=bulk['voltage'][i], compression='gzip')
             
             return {
                 "success": True,
@@ -3,12 +3,17 @@
 负责波形采集控制、降噪处理、质量评估、基准波形管理
 """
 
+import os
+import threading
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from typing import Dict, List, Any, Optional, Tuple
 
 from .field_database import FieldDatabaseManager
 from .field_hdf5 import FieldExperimentHDF5
+from ..core.echo_gate import DEFAULT_GATE_CONFIG, get_gate_time_window
+from ..core.signal_processing import DEFAULT_SUBSAMPLE_ESTIMATOR, SUBSAMPLE_ESTIMATORS
 
 
 class FieldCapture:
@@ -31,6 +36,15 @@ class FieldCapture:
     # 相邻点应力差异阈值 (MPa)
     NEIGHBOR_STRESS_DIFF = 200
     
+    # 互相关滞后搜索窗口 (ns)，取时间差有效范围的2倍，超范围的结果仍能被检出并标记
+    CORRELATION_MAX_SHIFT_NS = 2000
+    
+    # 重新计算应力时每个工作单元的测点数
+    RECALC_CHUNK_POINTS = 16
+    
+    # 重新计算应力的工作线程数（scipy FFT 计算期间释放 GIL）
+    RECALC_WORKERS = min(4, os.cpu_count() or 1)
+    
     def __init__(self, db: FieldDatabaseManager, oscilloscope=None):
         """
         初始化采集控制器
@@ -47,6 +61,10 @@ class FieldCapture:
         self.calibration_k = None
         self.baseline_stress = 0.0  # 基准点应力值（绝对应力模式使用）
         
+        # 基准波形互相关器（缓存基准频谱，基准波形变化时重建）
+        self._baseline_correlator = None
+        self._baseline_correlator_source = None
+        
         # 降噪配置
         self.denoise_config = {
             'enabled': True,
@@ -64,6 +82,23 @@ class FieldCapture:
             'highcut': 3.5,  # MHz
             'order': 6
         }
+        
+        # 回波门控配置（互相关前截取目标回波窗口）
+        self.gate_config = dict(DEFAULT_GATE_CONFIG)
+        
+        # 亚采样点时延估计方法（见 signal_processing.SUBSAMPLE_ESTIMATORS）
+        self.delay_estimator = DEFAULT_SUBSAMPLE_ESTIMATOR
+        
+        # 后台重新计算应力的状态（更换基准点后）
+        self._recalc_thread = None
+        self._recalc_cancel = threading.Event()
+        self._recalc_progress = {'running': False, 'done': 0, 'total': 0, 'cancelled': False,
+                                 'failed': False, 'recalculated': 0, 'message': ''}
+        
+        # 基准波形的门控时间窗缓存（基准波形或门控配置变化时重新检测）
+        self._baseline_gate_source = None
+        self._baseline_gate_config = None
+        self._baseline_gate_window = None
     
     def set_experiment(self, exp_id: str, hdf5: FieldExperimentHDF5, k: float, baseline_stress: float = 0.0):
         """
@@ -75,6 +110,17 @@ class FieldCapture:
             k: 应力系数 (MPa/ns)
             baseline_stress: 基准点应力值 (MPa)，绝对应力模式使用
         """
+        # 后台重新计算属于旧实验，先取消并等待结束
+        self.cancel_recalculation(wait=True)
+        
+        # 切换实验时关闭旧实验的会话（写入缓冲），新实验保持常驻句柄
+        if self.current_hdf5 is not None and self.current_hdf5.file_path != hdf5.file_path:
+            close_result = self.current_hdf5.close_session()
+            # 写入失败的测点留在旧实验的会话缓冲中，标记为 error，回到该实验后重测或跳过
+            for failed_id in close_result.get('failed_points') or []:
+                self.db.update_point(self.current_exp_id, failed_id, {'status': 'error'})
+        hdf5.open_session()
+        
         self.current_exp_id = exp_id
         self.current_hdf5 = hdf5
         self.calibration_k = k
@@ -163,6 +209,49 @@ class FieldCapture:
         
         return {"success": True, "message": "带通滤波配置已更新"}
     
+    def set_gate_config(self, config: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        设置回波门控配置
+        
+        Args:
+            config: 门控配置 {enabled, method, threshold_ratio, skip_us, pad_us, start_us, end_us}
+        
+        Returns:
+            dict: 操作结果
+        """
+        self.gate_config.update(config)
+        
+        # 保存到HDF5
+        if self.current_hdf5:
+            snapshot = self.current_hdf5.load_config_snapshot().get('data', {})
+            snapshot['gate'] = self.gate_config
+            self.current_hdf5.save_config_snapshot(snapshot)
+        
+        return {"success": True, "message": "回波门控配置已更新"}
+    
+    def set_delay_estimator(self, method: str) -> Dict[str, Any]:
+        """
+        设置亚采样点时延估计方法
+        
+        Args:
+            method: 估计方法名称（parabolic/gaussian/cosine/upsampled_fft/phase_slope）
+        
+        Returns:
+            dict: 操作结果
+        """
+        if method not in SUBSAMPLE_ESTIMATORS:
+            return {"success": False, "message": f"未知的时延估计方法: {method}"}
+        
+        self.delay_estimator = method
+        
+        # 保存到HDF5
+        if self.current_hdf5:
+            snapshot = self.current_hdf5.load_config_snapshot().get('data', {})
+            snapshot['delay_estimator'] = method
+            self.current_hdf5.save_config_snapshot(snapshot)
+        
+        return {"success": True, "message": "时延估计方法已更新"}
+    
     # ==================== 波形采集 ====================
     
     def capture_point(self, point_index: int, auto_denoise: bool = True) -> Dict[str, Any]:
@@ -199,6 +288,9 @@ class FieldCapture:
         if not self.calibration_k:
             return {"success": False, "error_code": 4002, "message": "没有加载标定数据"}
         
+        if self.is_recalculating():
+            return {"success": False, "error_code": 4023, "message": "正在重新计算应力值，请等待完成或取消后再采集"}
+        
         try:
             # 获取测点信息
             point = self.db.get_point(self.current_exp_id, point_index)
@@ -270,7 +362,9 @@ class FieldCapture:
                 'theta_coord': point.get('theta_coord')
             }
             
-            self.current_hdf5.save_point_waveform(point_index, processed_waveform, analysis, metadata)
+            save_error = self._save_point_waveform(point_index, processed_waveform, analysis, metadata)
+            if save_error:
+                return save_error
             
             # 更新数据库
             self.db.update_point(self.current_exp_id, point_index, {
@@ -337,6 +431,9 @@ class FieldCapture:
         if not self.calibration_k:
             return {"success": False, "error_code": 4002, "message": "没有加载标定数据"}
         
+        if self.is_recalculating():
+            return {"success": False, "error_code": 4023, "message": "正在重新计算应力值，请等待完成或取消后再采集"}
+        
         try:
             # 获取测点信息
             point = self.db.get_point(self.current_exp_id, point_index)
@@ -344,7 +441,7 @@ class FieldCapture:
                 return {"success": False, "error_code": 4003, "message": f"测点 {point_index} 不存在"}
             
             # 验证波形数据
-            if not waveform or not waveform.get('voltage') or not waveform.get('time'):
+            if not waveform or len(waveform.get('voltage', ())) == 0 or len(waveform.get('time', ())) == 0:
                 return {"success": False, "error_code": 4004, "message": "波形数据无效"}
             
             # ========== 信号处理流程（与标定模块一致）==========
@@ -418,7 +515,9 @@ class FieldCapture:
                 'theta_coord': point.get('theta_coord')
             }
             
-            self.current_hdf5.save_point_waveform(point_index, processed_waveform, analysis, metadata)
+            save_error = self._save_point_waveform(point_index, processed_waveform, analysis, metadata)
+            if save_error:
+                return save_error
             
             # 更新数据库
             self.db.update_point(self.current_exp_id, point_index, {
@@ -465,14 +564,19 @@ class FieldCapture:
             return None
         
         try:
-            # 使用 RAW 模式获取高精度波形数据
-            result = self.oscilloscope.获取波形数据_RAW模式_屏幕范围(1)
+            # 使用 RAW 模式获取高精度波形数据（numpy 波形对象，不经过列表转换）
+            result = self.oscilloscope.采集RAW波形_屏幕范围(1)
             if result.get('success'):
-                data = result['data']
+                waveform = result['waveform']
                 return {
-                    'time': data['time'],
-                    'voltage': data['data'],
-                    'sample_rate': data.get('sample_rate', 1e9)
+                    'time': waveform.time,
+                    'voltage': waveform.voltage,
+                    'sample_rate': waveform.sample_rate,
+                    # ADC 原始码值（HDF5 按 uint16 保存）
+                    'codes': waveform.codes,
+                    'y_increment': waveform.y_increment,
+                    'y_origin': waveform.y_origin,
+                    'y_reference': waveform.y_reference
                 }
         except Exception:
             pass
@@ -525,6 +629,11 @@ class FieldCapture:
             'sample_rate': 采样率
         }
         
+        # ADC 原始码值原样保留（与处理后电压一起保存到HDF5）
+        for key in ('codes', 'y_increment', 'y_origin', 'y_reference'):
+            if key in waveform:
+                processed[key] = waveform[key]
+        
         # 1. 带通滤波（先滤波）
         if bandpass_enabled and self.bandpass_config.get('enabled', True):
             processed['voltage'] = self._apply_bandpass_filter(
@@ -554,53 +663,110 @@ class FieldCapture:
         Returns:
             float: 时间差 (ns)
         """
-        from ..core.signal_processing import calculate_cross_correlation, find_peak_with_parabolic_interpolation
+        from ..core.signal_processing import find_peak_subsample
+        
+        correlator = self._get_baseline_correlator(baseline)
+        基准_voltage = correlator.baseline
+        测量_voltage = np.asarray(waveform['voltage'], dtype=float)
+        基准_time = np.asarray(baseline.get('time', []))
+        测量_time = np.asarray(waveform.get('time', []))
         
-        基准_voltage = np.array(baseline['voltage'])
-        测量_voltage = np.array(waveform['voltage'])
-        基准_time = np.array(baseline.get('time', []))
-        测量_time = np.array(waveform.get('time', []))
+        # 基准信号使用的区间 [基准_start, 基准_stop)
+        基准_start, 基准_stop = 0, len(基准_voltage)
         
         # 时域对齐（如果有时间数组）
         if len(基准_time) > 0 and len(测量_time) > 0:
             t_start = max(基准_time[0], 测量_time[0])
             t_end = min(基准_time[-1], 测量_time[-1])
             
+            # 回波门控：只保留基准波形中目标回波附近的时间窗
+            gate_window = self._get_baseline_gate_window(baseline, 基准_time)
+            if gate_window is not None:
+                t_start = max(t_start, gate_window[0])
+                t_end = min(t_end, gate_window[1])
+            
             if t_start < t_end:
-                基准_mask = (基准_time >= t_start) & (基准_time <= t_end)
-                测量_mask = (测量_time >= t_start) & (测量_time <= t_end)
-                
-                基准_aligned = 基准_voltage[基准_mask]
-                测量_aligned = 测量_voltage[测量_mask]
+                # 时间数组单调递增，重叠区间是连续的索引范围
+                b_lo = np.searchsorted(基准_time, t_start, side='left')
+                b_hi = np.searchsorted(基准_time, t_end, side='right')
+                m_lo = np.searchsorted(测量_time, t_start, side='left')
+                m_hi = np.searchsorted(测量_time, t_end, side='right')
                 
-                if len(基准_aligned) >= 100 and len(测量_aligned) >= 100:
-                    基准_voltage = 基准_aligned
-                    测量_voltage = 测量_aligned
+                if b_hi - b_lo >= 100 and m_hi - m_lo >= 100:
+                    基准_start, 基准_stop = b_lo, b_hi
+                    测量_voltage = 测量_voltage[m_lo:m_hi]
         
         # 确保长度一致
-        最小长度 = min(len(基准_voltage), len(测量_voltage))
-        基准 = 基准_voltage[:最小长度]
+        最小长度 = min(基准_stop - 基准_start, len(测量_voltage))
+        基准_stop = 基准_start + 最小长度
         测量 = 测量_voltage[:最小长度]
         
-        # 使用共享的互相关函数（FFT加速，mode='full'）
-        相关, lags = calculate_cross_correlation(基准, 测量)
+        # 🔧 使用已验证的采样率（waveform已在_process_waveform中验证过）
+        sample_rate = waveform.get('sample_rate', 1e9)
+        
+        # 只计算 ±CORRELATION_MAX_SHIFT_NS 窗口内的滞后（FFT加速，复用基准频谱）
+        max_lag = int(np.ceil(self.CORRELATION_MAX_SHIFT_NS * 1e-9 * sample_rate))
+        相关, lags = correlator.correlate(测量, 基准_start, 基准_stop, max_lag=max_lag)
         
-        # 找到峰值位置（使用抛物线插值获得亚采样点精度）
-        精确峰值索引, 峰值相关性 = find_peak_with_parabolic_interpolation(相关)
+        # 找到峰值位置（按配置的估计方法获得亚采样点精度）
+        精确峰值索引, 峰值相关性 = find_peak_subsample(相关, self.delay_estimator)
         峰值索引 = int(精确峰值索引)  # 整数索引用于获取对应的lag值
         
-        # 计算精确的滞后值（使用抛物线插值的小数部分）
+        # 计算精确的滞后值（使用亚采样点估计的小数部分）
         精确滞后 = lags[峰值索引] + (精确峰值索引 - 峰值索引)
         
-        # 🔧 使用已验证的采样率（waveform已在_process_waveform中验证过）
-        sample_rate = waveform.get('sample_rate', 1e9)
-        
         # 转换为时间偏移（注意：负值表示测量信号相对于基准信号提前）
         声时差_秒 = -精确滞后 / sample_rate  # 取反以匹配原有逻辑
         声时差_纳秒 = 声时差_秒 * 1e9
         
         return 声时差_纳秒
-
+    
+    def _get_baseline_gate_window(self, baseline: Dict[str, Any],
+                                  baseline_time: np.ndarray) -> Optional[Tuple[float, float]]:
+        """
+        获取基准波形的回波门控时间窗（基准波形或门控配置变化时重新检测）
+        
+        Args:
+            baseline: 处理后的基准波形
+            baseline_time: 基准波形时间数组
+        
+        Returns:
+            tuple or None: (t_start, t_end)，门控未启用时返回 None
+        """
+        if not self.gate_config.get('enabled', False):
+            return None
+        
+        gate_config = tuple(sorted(self.gate_config.items()))
+        if self._baseline_gate_source is not baseline or self._baseline_gate_config != gate_config:
+            self._baseline_gate_window = get_gate_time_window(
+                baseline_time,
+                baseline['voltage'],
+                baseline.get('sample_rate', 1e9),
+                self.gate_config
+            )
+            self._baseline_gate_source = baseline
+            self._baseline_gate_config = gate_config
+        
+        return self._baseline_gate_window
+    
+    def _get_baseline_correlator(self, baseline: Dict[str, Any]):
+        """
+        获取基准波形对应的互相关器（基准波形对象变化时重建）
+        
+        Args:
+            baseline: 处理后的基准波形
+        
+        Returns:
+            BaselineCorrelator: 缓存了基准频谱的互相关器
+        """
+        from ..core.signal_processing import BaselineCorrelator
+        
+        if self._baseline_correlator is None or self._baseline_correlator_source is not baseline:
+            self._baseline_correlator = BaselineCorrelator(baseline['voltage'])
+            self._baseline_correlator_source = baseline
+        
+        return self._baseline_correlator
+    
     def _apply_denoise(self, waveform: Dict[str, Any]) -> Dict[str, Any]:
         """应用降噪处理（调用共享的signal_processing模块）"""
         try:
@@ -652,12 +818,12 @@ class FieldCapture:
             order = self.bandpass_config.get('order', 6)
             
             # 调用统一的带通滤波函数
-            result = signal_processing.apply_bandpass_filter(
+            result = signal_processing.apply_bandpass_filter_array(
                 signal, sample_rate, lowcut, highcut, order
             )
             
             if result['success']:
-                return np.array(result['filtered'])
+                return result['filtered']
             else:
                 # 滤波失败时返回原信号
                 return signal
@@ -896,15 +1062,19 @@ class FieldCapture:
     
     # ==================== 基准波形管理 ====================
     
-    def set_baseline_point(self, point_index: int) -> Dict[str, Any]:
+    def set_baseline_point(self, point_index: int, background: bool = False) -> Dict[str, Any]:
         """
         设置基准测点
         
         Args:
             point_index: 测点索引
+            background: True 时在后台线程重新计算应力并立即返回（通过 get_recalculation_progress 查询进度）
+        
+        新基准在所有测点重新计算完成后才生效：HDF5 基准波形、数据库中的 baseline_point_id 和应力值一起更新，
+        后台计算被取消或失败时基准点和应力值都保持不变
         
         Returns:
-            dict: 操作结果，包含重新计算的点数
+            dict: 操作结果，包含重新计算的点数（后台模式为 recalculating=True）
         """
         if not self.current_exp_id:
             return {"success": False, "error_code": 4001, "message": "没有设置当前实验"}
@@ -942,20 +1112,19 @@ class FieldCapture:
                     "message": f"波形质量较差 (SNR={quality['snr']:.1f} dB)，建议选择其他测点"
                 }
             
-            # 更新基准波形
-            old_baseline = self.baseline_waveform
-            self.baseline_waveform = waveform
-            
-            # 保存到HDF5
-            self.current_hdf5.save_baseline(point_index, waveform)
-            
-            # 更新数据库
-            update_result = self.db.update_experiment(self.current_exp_id, {
-                'baseline_point_id': point_index
-            })
+            # 以新基准重新计算所有已测量点的应力值，完成后再更换基准点
+            if background:
+                start_result = self.start_recalculation(baseline=waveform, baseline_point_id=point_index)
+                return {
+                    "success": start_result['success'],
+                    "error_code": 0 if start_result['success'] else 4099,
+                    "message": (f"正在以测点 {point_index} 为基准重新计算应力值，完成后更换基准点"
+                                if start_result['success'] else start_result['message']),
+                    "recalculating": start_result['success'],
+                    "total": start_result.get('total', 0)
+                }
             
-            # 重新计算所有已测量点的应力值
-            recalculated = self._recalculate_all_stress_values()
+            recalculated = self._recalculate_all_stress_values(baseline=waveform, baseline_point_id=point_index)
             
             return {
                 "success": True,
@@ -971,38 +1140,213 @@ class FieldCapture:
                 "message": f"设置基准点失败: {str(e)}"
             }
     
-    def _recalculate_all_stress_values(self) -> int:
-        """重新计算所有已测量点的应力值"""
-        if not self.baseline_waveform or not self.calibration_k:
+    def _recalculate_all_stress_values(self, progress_callback=None,
+                                       cancel_event: Optional[threading.Event] = None,
+                                       baseline: Optional[Dict[str, Any]] = None,
+                                       baseline_point_id: Optional[int] = None,
+                                       exp_id: Optional[str] = None,
+                                       hdf5: Optional[FieldExperimentHDF5] = None) -> int:
+        """
+        重新计算所有已测量点的应力值
+        
+        测点按 RECALC_CHUNK_POINTS 分块交给线程池并行计算互相关，全部完成后在一个事务中写回数据库；
+        取消时不写入任何结果
+        
+        Args:
+            progress_callback: 进度回调 callback(已完成测点数, 总测点数)
+            cancel_event: 取消事件，置位后尽快停止
+            baseline: 计算使用的基准波形，None 表示当前基准
+            baseline_point_id: 更换基准点时的新基准测点；计算完成后与应力值一起生效（见 _apply_baseline_switch）
+            exp_id, hdf5: 计算的实验和 HDF5 文件，None 表示当前实验（后台任务在开始时固定，不随切换实验改变）
+        
+        Returns:
+            int: 重新计算的测点数（取消时为 0）
+        
+        Raises:
+            RuntimeError: 加载波形（更换基准点时）或写回数据库失败（基准点和应力值保持不变）
+        """
+        switching = baseline_point_id is not None
+        if baseline is None:
+            baseline = self.baseline_waveform
+        if exp_id is None:
+            exp_id, hdf5 = self.current_exp_id, self.current_hdf5
+        calibration_k = self.calibration_k
+        baseline_stress = self.baseline_stress
+        if not baseline or not (calibration_k or switching):
             return 0
         
-        measured_points = self.db.get_measured_points(self.current_exp_id)
-        recalculated = 0
+        measured_points = self.db.get_measured_points(exp_id) if calibration_k else []
+        if not measured_points:
+            if switching:
+                self._apply_baseline_switch(baseline_point_id, baseline, [], exp_id, hdf5)
+            return 0
         
-        for point in measured_points:
-            point_index = point['point_index']
-            
-            # 加载波形
-            waveform_result = self.current_hdf5.load_point_waveform(point_index)
-            if not waveform_result['success']:
-                continue
-            
-            waveform = waveform_result['data']['waveform']
-            
-            # 重新计算时间差和应力（使用简化版互相关，波形已经是处理后的）
-            time_diff = self._calculate_time_diff_simple(waveform, self.baseline_waveform)
-            # σ = σ_基准 + k × Δt
-            stress = self.baseline_stress + self.calibration_k * time_diff
-            
-            # 更新数据库
-            self.db.update_point(self.current_exp_id, point_index, {
-                'time_diff': time_diff,
-                'stress_value': stress
-            })
-            
-            recalculated += 1
+        # 一次打开文件批量加载所有已测量点的波形
+        bulk_result = hdf5.load_all_waveforms([p['point_index'] for p in measured_points])
+        if not bulk_result['success']:
+            if switching:
+                raise RuntimeError(f"加载测点波形失败: {bulk_result['message']}")
+            return 0
+        bulk = bulk_result['data']
+        total = len(bulk['point_ids'])
+        if progress_callback:
+            progress_callback(0, total)
+        
+        # 在当前线程预先建立基准互相关器和门控时间窗，工作线程只读取
+        self._get_baseline_correlator(baseline)
+        self._get_baseline_gate_window(baseline, np.asarray(baseline.get('time', [])))
+        
+        def compute_chunk(indices):
+            rows = []
+            for i in indices:
+                if cancel_event is not None and cancel_event.is_set():
+                    break
+                waveform = {
+                    'time': bulk['time'] if bulk['shared_time'] else bulk['time'][i],
+                    'voltage': bulk['voltage'][i],
+                    'sample_rate': bulk['sample_rate'][i]
+                }
+                if not bulk['is_processed'][i]:
+                    # 只保存了 ADC 码值的测点按当前配置重新处理
+                    waveform = self._process_waveform(waveform)
+                
+                # 重新计算时间差和应力（使用简化版互相关，波形已经是处理后的）
+                time_diff = self._calculate_time_diff_simple(waveform, baseline)
+                # σ = σ_基准 + k × Δt
+                stress = baseline_stress + calibration_k * time_diff
+                rows.append((int(bulk['point_ids'][i]), time_diff, stress))
+            return rows
+        
+        chunks = [range(start, min(start + self.RECALC_CHUNK_POINTS, total))
+                  for start in range(0, total, self.RECALC_CHUNK_POINTS)]
+        rows = []
+        with ThreadPoolExecutor(max_workers=self.RECALC_WORKERS) as executor:
+            futures = [executor.submit(compute_chunk, chunk) for chunk in chunks]
+            for future in as_completed(futures):
+                rows.extend(future.result())
+                if progress_callback:
+                    progress_callback(len(rows), total)
+        
+        if cancel_event is not None and cancel_event.is_set():
+            return 0
+        
+        if switching:
+            self._apply_baseline_switch(baseline_point_id, baseline, rows, exp_id, hdf5)
+            return len(rows)
+        
+        # 一个事务写回所有测点
+        update_result = self.db.update_stress_values(exp_id, rows)
+        if not update_result['success']:
+            raise RuntimeError(update_result['message'])
+        return len(rows)
+    
+    def _apply_baseline_switch(self, point_index: int, waveform: Dict[str, Any],
+                               rows: List[Tuple[int, float, float]],
+                               exp_id: str, hdf5: FieldExperimentHDF5) -> None:
+        """
+        让新基准生效：先保存 HDF5 基准波形，再在一个事务中写入应力值和 baseline_point_id；
+        数据库写入失败时把旧基准波形写回 HDF5
+        
+        Raises:
+            RuntimeError: 保存或写入失败
+        """
+        old_baseline = self.baseline_waveform if exp_id == self.current_exp_id else None
+        old_point_id = None
+        if old_baseline:
+            exp_result = self.db.load_experiment(exp_id)
+            if exp_result['success']:
+                old_point_id = exp_result['data']['experiment'].get('baseline_point_id')
+        
+        save_result = hdf5.save_baseline(point_index, waveform)
+        if not save_result['success']:
+            raise RuntimeError(save_result['message'])
+        
+        update_result = self.db.update_stress_values(exp_id, rows, baseline_point_id=point_index)
+        if not update_result['success']:
+            if old_baseline:
+                hdf5.save_baseline(old_point_id or 0, old_baseline)
+            raise RuntimeError(update_result['message'])
+        
+        if exp_id == self.current_exp_id:
+            self.baseline_waveform = waveform
+    
+    def start_recalculation(self, baseline: Optional[Dict[str, Any]] = None,
+                            baseline_point_id: Optional[int] = None) -> Dict[str, Any]:
+        """
+        在后台线程重新计算所有已测量点的应力值（已在运行时先取消旧任务）
         
-        return recalculated
+        Args:
+            baseline: 计算使用的基准波形，None 表示当前基准
+            baseline_point_id: 更换基准点时的新基准测点，计算完成后才生效；取消或失败时基准点保持不变
+        
+        Returns:
+            dict: {"success": bool, "message": str, "total": int}
+        """
+        switching = baseline_point_id is not None
+        if not (baseline or self.baseline_waveform) or not (self.calibration_k or switching):
+            return {"success": False, "message": "没有基准波形或标定数据", "total": 0}
+        
+        self.cancel_recalculation(wait=True)
+        self._recalc_cancel = threading.Event()
+        exp_id, hdf5 = self.current_exp_id, self.current_hdf5
+        total = len(self.db.get_measured_points(exp_id)) if self.calibration_k else 0
+        self._recalc_progress = {'running': True, 'done': 0, 'total': total, 'cancelled': False,
+                                 'failed': False, 'recalculated': 0, 'message': '正在重新计算应力值'}
+        
+        cancel_event = self._recalc_cancel
+        progress = self._recalc_progress
+        
+        def on_progress(done, total):
+            progress['done'] = done
+            progress['total'] = total
+        
+        def worker():
+            try:
+                recalculated = self._recalculate_all_stress_values(on_progress, cancel_event,
+                                                                   baseline, baseline_point_id,
+                                                                   exp_id, hdf5)
+                # 取消若晚于新基准生效，按完成处理
+                applied = switching and self.baseline_waveform is baseline
+                if cancel_event.is_set() and not applied:
+                    progress['cancelled'] = True
+                    progress['message'] = '已取消，基准点和应力值均未更改' if switching else '已取消，应力值未更新'
+                else:
+                    progress['recalculated'] = recalculated
+                    progress['message'] = (f'基准点已更改为测点 {baseline_point_id}，已重新计算 {recalculated} 个测点'
+                                           if switching else f'已重新计算 {recalculated} 个测点')
+            except Exception as e:
+                progress['failed'] = True
+                progress['message'] = f'重新计算失败: {str(e)}'
+            finally:
+                progress['running'] = False
+        
+        self._recalc_thread = threading.Thread(target=worker, daemon=True, name='FieldRecalculation')
+        self._recalc_thread.start()
+        return {"success": True, "message": "已开始重新计算", "total": total}
+    
+    def is_recalculating(self) -> bool:
+        """后台重新计算是否正在进行"""
+        return self._recalc_thread is not None and self._recalc_thread.is_alive()
+    
+    def get_recalculation_progress(self) -> Dict[str, Any]:
+        """获取后台重新计算的进度"""
+        return {"success": True, "data": dict(self._recalc_progress)}
+    
+    def cancel_recalculation(self, wait: bool = False) -> Dict[str, Any]:
+        """
+        取消后台重新计算（已写入数据库前取消时不更新任何测点）
+        
+        Args:
+            wait: 是否等待后台线程结束
+        """
+        thread = self._recalc_thread
+        if thread is None or not thread.is_alive():
+            return {"success": True, "message": "没有正在进行的重新计算"}
+        
+        self._recalc_cancel.set()
+        if wait:
+            thread.join()
+        return {"success": True, "message": "已请求取消重新计算"}
     
     def validate_baseline_quality(self) -> Dict[str, Any]:
         """验证当前基准波形的质量"""
@@ -1020,6 +1364,30 @@ class FieldCapture:
     
     # ==================== 测点操作 ====================
     
+    def _save_point_waveform(self, point_index: int, waveform: Dict[str, Any],
+                             analysis: Dict[str, Any], metadata: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        保存测点波形（会话模式下进入写缓冲）
+        
+        写缓冲中之前保存的测点写入失败时，把这些测点标记为 error（数据库中不能仍是 measured），
+        需要重测或跳过；当前测点本身保存失败时返回错误结果
+        
+        Returns:
+            dict: 当前测点保存失败时的错误结果，否则为 None
+        """
+        result = self.current_hdf5.save_point_waveform(point_index, waveform, analysis, metadata)
+        if result['success']:
+            return None
+        
+        failed_points = result.get('failed_points')
+        for failed_id in failed_points or []:
+            if failed_id != point_index:
+                self.db.update_point(self.current_exp_id, failed_id, {'status': 'error'})
+        
+        if failed_points is None or point_index in failed_points:
+            return {"success": False, "error_code": 4005, "message": result['message']}
+        return None
+    
     def skip_point(self, point_index: int, reason: str = "") -> Dict[str, Any]:
         """
         跳过测点
@@ -1039,6 +1407,10 @@ class FieldCapture:
             'skip_reason': reason
         })
         
+        # 跳过的测点不再写入（包括写入失败、仍在写缓冲中的旧数据）
+        if result.get('success') and self.current_hdf5:
+            self.current_hdf5.discard_pending_point(point_index)
+        
         return result
     
     def recapture_point(self, point_index: int, auto_denoise: bool = True) -> Dict[str, Any]:
@@ -6,8 +6,12 @@
 import sqlite3
 import os
 import json
+import threading
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Optional, Dict, List, Any
+from typing import Optional, Dict, List, Any, Tuple
+
+from ..core.db_pool import get_pool
 
 
 class FieldDatabaseManager:
@@ -16,6 +20,15 @@ class FieldDatabaseManager:
     # 当前数据库版本
     CURRENT_VERSION = 1
     
+    # 测点表中允许更新的字段
+    POINT_UPDATE_FIELDS = (
+        'time_diff', 'stress_value', 'status', 'measured_at',
+        'waveform_file', 'quality_score', 'snr', 'is_suspicious', 'skip_reason'
+    )
+    
+    # 已完成的实验只允许更新的字段（用于重新计算）
+    COMPLETED_UPDATE_FIELDS = {'time_diff', 'stress_value'}
+    
     def __init__(self, db_path: str = 'data/experiments.db'):
         """
         初始化数据库连接
@@ -27,14 +40,46 @@ class FieldDatabaseManager:
         os.makedirs(os.path.dirname(db_path) if os.path.dirname(db_path) else 'data', exist_ok=True)
         
         self.db_path = db_path
-        self.conn = sqlite3.connect(db_path, check_same_thread=False)
-        self.conn.row_factory = sqlite3.Row  # 支持字典式访问
         
-        # 初始化数据库表
-        self._init_tables()
+        # 每个线程使用连接池中自己的连接（WAL、synchronous=NORMAL、忙等待超时），
+        # sqlite3.Row 支持字典式访问
+        self._pool = get_pool(db_path, row_factory=sqlite3.Row)
+        
+        # 事务锁（同一实例被采集线程和后台重新计算线程同时使用，串行化写事务）
+        self._tx_lock = threading.RLock()
+        self._tx_depth = 0
         
-        # 检查并执行数据库迁移
-        self._check_and_migrate()
+        # 初始化数据库表并执行迁移（每个进程只执行一次）
+        self._pool.run_once('field_schema', lambda conn: (self._init_tables(), self._check_and_migrate()))
+    
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """当前线程的数据库连接"""
+        return self._pool.connection()
+    
+    @contextmanager
+    def transaction(self):
+        """
+        事务上下文：正常退出时提交一次，异常时回滚并继续抛出
+        
+        嵌套使用时只有最外层提交
+        
+        用法:
+            with db.transaction() as cursor:
+                cursor.executemany(...)
+        """
+        with self._tx_lock:
+            self._tx_depth += 1
+            try:
+                yield self.conn.cursor()
+                if self._tx_depth == 1:
+                    self.conn.commit()
+            except Exception:
+                if self._tx_depth == 1:
+                    self.conn.rollback()
+                raise
+            finally:
+                self._tx_depth -= 1
     
     def _init_tables(self):
         """创建应力场测绘相关的数据库表"""
@@ -112,6 +157,12 @@ class FieldDatabaseManager:
             ON field_points(experiment_id, status)
         ''')
         
+        # 按测点更新时直接定位（批量更新不再逐行扫描整个实验的测点）
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_field_points_exp_index 
+            ON field_points(experiment_id, point_index)
+        ''')
+        
         # 4. field_metadata表 - 云图元数据
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS field_metadata (
@@ -393,6 +444,23 @@ class FieldDatabaseManager:
                 "data": None
             }
     
+    def get_shape_config(self, exp_id: str) -> Optional[Dict[str, Any]]:
+        """
+        只读取实验的形状配置（云图刷新时使用，不加载测点和元数据）
+        
+        Args:
+            exp_id: 实验ID
+        
+        Returns:
+            dict: 形状配置；实验不存在时返回 None
+        """
+        cursor = self.conn.cursor()
+        cursor.execute('SELECT shape_config FROM field_experiments WHERE id = ?', (exp_id,))
+        row = cursor.fetchone()
+        if not row:
+            return None
+        return json.loads(row['shape_config']) if row['shape_config'] else {}
+    
     def delete_experiment(self, exp_id: str) -> Dict[str, Any]:
         """
         删除实验（SQLite记录，HDF5文件由调用者处理）
@@ -693,51 +761,44 @@ class FieldDatabaseManager:
             dict: 操作结果
         """
         try:
-            cursor = self.conn.cursor()
-            
-            # 检查实验状态
-            cursor.execute('SELECT status FROM field_experiments WHERE id = ?', (exp_id,))
-            result = cursor.fetchone()
-            
-            if not result:
-                return {"success": False, "error_code": 1002, "message": f"实验 {exp_id} 不存在"}
-            
-            if result[0] == 'completed':
-                return {"success": False, "error_code": 1007, "message": "实验已完成，无法修改"}
-            
-            # 删除旧的测点数据
-            cursor.execute('DELETE FROM field_points WHERE experiment_id = ?', (exp_id,))
-            
-            # 插入新的测点
-            for idx, point in enumerate(points):
-                # 兼容两种字段名：x/y 和 x_coord/y_coord
-                x_val = point.get('x', point.get('x_coord', 0))
-                y_val = point.get('y', point.get('y_coord', 0))
-                r_val = point.get('r', point.get('r_coord'))
-                theta_val = point.get('theta', point.get('theta_coord'))
+            with self.transaction() as cursor:
+                # 检查实验状态
+                cursor.execute('SELECT status FROM field_experiments WHERE id = ?', (exp_id,))
+                result = cursor.fetchone()
                 
-                cursor.execute('''
+                if not result:
+                    return {"success": False, "error_code": 1002, "message": f"实验 {exp_id} 不存在"}
+                
+                if result[0] == 'completed':
+                    return {"success": False, "error_code": 1007, "message": "实验已完成，无法修改"}
+                
+                # 删除旧的测点数据
+                cursor.execute('DELETE FROM field_points WHERE experiment_id = ?', (exp_id,))
+                
+                # 批量插入新的测点（兼容两种字段名：x/y 和 x_coord/y_coord）
+                cursor.executemany('''
                     INSERT INTO field_points (
                         experiment_id, point_index, x_coord, y_coord, 
                         r_coord, theta_coord, status
                     ) VALUES (?, ?, ?, ?, ?, ?, 'pending')
-                ''', (
-                    exp_id,
-                    idx + 1,
-                    x_val,
-                    y_val,
-                    r_val,
-                    theta_val
-                ))
-            
-            # 更新实验的point_layout字段
-            cursor.execute('''
-                UPDATE field_experiments 
-                SET point_layout = ?
-                WHERE id = ?
-            ''', (json.dumps(points, ensure_ascii=False), exp_id))
-            
-            self.conn.commit()
+                ''', [
+                    (
+                        exp_id,
+                        idx + 1,
+                        point.get('x', point.get('x_coord', 0)),
+                        point.get('y', point.get('y_coord', 0)),
+                        point.get('r', point.get('r_coord')),
+                        point.get('theta', point.get('theta_coord'))
+                    )
+                    for idx, point in enumerate(points)
+                ])
+                
+                # 更新实验的point_layout字段
+                cursor.execute('''
+                    UPDATE field_experiments 
+                    SET point_layout = ?
+                    WHERE id = ?
+                ''', (json.dumps(points, ensure_ascii=False), exp_id))
             
             return {
                 "success": True,
@@ -746,7 +807,6 @@ class FieldDatabaseManager:
                 "data": {"point_count": len(points)}
             }
         except Exception as e:
-            self.conn.rollback()
             return {
                 "success": False,
                 "error_code": 1010,
@@ -766,50 +826,134 @@ class FieldDatabaseManager:
             dict: 操作结果
         """
         try:
-            cursor = self.conn.cursor()
-            
-            # 检查实验状态
-            cursor.execute('SELECT status FROM field_experiments WHERE id = ?', (exp_id,))
-            result = cursor.fetchone()
-            
-            if not result:
-                return {"success": False, "error_code": 1002, "message": f"实验 {exp_id} 不存在"}
-            
-            # 完成的实验只允许更新应力相关字段（用于重新计算）
-            if result[0] == 'completed':
-                allowed_for_completed = {'time_diff', 'stress_value'}
-                update_keys = set(updates.keys())
-                if not update_keys.issubset(allowed_for_completed):
-                    return {"success": False, "error_code": 1007, "message": "实验已完成，只能更新应力值"}
-            
-            # 构建更新语句
-            allowed_fields = [
-                'time_diff', 'stress_value', 'status', 'measured_at',
-                'waveform_file', 'quality_score', 'snr', 'is_suspicious', 'skip_reason'
-            ]
-            
-            set_clauses = []
-            values = []
-            
-            for field, value in updates.items():
-                if field in allowed_fields:
-                    set_clauses.append(f'{field} = ?')
-                    values.append(value)
-            
-            if not set_clauses:
-                return {"success": False, "error_code": 1008, "message": "没有有效的更新字段"}
-            
-            values.extend([exp_id, point_index])
-            sql = f"UPDATE field_points SET {', '.join(set_clauses)} WHERE experiment_id = ? AND point_index = ?"
-            cursor.execute(sql, values)
-            
-            self.conn.commit()
+            with self.transaction() as cursor:
+                # 检查实验状态
+                cursor.execute('SELECT status FROM field_experiments WHERE id = ?', (exp_id,))
+                result = cursor.fetchone()
+                
+                if not result:
+                    return {"success": False, "error_code": 1002, "message": f"实验 {exp_id} 不存在"}
+                
+                # 完成的实验只允许更新应力相关字段（用于重新计算）
+                if result[0] == 'completed':
+                    update_keys = set(updates.keys())
+                    if not update_keys.issubset(self.COMPLETED_UPDATE_FIELDS):
+                        return {"success": False, "error_code": 1007, "message": "实验已完成，只能更新应力值"}
+                
+                # 构建更新语句
+                set_clauses = []
+                values = []
+                
+                for field, value in updates.items():
+                    if field in self.POINT_UPDATE_FIELDS:
+                        set_clauses.append(f'{field} = ?')
+                        values.append(value)
+                
+                if not set_clauses:
+                    return {"success": False, "error_code": 1008, "message": "没有有效的更新字段"}
+                
+                values.extend([exp_id, point_index])
+                sql = f"UPDATE field_points SET {', '.join(set_clauses)} WHERE experiment_id = ? AND point_index = ?"
+                cursor.execute(sql, values)
             
             return {"success": True, "error_code": 0, "message": "测点更新成功"}
         except Exception as e:
-            self.conn.rollback()
             return {"success": False, "error_code": 1011, "message": f"更新测点失败: {str(e)}"}
     
+    def update_points_bulk(self, exp_id: str, updates: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        批量更新多个测点（一次状态检查、一个事务）
+        
+        字段集合相同的测点合并为一条 executemany；字段规则与 update_point 相同
+        
+        Args:
+            exp_id: 实验ID
+            updates: 更新列表，每项为 {"point_index": int, 字段: 值, ...}
+        
+        Returns:
+            dict: 操作结果，data 包含 updated（更新的测点数）
+        """
+        if not updates:
+            return {"success": True, "error_code": 0, "message": "没有需要更新的测点", "data": {"updated": 0}}
+        
+        try:
+            with self.transaction() as cursor:
+                # 检查实验状态
+                cursor.execute('SELECT status FROM field_experiments WHERE id = ?', (exp_id,))
+                result = cursor.fetchone()
+                
+                if not result:
+                    return {"success": False, "error_code": 1002, "message": f"实验 {exp_id} 不存在"}
+                
+                completed = result[0] == 'completed'
+                
+                # 按字段集合分组
+                groups = {}
+                for item in updates:
+                    fields = tuple(f for f in item if f in self.POINT_UPDATE_FIELDS)
+                    if not fields:
+                        continue
+                    if completed and not set(fields).issubset(self.COMPLETED_UPDATE_FIELDS):
+                        return {"success": False, "error_code": 1007, "message": "实验已完成，只能更新应力值"}
+                    groups.setdefault(fields, []).append(
+                        [item[f] for f in fields] + [exp_id, item['point_index']]
+                    )
+                
+                if not groups:
+                    return {"success": False, "error_code": 1008, "message": "没有有效的更新字段"}
+                
+                updated = 0
+                for fields, rows in groups.items():
+                    set_clause = ', '.join(f'{field} = ?' for field in fields)
+                    cursor.executemany(
+                        f"UPDATE field_points SET {set_clause} WHERE experiment_id = ? AND point_index = ?",
+                        rows
+                    )
+                    updated += len(rows)
+            
+            return {
+                "success": True,
+                "error_code": 0,
+                "message": f"已更新 {updated} 个测点",
+                "data": {"updated": updated}
+            }
+        except Exception as e:
+            return {"success": False, "error_code": 1011, "message": f"批量更新测点失败: {str(e)}"}
+    
+    def update_stress_values(self, exp_id: str, rows: List[Tuple[int, float, float]],
+                             baseline_point_id: Optional[int] = None) -> Dict[str, Any]:
+        """
+        批量更新测点的时间差和应力值（一个事务，用于更换基准点后的重新计算）
+        
+        Args:
+            exp_id: 实验ID
+            rows: [(point_index, time_diff, stress_value), ...]
+            baseline_point_id: 同时更换的基准点；与应力值在同一事务中提交，任一失败都不做任何修改
+        
+        Returns:
+            dict: 操作结果
+        """
+        updates = [
+            {'point_index': point_index, 'time_diff': time_diff, 'stress_value': stress}
+            for point_index, time_diff, stress in rows
+        ]
+        if baseline_point_id is None:
+            return self.update_points_bulk(exp_id, updates)
+        
+        failure = None
+        try:
+            with self.transaction() as cursor:
+                result = self.update_points_bulk(exp_id, updates)
+                if not result['success']:
+                    # 抛出异常回滚整个事务（包括已执行的部分测点更新）
+                    failure = result
+                    raise RuntimeError(result['message'])
+                cursor.execute('UPDATE field_experiments SET baseline_point_id = ? WHERE id = ?',
+                               (baseline_point_id, exp_id))
+            return result
+        except Exception as e:
+            return failure or {"success": False, "error_code": 1011, "message": f"更新应力值失败: {str(e)}"}
+    
     def get_point(self, exp_id: str, point_index: int) -> Optional[Dict[str, Any]]:
         """获取单个测点数据"""
         cursor = self.conn.cursor()
@@ -876,6 +1020,5 @@ class FieldDatabaseManager:
             return {"success": False, "error_code": 1012, "message": f"保存云图元数据失败: {str(e)}"}
     
     def close(self):
-        """关闭数据库连接"""
-        if self.conn:
-            self.conn.close()
+        """关闭数据库连接（程序退出时调用，关闭连接池中的所有连接）"""
+        self._pool.close_all()
@@ -164,6 +164,10 @@ class FieldExperiment:
                 field_capture.denoise_config.update(config_snapshot['denoise'])
             if 'bandpass' in config_snapshot:
                 field_capture.bandpass_config.update(config_snapshot['bandpass'])
+            if 'gate' in config_snapshot:
+                field_capture.gate_config.update(config_snapshot['gate'])
+            if config_snapshot.get('delay_estimator'):
+                field_capture.delay_estimator = config_snapshot['delay_estimator']
         
         # 初始化云图生成器
         contour_generator = None
@@ -213,6 +217,14 @@ class FieldExperiment:
         if not exp_id:
             return {"success": False, "error_code": 1021, "message": "没有指定实验"}
         
+        # 写入会话缓冲中的测点并关闭常驻句柄
+        flush_result = FieldExperimentHDF5(exp_id).close_session()
+        if not flush_result['success']:
+            # 写入失败的测点仍在会话缓冲中，标记为 error，重测或跳过后才能完成实验
+            for point_id in flush_result.get('failed_points') or []:
+                self.db.update_point(exp_id, point_id, {'status': 'error'})
+            return {"success": False, "error_code": 1006, "message": flush_result['message']}
+        
         return self.db.complete_experiment(exp_id)
     
     def reset_experiment(self, exp_id: str = None) -> Dict[str, Any]:
@@ -682,5 +694,6 @@ class FieldExperiment:
     
     def close(self):
         """关闭资源"""
+        FieldExperimentHDF5.close_all_sessions()
         if self.db:
             self.db.close()
@@ -4,12 +4,47 @@
 """
 
 import os
+import time
+import atexit
+import threading
 import h5py
 import numpy as np
 import json
+from contextlib import contextmanager
 from datetime import datetime
 from typing import Optional, Dict, List, Any, Union
 
+from ..core.waveform_pyramid import (
+    write_pyramid, load_preview, has_pyramid, read_preview, uniform_axis, PREVIEW_POINTS
+)
+from .grid_payload import GRID_LAYERS, decode_axes, decode_layer, encode_grid
+
+
+# 会话模式下写缓冲的测点数达到该值时写入文件
+SESSION_FLUSH_POINTS = 10
+
+# 会话模式下写缓冲最长停留时间（秒）
+SESSION_FLUSH_SECONDS = 5.0
+
+
+class _HDF5Session:
+    """
+    实验文件会话：常驻的 h5py 句柄 + 测点写缓冲
+    
+    同一文件只有一个会话（按绝对路径登记），同一实验的所有 FieldExperimentHDF5 实例共用
+    """
+    
+    def __init__(self, owner, flush_points: int, flush_interval: float):
+        self.owner = owner  # 打开会话的 FieldExperimentHDF5 实例
+        self.file = h5py.File(owner.file_path, 'a')
+        self.lock = threading.RLock()
+        self.pending = {}  # point_id -> 待写入的测点参数
+        self.errors = {}  # point_id -> 写入失败的原因（测点仍留在缓冲中，重测或写入成功后清除）
+        self.flush_points = flush_points
+        self.flush_interval = flush_interval
+        self.last_flush = time.monotonic()
+        self.timer = None
+
 
 class FieldExperimentHDF5:
     """应力场实验HDF5文件管理类"""
@@ -17,6 +52,15 @@ class FieldExperimentHDF5:
     # HDF5文件存储根目录
     BASE_DIR = 'data/uniaxial_field'
     
+    # 波形存储格式版本
+    # 1: float64 time + float64 voltage
+    # 2: 隐式时间轴（x_origin/x_increment）+ uint16 ADC 码值（可选）+ float32 处理后电压（可选）
+    WAVEFORM_FORMAT_VERSION = 2
+    
+    # 会话登记表：绝对路径 -> _HDF5Session
+    _sessions: Dict[str, _HDF5Session] = {}
+    _sessions_lock = threading.Lock()
+    
     def __init__(self, exp_id: str):
         """
         初始化HDF5文件管理器
@@ -46,6 +90,9 @@ class FieldExperimentHDF5:
             dict: {"success": bool, "message": str, "file_path": str}
         """
         try:
+            # 重新创建文件前关闭旧会话（旧文件的缓冲不再写入）
+            self.close_session(discard=True)
+            
             with h5py.File(self.file_path, 'w') as f:
                 # 创建metadata组
                 meta_grp = f.create_group('metadata')
@@ -92,12 +139,207 @@ class FieldExperimentHDF5:
             dict: {"success": bool, "message": str}
         """
         try:
+            self.close_session(discard=True)
             if os.path.exists(self.file_path):
                 os.remove(self.file_path)
             return {"success": True, "message": "HDF5文件已删除"}
         except Exception as e:
             return {"success": False, "message": f"删除HDF5文件失败: {str(e)}"}
     
+    # ==================== 会话模式 ====================
+    
+    def open_session(self, flush_points: int = SESSION_FLUSH_POINTS,
+                     flush_interval: float = SESSION_FLUSH_SECONDS) -> Dict[str, Any]:
+        """
+        打开会话：保持一个 h5py 句柄直到 close_session，测点波形先进入写缓冲，
+        缓冲满 flush_points 个测点或停留超过 flush_interval 秒时批量写入并刷新到磁盘
+        
+        会话期间任何读取或其他写入操作之前都会先写入缓冲，读到的数据总是最新的
+        
+        Args:
+            flush_points: 缓冲测点数上限
+            flush_interval: 缓冲最长停留时间（秒）
+        
+        Returns:
+            dict: {"success": bool, "message": str}
+        """
+        if not self.file_exists():
+            return {"success": False, "message": "HDF5文件不存在"}
+        
+        key = os.path.abspath(self.file_path)
+        with self._sessions_lock:
+            session = self._sessions.get(key)
+            if session is not None:
+                session.flush_points = flush_points
+                session.flush_interval = flush_interval
+                return {"success": True, "message": "会话已打开"}
+            try:
+                self._sessions[key] = _HDF5Session(self, flush_points, flush_interval)
+            except Exception as e:
+                return {"success": False, "message": f"打开HDF5会话失败: {str(e)}"}
+        
+        return {"success": True, "message": "会话已打开"}
+    
+    def close_session(self, discard: bool = False) -> Dict[str, Any]:
+        """
+        写入缓冲并关闭会话句柄（实验完成、切换或删除实验时调用）
+        
+        有测点写入失败时会话保持打开、失败的测点留在缓冲中（返回 failed_points），
+        重测（save_point_waveform）或跳过（discard_pending_point）后再关闭；
+        discard=True 时丢弃写入失败的测点并强制关闭（删除或重新创建文件时使用）
+        
+        Returns:
+            dict: {"success": bool, "message": str, "written": int}
+        """
+        key = os.path.abspath(self.file_path)
+        session = self._session()
+        if session is None:
+            return {"success": True, "message": "没有打开的会话", "written": 0}
+        
+        with session.lock:
+            if session.timer is not None:
+                session.timer.cancel()
+                session.timer = None
+            try:
+                written = self._flush_pending(session)
+                error_result = self._write_error_result(session, written) if session.errors else None
+            except Exception as e:
+                written = 0
+                error_result = {"success": False, "message": f"写入缓冲失败: {str(e)}", "written": 0}
+            
+            if error_result is not None and not discard:
+                return error_result
+            
+            with self._sessions_lock:
+                if self._sessions.get(key) is session:
+                    del self._sessions[key]
+            session.pending.clear()
+            session.file.close()
+        
+        if error_result is not None:
+            return {"success": True, "message": f"会话已关闭，已丢弃写入失败的测点: {error_result['message']}",
+                    "written": written}
+        return {"success": True, "message": "会话已关闭", "written": written}
+    
+    def flush(self) -> Dict[str, Any]:
+        """
+        立即写入会话缓冲并刷新到磁盘（非会话模式下无操作）
+        
+        Returns:
+            dict: {"success": bool, "message": str, "written": int}
+        """
+        session = self._session()
+        if session is None:
+            return {"success": True, "message": "没有打开的会话", "written": 0}
+        
+        try:
+            with session.lock:
+                written = self._flush_pending(session)
+                if session.errors:
+                    return self._write_error_result(session, written)
+            return {"success": True, "message": f"已写入 {written} 个测点", "written": written}
+        except Exception as e:
+            return {"success": False, "message": f"写入缓冲失败: {str(e)}", "written": 0}
+    
+    @property
+    def in_session(self) -> bool:
+        """是否处于会话模式"""
+        return self._session() is not None
+    
+    @classmethod
+    def close_all_sessions(cls) -> None:
+        """关闭所有会话（程序退出时调用，保证缓冲写入磁盘）"""
+        with cls._sessions_lock:
+            sessions = list(cls._sessions.values())
+        for session in sessions:
+            result = session.owner.close_session()
+            if not result['success']:
+                print(f"⚠️ [HDF5会话] 关闭会话失败: {result['message']}")
+    
+    def _session(self) -> Optional[_HDF5Session]:
+        return self._sessions.get(os.path.abspath(self.file_path))
+    
+    @contextmanager
+    def _open(self, mode: str = 'r'):
+        """
+        打开文件：会话模式下复用常驻句柄（先写入缓冲），否则按 mode 临时打开
+        """
+        session = self._session()
+        if session is None:
+            with h5py.File(self.file_path, mode) as f:
+                yield f
+            return
+        
+        with session.lock:
+            self._flush_pending(session)
+            yield session.file
+    
+    def _flush_pending(self, session: _HDF5Session) -> int:
+        """
+        把缓冲中的测点逐个写入会话句柄并刷新到磁盘（调用方持有 session.lock）
+        
+        测点写入成功后才移出缓冲；写入失败的测点删除残留的组、留在缓冲中，
+        原因记入 session.errors，由下一次 save_point_waveform / flush / close_session 返回
+        
+        Returns:
+            int: 本次成功写入的测点数
+        """
+        if session.timer is not None:
+            session.timer.cancel()
+            session.timer = None
+        
+        session.last_flush = time.monotonic()
+        written = 0
+        for point_id in list(session.pending):
+            try:
+                self._write_point(session.file, point_id, *session.pending[point_id])
+            except Exception as e:
+                self._remove_point_group(session.file, point_id)
+                session.errors[point_id] = str(e)
+                continue
+            del session.pending[point_id]
+            session.errors.pop(point_id, None)
+            written += 1
+        
+        if written:
+            session.file.flush()
+        return written
+    
+    @staticmethod
+    def _remove_point_group(f, point_id: int) -> None:
+        """删除写入失败时残留的测点组（不完整的测点不能留在文件中）"""
+        point_key = f'points/point_{point_id:03d}'
+        try:
+            if point_key in f:
+                del f[point_key]
+        except Exception:
+            pass
+    
+    @staticmethod
+    def _write_error_result(session: _HDF5Session, written: int) -> Dict[str, Any]:
+        """写缓冲中有测点写入失败时的返回结果"""
+        failed = sorted(session.errors)
+        detail = '; '.join(f"测点 {point_id}: {session.errors[point_id]}" for point_id in failed)
+        return {
+            "success": False,
+            "message": f"{len(failed)} 个测点波形写入失败（{detail}）",
+            "written": written,
+            "failed_points": failed
+        }
+    
+    def _flush_on_timer(self, session: _HDF5Session) -> None:
+        """缓冲停留超时后由定时器线程写入"""
+        with session.lock:
+            if self._sessions.get(os.path.abspath(self.file_path)) is not session:
+                return
+            try:
+                self._flush_pending(session)
+            except Exception as e:
+                print(f"⚠️ [HDF5会话] 定时写入失败: {e}")
+            # 测点写入失败的原因保留在 session.errors 中，由下一次保存、flush 或关闭会话返回
+            if session.errors:
+                print(f"⚠️ [HDF5会话] 定时写入失败的测点: {sorted(session.errors)}")
+    
     # ==================== 配置快照管理 ====================
     
     def save_config_snapshot(self, config: Dict[str, Any]) -> Dict[str, Any]:
@@ -110,13 +352,15 @@ class FieldExperimentHDF5:
                 - shape: 形状配置 {type, width, height, ...}
                 - layout: 布点配置 {type, rows, cols, margin, ...}
                 - denoise: 降噪配置 {method, wavelet, level, ...}
+                - gate: 回波门控配置 {enabled, method, threshold_ratio, ...} (可选)
+                - delay_estimator: 亚采样点时延估计方法名称 (可选)
                 - scope: 示波器配置 (可选)
         
         Returns:
             dict: {"success": bool, "message": str}
         """
         try:
-            with h5py.File(self.file_path, 'a') as f:
+            with self._open('a') as f:
                 # 删除旧的config_snapshot组
                 if 'config_snapshot' in f:
                     del f['config_snapshot']
@@ -156,6 +400,15 @@ class FieldExperimentHDF5:
                     denoise_grp.attrs['threshold_mode'] = denoise.get('threshold_mode', 'soft')
                     denoise_grp.attrs['threshold_rule'] = denoise.get('threshold_rule', 'heursure')
                 
+                # 保存回波门控配置
+                if 'gate' in config:
+                    gate_grp = config_grp.create_group('gate')
+                    gate_grp.attrs['config_json'] = json.dumps(config['gate'], ensure_ascii=False)
+                
+                # 保存时延估计方法
+                if 'delay_estimator' in config:
+                    config_grp.attrs['delay_estimator'] = str(config['delay_estimator'])
+                
                 # 保存示波器配置
                 if 'scope' in config:
                     scope_grp = config_grp.create_group('scope')
@@ -178,7 +431,7 @@ class FieldExperimentHDF5:
             
             config = {}
             
-            with h5py.File(self.file_path, 'r') as f:
+            with self._open('r') as f:
                 if 'config_snapshot' not in f:
                     return {"success": True, "data": {}, "message": "配置快照为空"}
                 
@@ -218,6 +471,15 @@ class FieldExperimentHDF5:
                         'threshold_rule': str(denoise_grp.attrs.get('threshold_rule', 'heursure'))
                     }
                 
+                # 加载回波门控配置
+                if 'gate' in config_grp:
+                    gate_json = config_grp['gate'].attrs.get('config_json', '{}')
+                    config['gate'] = json.loads(gate_json)
+                
+                # 加载时延估计方法
+                if 'delay_estimator' in config_grp.attrs:
+                    config['delay_estimator'] = str(config_grp.attrs['delay_estimator'])
+                
                 # 加载示波器配置
                 if 'scope' in config_grp:
                     scope_json = config_grp['scope'].attrs.get('config_json', '{}')
@@ -227,6 +489,84 @@ class FieldExperimentHDF5:
         except Exception as e:
             return {"success": False, "message": f"加载配置快照失败: {str(e)}", "data": None}
     
+    # ==================== 波形存储格式 ====================
+    
+    def _write_waveform(self, wf_grp, waveform: Dict[str, Any], store_processed: bool = True) -> None:
+        """
+        按当前格式版本写入波形组
+        
+        - 时间轴等间隔时只保存 x_origin/x_increment 属性，否则保存 float64 time 数据集
+        - 波形带 ADC 码值（codes + y_increment/y_origin/y_reference）时保存 uint16 码值
+        - voltage（处理后电压）以 float32 保存；有码值时可通过 store_processed=False 省略
+        """
+        time_arr = np.asarray(waveform.get('time', []), dtype=np.float64)
+        voltage_arr = np.asarray(waveform.get('voltage', []), dtype=np.float64)
+        
+        wf_grp.attrs['format_version'] = self.WAVEFORM_FORMAT_VERSION
+        wf_grp.attrs['sample_rate'] = waveform.get('sample_rate', 1e9)
+        wf_grp.attrs['points'] = len(voltage_arr)
+        
+        axis = uniform_axis(time_arr) if len(time_arr) == len(voltage_arr) else None
+        if axis:
+            wf_grp.attrs['x_origin'], wf_grp.attrs['x_increment'] = axis
+        else:
+            wf_grp.create_dataset('time', data=time_arr, compression='gzip', compression_opts=6)
+        
+        codes = waveform.get('codes')
+        has_codes = codes is not None and len(codes) == len(voltage_arr)
+        if has_codes:
+            codes = np.asarray(codes)
+            code_dtype = np.uint16 if codes.min() >= 0 else np.int16
+            wf_grp.create_dataset('codes', data=codes.astype(code_dtype), compression='gzip',
+                                  compression_opts=6, shuffle=True)
+            wf_grp.attrs['y_increment'] = float(waveform.get('y_increment', 1.0))
+            wf_grp.attrs['y_origin'] = float(waveform.get('y_origin', 0.0))
+            wf_grp.attrs['y_reference'] = float(waveform.get('y_reference', 0.0))
+        
+        if store_processed or not has_codes:
+            wf_grp.create_dataset('voltage', data=voltage_arr.astype(np.float32), compression='gzip',
+                                  compression_opts=6, shuffle=True)
+        
+        # 预览用的最小/最大值金字塔
+        write_pyramid(wf_grp, voltage_arr, time_arr, source='voltage' if 'voltage' in wf_grp else 'codes')
+    
+    @staticmethod
+    def _has_waveform(wf_grp) -> bool:
+        """检查波形组是否包含完整的波形数据（兼容各格式版本）"""
+        has_time = 'time' in wf_grp or 'x_increment' in wf_grp.attrs
+        return has_time and ('voltage' in wf_grp or 'codes' in wf_grp)
+    
+    @staticmethod
+    def _read_waveform(wf_grp) -> Dict[str, Any]:
+        """
+        读取波形组（兼容各格式版本），返回 numpy 数组
+        
+        Returns:
+            dict: {time, voltage, sample_rate, is_processed}；
+                  没有保存处理后电压时 voltage 由 ADC 码值换算，is_processed 为 False
+        """
+        if 'voltage' in wf_grp:
+            voltage = wf_grp['voltage'][:].astype(np.float64)
+            is_processed = True
+        else:
+            voltage = wf_grp['codes'][:].astype(np.float64)
+            voltage -= wf_grp.attrs.get('y_origin', 0.0)
+            voltage -= wf_grp.attrs.get('y_reference', 0.0)
+            voltage *= wf_grp.attrs.get('y_increment', 1.0)
+            is_processed = False
+        
+        if 'time' in wf_grp:
+            time_arr = wf_grp['time'][:]
+        else:
+            time_arr = wf_grp.attrs['x_origin'] + np.arange(len(voltage)) * wf_grp.attrs['x_increment']
+        
+        return {
+            'time': time_arr,
+            'voltage': voltage,
+            'sample_rate': float(wf_grp.attrs.get('sample_rate', 1e9)),
+            'is_processed': is_processed
+        }
+    
     # ==================== 基准波形管理 ====================
     
     def save_baseline(self, point_id: int, waveform: Dict[str, Any], is_processed: bool = True) -> Dict[str, Any]:
@@ -242,7 +582,7 @@ class FieldExperimentHDF5:
             dict: {"success": bool, "message": str}
         """
         try:
-            with h5py.File(self.file_path, 'a') as f:
+            with self._open('a') as f:
                 # 删除旧的baseline数据
                 if 'baseline' in f:
                     del f['baseline']
@@ -256,12 +596,7 @@ class FieldExperimentHDF5:
                 wf_grp = baseline_grp.create_group('waveform')
                 
                 # 保存波形数据（使用压缩）
-                time_data = np.array(waveform.get('time', []), dtype=np.float64)
-                voltage_data = np.array(waveform.get('voltage', []), dtype=np.float64)
-                
-                wf_grp.create_dataset('time', data=time_data, compression='gzip', compression_opts=6)
-                wf_grp.create_dataset('voltage', data=voltage_data, compression='gzip', compression_opts=6)
-                wf_grp.attrs['sample_rate'] = waveform.get('sample_rate', 1e9)
+                self._write_waveform(wf_grp, waveform)
             
             return {"success": True, "message": "基准波形已保存"}
         except Exception as e:
@@ -279,21 +614,21 @@ class FieldExperimentHDF5:
             if not self.file_exists():
                 return {"success": False, "message": "HDF5文件不存在", "data": None}
             
-            with h5py.File(self.file_path, 'r') as f:
+            with self._open('r') as f:
                 if 'baseline' not in f or 'waveform' not in f['baseline']:
                     return {"success": False, "message": "基准波形不存在", "data": None}
                 
                 baseline_grp = f['baseline']
-                wf_grp = baseline_grp['waveform']
+                wf = self._read_waveform(baseline_grp['waveform'])
                 
                 data = {
                     'point_id': int(baseline_grp.attrs.get('point_id', 0)),
                     'captured_at': str(baseline_grp.attrs.get('captured_at', '')),
                     'is_processed': bool(baseline_grp.attrs.get('is_processed', False)),  # 读取处理标记
                     'waveform': {
-                        'time': wf_grp['time'][:].tolist(),
-                        'voltage': wf_grp['voltage'][:].tolist(),
-                        'sample_rate': float(wf_grp.attrs.get('sample_rate', 1e9))
+                        'time': wf['time'].tolist(),
+                        'voltage': wf['voltage'].tolist(),
+                        'sample_rate': wf['sample_rate']
                     }
                 }
             
@@ -304,24 +639,26 @@ class FieldExperimentHDF5:
     # ==================== 测点波形管理 ====================
     
     def save_point_waveform(self, point_id: int, waveform: Dict[str, Any], 
-                           analysis: Dict[str, Any], metadata: Dict[str, Any] = None) -> Dict[str, Any]:
+                           analysis: Dict[str, Any], metadata: Dict[str, Any] = None,
+                           store_processed: bool = True) -> Dict[str, Any]:
         """
         保存测点波形数据
         
         Args:
             point_id: 测点ID
-            waveform: 波形数据 {time: [], voltage: [], sample_rate: float}
+            waveform: 波形数据 {time: [], voltage: [], sample_rate: float}，
+                      可附带 ADC 码值 {codes, y_increment, y_origin, y_reference}
             analysis: 分析结果 {time_diff: float, stress: float, snr: float, quality_score: float}
             metadata: 元数据 {x_coord, y_coord, measured_at, ...} (可选)
+            store_processed: 是否保存处理后电压（float32）；无码值时总是保存
         
         Returns:
-            dict: {"success": bool, "message": str}
+            dict: {"success": bool, "message": str}；会话模式下写缓冲中有测点（包括之前保存的测点）
+                  写入失败时 success 为 False，附带 failed_points
         """
         try:
-            point_key = f'point_{point_id:03d}'
-            
             # 验证波形数据
-            if not waveform or not waveform.get('voltage') or not waveform.get('time'):
+            if not waveform:
                 return {"success": False, "message": f"测点 {point_id} 波形数据无效"}
             
             voltage_data = waveform.get('voltage', [])
@@ -330,47 +667,34 @@ class FieldExperimentHDF5:
             if len(voltage_data) == 0 or len(time_data) == 0:
                 return {"success": False, "message": f"测点 {point_id} 波形数据为空"}
             
+            args = (waveform, analysis, metadata, store_processed, datetime.now().isoformat())
+            
+            # 会话模式：放入写缓冲，按测点数/停留时间批量写入
+            session = self._session()
+            if session is not None:
+                with session.lock:
+                    # 重测的测点替换缓冲中写入失败的旧数据
+                    session.pending[point_id] = args
+                    session.errors.pop(point_id, None)
+                    if (len(session.pending) >= session.flush_points or
+                            time.monotonic() - session.last_flush >= session.flush_interval):
+                        written = self._flush_pending(session)
+                    else:
+                        written = 0
+                        if session.timer is None:
+                            session.timer = threading.Timer(session.flush_interval, self._flush_on_timer, (session,))
+                            session.timer.daemon = True
+                            session.timer.start()
+                    if session.errors:
+                        return self._write_error_result(session, written)
+                return {"success": True, "message": f"测点 {point_id} 波形已保存"}
+            
             with h5py.File(self.file_path, 'a') as f:
-                # 确保 points 组存在
-                if 'points' not in f:
-                    f.create_group('points')
-                
-                points_grp = f['points']
-                
-                # 删除旧的测点数据
-                if point_key in points_grp:
-                    del points_grp[point_key]
-                
-                point_grp = points_grp.create_group(point_key)
-                
-                # 保存元数据
-                meta_grp = point_grp.create_group('metadata')
-                meta_grp.attrs['point_id'] = point_id
-                meta_grp.attrs['measured_at'] = datetime.now().isoformat()
-                
-                if metadata:
-                    meta_grp.attrs['x_coord'] = metadata.get('x_coord', 0.0)
-                    meta_grp.attrs['y_coord'] = metadata.get('y_coord', 0.0)
-                    if 'r_coord' in metadata and metadata['r_coord'] is not None:
-                        meta_grp.attrs['r_coord'] = metadata['r_coord']
-                    if 'theta_coord' in metadata and metadata['theta_coord'] is not None:
-                        meta_grp.attrs['theta_coord'] = metadata['theta_coord']
-                
-                # 保存波形数据
-                wf_grp = point_grp.create_group('waveform')
-                time_arr = np.array(time_data, dtype=np.float64)
-                voltage_arr = np.array(voltage_data, dtype=np.float64)
-                
-                wf_grp.create_dataset('time', data=time_arr, compression='gzip', compression_opts=6)
-                wf_grp.create_dataset('voltage', data=voltage_arr, compression='gzip', compression_opts=6)
-                wf_grp.attrs['sample_rate'] = waveform.get('sample_rate', 1e9)
-                
-                # 保存分析结果
-                analysis_grp = point_grp.create_group('analysis')
-                analysis_grp.attrs['time_diff'] = analysis.get('time_diff', 0.0)
-                analysis_grp.attrs['stress'] = analysis.get('stress', 0.0)
-                analysis_grp.attrs['snr'] = analysis.get('snr', 0.0)
-                analysis_grp.attrs['quality_score'] = analysis.get('quality_score', 0.0)
+                try:
+                    self._write_point(f, point_id, *args)
+                except Exception:
+                    self._remove_point_group(f, point_id)
+                    raise
             
             return {"success": True, "message": f"测点 {point_id} 波形已保存"}
         except Exception as e:
@@ -378,6 +702,61 @@ class FieldExperimentHDF5:
             traceback.print_exc()
             return {"success": False, "message": f"保存测点波形失败: {str(e)}"}
     
+    def discard_pending_point(self, point_id: int) -> bool:
+        """
+        从会话写缓冲中移除测点（跳过测点时调用，写入失败的旧数据不再重试）
+        
+        Returns:
+            bool: 缓冲中是否有该测点
+        """
+        session = self._session()
+        if session is None:
+            return False
+        with session.lock:
+            session.errors.pop(point_id, None)
+            return session.pending.pop(point_id, None) is not None
+    
+    def _write_point(self, f, point_id: int, waveform: Dict[str, Any], analysis: Dict[str, Any],
+                     metadata: Optional[Dict[str, Any]], store_processed: bool, measured_at: str) -> None:
+        """把一个测点写入已打开的文件"""
+        point_key = f'point_{point_id:03d}'
+        
+        # 确保 points 组存在
+        if 'points' not in f:
+            f.create_group('points')
+        
+        points_grp = f['points']
+        
+        # 删除旧的测点数据
+        if point_key in points_grp:
+            del points_grp[point_key]
+        
+        point_grp = points_grp.create_group(point_key)
+        
+        # 保存元数据
+        meta_grp = point_grp.create_group('metadata')
+        meta_grp.attrs['point_id'] = point_id
+        meta_grp.attrs['measured_at'] = measured_at
+        
+        if metadata:
+            meta_grp.attrs['x_coord'] = metadata.get('x_coord', 0.0)
+            meta_grp.attrs['y_coord'] = metadata.get('y_coord', 0.0)
+            if 'r_coord' in metadata and metadata['r_coord'] is not None:
+                meta_grp.attrs['r_coord'] = metadata['r_coord']
+            if 'theta_coord' in metadata and metadata['theta_coord'] is not None:
+                meta_grp.attrs['theta_coord'] = metadata['theta_coord']
+        
+        # 保存波形数据
+        wf_grp = point_grp.create_group('waveform')
+        self._write_waveform(wf_grp, waveform, store_processed)
+        
+        # 保存分析结果
+        analysis_grp = point_grp.create_group('analysis')
+        analysis_grp.attrs['time_diff'] = analysis.get('time_diff', 0.0)
+        analysis_grp.attrs['stress'] = analysis.get('stress', 0.0)
+        analysis_grp.attrs['snr'] = analysis.get('snr', 0.0)
+        analysis_grp.attrs['quality_score'] = analysis.get('quality_score', 0.0)
+    
     def load_point_waveform(self, point_id: int) -> Dict[str, Any]:
         """
         加载测点波形数据
@@ -394,7 +773,7 @@ class FieldExperimentHDF5:
             
             point_key = f'point_{point_id:03d}'
             
-            with h5py.File(self.file_path, 'r') as f:
+            with self._open('r') as f:
                 if 'points' not in f or point_key not in f['points']:
                     return {"success": False, "message": f"测点 {point_id} 不存在", "data": None}
                 
@@ -423,13 +802,15 @@ class FieldExperimentHDF5:
                 wf_grp = point_grp['waveform']
                 
                 # 检查必要的数据集是否存在
-                if 'time' not in wf_grp or 'voltage' not in wf_grp:
+                if not self._has_waveform(wf_grp):
                     return {"success": False, "message": f"测点 {point_id} 的波形数据不完整", "data": None}
                 
+                wf = self._read_waveform(wf_grp)
                 waveform = {
-                    'time': wf_grp['time'][:].tolist(),
-                    'voltage': wf_grp['voltage'][:].tolist(),
-                    'sample_rate': float(wf_grp.attrs.get('sample_rate', 1e9))
+                    'time': wf['time'].tolist(),
+                    'voltage': wf['voltage'].tolist(),
+                    'sample_rate': wf['sample_rate'],
+                    'is_processed': wf['is_processed']
                 }
                 
                 # 加载分析结果
@@ -453,6 +834,182 @@ class FieldExperimentHDF5:
         except Exception as e:
             return {"success": False, "message": f"加载测点波形失败: {str(e)}", "data": None}
     
+    def load_waveform_preview(self, point_id: Optional[int] = None,
+                              max_points: int = PREVIEW_POINTS) -> Dict[str, Any]:
+        """
+        加载波形预览（读取最小/最大值金字塔，不读取完整波形）
+        
+        没有金字塔的旧文件在首次预览时补写
+        
+        Args:
+            point_id: 测点ID，None 表示基准波形
+            max_points: 预览点数上限
+        
+        Returns:
+            dict: {"success": bool, "data": {time, voltage, factor, source_points, decimated}, "message": str}
+        """
+        if not self.file_exists():
+            return {"success": False, "message": "HDF5文件不存在", "data": None}
+        
+        group_path = 'baseline/waveform' if point_id is None else f'points/point_{point_id:03d}/waveform'
+        
+        try:
+            with self._open('r') as f:
+                if group_path not in f or not self._has_waveform(f[group_path]):
+                    return {"success": False, "message": f"波形数据不存在: {group_path}", "data": None}
+                wf_grp = f[group_path]
+                version = int(wf_grp.attrs.get('format_version', 1))
+                source = 'voltage' if 'voltage' in wf_grp else 'codes'
+                
+                preview = None
+                if version >= 2:
+                    # 新格式保存时已写入金字塔；点数不超过上限（或数据太短没有金字塔）时读取完整波形
+                    if len(wf_grp[source]) > max_points and has_pyramid(wf_grp, source):
+                        preview = read_preview(wf_grp, max_points, source)
+                    else:
+                        wf = self._read_waveform(wf_grp)
+                        preview = {
+                            'time': wf['time'],
+                            'voltage': wf['voltage'],
+                            'factor': 1,
+                            'source_points': len(wf['voltage']),
+                            'decimated': False
+                        }
+        except Exception as e:
+            return {"success": False, "message": f"读取波形预览失败: {str(e)}", "data": None}
+        
+        if preview is None and self.in_session:
+            # 旧格式：没有金字塔时补写（惰性升级），会话模式下直接使用常驻句柄
+            try:
+                with self._open('a') as f:
+                    wf_grp = f[group_path]
+                    if not has_pyramid(wf_grp):
+                        write_pyramid(wf_grp, wf_grp['voltage'][:], wf_grp['time'][:])
+                    preview = read_preview(wf_grp, max_points)
+            except Exception as e:
+                return {"success": False, "message": f"读取波形预览失败: {str(e)}", "data": None}
+        elif preview is None:
+            # 旧格式：没有金字塔时补写（惰性升级）
+            result = load_preview(self.file_path, group_path, max_points)
+            if not result['success']:
+                return {"success": False, "message": result['message'], "data": None}
+            preview = result['data']
+        
+        preview['time'] = preview['time'].tolist()
+        preview['voltage'] = preview['voltage'].tolist()
+        return {"success": True, "data": preview, "message": "波形预览加载成功"}
+    
+    def load_all_waveforms(self, point_ids: Optional[List[int]] = None) -> Dict[str, Any]:
+        """
+        一次打开文件批量加载测点波形
+        
+        所有测点点数相同时电压读入连续的 (n_points, n_samples) 数组；
+        点数不一致时退化为数组列表（ragged=True）
+        
+        Args:
+            point_ids: 测点ID列表，None 表示文件中的全部测点；不存在或数据不完整的测点跳过
+        
+        Returns:
+            dict: {"success": bool, "message": str, "data": {
+                      "point_ids": (n,) int 数组,
+                      "voltage": (n, m) 数组，ragged 时为数组列表,
+                      "time": 所有测点时间轴相同时为 (m,) 数组，否则与 voltage 同形,
+                      "shared_time": bool, "ragged": bool,
+                      "sample_rate": (n,) 数组, "is_processed": (n,) bool 数组,
+                      "metadata": {"x_coord": (n,), "y_coord": (n,), "measured_at": list},
+                      "analysis": {"time_diff": (n,), "stress": (n,), "snr": (n,), "quality_score": (n,)}
+                  }}
+        """
+        try:
+            if not self.file_exists():
+                return {"success": False, "message": "HDF5文件不存在", "data": None}
+            
+            with self._open('r') as f:
+                points_grp = f['points'] if 'points' in f else {}
+                if point_ids is None:
+                    point_ids = sorted(int(key[len('point_'):]) for key in points_grp.keys() if key.startswith('point_'))
+                
+                # 收集有效测点的波形组
+                groups = []
+                for point_id in point_ids:
+                    point_key = f'point_{int(point_id):03d}'
+                    if point_key not in points_grp or 'waveform' not in points_grp[point_key]:
+                        continue
+                    wf_grp = points_grp[point_key]['waveform']
+                    if self._has_waveform(wf_grp):
+                        groups.append((int(point_id), points_grp[point_key], wf_grp))
+                
+                n = len(groups)
+                lengths = [len(wf_grp['voltage'] if 'voltage' in wf_grp else wf_grp['codes']) for _, _, wf_grp in groups]
+                ragged = len(set(lengths)) > 1
+                
+                # 时间轴：隐式时间轴参数全部相同时只返回一份
+                axes = {(float(wf_grp.attrs['x_origin']), float(wf_grp.attrs['x_increment']))
+                        if 'x_increment' in wf_grp.attrs else None for _, _, wf_grp in groups}
+                shared_time = n > 0 and not ragged and len(axes) == 1 and None not in axes
+                
+                if ragged:
+                    voltage = []
+                    times = []
+                else:
+                    voltage = np.empty((n, lengths[0] if n else 0), dtype=np.float64)
+                    times = None if shared_time else np.empty_like(voltage)
+                
+                sample_rate = np.empty(n, dtype=np.float64)
+                is_processed = np.empty(n, dtype=bool)
+                metadata = {'x_coord': np.zeros(n), 'y_coord': np.zeros(n), 'measured_at': []}
+                analysis = {key: np.zeros(n) for key in ('time_diff', 'stress', 'snr', 'quality_score')}
+                
+                for i, (point_id, point_grp, wf_grp) in enumerate(groups):
+                    if 'voltage' in wf_grp and not ragged:
+                        # 直接读入连续数组的对应行（HDF5 完成类型转换）
+                        wf_grp['voltage'].read_direct(voltage[i])
+                        is_processed[i] = True
+                        if times is not None:
+                            if 'time' in wf_grp:
+                                wf_grp['time'].read_direct(times[i])
+                            else:
+                                times[i] = wf_grp.attrs['x_origin'] + np.arange(lengths[i]) * wf_grp.attrs['x_increment']
+                    else:
+                        wf = self._read_waveform(wf_grp)
+                        is_processed[i] = wf['is_processed']
+                        if ragged:
+                            voltage.append(wf['voltage'])
+                            times.append(wf['time'])
+                        else:
+                            voltage[i] = wf['voltage']
+                            if times is not None:
+                                times[i] = wf['time']
+                    sample_rate[i] = float(wf_grp.attrs.get('sample_rate', 1e9))
+                    
+                    meta_attrs = point_grp['metadata'].attrs if 'metadata' in point_grp else {}
+                    metadata['x_coord'][i] = float(meta_attrs.get('x_coord', 0))
+                    metadata['y_coord'][i] = float(meta_attrs.get('y_coord', 0))
+                    metadata['measured_at'].append(str(meta_attrs.get('measured_at', '')))
+                    
+                    analysis_attrs = point_grp['analysis'].attrs if 'analysis' in point_grp else {}
+                    for key in analysis:
+                        analysis[key][i] = float(analysis_attrs.get(key, 0))
+                
+                if shared_time:
+                    x_origin, x_increment = axes.pop()
+                    times = x_origin + np.arange(lengths[0]) * x_increment
+            
+            data = {
+                'point_ids': np.array([g[0] for g in groups], dtype=np.int64),
+                'voltage': voltage,
+                'time': times,
+                'shared_time': shared_time,
+                'ragged': ragged,
+                'sample_rate': sample_rate,
+                'is_processed': is_processed,
+                'metadata': metadata,
+                'analysis': analysis
+            }
+            return {"success": True, "data": data, "message": f"已加载 {n} 个测点波形"}
+        except Exception as e:
+            return {"success": False, "message": f"批量加载测点波形失败: {str(e)}", "data": None}
+    
     def get_all_point_ids(self) -> List[int]:
         """获取所有已保存的测点ID列表"""
         try:
@@ -460,7 +1017,7 @@ class FieldExperimentHDF5:
                 return []
             
             point_ids = []
-            with h5py.File(self.file_path, 'r') as f:
+            with self._open('r') as f:
                 if 'points' in f:
                     for key in f['points'].keys():
                         if key.startswith('point_'):
@@ -477,15 +1034,20 @@ class FieldExperimentHDF5:
         """
         保存云图数据
         
+        网格保存为坐标轴 x (nx,)、y (ny,) 和 float32 数据层 zi / uncertainty / variance (ny, nx)
+        
         Args:
-            grid_data: 网格数据 {xi: 2D array, yi: 2D array, zi: 2D array}
-            metadata: 元数据 {interpolation_method, resolution, n_points, ...}
+            grid_data: 网格数据（grid_payload 格式，或旧的 {xi, yi, zi, uncertainty} 2-D 列表）
+            metadata: 元数据 {interpolation_method, resolution, n_points, uncertainty_source, ...}
         
         Returns:
             dict: {"success": bool, "message": str}
         """
         try:
-            with h5py.File(self.file_path, 'a') as f:
+            x_axis, y_axis = decode_axes(grid_data)
+            layers = {name: decode_layer(grid_data, name) for name in GRID_LAYERS}
+            
+            with self._open('a') as f:
                 # 删除旧的contour数据
                 if 'contour' in f:
                     del f['contour']
@@ -494,14 +1056,12 @@ class FieldExperimentHDF5:
                 
                 # 保存网格数据
                 grid_grp = contour_grp.create_group('grid')
-                
-                xi = np.array(grid_data.get('xi', []), dtype=np.float64)
-                yi = np.array(grid_data.get('yi', []), dtype=np.float64)
-                zi = np.array(grid_data.get('zi', []), dtype=np.float64)
-                
-                grid_grp.create_dataset('xi', data=xi, compression='gzip', compression_opts=6)
-                grid_grp.create_dataset('yi', data=yi, compression='gzip', compression_opts=6)
-                grid_grp.create_dataset('zi', data=zi, compression='gzip', compression_opts=6)
+                grid_grp.create_dataset('x', data=x_axis)
+                grid_grp.create_dataset('y', data=y_axis)
+                for name, values in layers.items():
+                    if values is not None:
+                        grid_grp.create_dataset(name, data=values.astype(np.float32),
+                                                compression='gzip', compression_opts=6, shuffle=True)
                 
                 # 保存元数据
                 meta_grp = contour_grp.create_group('metadata')
@@ -511,6 +1071,8 @@ class FieldExperimentHDF5:
                 meta_grp.attrs['generated_at'] = datetime.now().isoformat()
                 meta_grp.attrs['vmin'] = metadata.get('vmin', 0.0)
                 meta_grp.attrs['vmax'] = metadata.get('vmax', 0.0)
+                if metadata.get('uncertainty_source'):
+                    meta_grp.attrs['uncertainty_source'] = metadata['uncertainty_source']
             
             return {"success": True, "message": "云图数据已保存"}
         except Exception as e:
@@ -521,13 +1083,13 @@ class FieldExperimentHDF5:
         加载云图数据
         
         Returns:
-            dict: {"success": bool, "data": {...}, "message": str}
+            dict: {"success": bool, "data": {"grid": grid_payload 格式, "metadata": {...}}, "message": str}
         """
         try:
             if not self.file_exists():
                 return {"success": False, "message": "HDF5文件不存在", "data": None}
             
-            with h5py.File(self.file_path, 'r') as f:
+            with self._open('r') as f:
                 if 'contour' not in f or 'grid' not in f['contour']:
                     return {"success": False, "message": "云图数据不存在", "data": None}
                 
@@ -535,12 +1097,15 @@ class FieldExperimentHDF5:
                 grid_grp = contour_grp['grid']
                 meta_grp = contour_grp['metadata']
                 
+                # 旧文件保存的是 2-D 的 xi/yi
+                if 'x' in grid_grp:
+                    x_axis, y_axis = grid_grp['x'][:], grid_grp['y'][:]
+                else:
+                    x_axis, y_axis = grid_grp['xi'][0, :], grid_grp['yi'][:, 0]
+                layers = {name: grid_grp[name][:] for name in GRID_LAYERS if name in grid_grp}
+                
                 data = {
-                    'grid': {
-                        'xi': grid_grp['xi'][:].tolist(),
-                        'yi': grid_grp['yi'][:].tolist(),
-                        'zi': grid_grp['zi'][:].tolist()
-                    },
+                    'grid': encode_grid(x_axis, y_axis, **layers),
                     'metadata': {
                         'interpolation_method': str(meta_grp.attrs.get('interpolation_method', 'cubic')),
                         'resolution': int(meta_grp.attrs.get('resolution', 200)),
@@ -550,6 +1115,8 @@ class FieldExperimentHDF5:
                         'vmax': float(meta_grp.attrs.get('vmax', 0))
                     }
                 }
+                if 'uncertainty' in grid_grp:
+                    data['metadata']['uncertainty_source'] = str(meta_grp.attrs.get('uncertainty_source', ''))
             
             return {"success": True, "data": data, "message": "云图数据加载成功"}
         except Exception as e:
@@ -577,7 +1144,7 @@ class FieldExperimentHDF5:
                 "has_contour": False
             }
             
-            with h5py.File(self.file_path, 'r') as f:
+            with self._open('r') as f:
                 if 'baseline' in f and 'waveform' in f['baseline']:
                     info['has_baseline'] = True
                 if 'contour' in f and 'grid' in f['contour']:
@@ -598,7 +1165,7 @@ class FieldExperimentHDF5:
             if not self.file_exists():
                 return {"success": True, "message": "HDF5文件不存在，无需清空"}
             
-            with h5py.File(self.file_path, 'a') as f:
+            with self._open('a') as f:
                 # 清空基准波形
                 if 'baseline' in f:
                     del f['baseline']
@@ -617,3 +1184,7 @@ class FieldExperimentHDF5:
             return {"success": True, "message": "波形数据已清空"}
         except Exception as e:
             return {"success": False, "message": f"清空波形数据失败: {str(e)}"}
+
+
+# 程序退出时写入所有会话缓冲
+atexit.register(FieldExperimentHDF5.close_all_sessions)
@@ -0,0 +1,106 @@
+"""
+应力场测绘模块 - 云图网格传输格式
+插值网格是规则网格，xi/yi 只是两条等间隔坐标轴；网格数据按 float32 一次性编码，
+代替 2-D 的 tolist() 列表（NaN 保留在 float32 中，前端按 NaN 判断无效网格点）
+
+格式（编码规则见 modules/core/binary_transport.py）:
+    {
+        "format": "axes",
+        "shape": [ny, nx],
+        "x": {"__array__": "linear", ...},        # nx 个网格列坐标
+        "y": {"__array__": "linear", ...},        # ny 个网格行坐标
+        "zi": {"__array__": "base64", "dtype": "float32", ...},   # 按行展开，NaN 表示无效
+        "uncertainty": ...,                        # 可选，同 zi
+        "variance": ...                            # 可选，同 zi（仅 kriging）
+    }
+
+decode_grid 同时兼容旧格式 {xi: 2D 列表, yi: 2D 列表, zi: 2D 列表（None 表示无效）}
+"""
+
+from typing import Dict, Any, Tuple
+
+import numpy as np
+
+from ..core.binary_transport import decode_array, encode_array, encode_time_axis, is_encoded
+
+
+# 网格格式标记
+GRID_FORMAT = 'axes'
+
+# 网格数据层（除坐标轴外按 float32 编码的字段）
+GRID_LAYERS = ('zi', 'uncertainty', 'variance')
+
+
+def encode_grid(x_axis: np.ndarray, y_axis: np.ndarray, **layers: np.ndarray) -> Dict[str, Any]:
+    """
+    编码网格
+    
+    Args:
+        x_axis: 网格列坐标（nx,）
+        y_axis: 网格行坐标（ny,）
+        **layers: 数据层，形状 (ny, nx)，值为 None 的层不输出
+    
+    Returns:
+        dict: 网格传输格式
+    """
+    x_axis = np.asarray(x_axis, dtype=np.float64)
+    y_axis = np.asarray(y_axis, dtype=np.float64)
+    grid = {
+        "format": GRID_FORMAT,
+        "shape": [int(y_axis.size), int(x_axis.size)],
+        # 等间隔时只传起点和步长
+        "x": encode_time_axis(x_axis),
+        "y": encode_time_axis(y_axis)
+    }
+    for name, values in layers.items():
+        if values is not None:
+            grid[name] = encode_array(np.asarray(values).ravel(), dtype='float32')
+    return grid
+
+
+def is_compact(grid_data: Dict[str, Any]) -> bool:
+    """是否为网格传输格式（而不是旧的 2-D 列表）"""
+    return isinstance(grid_data, dict) and grid_data.get('format') == GRID_FORMAT
+
+
+def decode_axes(grid_data: Dict[str, Any]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    取出坐标轴
+    
+    Returns:
+        tuple: (x_axis (nx,), y_axis (ny,))
+    """
+    if is_compact(grid_data):
+        return decode_array(grid_data['x']), decode_array(grid_data['y'])
+    xi = np.asarray(grid_data['xi'], dtype=np.float64)
+    yi = np.asarray(grid_data['yi'], dtype=np.float64)
+    return xi[0, :], yi[:, 0]
+
+
+def decode_layer(grid_data: Dict[str, Any], name: str = 'zi') -> np.ndarray:
+    """
+    取出数据层（float64，无效网格点为 NaN）
+    
+    Returns:
+        np.ndarray: 形状 (ny, nx)；数据层不存在时返回 None
+    """
+    values = grid_data.get(name)
+    if values is None:
+        return None
+    if is_compact(grid_data) or is_encoded(values):
+        ny, nx = grid_data['shape']
+        return decode_array(values).reshape(ny, nx)
+    # 旧格式：2-D 列表，None 直接转换为 NaN
+    return np.array(values, dtype=np.float64)
+
+
+def decode_grid(grid_data: Dict[str, Any]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    解码为 2-D 网格（供 matplotlib 等需要完整坐标网格的场合）
+    
+    Returns:
+        tuple: (xi, yi, zi)，形状均为 (ny, nx)，zi 中无效网格点为 NaN
+    """
+    x_axis, y_axis = decode_axes(grid_data)
+    xi, yi = np.meshgrid(x_axis, y_axis)
+    return xi, yi, decode_layer(grid_data, 'zi')
@@ -3,10 +3,15 @@
 负责应力场插值、置信度评估、等高线生成
 """
 
+import json
+import threading
+from collections import OrderedDict
+
 import numpy as np
 from typing import Dict, List, Any, Tuple, Optional
 from scipy import interpolate
 from scipy.ndimage import gaussian_filter
+from scipy.spatial import Delaunay
 
 
 def _get_point_coords(point: Dict[str, Any]) -> Tuple[float, float]:
@@ -28,7 +33,9 @@ class StressFieldInterpolation:
                                  shape_config: Dict[str, Any],
                                  resolution: int = 100,
                                  method: str = 'auto',
-                                 smoothing: bool = True) -> Dict[str, Any]:
+                                 smoothing: bool = True,
+                                 options: Optional[Dict[str, Any]] = None,
+                                 with_uncertainty: bool = True) -> Dict[str, Any]:
         """
         对应力场进行插值
         
@@ -36,17 +43,24 @@ class StressFieldInterpolation:
             points: 测点列表，每个点包含 {x, y, stress_value} 或 {x_coord, y_coord, stress_value}
             shape_config: 形状配置
             resolution: 网格分辨率
-            method: 插值方法 'auto' | 'linear' | 'cubic' | 'nearest'
+            method: 插值方法 'auto' | 'linear' | 'cubic' | 'nearest' | 'idw' | 'rbf' | 'kriging'
             smoothing: 是否应用高斯平滑（默认True）
+            options: 插值引擎参数（见 spatial_interpolation.ENGINE_OPTIONS），
+                     如 {"power": 2, "neighbors": 12}、{"kernel": "thin_plate_spline"}、{"model": "spherical"}
+            with_uncertainty: 是否估计不确定度（距离估计需要留一法残差和逐网格点近邻查询，
+                              只在显示不确定度叠加层或导出时需要）
         
         Returns:
             dict: {
                 "success": bool,
-                "mode": str,  # 'points_only' | 'linear' | 'cubic'
-                "grid": {"xi": 2D, "yi": 2D, "zi": 2D},
+                "mode": str,  # 'points_only' | 'contour'
+                "grid": {"format": "axes", "shape", "x", "y", "zi", "uncertainty", "variance"（仅 kriging）},
+                        # 编码格式见 grid_payload（坐标轴 + float32 数据层，NaN 表示无效）
                 "method": str,
                 "confidence": str,
-                "message": str
+                "message": str,
+                "uncertainty": {"source", "max", "mean"},  # 每个网格点的不确定度（MPa）摘要，仅 with_uncertainty
+                "variogram": dict（仅 kriging）
             }
         """
         try:
@@ -68,27 +82,17 @@ class StressFieldInterpolation:
             y = np.array([c[1] for c in coords])
             z = np.array([p['stress_value'] for p in valid_points])
             
-            # 获取边界框
-            from .shape_utils import ShapeUtils
-            min_x, min_y, max_x, max_y = ShapeUtils.get_bounding_box(shape_config)
-            
             # 创建网格
-            xi = np.linspace(min_x, max_x, resolution)
-            yi = np.linspace(min_y, max_y, resolution)
-            xi_grid, yi_grid = np.meshgrid(xi, yi)
+            from .shape_utils import ShapeUtils
+            xi_grid, yi_grid = StressFieldInterpolation._build_grid(shape_config, resolution)
             
             # 根据点数选择插值方法
-            if method == 'auto':
-                if n_points < StressFieldInterpolation.MIN_POINTS_FOR_LINEAR:
-                    actual_method = 'none'
-                elif n_points < StressFieldInterpolation.MIN_POINTS_FOR_CUBIC:
-                    actual_method = 'linear'
-                else:
-                    actual_method = 'cubic'
-            else:
-                actual_method = method
+            actual_method = StressFieldInterpolation._resolve_method(method, n_points)
             
             # 执行插值
+            variance_grid = None
+            uncertainty = None
+            extra = None
             if actual_method == 'none' or n_points < StressFieldInterpolation.MIN_POINTS_FOR_LINEAR:
                 # 点数太少，不进行插值
                 zi_grid = np.full(xi_grid.shape, np.nan)
@@ -97,11 +101,8 @@ class StressFieldInterpolation:
                 message = f"测点数量不足 ({n_points} < {StressFieldInterpolation.MIN_POINTS_FOR_LINEAR})，仅显示离散点"
             else:
                 try:
-                    # 使用griddata进行插值
-                    zi_grid = interpolate.griddata(
-                        (x, y), z, (xi_grid, yi_grid),
-                        method=actual_method,
-                        fill_value=np.nan
+                    zi_grid, variance_grid, extra = StressFieldInterpolation._interpolate_grid(
+                        x, y, z, xi_grid, yi_grid, actual_method, options
                     )
                     
                     # 根据参数决定是否应用高斯平滑
@@ -128,54 +129,25 @@ class StressFieldInterpolation:
                         message = f"三次插值失败，降级为线性插值"
                     else:
                         raise interp_error
+                
+                if with_uncertainty:
+                    uncertainty = StressFieldInterpolation._estimate_uncertainty(
+                        x, y, z, xi_grid, yi_grid, zi_grid, variance_grid
+                    )
             
             # 应用形状遮罩（仅当形状配置有效时）
-            shape_type = shape_config.get('type')
-            has_valid_shape = False
-            
-            if shape_type == 'rectangle':
-                has_valid_shape = shape_config.get('width', 0) > 0 and shape_config.get('height', 0) > 0
-            elif shape_type == 'circle':
-                has_valid_shape = shape_config.get('outerRadius', shape_config.get('radius', 0)) > 0
-            elif shape_type == 'polygon':
-                has_valid_shape = len(shape_config.get('vertices', [])) >= 3
-            
-            if has_valid_shape:
+            if StressFieldInterpolation._has_valid_shape(shape_config):
                 mask = ShapeUtils.create_shape_mask(shape_config, xi_grid, yi_grid)
                 zi_grid = np.where(mask, zi_grid, np.nan)
+                if variance_grid is not None:
+                    variance_grid = np.where(mask, variance_grid, np.nan)
+                if uncertainty is not None:
+                    uncertainty = (np.where(mask, uncertainty[0], np.nan), uncertainty[1])
             
-            # 将 NaN 转换为 None（JSON 兼容）
-            def nan_to_none(arr):
-                """将 numpy 数组中的 NaN 转换为 None"""
-                result = []
-                for row in arr:
-                    new_row = []
-                    for val in row:
-                        if np.isnan(val):
-                            new_row.append(None)
-                        else:
-                            new_row.append(float(val))
-                    result.append(new_row)
-                return result
-            
-            return {
-                "success": True,
-                "mode": mode,
-                "grid": {
-                    "xi": xi_grid.tolist(),
-                    "yi": yi_grid.tolist(),
-                    "zi": nan_to_none(zi_grid)
-                },
-                "method": actual_method,
-                "confidence": confidence,
-                "n_points": n_points,
-                "message": message,
-                "stats": {
-                    "vmin": float(np.nanmin(zi_grid)) if not np.all(np.isnan(zi_grid)) else 0,
-                    "vmax": float(np.nanmax(zi_grid)) if not np.all(np.isnan(zi_grid)) else 0,
-                    "mean": float(np.nanmean(zi_grid)) if not np.all(np.isnan(zi_grid)) else 0
-                }
-            }
+            return StressFieldInterpolation._build_result(
+                xi_grid, yi_grid, zi_grid, mode, actual_method, confidence, n_points, message,
+                variance_grid=variance_grid, uncertainty=uncertainty, extra=extra
+            )
             
         except Exception as e:
             return {
@@ -185,6 +157,127 @@ class StressFieldInterpolation:
                 "grid": None
             }
     
+    @staticmethod
+    def _interpolate_grid(x: np.ndarray, y: np.ndarray, z: np.ndarray,
+                          xi_grid: np.ndarray, yi_grid: np.ndarray,
+                          method: str, options: Optional[Dict[str, Any]] = None
+                          ) -> Tuple[np.ndarray, Optional[np.ndarray], Optional[Dict[str, Any]]]:
+        """
+        在网格上执行插值
+        
+        Returns:
+            tuple: (应力值网格, 估计方差网格或 None, 附加结果字段或 None)
+        """
+        from . import spatial_interpolation
+        
+        if method in ('linear', 'cubic', 'nearest'):
+            zi_grid = interpolate.griddata((x, y), z, (xi_grid, yi_grid), method=method, fill_value=np.nan)
+            return zi_grid, None, None
+        
+        if method not in spatial_interpolation.ENGINE_OPTIONS:
+            raise ValueError(f"不支持的插值方法: {method}")
+        
+        # 只传递该引擎接受的参数
+        allowed = spatial_interpolation.ENGINE_OPTIONS[method]
+        kwargs = {k: v for k, v in (options or {}).items() if k in allowed and v is not None}
+        
+        if method == 'idw':
+            return spatial_interpolation.idw_grid(x, y, z, xi_grid, yi_grid, **kwargs), None, None
+        if method == 'rbf':
+            return spatial_interpolation.rbf_grid(x, y, z, xi_grid, yi_grid, **kwargs), None, None
+        
+        zi_grid, variance_grid, variogram = spatial_interpolation.kriging_grid(x, y, z, xi_grid, yi_grid, **kwargs)
+        return zi_grid, variance_grid, {"variogram": variogram}
+    
+    @staticmethod
+    def _estimate_uncertainty(x: np.ndarray, y: np.ndarray, z: np.ndarray,
+                              xi_grid: np.ndarray, yi_grid: np.ndarray, zi_grid: np.ndarray,
+                              variance_grid: Optional[np.ndarray] = None) -> Tuple[np.ndarray, str]:
+        """
+        每个网格点的不确定度（克里金取标准差，其余方法按留一法残差和到测点的距离估计）
+        
+        Returns:
+            tuple: (不确定度网格，插值结果为 NaN 处也为 NaN, 来源 'kriging' | 'distance')
+        """
+        from .spatial_interpolation import uncertainty_grid
+        
+        grid, source = uncertainty_grid(x, y, z, xi_grid, yi_grid, variance=variance_grid)
+        return np.where(np.isnan(zi_grid), np.nan, grid), source
+    
+    @staticmethod
+    def _build_grid(shape_config: Dict[str, Any], resolution: int) -> Tuple[np.ndarray, np.ndarray]:
+        """按形状边界框创建 resolution × resolution 的插值网格"""
+        from .shape_utils import ShapeUtils
+        min_x, min_y, max_x, max_y = ShapeUtils.get_bounding_box(shape_config)
+        xi = np.linspace(min_x, max_x, resolution)
+        yi = np.linspace(min_y, max_y, resolution)
+        return np.meshgrid(xi, yi)
+    
+    @staticmethod
+    def _resolve_method(method: str, n_points: int) -> str:
+        """method='auto' 时根据点数选择插值方法"""
+        if method != 'auto':
+            return method
+        return StressFieldInterpolation.get_interpolation_method(n_points)
+    
+    @staticmethod
+    def _has_valid_shape(shape_config: Dict[str, Any]) -> bool:
+        """形状配置是否有效（有效时才应用形状遮罩）"""
+        shape_type = shape_config.get('type')
+        if shape_type == 'rectangle':
+            return shape_config.get('width', 0) > 0 and shape_config.get('height', 0) > 0
+        elif shape_type == 'circle':
+            return shape_config.get('outerRadius', shape_config.get('radius', 0)) > 0
+        elif shape_type == 'polygon':
+            return len(shape_config.get('vertices', [])) >= 3
+        return False
+    
+    @staticmethod
+    def _build_result(xi_grid: np.ndarray, yi_grid: np.ndarray, zi_grid: np.ndarray,
+                      mode: str, actual_method: str, confidence: str,
+                      n_points: int, message: str,
+                      variance_grid: Optional[np.ndarray] = None,
+                      uncertainty: Optional[Tuple[np.ndarray, str]] = None,
+                      extra: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        组装插值结果（网格按 grid_payload 格式编码：1-D 坐标轴 + float32 数据层）
+        
+        uncertainty 为 (不确定度网格, 来源)，见 _estimate_uncertainty
+        """
+        from .grid_payload import encode_grid
+        
+        grid = encode_grid(
+            xi_grid[0, :], yi_grid[:, 0],
+            zi=zi_grid,
+            uncertainty=uncertainty[0] if uncertainty is not None else None,
+            variance=variance_grid
+        )
+        
+        result = {
+            "success": True,
+            "mode": mode,
+            "grid": grid,
+            "method": actual_method,
+            "confidence": confidence,
+            "n_points": n_points,
+            "message": message,
+            "stats": {
+                "vmin": float(np.nanmin(zi_grid)) if not np.all(np.isnan(zi_grid)) else 0,
+                "vmax": float(np.nanmax(zi_grid)) if not np.all(np.isnan(zi_grid)) else 0,
+                "mean": float(np.nanmean(zi_grid)) if not np.all(np.isnan(zi_grid)) else 0
+            }
+        }
+        if uncertainty is not None:
+            valid_u = uncertainty[0][~np.isnan(uncertainty[0])]
+            result["uncertainty"] = {
+                "source": uncertainty[1],
+                "max": float(valid_u.max()) if valid_u.size else 0,
+                "mean": float(valid_u.mean()) if valid_u.size else 0
+            }
+        if extra:
+            result.update(extra)
+        return result
+    
     @staticmethod
     def _apply_smoothing(zi: np.ndarray, sigma: float = 1.0) -> np.ndarray:
         """应用高斯平滑"""
@@ -370,38 +463,258 @@ class StressFieldInterpolation:
         Returns:
             float: 插值的应力值，如果无法插值则返回None
         """
+        from .spatial_interpolation import idw_grid
+        
         valid_points = [p for p in points if p.get('stress_value') is not None]
         
         if not valid_points:
             return None
         
-        if method == 'nearest':
-            # 最近邻
-            min_dist = float('inf')
-            nearest_stress = None
-            for p in valid_points:
-                px, py = _get_point_coords(p)
-                dist = np.sqrt((px - x)**2 + (py - y)**2)
-                if dist < min_dist:
-                    min_dist = dist
-                    nearest_stress = p['stress_value']
-            return nearest_stress
-        
-        else:  # IDW
-            # 反距离加权插值
-            weights = []
-            values = []
-            
-            for p in valid_points:
-                px, py = _get_point_coords(p)
-                dist = np.sqrt((px - x)**2 + (py - y)**2)
-                if dist < 0.001:  # 非常接近某个测点
-                    return p['stress_value']
-                weights.append(1.0 / dist**2)
-                values.append(p['stress_value'])
+        coords = np.array([_get_point_coords(p) for p in valid_points], dtype=float)
+        z = np.array([p['stress_value'] for p in valid_points], dtype=float)
+        
+        # 最近邻即只取 1 个最近测点；IDW 使用全部测点（幂次 2）
+        neighbors = 1 if method == 'nearest' else None
+        value = idw_grid(coords[:, 0], coords[:, 1], z, np.array([[x]]), np.array([[y]]),
+                         power=2.0, neighbors=neighbors)
+        return float(value[0, 0])
+
+
+class IncrementalFieldInterpolator:
+    """
+    单个实验的增量插值器（采集过程中每测一个点刷新一次云图）
+    
+    在两次调用之间保留：
+    - 网格和形状遮罩（形状或分辨率不变时不重建）
+    - Delaunay 三角剖分（incremental=True，新测点用 add_points 加入）
+    - 每个网格点所在的三角形及其重心坐标（linear）
+    
+    新测点加入后只有被改动的三角形内的网格点需要重新定位，其余网格点沿用缓存的
+    重心坐标，只按新的应力值重新加权（更换基准点后应力值整体变化也无需重新剖分）。
+    cubic（Clough-Tocher）的梯度估计是全局的，复用三角剖分后整体重新求值。
+    
+    结果与 StressFieldInterpolation.interpolate_stress_field 相同；
+    测点被删除或移动时重新剖分，点数不足或方法不是 linear/cubic（nearest、idw、rbf、kriging）时退回完整插值
+    """
+    
+    # 保留的插值器数量（按 实验ID + 分辨率，超出时释放最久未用的）
+    MAX_INSTANCES = 4
+    
+    # 三角形编码中每个顶点索引占用的位数（最多 2^21 个测点）
+    _VERTEX_BITS = 21
+    
+    # 网格点定位状态：未定位（或所在三角形已被改动）、在凸包外
+    _UNLOCATED = -1
+    _OUTSIDE_HULL = -2
+    
+    _instances = OrderedDict()
+    _instances_lock = threading.Lock()
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._grid_key = None
+        self._xi_grid = None
+        self._yi_grid = None
+        self._cells = None
+        self._mask = None
+        self._reset_triangulation()
+    
+    @classmethod
+    def for_experiment(cls, exp_id: str, resolution: int = 100) -> 'IncrementalFieldInterpolator':
+        """获取（或创建）实验在指定分辨率下的插值器"""
+        key = (exp_id, int(resolution))
+        with cls._instances_lock:
+            instance = cls._instances.get(key)
+            if instance is None:
+                instance = cls._instances[key] = cls()
+            cls._instances.move_to_end(key)
+            while len(cls._instances) > cls.MAX_INSTANCES:
+                _, old = cls._instances.popitem(last=False)
+                old._reset_triangulation()
+            return instance
+    
+    @classmethod
+    def discard(cls, exp_id: str) -> None:
+        """释放实验的所有插值器（实验删除或重置时调用）"""
+        with cls._instances_lock:
+            for key in [k for k in cls._instances if k[0] == exp_id]:
+                cls._instances.pop(key)._reset_triangulation()
+    
+    def _reset_triangulation(self):
+        """丢弃三角剖分和网格点定位缓存"""
+        tri = getattr(self, '_tri', None)
+        if tri is not None:
+            tri.close()
+        self._tri = None
+        self._coord_index = {}      # 测点坐标 -> 三角剖分顶点索引
+        self._hull_grew = True      # 上次求值后凸包是否扩大（在凸包外的网格点需要重新定位）
+        self._simplex_keys = None   # 上次求值时各三角形的编码
+        self._cell_simplex = None   # 每个网格点所在三角形在 _simplex_keys 中的序号，或定位状态
+        self._cell_vertices = None  # (n_cells, 3) 三角形顶点索引
+        self._cell_weights = None   # (n_cells, 3) 重心坐标
+    
+    def interpolate(self, points: List[Dict[str, Any]], shape_config: Dict[str, Any],
+                    resolution: int = 100, method: str = 'auto',
+                    smoothing: bool = True, options: Optional[Dict[str, Any]] = None,
+                    with_uncertainty: bool = True) -> Dict[str, Any]:
+        """
+        插值（参数和返回值同 StressFieldInterpolation.interpolate_stress_field）
+        """
+        valid_points = [p for p in points if p.get('stress_value') is not None]
+        n_points = len(valid_points)
+        actual_method = StressFieldInterpolation._resolve_method(method, n_points)
+        
+        if n_points < StressFieldInterpolation.MIN_POINTS_FOR_LINEAR or actual_method not in ('linear', 'cubic'):
+            return StressFieldInterpolation.interpolate_stress_field(
+                points, shape_config, resolution=resolution, method=method, smoothing=smoothing,
+                options=options, with_uncertainty=with_uncertainty
+            )
+        
+        try:
+            with self._lock:
+                coords = np.array([_get_point_coords(p) for p in valid_points], dtype=np.float64)
+                z = np.array([p['stress_value'] for p in valid_points], dtype=np.float64)
+                self._update_grid(shape_config, resolution)
+                values = self._update_triangulation(coords, z)
+                
+                if actual_method == 'linear':
+                    zi = self._evaluate_linear(values)
+                else:
+                    zi = interpolate.CloughTocher2DInterpolator(self._tri, values)(self._xi_grid, self._yi_grid)
+                
+                uncertainty = None
+                if with_uncertainty:
+                    uncertainty = StressFieldInterpolation._estimate_uncertainty(
+                        coords[:, 0], coords[:, 1], z, self._xi_grid, self._yi_grid, zi
+                    )
+                
+                if smoothing:
+                    zi = StressFieldInterpolation._apply_smoothing(zi)
+                if self._mask is not None:
+                    zi = np.where(self._mask, zi, np.nan)
+                    if uncertainty is not None:
+                        uncertainty = (np.where(self._mask, uncertainty[0], np.nan), uncertainty[1])
+                
+                message = f"使用 {actual_method} 插值，{n_points} 个测点"
+                if smoothing:
+                    message += "（已平滑）"
+                
+                return StressFieldInterpolation._build_result(
+                    self._xi_grid, self._yi_grid, zi, 'contour', actual_method,
+                    StressFieldInterpolation.get_confidence_level(n_points), n_points, message,
+                    uncertainty=uncertainty
+                )
+        except Exception:
+            # 三角剖分失败（如测点共线）时丢弃缓存，按完整插值处理（含降级逻辑）
+            with self._lock:
+                self._reset_triangulation()
+            return StressFieldInterpolation.interpolate_stress_field(
+                points, shape_config, resolution=resolution, method=method, smoothing=smoothing,
+                options=options, with_uncertainty=with_uncertainty
+            )
+    
+    def _update_grid(self, shape_config: Dict[str, Any], resolution: int):
+        """形状或分辨率变化时重建网格、遮罩，并丢弃网格点定位缓存"""
+        grid_key = (json.dumps(shape_config, sort_keys=True, default=str), int(resolution))
+        if grid_key == self._grid_key:
+            return
+        
+        from .shape_utils import ShapeUtils
+        self._xi_grid, self._yi_grid = StressFieldInterpolation._build_grid(shape_config, resolution)
+        self._cells = np.column_stack((self._xi_grid.ravel(), self._yi_grid.ravel()))
+        self._mask = None
+        if StressFieldInterpolation._has_valid_shape(shape_config):
+            self._mask = ShapeUtils.create_shape_mask(shape_config, self._xi_grid, self._yi_grid)
+        self._grid_key = grid_key
+        self._cell_simplex = None
+    
+    def _update_triangulation(self, coords: np.ndarray, z: np.ndarray) -> np.ndarray:
+        """
+        把测点同步到三角剖分：新坐标用 add_points 加入，已有测点只更新应力值
+        
+        Returns:
+            np.ndarray: 按三角剖分顶点顺序排列的应力值
+        """
+        keys = [tuple(c) for c in coords]
+        
+        # 已有测点被删除（或移动）时重新剖分
+        if self._tri is None or len(set(keys) & self._coord_index.keys()) != len(self._coord_index):
+            self._reset_triangulation()
+        
+        new_keys = list(dict.fromkeys(k for k in keys if k not in self._coord_index))
+        base = 0 if self._tri is None else len(self._tri.points)
+        if new_keys:
+            new_coords = np.array(new_keys, dtype=np.float64)
+            if self._tri is None:
+                self._tri = Delaunay(new_coords, incremental=True)
+                self._hull_grew = True
+            else:
+                # 新测点落在原凸包外时凸包扩大
+                self._hull_grew |= bool(np.any(self._tri.find_simplex(new_coords) < 0))
+                self._tri.add_points(new_coords)
+            for offset, k in enumerate(new_keys):
+                self._coord_index[k] = base + offset
+        
+        # 重合测点只对应一个顶点（取后出现的应力值）
+        values = np.full(len(self._tri.points), np.nan)
+        values[[self._coord_index[k] for k in keys]] = z
+        return values
+    
+    @classmethod
+    def _encode_simplices(cls, simplices: np.ndarray) -> np.ndarray:
+        """把三角形的（排序后）顶点索引编码为一个整数，便于比较剖分前后的三角形"""
+        v = np.sort(simplices, axis=1).astype(np.int64)
+        return (v[:, 0] << (2 * cls._VERTEX_BITS)) | (v[:, 1] << cls._VERTEX_BITS) | v[:, 2]
+    
+    def _evaluate_linear(self, values: np.ndarray) -> np.ndarray:
+        """
+        线性插值：只重新定位所在三角形已被改动的网格点（凸包扩大时还有原先在凸包外的网格点），
+        其余网格点沿用缓存的重心坐标
+        """
+        tri = self._tri
+        cells = self._cells
+        keys = self._encode_simplices(tri.simplices)
+        
+        if self._cell_simplex is None:
+            self._cell_simplex = np.full(len(cells), self._UNLOCATED, dtype=np.int64)
+            self._cell_vertices = np.zeros((len(cells), 3), dtype=np.int64)
+            self._cell_weights = np.zeros((len(cells), 3))
+            self._cell_weights[:, 0] = 1.0
+        elif self._simplex_keys is not None:
+            # 上次的三角形在当前剖分中的序号（已被改动的三角形为 _UNLOCATED）
+            order = np.argsort(keys)
+            pos = np.minimum(np.searchsorted(keys, self._simplex_keys, sorter=order), len(keys) - 1)
+            old_to_new = np.where(keys[order[pos]] == self._simplex_keys, order[pos], self._UNLOCATED)
+            self._cell_simplex = np.where(self._cell_simplex >= 0,
+                                          old_to_new[np.maximum(self._cell_simplex, 0)],
+                                          self._cell_simplex)
+        
+        stale = self._cell_simplex == self._UNLOCATED
+        if self._hull_grew:
+            stale |= self._cell_simplex == self._OUTSIDE_HULL
+        
+        stale_idx = np.flatnonzero(stale)
+        if len(stale_idx):
+            simplex = tri.find_simplex(cells[stale_idx])
+            found = simplex >= 0
+            self._cell_simplex[stale_idx] = np.where(found, simplex, self._OUTSIDE_HULL)
             
-            total_weight = sum(weights)
-            if total_weight == 0:
-                return None
+            # 凸包外的网格点指向末尾的 NaN 哨兵值
+            outside = stale_idx[~found]
+            self._cell_vertices[outside] = -1
+            self._cell_weights[outside] = (1.0, 0.0, 0.0)
             
-            return sum(w * v for w, v in zip(weights, values)) / total_weight
+            # 重心坐标：transform[s, :2] 为仿射逆矩阵，transform[s, 2] 为参考顶点
+            idx = stale_idx[found]
+            s = simplex[found]
+            b = np.einsum('ijk,ik->ij', tri.transform[s, :2], cells[idx] - tri.transform[s, 2])
+            self._cell_vertices[idx] = tri.simplices[s]
+            self._cell_weights[idx] = np.column_stack((b, 1 - b.sum(axis=1)))
+        
+        self._simplex_keys = keys
+        self._hull_grew = False
+        
+        # 末尾追加 NaN 哨兵（顶点索引 -1），凸包外的网格点结果为 NaN
+        values = np.append(values, np.nan)
+        zi = np.einsum('ij,ij->i', self._cell_weights, values[self._cell_vertices])
+        return zi.reshape(self._xi_grid.shape)
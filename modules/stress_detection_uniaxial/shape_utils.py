@@ -3,11 +3,17 @@
 负责形状验证、遮罩生成、点位判断、面积计算、布尔运算
 """
 
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
 import numpy as np
 from typing import Dict, List, Any, Tuple, Optional, Union
 
 # 尝试导入shapely，如果不可用则使用简化实现
 try:
+    import shapely
     from shapely.geometry import Polygon, Point, MultiPolygon
     from shapely.ops import unary_union
     from shapely.validation import explain_validity
@@ -16,6 +22,15 @@ except ImportError:
     SHAPELY_AVAILABLE = False
     print("警告: shapely库未安装，将使用简化的几何计算")
 
+# 浮点精度容差（与 is_point_inside 一致）
+POINT_TOLERANCE = 1e-6
+
+# 形状遮罩缓存容量（按 形状配置 + 网格 + 边距 缓存，超出时淘汰最久未用的）
+MASK_CACHE_SIZE = 16
+
+_mask_cache = OrderedDict()
+_mask_cache_lock = threading.Lock()
+
 
 class ShapeUtils:
     """形状工具类"""
@@ -384,6 +399,114 @@ class ShapeUtils:
         
         return False
     
+    @staticmethod
+    def points_inside(x: np.ndarray, y: np.ndarray, shape_config: Dict[str, Any],
+                      check_modifiers: bool = True) -> np.ndarray:
+        """
+        批量判断点是否在形状内部（is_point_inside 的向量化版本，边界和容差规则相同）
+        
+        Args:
+            x, y: 点坐标数组（形状相同）
+            shape_config: 形状配置
+            check_modifiers: 是否检查布尔运算修改器（孔洞）
+        
+        Returns:
+            np.ndarray: 与 x 形状相同的布尔数组
+        """
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        shape_type = shape_config.get('type', 'rectangle')
+        
+        if shape_type == 'rectangle':
+            width = shape_config.get('width', 0)
+            height = shape_config.get('height', 0)
+            inside = (x >= 0) & (x <= width) & (y >= 0) & (y <= height)
+        
+        elif shape_type == 'circle':
+            cx = shape_config.get('centerX', 0)
+            cy = shape_config.get('centerY', 0)
+            outer_r = shape_config.get('outerRadius', shape_config.get('radius', 0))
+            inner_r = shape_config.get('innerRadius', 0)
+            start_angle = shape_config.get('startAngle', 0)
+            end_angle = shape_config.get('endAngle', 360)
+            
+            dist = np.hypot(x - cx, y - cy)
+            inside = (dist >= inner_r - POINT_TOLERANCE) & (dist <= outer_r + POINT_TOLERANCE)
+            
+            if abs(end_angle - start_angle) < 360:
+                angle = np.degrees(np.arctan2(y - cy, x - cx))
+                angle = np.where(angle < 0, angle + 360, angle)
+                start_norm = start_angle % 360
+                end_norm = end_angle % 360
+                if start_norm <= end_norm:
+                    inside &= (angle >= start_norm) & (angle <= end_norm)
+                else:
+                    # 跨越0度的情况
+                    inside &= (angle >= start_norm) | (angle <= end_norm)
+        
+        elif shape_type == 'polygon':
+            vertices = shape_config.get('vertices', [])
+            inside = None
+            if SHAPELY_AVAILABLE and len(vertices) >= 3:
+                try:
+                    # intersects 包含边界，与 contains(point) or boundary.contains(point) 一致
+                    inside = shapely.intersects_xy(Polygon(vertices), x, y)
+                except Exception:
+                    inside = None
+            if inside is None:
+                inside = ShapeUtils._points_in_polygon_simple(x, y, vertices)
+        
+        else:
+            inside = np.zeros(x.shape, dtype=bool)
+        
+        if check_modifiers:
+            for modifier in shape_config.get('modifiers', []):
+                if modifier.get('op') == 'subtract':
+                    inside &= ~ShapeUtils._points_in_modifier(x, y, modifier)
+        
+        return inside
+    
+    @staticmethod
+    def _points_in_polygon_simple(x: np.ndarray, y: np.ndarray, vertices: List[List[float]]) -> np.ndarray:
+        """射线法的向量化版本（逐条边处理整个数组）"""
+        inside = np.zeros(x.shape, dtype=bool)
+        n = len(vertices)
+        if n < 3:
+            return inside
+        
+        j = n - 1
+        for i in range(n):
+            xi, yi = vertices[i]
+            xj, yj = vertices[j]
+            # 水平边不会与水平射线相交
+            if yj != yi:
+                inside ^= ((yi > y) != (yj > y)) & (x < (xj - xi) * (y - yi) / (yj - yi) + xi)
+            j = i
+        
+        return inside
+    
+    @staticmethod
+    def _points_in_modifier(x: np.ndarray, y: np.ndarray, modifier: Dict[str, Any]) -> np.ndarray:
+        """_is_point_in_modifier 的向量化版本（包含边界）"""
+        shape_type = modifier.get('shape', 'circle')
+        
+        if shape_type == 'circle':
+            cx = modifier.get('centerX', 0)
+            cy = modifier.get('centerY', 0)
+            radius = modifier.get('radius', 0)
+            return np.hypot(x - cx, y - cy) <= radius + POINT_TOLERANCE
+        
+        elif shape_type == 'rectangle':
+            mx = modifier.get('x', modifier.get('centerX', 0))
+            my = modifier.get('y', modifier.get('centerY', 0))
+            width = modifier.get('width', 0)
+            height = modifier.get('height', 0)
+            # x,y是左下角坐标
+            return ((x >= mx - POINT_TOLERANCE) & (x <= mx + width + POINT_TOLERANCE) &
+                    (y >= my - POINT_TOLERANCE) & (y <= my + height + POINT_TOLERANCE))
+        
+        return np.zeros(x.shape, dtype=bool)
+    
     @staticmethod
     def create_shape_mask(shape_config: Dict[str, Any], 
                          grid_x: np.ndarray, grid_y: np.ndarray,
@@ -391,6 +514,9 @@ class ShapeUtils:
         """
         创建形状遮罩
         
+        整个网格一次向量化判断；边距用距离变换计算（同时考虑外边界和孔洞）。
+        结果按 (形状配置, 网格, 边距) 缓存，云图刷新时形状不变则直接复用
+        
         Args:
             shape_config: 形状配置
             grid_x: X坐标网格 (2D array)
@@ -400,22 +526,60 @@ class ShapeUtils:
         Returns:
             np.ndarray: 布尔遮罩数组，True表示在形状内
         """
-        mask = np.zeros(grid_x.shape, dtype=bool)
+        grid_x = np.asarray(grid_x, dtype=np.float64)
+        grid_y = np.asarray(grid_y, dtype=np.float64)
+        key = ShapeUtils._mask_cache_key(shape_config, grid_x, grid_y, margin)
+        
+        with _mask_cache_lock:
+            cached = _mask_cache.get(key)
+            if cached is not None:
+                _mask_cache.move_to_end(key)
+                return cached.copy()
+        
+        mask = ShapeUtils.points_inside(grid_x, grid_y, shape_config, check_modifiers=True)
+        if margin > 0:
+            mask = ShapeUtils._apply_margin(mask, grid_x, grid_y, margin)
+        
+        with _mask_cache_lock:
+            _mask_cache[key] = mask
+            while len(_mask_cache) > MASK_CACHE_SIZE:
+                _mask_cache.popitem(last=False)
+        
+        return mask.copy()
+    
+    @staticmethod
+    def _mask_cache_key(shape_config: Dict[str, Any], grid_x: np.ndarray, grid_y: np.ndarray,
+                        margin: float) -> Tuple[str, str, float]:
+        """遮罩缓存键：形状配置的规范化 JSON 和网格坐标的摘要"""
+        config_key = json.dumps(shape_config, sort_keys=True, default=str)
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(str(grid_x.shape).encode())
+        digest.update(np.ascontiguousarray(grid_x).tobytes())
+        digest.update(np.ascontiguousarray(grid_y).tobytes())
+        return config_key, digest.hexdigest(), float(margin)
+    
+    @staticmethod
+    def _apply_margin(mask: np.ndarray, grid_x: np.ndarray, grid_y: np.ndarray, margin: float) -> np.ndarray:
+        """
+        向内收缩遮罩：保留到形状外（含孔洞）距离不小于 margin 的网格点
         
-        for i in range(grid_x.shape[0]):
-            for j in range(grid_x.shape[1]):
-                x, y = grid_x[i, j], grid_y[i, j]
-                
-                # 检查是否在形状内
-                if ShapeUtils.is_point_inside(x, y, shape_config, check_modifiers=True):
-                    # 如果有边距，检查到边界的距离
-                    if margin > 0:
-                        if ShapeUtils._distance_to_boundary(x, y, shape_config) >= margin:
-                            mask[i, j] = True
-                    else:
-                        mask[i, j] = True
+        规则网格（meshgrid）用欧氏距离变换；网格外视为形状外。
+        边界位于内外网格点之间，距离减去半个网格间距作为到边界的距离
+        """
+        from scipy.ndimage import distance_transform_edt
+        
+        if mask.ndim != 2 or min(mask.shape) < 2:
+            return mask
+        
+        dx = abs(grid_x[0, 1] - grid_x[0, 0])
+        dy = abs(grid_y[1, 0] - grid_y[0, 0])
+        if dx == 0 or dy == 0:
+            return mask
         
-        return mask
+        # 四周补一圈形状外的点，使网格边缘上的点也按到边界的距离计算
+        padded = np.pad(mask, 1, constant_values=False)
+        distance = distance_transform_edt(padded, sampling=(dy, dx))[1:-1, 1:-1]
+        return mask & (distance - 0.5 * min(dx, dy) >= margin)
     
     @staticmethod
     def _distance_to_boundary(x: float, y: float, shape_config: Dict[str, Any]) -> float:
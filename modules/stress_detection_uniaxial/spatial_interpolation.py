@@ -0,0 +1,406 @@
+"""
+应力场测绘模块 - 空间插值引擎
+在整个网格上一次性求值的散点插值算法（供 StressFieldInterpolation 调用）：
+- idw: 反距离加权，KD 树查询 k 个最近测点
+- rbf: 径向基函数（scipy RBFInterpolator），测点较多时只用邻域测点求解
+- kriging: 普通克里金，自动拟合变差函数，同时返回每个网格点的估计方差
+- uncertainty_grid: 每个网格点的插值不确定度（克里金标准差，或留一法残差 × 到最近测点的距离）
+
+所有函数的输入为测点坐标 x, y、应力值 z 和网格坐标 xi, yi（形状相同的数组），
+输出与 xi 形状相同的网格
+"""
+
+import warnings
+from typing import Dict, Any, Optional, Tuple
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+
+# IDW 默认幂次和参与加权的最近测点数
+IDW_POWER = 2.0
+IDW_NEIGHBORS = 12
+
+# 网格点与测点距离小于该值时直接取测点值（避免除零）
+IDW_EXACT_DISTANCE = 1e-9
+
+# RBF 默认核函数；测点数不超过 RBF_GLOBAL_MAX_POINTS 时全局求解（比邻域求解更快），
+# 超过时每个网格点只用 RBF_NEIGHBORS 个邻域测点，避免 O(n³) 的全局方程组
+RBF_KERNEL = 'thin_plate_spline'
+RBF_GLOBAL_MAX_POINTS = 1000
+RBF_NEIGHBORS = 50
+
+# 不需要形状参数的核函数
+RBF_SCALE_INVARIANT_KERNELS = ('linear', 'thin_plate_spline', 'cubic', 'quintic')
+
+# 克里金邻域测点数（测点数不超过时使用全部测点，只需分解一次方程组）
+KRIGING_NEIGHBORS = 24
+
+# 克里金分块求解的网格点数（控制批量矩阵占用的内存）
+KRIGING_CHUNK = 2048
+
+# 变差函数拟合：分箱数、参与拟合的最多测点数（超过时固定种子抽样）
+VARIOGRAM_LAGS = 12
+VARIOGRAM_MAX_POINTS = 1500
+
+# 支持的变差函数模型
+VARIOGRAM_MODELS = ('spherical', 'exponential', 'gaussian')
+
+# 不确定度估计时混合留一法误差率的最近测点数
+UNCERTAINTY_NEIGHBORS = 4
+
+# 各引擎接受的可选参数（interpolate_stress_field 的 options 中其余键被忽略）
+ENGINE_OPTIONS = {
+    'idw': ('power', 'neighbors'),
+    'rbf': ('kernel', 'neighbors', 'smoothing', 'epsilon'),
+    'kriging': ('model', 'neighbors'),
+}
+
+
+def merge_duplicates(x: np.ndarray, y: np.ndarray, z: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """坐标完全相同的测点取应力平均值（重复坐标会使 RBF/克里金方程组奇异）"""
+    coords = np.column_stack((x, y))
+    unique, inverse, counts = np.unique(coords, axis=0, return_inverse=True, return_counts=True)
+    if len(unique) == len(coords):
+        return x, y, z
+    inverse = inverse.ravel()
+    z_mean = np.bincount(inverse, weights=z) / counts
+    return unique[:, 0], unique[:, 1], z_mean
+
+
+def idw_grid(x: np.ndarray, y: np.ndarray, z: np.ndarray,
+             xi: np.ndarray, yi: np.ndarray,
+             power: float = IDW_POWER,
+             neighbors: Optional[int] = IDW_NEIGHBORS) -> np.ndarray:
+    """
+    反距离加权插值
+    
+    Args:
+        x, y, z: 测点坐标和应力值
+        xi, yi: 网格坐标
+        power: 距离幂次
+        neighbors: 参与加权的最近测点数（None 表示全部测点）
+    
+    Returns:
+        np.ndarray: 与 xi 形状相同的插值结果
+    """
+    x, y, z = merge_duplicates(np.asarray(x, dtype=float), np.asarray(y, dtype=float), np.asarray(z, dtype=float))
+    k = len(z) if neighbors is None else max(1, min(int(neighbors), len(z)))
+    
+    tree = cKDTree(np.column_stack((x, y)))
+    dist, idx = tree.query(np.column_stack((xi.ravel(), yi.ravel())), k=k)
+    if k == 1:
+        return z[idx].reshape(xi.shape)
+    
+    # 与测点重合的网格点直接取测点值（最近的测点排在第一列）
+    exact = dist[:, 0] <= IDW_EXACT_DISTANCE
+    dist[exact] = np.inf
+    dist[exact, 0] = 1.0
+    weights = 1.0 / dist ** power
+    
+    zi = np.einsum('ij,ij->i', weights, z[idx]) / weights.sum(axis=1)
+    return zi.reshape(xi.shape)
+
+
+def rbf_grid(x: np.ndarray, y: np.ndarray, z: np.ndarray,
+             xi: np.ndarray, yi: np.ndarray,
+             kernel: str = RBF_KERNEL,
+             neighbors: Optional[int] = RBF_NEIGHBORS,
+             smoothing: float = 0.0,
+             epsilon: Optional[float] = None) -> np.ndarray:
+    """
+    径向基函数插值
+    
+    Args:
+        x, y, z: 测点坐标和应力值
+        xi, yi: 网格坐标
+        kernel: RBFInterpolator 核函数（thin_plate_spline、cubic、multiquadric、gaussian 等）
+        neighbors: 测点数超过 RBF_GLOBAL_MAX_POINTS 时每个网格点使用的邻域测点数（None 表示始终全局求解）
+        smoothing: 平滑系数（0 表示精确通过测点）
+        epsilon: 形状参数（gaussian、multiquadric 等核函数需要；None 时取测点平均间距的倒数）
+    
+    Returns:
+        np.ndarray: 与 xi 形状相同的插值结果
+    """
+    from scipy.interpolate import RBFInterpolator
+    
+    x, y, z = merge_duplicates(np.asarray(x, dtype=float), np.asarray(y, dtype=float), np.asarray(z, dtype=float))
+    coords = np.column_stack((x, y))
+    if neighbors is not None and (len(z) <= RBF_GLOBAL_MAX_POINTS or int(neighbors) >= len(z)):
+        neighbors = None
+    
+    if epsilon is None and kernel not in RBF_SCALE_INVARIANT_KERNELS:
+        # 按测点平均间距取值（尺度无关的核函数使用 RBFInterpolator 默认值）
+        dist, _ = cKDTree(coords).query(coords, k=2)
+        spacing = float(np.mean(dist[:, 1])) if len(z) > 1 else 1.0
+        epsilon = 1.0 / spacing if spacing > 0 else 1.0
+    
+    rbf = RBFInterpolator(coords, z, neighbors=None if neighbors is None else int(neighbors),
+                          kernel=kernel, smoothing=smoothing,
+                          epsilon=1.0 if epsilon is None else epsilon)
+    return rbf(np.column_stack((xi.ravel(), yi.ravel()))).reshape(xi.shape)
+
+
+def variogram_model(h: np.ndarray, model: str, nugget: float, partial_sill: float, range_: float) -> np.ndarray:
+    """
+    变差函数 γ(h)（h = 0 时为 0，h > 0 时包含块金值）
+    
+    Args:
+        h: 距离
+        model: 'spherical' | 'exponential' | 'gaussian'
+        nugget: 块金值
+        partial_sill: 偏基台值（基台值 = 块金值 + 偏基台值）
+        range_: 变程（exponential/gaussian 为有效变程，达到 95% 基台值的距离）
+    """
+    r = np.asarray(h, dtype=float) / max(range_, 1e-12)
+    if model == 'spherical':
+        shape = np.where(r < 1.0, 1.5 * r - 0.5 * r ** 3, 1.0)
+    elif model == 'exponential':
+        shape = 1.0 - np.exp(-3.0 * r)
+    elif model == 'gaussian':
+        shape = 1.0 - np.exp(-3.0 * r ** 2)
+    else:
+        raise ValueError(f'不支持的变差函数模型: {model}，可选: {", ".join(VARIOGRAM_MODELS)}')
+    return np.where(r > 0, nugget + partial_sill * shape, 0.0)
+
+
+def fit_variogram(x: np.ndarray, y: np.ndarray, z: np.ndarray,
+                  model: str = 'spherical', n_lags: int = VARIOGRAM_LAGS) -> Dict[str, Any]:
+    """
+    由测点拟合变差函数（经验变差函数按距离分箱，加权最小二乘拟合模型参数）
+    
+    Args:
+        x, y, z: 测点坐标和应力值
+        model: 变差函数模型
+        n_lags: 距离分箱数（最大距离取测点间最大距离的一半）
+    
+    Returns:
+        dict: {"model", "nugget", "sill", "range", "fitted"}；
+              测点太少或拟合失败时 fitted 为 False，使用经验参数（无块金，基台值为方差）
+    """
+    from scipy.optimize import OptimizeWarning, curve_fit
+    from scipy.spatial.distance import pdist
+    
+    if model not in VARIOGRAM_MODELS:
+        raise ValueError(f'不支持的变差函数模型: {model}，可选: {", ".join(VARIOGRAM_MODELS)}')
+    
+    coords = np.column_stack((x, y))
+    z = np.asarray(z, dtype=float)
+    if len(z) > VARIOGRAM_MAX_POINTS:
+        keep = np.random.default_rng(0).choice(len(z), VARIOGRAM_MAX_POINTS, replace=False)
+        coords, z = coords[keep], z[keep]
+    
+    dist = pdist(coords)
+    max_lag = float(dist.max()) / 2 if dist.size else 0.0
+    
+    # 经验参数：无块金，基台值为方差，变程为最大分箱距离的一半
+    params = {
+        "model": model,
+        "nugget": 0.0,
+        "sill": float(np.var(z)),
+        "range": max(max_lag / 2, 1e-12),
+        "fitted": False
+    }
+    if max_lag <= 0 or params["sill"] <= 0:
+        return params
+    
+    gamma = 0.5 * pdist(z[:, None], 'sqeuclidean')
+    in_range = dist <= max_lag
+    lag = np.minimum((dist[in_range] / max_lag * n_lags).astype(int), n_lags - 1)
+    counts = np.bincount(lag, minlength=n_lags)
+    used = counts > 0
+    if np.count_nonzero(used) < 3:
+        return params
+    
+    h = np.bincount(lag, weights=dist[in_range], minlength=n_lags)[used] / counts[used]
+    g = np.bincount(lag, weights=gamma[in_range], minlength=n_lags)[used] / counts[used]
+    
+    def func(h, nugget, partial_sill, range_):
+        return variogram_model(h, model, nugget, partial_sill, range_)
+    
+    try:
+        sill_max = max(float(g.max()), params["sill"]) * 2
+        with warnings.catch_warnings():
+            # 分箱较少时参数协方差无法估计，只需要参数本身
+            warnings.simplefilter('ignore', OptimizeWarning)
+            (nugget, partial_sill, range_), _ = curve_fit(
+                func, h, g,
+                p0=(0.0, params["sill"], params["range"]),
+                bounds=([0.0, 0.0, max_lag * 1e-3], [sill_max, sill_max, max_lag * 4]),
+                sigma=1.0 / np.sqrt(counts[used])
+            )
+    except (RuntimeError, ValueError):
+        return params
+    
+    if partial_sill <= 0:
+        return params
+    
+    params.update(nugget=float(nugget), sill=float(nugget + partial_sill), range=float(range_), fitted=True)
+    return params
+
+
+def _covariance(h: np.ndarray, variogram: Dict[str, Any]) -> np.ndarray:
+    """协方差 C(h) = 基台值 - γ(h)（C(0) 为基台值）"""
+    nugget = variogram["nugget"]
+    sill = variogram["sill"]
+    return sill - variogram_model(h, variogram["model"], nugget, sill - nugget, variogram["range"])
+
+
+def kriging_grid(x: np.ndarray, y: np.ndarray, z: np.ndarray,
+                 xi: np.ndarray, yi: np.ndarray,
+                 model: str = 'spherical',
+                 neighbors: Optional[int] = KRIGING_NEIGHBORS,
+                 variogram: Optional[Dict[str, Any]] = None) -> Tuple[np.ndarray, np.ndarray, Dict[str, Any]]:
+    """
+    普通克里金插值
+    
+    测点数不超过 neighbors 时所有网格点共用一个方程组（分解一次）；
+    否则每个网格点使用 neighbors 个最近测点，分块批量求解
+    
+    Args:
+        x, y, z: 测点坐标和应力值
+        xi, yi: 网格坐标
+        model: 变差函数模型（variogram 为 None 时用于拟合）
+        neighbors: 邻域测点数（None 表示全部测点）
+        variogram: 已知的变差函数参数（fit_variogram 的返回值）
+    
+    Returns:
+        tuple: (估计值网格, 估计方差网格, 变差函数参数)
+    """
+    import scipy.linalg
+    
+    x, y, z = merge_duplicates(np.asarray(x, dtype=float), np.asarray(y, dtype=float), np.asarray(z, dtype=float))
+    n = len(z)
+    if variogram is None:
+        variogram = fit_variogram(x, y, z, model=model)
+    
+    # 应力值处处相同：估计值为常数，方差为 0
+    if variogram["sill"] <= 0 or np.ptp(z) == 0:
+        return np.full(xi.shape, float(z.mean())), np.zeros(xi.shape), variogram
+    
+    coords = np.column_stack((x, y))
+    cells = np.column_stack((xi.ravel(), yi.ravel()))
+    sill = variogram["sill"]
+    
+    # 对角线加微小扰动，避免无块金的 gaussian 模型方程组病态
+    jitter = sill * 1e-10
+    zi = np.empty(len(cells))
+    variance = np.empty(len(cells))
+    
+    if neighbors is None or int(neighbors) >= n:
+        # 全局克里金：[[C, 1], [1ᵀ, 0]] [w; μ] = [c0; 1]
+        A = np.ones((n + 1, n + 1))
+        A[:n, :n] = _covariance(np.linalg.norm(coords[:, None] - coords[None], axis=-1), variogram)
+        A[:n, :n] += jitter * np.eye(n)
+        A[n, n] = 0.0
+        lu = scipy.linalg.lu_factor(A)
+        
+        for start in range(0, len(cells), KRIGING_CHUNK):
+            chunk = cells[start:start + KRIGING_CHUNK]
+            b = np.ones((n + 1, len(chunk)))
+            b[:n] = _covariance(np.linalg.norm(coords[:, None] - chunk[None], axis=-1), variogram)
+            sol = scipy.linalg.lu_solve(lu, b)
+            zi[start:start + len(chunk)] = z @ sol[:n]
+            variance[start:start + len(chunk)] = sill - np.einsum('ij,ij->j', sol[:n], b[:n]) - sol[n]
+    else:
+        # 邻域克里金：每个网格点用 k 个最近测点；相邻网格点的邻域测点大多相同，
+        # 按邻域分组后每组的 (k+1)×(k+1) 方程组只求逆一次
+        k = int(neighbors)
+        _, idx = cKDTree(coords).query(cells, k=k)
+        idx.sort(axis=1)
+        
+        # 按邻域排序分组（np.unique(axis=0) 对多列整数排序较慢，这里用 lexsort）
+        order = np.lexsort(idx.T[::-1])
+        sorted_idx = idx[order]
+        is_new = np.ones(len(order), dtype=bool)
+        is_new[1:] = np.any(sorted_idx[1:] != sorted_idx[:-1], axis=1)
+        sets = sorted_idx[is_new]
+        group = np.empty(len(order), dtype=np.int64)
+        group[order] = np.cumsum(is_new) - 1
+        eye = jitter * np.eye(k)
+        
+        for start in range(0, len(cells), KRIGING_CHUNK):
+            cell_idx = order[start:start + KRIGING_CHUNK]
+            first, last = group[cell_idx[0]], group[cell_idx[-1]]
+            
+            # 本块涉及的邻域组（按组号排序后连续）
+            nbr = coords[sets[first:last + 1]]
+            A = np.ones((len(nbr), k + 1, k + 1))
+            A[:, :k, :k] = _covariance(np.linalg.norm(nbr[:, :, None] - nbr[:, None], axis=-1), variogram) + eye
+            A[:, k, k] = 0.0
+            A_inv = np.linalg.inv(A)
+            
+            local = group[cell_idx] - first
+            b = np.ones((len(cell_idx), k + 1))
+            b[:, :k] = _covariance(np.linalg.norm(nbr[local] - cells[cell_idx][:, None], axis=-1), variogram)
+            sol = np.einsum('cij,cj->ci', A_inv[local], b)
+            
+            zi[cell_idx] = np.einsum('ij,ij->i', sol[:, :k], z[sets[group[cell_idx]]])
+            variance[cell_idx] = sill - np.einsum('ij,ij->i', sol[:, :k], b[:, :k]) - sol[:, k]
+    
+    # 舍入误差可能产生极小的负方差
+    np.maximum(variance, 0.0, out=variance)
+    return zi.reshape(xi.shape), variance.reshape(xi.shape), variogram
+
+
+def loo_residuals(x: np.ndarray, y: np.ndarray, z: np.ndarray,
+                  power: float = IDW_POWER,
+                  neighbors: int = IDW_NEIGHBORS) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    留一法交叉验证残差：每个测点去掉自身后用 IDW（k 个最近的其余测点）估计
+    
+    Args:
+        x, y, z: 测点坐标和应力值（坐标不应重复，见 merge_duplicates）
+        power, neighbors: IDW 参数
+    
+    Returns:
+        tuple: (每个测点的绝对残差, 每个测点到最近其余测点的距离)
+    """
+    coords = np.column_stack((x, y))
+    k = max(1, min(int(neighbors), len(z) - 1))
+    dist, idx = cKDTree(coords).query(coords, k=k + 1)
+    dist = dist[:, 1:].reshape(len(z), k)
+    idx = idx[:, 1:].reshape(len(z), k)
+    
+    weights = 1.0 / np.maximum(dist, IDW_EXACT_DISTANCE) ** power
+    estimate = np.einsum('ij,ij->i', weights, z[idx]) / weights.sum(axis=1)
+    return np.abs(z - estimate), dist[:, 0]
+
+
+def uncertainty_grid(x: np.ndarray, y: np.ndarray, z: np.ndarray,
+                     xi: np.ndarray, yi: np.ndarray,
+                     variance: Optional[np.ndarray] = None) -> Tuple[np.ndarray, str]:
+    """
+    估计每个网格点的插值不确定度（单位与应力值相同）
+    
+    - 有克里金方差时取其平方根（克里金标准差）
+    - 否则按距离估计：每个测点的留一法残差除以它到最近其余测点的距离，得到局部"误差率"；
+      网格点的不确定度 = 邻近测点误差率的反距离加权平均 × 到最近测点的距离
+      （测点处为 0，远离测点、应力变化剧烈的区域更大）
+    
+    Args:
+        x, y, z: 测点坐标和应力值
+        xi, yi: 网格坐标
+        variance: 克里金估计方差网格（可选）
+    
+    Returns:
+        tuple: (不确定度网格, 来源 'kriging' | 'distance')
+    """
+    if variance is not None:
+        return np.sqrt(np.maximum(variance, 0.0)), 'kriging'
+    
+    x, y, z = merge_duplicates(np.asarray(x, dtype=float), np.asarray(y, dtype=float), np.asarray(z, dtype=float))
+    if len(z) < 2:
+        return np.full(xi.shape, np.nan), 'distance'
+    
+    residual, spacing = loo_residuals(x, y, z)
+    rate = residual / np.maximum(spacing, IDW_EXACT_DISTANCE)
+    
+    k = min(UNCERTAINTY_NEIGHBORS, len(z))
+    dist, idx = cKDTree(np.column_stack((x, y))).query(np.column_stack((xi.ravel(), yi.ravel())), k=k)
+    dist = dist.reshape(-1, k)
+    idx = idx.reshape(-1, k)
+    
+    weights = 1.0 / np.maximum(dist, IDW_EXACT_DISTANCE) ** IDW_POWER
+    local_rate = np.einsum('ij,ij->i', weights, rate[idx]) / weights.sum(axis=1)
+    return (local_rate * dist[:, 0]).reshape(xi.shape), 'distance'
@@ -44,6 +44,12 @@ class WaveformAnalysis:
             'highcut': 3.5,  # MHz
             'order': 6
         }
+        
+        # 亚采样点时延估计方法（见 signal_processing.SUBSAMPLE_ESTIMATORS）
+        self.delay_estimator = 'parabolic'
+        
+        # 当前大波形文件保存在服务端的序列引用（time/voltage），重新加载时释放
+        self._服务端序列 = []
     
     def 选择打开文件(self):
         """打开文件选择对话框"""
@@ -118,8 +124,16 @@ class WaveformAnalysis:
         except Exception as e:
             return {"success": False, "message": f"获取文件列表失败: {str(e)}"}
     
-    def 加载波形文件(self, 文件路径):
-        """从NPY、CSV或HDF5文件加载波形数据"""
+    def 加载波形文件(self, 文件路径, 二进制=False, 显示点数=None):
+        """
+        从NPY、CSV或HDF5文件加载波形数据
+        
+        Args:
+            文件路径: 波形文件路径
+            二进制: True 时 time/voltage 以 base64 编码返回（见 core.binary_transport），否则为列表
+            显示点数: 二进制模式下，点数超过该值时全分辨率数据保留在服务端，
+                      time/voltage 返回序列引用，前端通过 获取显示视窗 按需取抽取后的数据
+        """
         try:
             文件扩展名 = os.path.splitext(文件路径)[1].lower()
             
@@ -128,8 +142,8 @@ class WaveformAnalysis:
                 数据 = np.load(文件路径, allow_pickle=True).item()
                 
                 波形数据 = {
-                    'time': 数据['time'].tolist(),
-                    'voltage': 数据['voltage'].tolist(),
+                    'time': np.asarray(数据['time']),
+                    'voltage': np.asarray(数据['voltage']),
                     'vScale': 数据.get('v_scale', 1.0),
                     'vOffset': 数据.get('v_offset', 0.0),
                     'hScale': 数据.get('timebase', 1e-6),
@@ -157,8 +171,8 @@ class WaveformAnalysis:
                         电压 = np.array(ref_group['voltage'])
                         
                         波形数据 = {
-                            'time': 时间.tolist(),
-                            'voltage': 电压.tolist(),
+                            'time': 时间,
+                            'voltage': 电压,
                             'vScale': ref_group.attrs.get('v_scale', 1.0),
                             'vOffset': ref_group.attrs.get('v_offset', 0.0),
                             'hScale': ref_group.attrs.get('timebase', 1e-6),
@@ -168,6 +182,24 @@ class WaveformAnalysis:
                             'points': len(时间),
                             'timestamp': 'HDF5 file'
                         }
+                    elif 'baseline' in f and 'waveform' in f['baseline']:
+                        # 现场测试格式：加载基准波形（时间轴可能只保存起点和步长，电压可能只保存 ADC 码值）
+                        from modules.stress_detection_uniaxial.field_hdf5 import FieldExperimentHDF5
+                        wf_grp = f['baseline/waveform']
+                        波形 = FieldExperimentHDF5._read_waveform(wf_grp)
+                        
+                        波形数据 = {
+                            'time': 波形['time'],
+                            'voltage': 波形['voltage'],
+                            'vScale': wf_grp.attrs.get('v_scale', 1.0),
+                            'vOffset': wf_grp.attrs.get('v_offset', 0.0),
+                            'hScale': wf_grp.attrs.get('timebase', 1e-6),
+                            'sampleRate': 波形['sample_rate'],
+                            'memoryDepth': 'unknown',
+                            'channel': 1,
+                            'points': len(波形['voltage']),
+                            'timestamp': f['baseline'].attrs.get('captured_at', 'HDF5 file')
+                        }
                     else:
                         # 结构2: 查找第一个包含 time 和 voltage 的组
                         波形数据 = None
@@ -179,8 +211,8 @@ class WaveformAnalysis:
                                     电压 = np.array(group['voltage'])
                                     
                                     波形数据 = {
-                                        'time': 时间.tolist(),
-                                        'voltage': 电压.tolist(),
+                                        'time': 时间,
+                                        'voltage': 电压,
                                         'vScale': group.attrs.get('v_scale', 1.0),
                                         'vOffset': group.attrs.get('v_offset', 0.0),
                                         'hScale': group.attrs.get('timebase', 1e-6),
@@ -244,8 +276,8 @@ class WaveformAnalysis:
                 电压 = np.array(电压列表)
                 
                 波形数据 = {
-                    'time': 时间.tolist(),
-                    'voltage': 电压.tolist(),
+                    'time': 时间,
+                    'voltage': 电压,
                     'vScale': 1.0,
                     'vOffset': 0.0,
                     'hScale': 1e-6,
@@ -258,10 +290,156 @@ class WaveformAnalysis:
             else:
                 return {"success": False, "message": f"不支持的文件格式: {文件扩展名}"}
             
+            # 在 Web 边界统一转换数组格式
+            if 二进制 and 显示点数 and len(波形数据['voltage']) > int(显示点数):
+                from modules.core.binary_transport import series_store
+                for 引用 in self._服务端序列:
+                    series_store.release(引用)
+                
+                时间 = np.asarray(波形数据['time'], dtype=np.float64)
+                电压 = np.asarray(波形数据['voltage'], dtype=np.float64)
+                波形数据['time'] = series_store.store(时间)
+                波形数据['voltage'] = series_store.store(电压)
+                波形数据['serverSide'] = True
+                波形数据['timeRange'] = [float(时间[0]), float(时间[-1])]
+                波形数据['voltageRange'] = [float(np.min(电压)), float(np.max(电压))]
+                self._服务端序列 = [波形数据['time'], 波形数据['voltage']]
+            elif 二进制:
+                from modules.core.binary_transport import encode_array, encode_time_axis
+                波形数据['time'] = encode_time_axis(波形数据['time'])
+                波形数据['voltage'] = encode_array(波形数据['voltage'], dtype='float32')
+            else:
+                波形数据['time'] = 波形数据['time'].tolist()
+                波形数据['voltage'] = 波形数据['voltage'].tolist()
+            
             return {"success": True, "data": 波形数据}
         except Exception as e:
             return {"success": False, "message": f"加载失败: {str(e)}"}
     
+    def 预览波形文件(self, 文件路径, 最大点数=2000, 二进制=False):
+        """
+        读取HDF5波形文件的预览（最小/最大值金字塔，只读 KB 级数据）
+        
+        旧文件没有金字塔时在首次预览时补写；支持实时采集、应力标定和现场测试三种HDF5结构。
+        分析页面打开HDF5文件时先显示预览，完整数据加载完成后再替换
+        
+        Args:
+            文件路径: HDF5文件路径
+            最大点数: 预览点数上限
+            二进制: True 时 time/voltage 以 base64 编码返回（见 core.binary_transport）
+        
+        Returns:
+            dict: {"success": bool, "data": {time, voltage, factor, source_points, decimated, upgraded}}
+        """
+        try:
+            import h5py
+        except ImportError:
+            return {"success": False, "message": "需要安装 h5py: pip install h5py"}
+        
+        from modules.core.waveform_pyramid import load_preview
+        
+        try:
+            # 定位波形数据集所在的组
+            with h5py.File(文件路径, 'r') as f:
+                if 'reference_waveform' in f:
+                    组路径, 数据名 = 'reference_waveform', 'voltage'
+                elif 'waveform' in f and isinstance(f['waveform'], h5py.Dataset):
+                    组路径, 数据名 = '/', 'waveform'
+                elif 'baseline' in f and 'waveform' in f['baseline']:
+                    组路径, 数据名 = 'baseline/waveform', 'voltage'
+                else:
+                    组路径, 数据名 = None, 'voltage'
+                    for key in f.keys():
+                        if isinstance(f[key], h5py.Group) and 'time' in f[key] and 'voltage' in f[key]:
+                            组路径 = key
+                            break
+            
+            if 组路径 is None:
+                return {"success": False, "message": "HDF5文件中未找到波形数据（需要 time 和 voltage 数据集）"}
+            
+            结果 = load_preview(文件路径, 组路径, int(最大点数), source=数据名)
+            if not 结果['success']:
+                return 结果
+            
+            预览 = 结果['data']
+            if 二进制:
+                from modules.core.binary_transport import encode_array, encode_time_axis
+                预览['time'] = encode_time_axis(预览['time'])
+                预览['voltage'] = encode_array(预览['voltage'], dtype='float32')
+            else:
+                预览['time'] = 预览['time'].tolist()
+                预览['voltage'] = 预览['voltage'].tolist()
+            预览['upgraded'] = 结果['upgraded']
+            return {"success": True, "data": 预览}
+        except Exception as e:
+            return {"success": False, "message": f"预览失败: {str(e)}"}
+    
+    def 获取显示视窗(self, 时间数据, 电压数据, t_start=None, t_end=None, 宽度像素=1000,
+                    方法='minmax', 附加序列=None, 二进制=False):
+        """
+        按显示视窗抽取波形（见 waveform_decimation）
+        
+        Args:
+            时间数据, 电压数据: 时间/电压数组、二进制编码或服务端序列引用
+            t_start, t_end: 视窗时间范围（秒），None 表示整条波形
+            宽度像素: 视窗宽度，每像素最多返回两点
+            方法: 'minmax'（保留峰值包络）或 'lttb'
+            附加序列: {名称: 数组或引用}，在相同索引处取值（如 Hilbert 包络），与电压对齐
+            二进制: True 时数组以 base64 编码返回
+        
+        Returns:
+            dict: {"success": bool, "data": {"time", "voltage", "extra", "start", "stop",
+                   "decimated", "source_points", "points", "method"}}
+        """
+        try:
+            from modules.core.binary_transport import decode_array, encode_array, encode_time_axis
+            from .waveform_decimation import decimate_viewport
+            
+            时间 = decode_array(时间数据)
+            电压 = decode_array(电压数据)
+            if len(时间) != len(电压):
+                return {"success": False, "message": f"时间与电压长度不一致: {len(时间)} != {len(电压)}"}
+            
+            结果 = decimate_viewport(
+                时间, 电压,
+                None if t_start is None else float(t_start),
+                None if t_end is None else float(t_end),
+                宽度像素, 方法
+            )
+            索引 = 结果['indices']
+            
+            附加 = {}
+            for 名称, 数据 in (附加序列 or {}).items():
+                数组 = decode_array(数据)
+                if len(数组) == len(电压):
+                    附加[名称] = 数组[索引]
+            
+            if 二进制:
+                视窗时间 = encode_time_axis(时间[索引])
+                视窗电压 = encode_array(电压[索引], dtype='float32')
+                附加 = {名称: encode_array(数组, dtype='float32') for 名称, 数组 in 附加.items()}
+            else:
+                视窗时间 = 时间[索引].tolist()
+                视窗电压 = 电压[索引].tolist()
+                附加 = {名称: 数组.tolist() for 名称, 数组 in 附加.items()}
+            
+            return {
+                "success": True,
+                "data": {
+                    "time": 视窗时间,
+                    "voltage": 视窗电压,
+                    "extra": 附加,
+                    "start": 结果['start'],
+                    "stop": 结果['stop'],
+                    "decimated": 结果['decimated'],
+                    "source_points": len(电压),
+                    "points": len(索引),
+                    "method": 方法
+                }
+            }
+        except Exception as e:
+            return {"success": False, "message": f"获取显示视窗失败: {str(e)}"}
+    
     def 选择多个CSV文件(self):
         """打开文件选择对话框，允许选择多个CSV文件"""
         try:
@@ -335,6 +513,34 @@ class WaveformAnalysis:
         """
         return {"success": True, "data": self.bandpass_config}
     
+    def set_delay_estimator(self, method):
+        """
+        设置亚采样点时延估计方法
+        
+        Args:
+            method: 估计方法名称（parabolic/gaussian/cosine/upsampled_fft/phase_slope）
+            
+        Returns:
+            dict: 操作结果
+        """
+        from modules.core.signal_processing import SUBSAMPLE_ESTIMATORS
+        
+        if method not in SUBSAMPLE_ESTIMATORS:
+            return {"success": False, "message": f"未知的时延估计方法: {method}"}
+        self.delay_estimator = method
+        return {"success": True, "message": "时延估计方法已更新"}
+    
+    def get_delay_estimator(self):
+        """
+        获取当前亚采样点时延估计方法
+        
+        Returns:
+            dict: {"success": True, "data": {"method": str, "available": list}}
+        """
+        from modules.core.signal_processing import SUBSAMPLE_ESTIMATORS
+        
+        return {"success": True, "data": {"method": self.delay_estimator, "available": list(SUBSAMPLE_ESTIMATORS)}}
+    
     # ==================== 互相关分析 ====================
     
     def 加载多个CSV文件(self, 文件路径列表):
@@ -426,6 +632,62 @@ class WaveformAnalysis:
         except Exception as e:
             return {"success": False, "message": f"加载文件失败: {str(e)}"}
     
+    def _预处理互相关信号(self):
+        """
+        对互相关信号列表做带通滤波和小波降噪
+        
+        所有信号等长时使用批量降噪一次完成，否则逐条处理
+        
+        Returns:
+            list: 与 self.互相关信号列表 对应的处理后电压数组
+        """
+        from modules.core import signal_processing
+        
+        电压列表 = []
+        for 信号 in self.互相关信号列表:
+            电压 = np.array(信号['original_voltage'])
+            
+            # 1. 带通滤波（如果启用）
+            if self.bandpass_config.get('enabled', False):
+                lowcut = self.bandpass_config.get('lowcut', 1.5) * 1e6  # MHz转Hz
+                highcut = self.bandpass_config.get('highcut', 3.5) * 1e6
+                order = self.bandpass_config.get('order', 6)
+                
+                滤波结果 = signal_processing.apply_bandpass_filter_array(
+                    电压, 信号['sampling_rate'], lowcut, highcut, order
+                )
+                
+                if 滤波结果['success']:
+                    电压 = 滤波结果['filtered']
+            
+            电压列表.append(电压)
+        
+        # 2. 小波降噪（如果启用）
+        if not self.denoise_config.get('enabled', True):
+            return 电压列表
+        
+        wavelet = self.denoise_config.get('wavelet', 'sym6')
+        level = self.denoise_config.get('level', 5)
+        threshold_mode = self.denoise_config.get('threshold_mode', 'soft')
+        
+        if len(set(len(电压) for 电压 in 电压列表)) == 1:
+            降噪结果 = signal_processing.apply_wavelet_denoising_batch(
+                np.vstack(电压列表), wavelet, level, threshold_mode, 'heursure'
+            )
+            
+            if 降噪结果['success']:
+                return list(降噪结果['denoised'])
+        
+        for idx, 电压 in enumerate(电压列表):
+            降噪结果 = signal_processing.apply_wavelet_denoising(
+                电压, wavelet, level, threshold_mode, 'heursure'
+            )
+            
+            if 降噪结果['success']:
+                电压列表[idx] = np.array(降噪结果['denoised'])
+        
+        return 电压列表
+    
     def 计算互相关(self, 参考信号索引, truncate_start=None, truncate_end=None):
         """
         计算参考信号与其他信号的互相关
@@ -442,10 +704,9 @@ class WaveformAnalysis:
             truncate_end: 截取结束时间（微秒），None表示到信号末尾
         """
         try:
-            from modules.core import signal_processing
             from modules.core.signal_processing import (
                 calculate_cross_correlation, 
-                find_peak_with_parabolic_interpolation
+                find_peak_subsample
             )
             from . import waveform_processing
             
@@ -461,34 +722,10 @@ class WaveformAnalysis:
             # ========== 处理参考信号 ==========
             参考信号 = self.互相关信号列表[参考信号索引]
             参考时间原始 = np.array(参考信号['original_time'])
-            参考电压原始 = np.array(参考信号['original_voltage'])
-            参考采样率 = 参考信号['sampling_rate']
-            
-            # 1. 带通滤波（如果启用）
-            if self.bandpass_config.get('enabled', False):
-                lowcut = self.bandpass_config.get('lowcut', 1.5) * 1e6  # MHz转Hz
-                highcut = self.bandpass_config.get('highcut', 3.5) * 1e6
-                order = self.bandpass_config.get('order', 6)
-                
-                滤波结果 = signal_processing.apply_bandpass_filter(
-                    参考电压原始, 参考采样率, lowcut, highcut, order
-                )
-                
-                if 滤波结果['success']:
-                    参考电压原始 = np.array(滤波结果['filtered'])
             
-            # 2. 小波降噪（如果启用）
-            if self.denoise_config.get('enabled', True):
-                wavelet = self.denoise_config.get('wavelet', 'sym6')
-                level = self.denoise_config.get('level', 5)
-                threshold_mode = self.denoise_config.get('threshold_mode', 'soft')
-                
-                降噪结果 = signal_processing.apply_wavelet_denoising(
-                    参考电压原始, wavelet, level, threshold_mode, 'heursure'
-                )
-                
-                if 降噪结果['success']:
-                    参考电压原始 = np.array(降噪结果['denoised'])
+            # 1-2. 带通滤波 + 小波降噪（等长信号批量处理）
+            处理后电压列表 = self._预处理互相关信号()
+            参考电压原始 = 处理后电压列表[参考信号索引]
             
             # 3. 根据用户指定范围截取参考信号
             参考时间, 参考电压 = waveform_processing.truncate_signal_range(参考时间原始, 参考电压原始, truncate_start, truncate_end)
@@ -518,34 +755,7 @@ class WaveformAnalysis:
                 
                 # 处理对比信号
                 对比时间原始 = np.array(信号['original_time'])
-                对比电压原始 = np.array(信号['original_voltage'])
-                对比采样率 = 信号['sampling_rate']
-                
-                # 1. 带通滤波（如果启用）
-                if self.bandpass_config.get('enabled', False):
-                    lowcut = self.bandpass_config.get('lowcut', 1.5) * 1e6
-                    highcut = self.bandpass_config.get('highcut', 3.5) * 1e6
-                    order = self.bandpass_config.get('order', 6)
-                    
-                    滤波结果 = signal_processing.apply_bandpass_filter(
-                        对比电压原始, 对比采样率, lowcut, highcut, order
-                    )
-                    
-                    if 滤波结果['success']:
-                        对比电压原始 = np.array(滤波结果['filtered'])
-                
-                # 2. 小波降噪（如果启用）
-                if self.denoise_config.get('enabled', True):
-                    wavelet = self.denoise_config.get('wavelet', 'sym6')
-                    level = self.denoise_config.get('level', 5)
-                    threshold_mode = self.denoise_config.get('threshold_mode', 'soft')
-                    
-                    降噪结果 = signal_processing.apply_wavelet_denoising(
-                        对比电压原始, wavelet, level, threshold_mode, 'heursure'
-                    )
-                    
-                    if 降噪结果['success']:
-                        对比电压原始 = np.array(降噪结果['denoised'])
+                对比电压原始 = 处理后电压列表[i]
                 
                 # 3. 对比信号也使用相同的截取范围
                 _, 对比电压 = waveform_processing.truncate_signal_range(对比时间原始, 对比电压原始, truncate_start, truncate_end)
@@ -564,8 +774,8 @@ class WaveformAnalysis:
                 except Exception as e:
                     continue
                 
-                # 找到最大相关性位置（使用抛物线插值获得亚采样点精度）
-                精确峰值索引, max_correlation = find_peak_with_parabolic_interpolation(correlation)
+                # 找到最大相关性位置（按配置的估计方法获得亚采样点精度）
+                精确峰值索引, max_correlation = find_peak_subsample(correlation, self.delay_estimator)
                 max_idx = int(精确峰值索引)  # 整数索引用于获取对应的lag值
                 
                 # 计算精确的滞后值
@@ -0,0 +1,158 @@
+"""
+波形抽取模块
+按显示视窗（t_start, t_end, width_px）把全分辨率波形抽取为适合绘制的点数：
+- minmax: 每个桶取最小值和最大值（保留尖峰和包络，适合振荡波形）
+- lttb: Largest-Triangle-Three-Buckets（保留视觉形状，点数更少）
+"""
+
+import numpy as np
+
+
+# 每个像素输出的点数（minmax 每桶两点）
+POINTS_PER_PIXEL = 2
+
+# 视窗宽度上限（像素），防止前端传入异常值导致返回过多点
+MAX_WIDTH_PX = 8192
+
+
+def minmax_indices(values, n_out):
+    """
+    按桶取最小/最大值，返回保留点的索引（升序）
+    
+    Args:
+        values: 数据数组
+        n_out: 输出点数（每桶两点，不足一桶的尾部另取最多两点）
+    
+    Returns:
+        np.ndarray: 索引数组；点数不超过 n_out 时返回全部索引
+    """
+    n = len(values)
+    if n_out < 4 or n <= n_out:
+        return np.arange(n)
+    
+    桶数 = n_out // 2
+    桶长 = n // 桶数
+    有效 = 桶数 * 桶长
+    分桶 = np.asarray(values[:有效]).reshape(桶数, 桶长)
+    
+    最小位置 = np.argmin(分桶, axis=1)
+    最大位置 = np.argmax(分桶, axis=1)
+    
+    # 每桶按时间先后输出最小值和最大值
+    起点 = np.arange(桶数) * 桶长
+    索引 = np.empty((桶数, 2), dtype=np.int64)
+    索引[:, 0] = 起点 + np.minimum(最小位置, 最大位置)
+    索引[:, 1] = 起点 + np.maximum(最小位置, 最大位置)
+    索引 = 索引.ravel()
+    
+    # 不足一个桶的尾部并入输出，保证末端不被截掉
+    if 有效 < n:
+        尾部 = np.asarray(values[有效:])
+        尾部索引 = 有效 + np.unique([np.argmin(尾部), np.argmax(尾部)])
+        索引 = np.concatenate([索引, 尾部索引])
+    
+    return 索引
+
+
+def lttb_indices(x, y, n_out):
+    """
+    Largest-Triangle-Three-Buckets 抽取，返回保留点的索引（升序）
+    
+    首尾点固定，中间每个桶选取与前一选中点、后一桶均值构成三角形面积最大的点
+    
+    Args:
+        x: 横坐标数组（时间）
+        y: 纵坐标数组（电压）
+        n_out: 输出点数
+    
+    Returns:
+        np.ndarray: 索引数组
+    """
+    n = len(y)
+    if n_out < 3 or n <= n_out:
+        return np.arange(n)
+    
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    
+    # 中间 n_out - 2 个桶的边界（不含首尾点）
+    边界 = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    
+    # 每个桶的均值（作为下一桶的参考点）
+    桶长 = np.diff(边界)
+    均值x = np.add.reduceat(x[:n - 1], 边界[:-1]) / 桶长
+    均值y = np.add.reduceat(y[:n - 1], 边界[:-1]) / 桶长
+    
+    索引 = np.empty(n_out, dtype=np.int64)
+    索引[0] = 0
+    索引[-1] = n - 1
+    
+    上一点 = 0
+    for i in range(n_out - 2):
+        起, 止 = 边界[i], 边界[i + 1]
+        if i + 1 < n_out - 2:
+            参考x, 参考y = 均值x[i + 1], 均值y[i + 1]
+        else:
+            参考x, 参考y = x[n - 1], y[n - 1]
+        
+        ax, ay = x[上一点], y[上一点]
+        面积 = np.abs((ax - 参考x) * (y[起:止] - ay) - (ax - x[起:止]) * (参考y - ay))
+        上一点 = 起 + int(np.argmax(面积))
+        索引[i + 1] = 上一点
+    
+    return 索引
+
+
+DECIMATION_METHODS = ('minmax', 'lttb')
+
+
+def viewport_range(time, t_start=None, t_end=None):
+    """
+    返回视窗对应的索引区间 [start, stop)（时间轴需单调递增）
+    
+    两端各多取一个点，保证折线延伸到视窗边缘
+    """
+    n = len(time)
+    start = 0 if t_start is None else int(np.searchsorted(time, t_start, side='left'))
+    stop = n if t_end is None else int(np.searchsorted(time, t_end, side='right'))
+    return max(start - 1, 0), min(stop + 1, n)
+
+
+def decimate_viewport(time, values, t_start=None, t_end=None, width_px=1000, method='minmax'):
+    """
+    按显示视窗抽取波形
+    
+    Args:
+        time: 全分辨率时间数组（单调递增）
+        values: 全分辨率数据数组
+        t_start, t_end: 视窗时间范围（None 表示不限制）
+        width_px: 视窗宽度（像素）
+        method: 'minmax' 或 'lttb'
+    
+    Returns:
+        dict: {"indices": 选中点在全数组中的索引, "start": int, "stop": int, "decimated": bool}
+    """
+    if method not in DECIMATION_METHODS:
+        raise ValueError(f'不支持的抽取方法: {method}，可选: {", ".join(DECIMATION_METHODS)}')
+    
+    width_px = int(min(max(int(width_px), 1), MAX_WIDTH_PX))
+    start, stop = viewport_range(time, t_start, t_end)
+    n_out = width_px * POINTS_PER_PIXEL
+    
+    if stop - start <= n_out:
+        索引 = np.arange(start, stop)
+        抽取 = False
+    else:
+        if method == 'lttb':
+            局部 = lttb_indices(time[start:stop], values[start:stop], n_out)
+        else:
+            局部 = minmax_indices(values[start:stop], n_out)
+        索引 = start + 局部
+        抽取 = True
+    
+    return {
+        "indices": 索引,
+        "start": start,
+        "stop": stop,
+        "decimated": 抽取
+    }
@@ -0,0 +1,179 @@
+// ==================== 二进制波形传输模块 ====================
+// 与后端 modules/core/binary_transport.py 配套：
+// 把 base64 编码的数组还原为 TypedArray，并在回传后端时复用原始编码，避免大数组走 JSON 文本
+// 服务端序列引用（__array__: 'series'）不在前端解码，原样回传后端
+
+const BinaryTransport = (function() {
+    'use strict';
+    
+    const 标记键 = '__array__';
+    
+    const 类型映射 = {
+        float32: Float32Array,
+        float64: Float64Array,
+        int16: Int16Array,
+        uint16: Uint16Array,
+        int8: Int8Array,
+        uint8: Uint8Array,
+        int32: Int32Array
+    };
+    
+    // 每个 API 的往返耗时统计
+    const 统计 = {};
+    
+    // 判断是否为编码对象
+    function 是编码对象(obj) {
+        return obj !== null && typeof obj === 'object' && !ArrayBuffer.isView(obj) && 标记键 in obj;
+    }
+    
+    // base64 → Uint8Array
+    function base64转字节(文本) {
+        const 二进制串 = atob(文本);
+        const 字节 = new Uint8Array(二进制串.length);
+        for (let i = 0; i < 二进制串.length; i++) {
+            字节[i] = 二进制串.charCodeAt(i);
+        }
+        return 字节;
+    }
+    
+    // Uint8Array → base64（分块避免参数过多）
+    function 字节转base64(字节) {
+        const 块大小 = 0x8000;
+        let 二进制串 = '';
+        for (let i = 0; i < 字节.length; i += 块大小) {
+            二进制串 += String.fromCharCode.apply(null, 字节.subarray(i, i + 块大小));
+        }
+        return btoa(二进制串);
+    }
+    
+    // 记录原始编码，回传后端时直接复用（不可枚举，不影响其他代码）
+    function 附加编码(数组, 编码) {
+        Object.defineProperty(数组, '__wire', { value: 编码, enumerable: false, configurable: true });
+        return 数组;
+    }
+    
+    // 判断是否为服务端序列引用
+    function 是序列引用(obj) {
+        return 是编码对象(obj) && obj[标记键] === 'series';
+    }
+    
+    // 返回共享数据的新视图，并附加回传后端时使用的编码（如服务端序列引用）
+    function 附加引用(数组, 编码) {
+        return 附加编码(数组.subarray(0), 编码);
+    }
+    
+    // 编码对象 → TypedArray（普通数组和服务端序列引用原样返回）
+    function decode(obj) {
+        if (!是编码对象(obj) || 是序列引用(obj)) return obj;
+        
+        if (obj[标记键] === 'linear') {
+            const 数组 = new Float64Array(obj.length);
+            for (let i = 0; i < obj.length; i++) {
+                数组[i] = obj.start + i * obj.step;
+            }
+            return 附加编码(数组, obj);
+        }
+        
+        const 类型 = 类型映射[obj.dtype];
+        if (obj[标记键] !== 'base64' || !类型) {
+            throw new Error(`无法解码的数组格式: ${obj[标记键]} / ${obj.dtype}`);
+        }
+        
+        const 原始 = new 类型(base64转字节(obj.data).buffer, 0, obj.length);
+        const scale = obj.scale ?? 1;
+        const offset = obj.offset ?? 0;
+        
+        // 浮点且无需换算时直接使用
+        if ((原始 instanceof Float32Array || 原始 instanceof Float64Array) && scale === 1 && offset === 0) {
+            return 附加编码(原始, obj);
+        }
+        
+        const 数组 = new Float32Array(原始.length);
+        for (let i = 0; i < 原始.length; i++) {
+            数组[i] = 原始[i] * scale + offset;
+        }
+        return 附加编码(数组, obj);
+    }
+    
+    // TypedArray → 编码对象（已有原始编码时直接复用；普通数组原样返回）
+    function toWire(数组) {
+        if (数组 === null || 数组 === undefined || 是编码对象(数组)) return 数组;
+        if (数组.__wire) return 数组.__wire;
+        if (!ArrayBuffer.isView(数组)) return 数组;
+        
+        const 双精度 = 数组 instanceof Float64Array;
+        const 浮点 = 双精度 ? 数组 : Float32Array.from(数组);
+        return {
+            [标记键]: 'base64',
+            dtype: 双精度 ? 'float64' : 'float32',
+            length: 浮点.length,
+            scale: 1,
+            offset: 0,
+            data: 字节转base64(new Uint8Array(浮点.buffer, 浮点.byteOffset, 浮点.byteLength))
+        };
+    }
+    
+    // 就地解码对象中所有编码字段（一层）
+    function decodeFields(obj) {
+        if (!obj || typeof obj !== 'object') return obj;
+        for (const 键 of Object.keys(obj)) {
+            if (是编码对象(obj[键])) {
+                obj[键] = decode(obj[键]);
+            }
+        }
+        return obj;
+    }
+    
+    // 就地解码接口返回值（顶层字段和 data 字段）
+    function decodeResult(result) {
+        if (result && result.success) {
+            decodeFields(result);
+            if (result.data && typeof result.data === 'object') {
+                decodeFields(result.data);
+            }
+        }
+        return result;
+    }
+    
+    // 调用后端接口：记录往返耗时并解码返回的数组
+    async function 调用(方法名, ...参数) {
+        const 开始 = performance.now();
+        const result = await pywebview.api[方法名](...参数);
+        const 往返 = performance.now() - 开始;
+        
+        const 项 = 统计[方法名] || (统计[方法名] = { calls: 0, total_ms: 0, last_ms: 0 });
+        项.calls++;
+        项.total_ms += 往返;
+        项.last_ms = 往返;
+        
+        return decodeResult(result);
+    }
+    
+    // 获取往返耗时统计
+    function 获取统计() {
+        const 结果 = {};
+        for (const [方法名, 项] of Object.entries(统计)) {
+            结果[方法名] = { ...项, avg_ms: 项.total_ms / Math.max(项.calls, 1) };
+        }
+        return 结果;
+    }
+    
+    function 重置统计() {
+        for (const 方法名 of Object.keys(统计)) {
+            delete 统计[方法名];
+        }
+    }
+    
+    return {
+        decode,
+        decodeFields,
+        decodeResult,
+        toWire,
+        是编码对象,
+        是序列引用,
+        附加引用,
+        调用,
+        获取统计,
+        重置统计
+    };
+})();
@@ -8,6 +8,7 @@ const RealtimeCapture = (function() {
     let canvas, ctx;
     let 已连接 = false;
     let 正在采集 = false;
+    let 采集代次 = 0;  // 每次进入连续采集循环加一，用于判断循环退出时是否已重新开始采集
     let 示波器正在运行 = true;  // 🆕 示波器运行状态（默认运行）
     let 波形数据 = {
         时间: [],
@@ -330,6 +331,7 @@ const RealtimeCapture = (function() {
         try {
             const 之前正在采集 = 正在采集;
             正在采集 = false;
+            await 停止后台采集();
             await new Promise(resolve => setTimeout(resolve, 150));
             
             const result = await pywebview.api.设置存储深度(e.target.value);
@@ -360,6 +362,7 @@ const RealtimeCapture = (function() {
         try {
             const 之前正在采集 = 正在采集;
             正在采集 = false;
+            await 停止后台采集();
             await new Promise(resolve => setTimeout(resolve, 150));
             
             const result = await pywebview.api.设置时基(parseFloat(e.target.value));
@@ -558,12 +561,30 @@ const RealtimeCapture = (function() {
     }
     
     async function 连续采集() {
+        // 后台线程负责采集，这里只取最新完成的一帧（采集与显示并行）
+        const 本次代次 = ++采集代次;
+        let 上一帧序号 = null;
+        try {
+            await pywebview.api.开始后台采集(parseInt(elements.channelSelect.value));
+        } catch (error) {
+            // 启动失败时下方取帧会返回错误
+        }
+        
         while (正在采集 && 已连接) {
             try {
                 const 通道 = parseInt(elements.channelSelect.value);
-                const result = await pywebview.api.获取波形数据(通道);
+                const 最大点数 = canvas ? 2 * canvas.width : null;  // 每像素最多两点（最小/最大值）
+                const result = await BinaryTransport.调用('获取最新帧', 通道, 最大点数, 上一帧序号, true);
+                
+                if (result.success && !result.data) {
+                    // 还没有新帧，等待下一次屏幕刷新
+                    await new Promise(resolve => requestAnimationFrame(resolve));
+                    continue;
+                }
                 
                 if (result.success) {
+                    上一帧序号 = result.frame_id;
+                    
                     // 同步示波器位置(带时间戳保护)
                     const 当前时间 = Date.now();
                     if (当前时间 - 最后操作时间 > 操作保护时间) {
@@ -593,14 +614,28 @@ const RealtimeCapture = (function() {
                     更新通道状态缓存(); // 异步执行，不等待
                 }
                 
-                // 20fps = 50ms 刷新间隔
-                await new Promise(resolve => setTimeout(resolve, 50));
+                // 与屏幕刷新同步（显示速度由渲染决定，不再额外等待）
+                await new Promise(resolve => requestAnimationFrame(resolve));
             } catch (error) {
                 elements.statusMessage.textContent = '采集错误: ' + error;
                 正在采集 = false;
                 break;
             }
         }
+        
+        // 退出循环后立即停止后台线程（不等后端空闲超时），已重新开始的采集循环不受影响
+        if (!正在采集 && 本次代次 === 采集代次) {
+            await 停止后台采集();
+        }
+    }
+    
+    async function 停止后台采集() {
+        // 暂停采集后、向示波器发送其他命令之前调用，避免后台读取与这些命令争用示波器
+        try {
+            await pywebview.api.停止后台采集();
+        } catch (error) {
+            // 忽略停止错误
+        }
     }
     
 
@@ -731,6 +766,8 @@ const RealtimeCapture = (function() {
         
         if (当前保存格式 === 'csv') {
             elements.saveBtn.innerHTML = '📊 保存为 CSV';
+        } else if (当前保存格式 === 'h5') {
+            elements.saveBtn.innerHTML = '🗂️ 保存为 HDF5';
         } else {
             elements.saveBtn.innerHTML = '💾 保存为 NPY';
         }
@@ -757,6 +794,7 @@ const RealtimeCapture = (function() {
             
             const 之前正在采集 = 正在采集;
             正在采集 = false;
+            await 停止后台采集();
             await new Promise(resolve => setTimeout(resolve, 200));
             
             const 格式名称 = 格式.toUpperCase();
@@ -820,6 +858,7 @@ const RealtimeCapture = (function() {
                 const 通道 = parseInt(elements.channelSelect.value);
                 const 之前正在采集 = 正在采集;
                 正在采集 = false;
+                await 停止后台采集();
                 await new Promise(resolve => setTimeout(resolve, 50));
                 
                 const result = await pywebview.api.设置水平位置(timeOffset);
@@ -835,7 +874,7 @@ const RealtimeCapture = (function() {
                 // 缩短等待时间：200ms → 100ms
                 await new Promise(resolve => setTimeout(resolve, 100));
                 
-                const dataResult = await pywebview.api.获取波形数据(通道);
+                const dataResult = await BinaryTransport.调用('获取波形数据', 通道, true);
                 
                 if (dataResult.success) {
                     更新波形数据(dataResult.data);
@@ -867,6 +906,7 @@ const RealtimeCapture = (function() {
                 const 通道 = parseInt(elements.channelSelect.value);
                 const 之前正在采集 = 正在采集;
                 正在采集 = false;
+                await 停止后台采集();
                 await new Promise(resolve => setTimeout(resolve, 50));
                 
                 const result = await pywebview.api.设置水平位置(0);
@@ -881,7 +921,7 @@ const RealtimeCapture = (function() {
                 // 缩短等待时间：200ms → 100ms
                 await new Promise(resolve => setTimeout(resolve, 100));
                 
-                const dataResult = await pywebview.api.获取波形数据(通道);
+                const dataResult = await BinaryTransport.调用('获取波形数据', 通道, true);
                 if (dataResult.success) {
                     更新波形数据(dataResult.data);
                 }
@@ -912,6 +952,7 @@ const RealtimeCapture = (function() {
                 const 通道 = parseInt(elements.channelSelect.value);
                 const 之前正在采集 = 正在采集;
                 正在采集 = false;
+                await 停止后台采集();
                 await new Promise(resolve => setTimeout(resolve, 50));
                 
                 const result = await pywebview.api.设置垂直位置(通道, 0);
@@ -926,7 +967,7 @@ const RealtimeCapture = (function() {
                 // 缩短等待时间：200ms → 100ms
                 await new Promise(resolve => setTimeout(resolve, 100));
                 
-                const dataResult = await pywebview.api.获取波形数据(通道);
+                const dataResult = await BinaryTransport.调用('获取波形数据', 通道, true);
                 if (dataResult.success) {
                     更新波形数据(dataResult.data);
                 }
@@ -1097,6 +1138,7 @@ const RealtimeCapture = (function() {
                 const 通道 = parseInt(elements.channelSelect.value);
                 const 之前正在采集 = 正在采集;
                 正在采集 = false;
+                await 停止后台采集();
                 await new Promise(resolve => setTimeout(resolve, 50));
                 
                 const result = await pywebview.api.设置垂直灵敏度(通道, 新档位);
@@ -1111,7 +1153,7 @@ const RealtimeCapture = (function() {
                 
                 await new Promise(resolve => setTimeout(resolve, 100));
                 
-                const dataResult = await pywebview.api.获取波形数据(通道);
+                const dataResult = await BinaryTransport.调用('获取波形数据', 通道, true);
                 
                 if (dataResult.success) {
                     更新波形数据(dataResult.data);
@@ -1238,6 +1280,7 @@ const RealtimeCapture = (function() {
             try {
                 const 之前正在采集 = 正在采集;
                 正在采集 = false;
+                await 停止后台采集();
                 await new Promise(resolve => setTimeout(resolve, 100));
                 
                 const 通道 = parseInt(elements.channelSelect.value);
@@ -1249,7 +1292,7 @@ const RealtimeCapture = (function() {
                 
                 await new Promise(resolve => setTimeout(resolve, 200));
                 
-                const dataResult = await pywebview.api.获取波形数据(通道);
+                const dataResult = await BinaryTransport.调用('获取波形数据', 通道, true);
                 if (dataResult.success) {
                     更新波形数据(dataResult.data);
                 }
@@ -1315,13 +1358,15 @@ const RealtimeCapture = (function() {
             // 暂停实时采集
             const 之前正在采集 = 正在采集;
             正在采集 = false;
+            await 停止后台采集();
             
             // 等待当前采集循环结束
             await new Promise(resolve => setTimeout(resolve, 100));
             
             // 获取RAW模式数据
             const 通道 = parseInt(elements.channelSelect.value);
-            const result = await pywebview.api.获取RAW波形数据(通道);
+            // 二进制编码返回：time/voltage 保持编码对象，由调用方原样回传后端（见 BinaryTransport）
+            const result = await pywebview.api.获取RAW波形数据(通道, true);
             
             // 恢复实时采集
             if (之前正在采集) {
@@ -146,8 +146,8 @@ const StressCalibrationCapture = (function() {
             const result = await pywebview.api.保存基准波形数据(
                 当前方向.实验ID,
                 当前方向.方向名称,
-                波形数据.voltage,
-                波形数据.time,
+                BinaryTransport.toWire(波形数据.voltage),
+                BinaryTransport.toWire(波形数据.time),
                 示波器采样率
             );
             
@@ -231,8 +231,8 @@ const StressCalibrationCapture = (function() {
                 当前方向.实验ID,
                 当前方向.方向名称,
                 应力值,
-                波形数据.voltage,
-                波形数据.time,
+                BinaryTransport.toWire(波形数据.voltage),
+                BinaryTransport.toWire(波形数据.time),
                 示波器采样率
             );
             
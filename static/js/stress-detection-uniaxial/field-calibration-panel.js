@@ -12,6 +12,10 @@ const FieldCalibrationPanel = (function() {
     // 当前选择的数据来源
     let 当前来源 = 'local';  // 'local' | 'file' | 'manual'
     
+    // 标定实验列表分页
+    const 每页实验数 = 50;
+    let 已加载页码 = 0;
+    
     // ========== 初始化 ==========
     function 初始化(state, els, cbs) {
         实验状态 = state;
@@ -92,32 +96,29 @@ const FieldCalibrationPanel = (function() {
         await 加载标定实验列表();
     }
     
-    async function 加载标定实验列表() {
+    async function 加载标定实验列表(页码 = 1) {
         const container = document.getElementById('field-calib-exp-list');
         if (!container) return;
         
         try {
-            const result = await pywebview.api.获取所有实验列表();
+            // 分页加载，只返回至少有一个方向已拟合的实验
+            const result = await pywebview.api.获取实验列表分页(页码, 每页实验数, true);
             
             if (!result.success) {
                 container.innerHTML = `<div class="error">加载失败: ${result.message}</div>`;
                 return;
             }
             
-            const experiments = result.data || [];
-            
-            // 过滤出有拟合结果的实验
-            const validExps = experiments.filter(exp => 
-                exp.directions && exp.directions.some(d => d.拟合结果)
-            );
+            const 分页 = result.data || {};
+            const experiments = 分页.实验列表 || [];
             
-            if (validExps.length === 0) {
+            if (页码 === 1 && experiments.length === 0) {
                 container.innerHTML = '<div class="empty">暂无可用的标定数据<br><small>请先在"应力系数标定"模块完成标定实验</small></div>';
                 return;
             }
             
             let html = '';
-            validExps.forEach(exp => {
+            experiments.forEach(exp => {
                 // 兼容不同的字段名
                 const expId = exp.实验ID || exp.id || exp.experiment_id;
                 const material = exp.材料名称 || exp.material || exp.sample_material || '未知材料';
@@ -140,7 +141,23 @@ const FieldCalibrationPanel = (function() {
                 });
             });
             
-            container.innerHTML = html;
+            // 第一页替换列表，后续页追加到"加载更多"按钮之前
+            document.getElementById('field-calib-load-more')?.remove();
+            if (页码 === 1) {
+                container.innerHTML = html;
+            } else {
+                container.insertAdjacentHTML('beforeend', html);
+            }
+            已加载页码 = 页码;
+            
+            if (页码 < 分页.总页数) {
+                const 已显示 = Math.min(页码 * 每页实验数, 分页.总数);
+                container.insertAdjacentHTML('beforeend', `
+                    <button id="field-calib-load-more" class="btn btn-secondary" onclick="FieldCalibrationPanel.加载更多标定实验()">
+                        加载更多（已显示 ${已显示}/${分页.总数} 个实验）
+                    </button>
+                `);
+            }
             
         } catch (error) {
             console.error('[标定面板] 加载标定实验列表失败:', error);
@@ -148,6 +165,10 @@ const FieldCalibrationPanel = (function() {
         }
     }
     
+    function 加载更多标定实验() {
+        return 加载标定实验列表(已加载页码 + 1);
+    }
+    
     async function 选择标定数据(expId, direction) {
         try {
             const result = await pywebview.api.load_calibration_from_experiment(expId, direction);
@@ -327,6 +348,7 @@ const FieldCalibrationPanel = (function() {
         从本地加载,
         确认手动输入,
         选择标定数据,
+        加载更多标定实验,
         更新显示,
         清空,
         // 🆕 禁用/启用面板
@@ -347,8 +347,8 @@ const FieldCapturePanel = (function() {
             // 传递波形数据给后端处理
             const result = await pywebview.api.capture_field_point_with_waveform(
                 pointIndex + 1,
-                波形数据.voltage,
-                波形数据.time,
+                BinaryTransport.toWire(波形数据.voltage),
+                BinaryTransport.toWire(波形数据.time),
                 波形数据.sample_rate || 1e9,
                 autoDenoise,
                 bandpassEnabled
@@ -569,6 +569,7 @@ const FieldCapturePanel = (function() {
             实验状态.当前测点索引--;
             更新当前测点显示();
             callbacks?.刷新预览画布?.();
+            显示测点波形预览(实验状态.当前测点索引);
         }
     }
     
@@ -577,6 +578,7 @@ const FieldCapturePanel = (function() {
             实验状态.当前测点索引++;
             更新当前测点显示();
             callbacks?.刷新预览画布?.();
+            显示测点波形预览(实验状态.当前测点索引);
         }
     }
     
@@ -585,6 +587,55 @@ const FieldCapturePanel = (function() {
             实验状态.当前测点索引 = index;
             更新当前测点显示();
             callbacks?.刷新预览画布?.();
+            显示测点波形预览(index);
+        }
+    }
+    
+    // ========== 已测点波形预览 ==========
+    // 未监控时选中已测点，显示HDF5中保存的波形（只读取最小/最大值金字塔，不读取完整波形）
+    let 预览请求序号 = 0;
+    
+    async function 显示测点波形预览(index) {
+        const point = 实验状态.测点列表[index];
+        if (监控中 || !waveformCanvas || !point || point.status !== 'measured') return;
+        
+        const 序号 = ++预览请求序号;
+        try {
+            // 每像素最多两点（最小/最大值）
+            const 最大点数 = Math.max(2 * waveformCanvas.width, 500);
+            const result = await pywebview.api.get_field_waveform_preview(point.point_index || index + 1, 最大点数);
+            
+            // 只显示最新一次请求的结果；期间开始监控时不覆盖实时波形
+            if (序号 !== 预览请求序号 || 监控中 || !result.success) return;
+            
+            const { time: 时间, voltage: 电压 } = result.data;
+            if (!时间 || 时间.length === 0) return;
+            
+            // 按数据范围铺满画布：水平 10 格、垂直 8 格
+            let 电压最小 = Infinity, 电压最大 = -Infinity;
+            for (const v of 电压) {
+                if (v < 电压最小) 电压最小 = v;
+                if (v > 电压最大) 电压最大 = v;
+            }
+            const 时基档位 = (时间[时间.length - 1] - 时间[0]) / 10 || 1e-6;
+            const 垂直档位 = (电压最大 - 电压最小) * 1.1 / 8 || 1;
+            
+            waveformCtx.save();
+            waveformCtx.setTransform(1, 0, 0, 1, 0, 0);
+            waveformCtx.clearRect(0, 0, waveformCanvas.width, waveformCanvas.height);
+            waveformCtx.restore();
+            
+            CommonUtils.绘制波形到画布(
+                waveformCanvas,
+                waveformCtx,
+                { 时间, 电压, 时基档位, 垂直档位, 垂直偏移: 0 },
+                {
+                    timeOffset: (时间[0] + 时间[时间.length - 1]) / 2,
+                    voltageOffset: (电压最小 + 电压最大) / 2
+                }
+            );
+        } catch (error) {
+            // 静默处理错误
         }
     }
     
@@ -621,6 +672,7 @@ const FieldCapturePanel = (function() {
         实验状态.当前测点索引 = value - 1;
         更新当前测点显示();
         callbacks?.刷新预览画布?.();
+        显示测点波形预览(value - 1);
 
     }
     
@@ -969,11 +1021,11 @@ const FieldCapturePanel = (function() {
         if (!confirmed) return;
         
         try {
-            const result = await pywebview.api.set_baseline_point(
-                pointIndex + 1
-            );
+            const result = await StressDetectionUniaxialModule.更换基准点(pointIndex + 1);
             
-            if (result.success) {
+            if (result.cancelled) {
+                callbacks?.显示状态信息('ℹ️', '已取消更换基准点', '基准点和应力值保持不变', 'info');
+            } else if (result.success) {
                 实验状态.基准点ID = pointIndex + 1;
                 实验状态.基准点已采集 = true;
                 
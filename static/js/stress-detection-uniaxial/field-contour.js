@@ -18,6 +18,7 @@ const FieldContour = (function() {
         显示测点: true,
         显示等高线: false,
         显示提示框: false,  // 默认关闭悬停提示
+        显示不确定度: false,
         色图名称: 'jet',
         透明度: 0.8,
         缩放比例: 1,
@@ -34,6 +35,12 @@ const FieldContour = (function() {
         起始偏移Y: 0
     };
     
+    // 不确定度叠加层：白色"雾"，不确定度最大处的不透明度
+    const 不确定度最大透明度 = 0.75;
+    
+    // 网格图层的离屏画布（每个网格点一个像素）
+    const 离屏画布 = document.createElement('canvas');
+    
     // 色图定义
     const 色图 = {
         jet: [
@@ -131,6 +138,29 @@ const FieldContour = (function() {
             });
         }
         
+        // 显示不确定度复选框
+        const showUncertaintyCheckbox = document.getElementById('field-contour-show-uncertainty');
+        if (showUncertaintyCheckbox) {
+            showUncertaintyCheckbox.addEventListener('change', async (e) => {
+                显示设置.显示不确定度 = e.target.checked;
+                
+                // 不确定度按需计算：当前网格没有不确定度时重新请求
+                const expId = 实验状态?.当前实验?.id || 实验状态?.当前实验?.experiment_id;
+                if (e.target.checked && expId && 云图数据?.网格 && !云图数据.网格.uncertainty) {
+                    try {
+                        const result = await 请求云图(expId);
+                        if (result.success) {
+                            更新数据(result);
+                            return;
+                        }
+                    } catch (error) {
+                        console.error('[云图显示] 获取不确定度失败:', error);
+                    }
+                }
+                刷新();
+            });
+        }
+        
         // 色标样式下拉框
         const colormapSelect = document.getElementById('field-contour-colormap');
         if (colormapSelect) {
@@ -159,18 +189,7 @@ const FieldContour = (function() {
                         return;
                     }
                     
-                    // 获取设置参数
-                    const interpolation = document.getElementById('field-contour-interpolation')?.value || 'auto';
-                    const resolution = parseInt(document.getElementById('field-contour-resolution')?.value || '100');
-                    const smoothing = document.getElementById('field-contour-smoothing')?.checked ?? true;
-                    
-                    const result = await pywebview.api.update_field_contour(expId, {
-                        method: interpolation,
-                        resolution: resolution,
-                        smoothing: smoothing,
-                        vmin: null,
-                        vmax: null
-                    });
+                    const result = await 请求云图(expId);
                     
                     if (result.success) {
                         // update_field_contour 直接返回数据，不嵌套在 data 里
@@ -193,6 +212,30 @@ const FieldContour = (function() {
         }
     }
     
+    // ========== 请求云图 ==========
+    /**
+     * 按界面设置请求插值结果（只在显示不确定度时让后端估计不确定度）
+     */
+    function 请求云图(expId) {
+        const interpolation = document.getElementById('field-contour-interpolation')?.value || 'auto';
+        const resolution = parseInt(document.getElementById('field-contour-resolution')?.value || '100');
+        const smoothing = document.getElementById('field-contour-smoothing')?.checked ?? true;
+        
+        return pywebview.api.update_field_contour(expId, {
+            method: interpolation,
+            resolution: resolution,
+            smoothing: smoothing,
+            vmin: null,
+            vmax: null,
+            uncertainty: 显示设置.显示不确定度
+        });
+    }
+    
+    /** 是否显示不确定度（外部刷新云图时据此决定是否请求不确定度） */
+    function 需要不确定度() {
+        return 显示设置.显示不确定度;
+    }
+    
     // ========== 更新色标预览 ==========
     function 更新色标预览() {
         const previewCanvas = document.getElementById('field-colormap-preview');
@@ -236,6 +279,7 @@ const FieldContour = (function() {
                     show_colorbar: true,
                     show_contour_lines: true,  // 显示等高线和数字标签
                     contour_levels: 8,         // 等高线数量
+                    show_uncertainty: 显示设置.显示不确定度,
                     title: 实验状态?.当前实验?.name || ''
                 });
                 
@@ -308,6 +352,9 @@ const FieldContour = (function() {
     function 更新数据(data) {
         // 完全替换云图数据
         云图数据 = data;
+        if (data?.grid) {
+            云图数据.网格 = 解析网格(data.grid);
+        }
         
         // 如果显示等高线，加载等高线数据
         if (显示设置.显示等高线 && data?.success && data?.mode === 'contour') {
@@ -317,6 +364,27 @@ const FieldContour = (function() {
         刷新();
     }
     
+    // ========== 解析网格 ==========
+    // 后端网格格式：1-D 坐标轴 x/y + 按行展开的 float32 数据层（NaN 表示无效），见 grid_payload.py
+    // 旧格式（2-D 列表，null 表示无效）转换为相同结构
+    function 解析网格(grid) {
+        if (grid.format === 'axes') {
+            BinaryTransport.decodeFields(grid);
+            const [rows, cols] = grid.shape;
+            return { x: grid.x, y: grid.y, rows, cols, zi: grid.zi, uncertainty: grid.uncertainty || null };
+        }
+        
+        const 展开 = (层) => 层 ? Float32Array.from(层.flat(), v => v === null ? NaN : v) : null;
+        return {
+            x: grid.xi[0],
+            y: grid.yi.map(row => row[0]),
+            rows: grid.zi.length,
+            cols: grid.zi[0]?.length || 0,
+            zi: 展开(grid.zi),
+            uncertainty: 展开(grid.uncertainty)
+        };
+    }
+    
     // ========== 加载等高线数据 ==========
     async function 加载等高线数据() {
         try {
@@ -410,9 +478,13 @@ const FieldContour = (function() {
         
         // 绘制云图
 
-        if (云图数据.mode === 'contour' && 云图数据.grid) {
+        if (云图数据.mode === 'contour' && 云图数据.网格) {
 
             绘制云图(transform);
+            
+            if (显示设置.显示不确定度 && 云图数据.网格.uncertainty) {
+                绘制不确定度(transform);
+            }
         } else {
 
         }
@@ -630,49 +702,87 @@ const FieldContour = (function() {
     
     // ========== 绘制云图 ==========
     function 绘制云图(transform) {
-        const grid = 云图数据.grid;
-        if (!grid || !grid.xi || !grid.yi || !grid.zi) {
-            return;
+        const 网格 = 云图数据.网格;
+        if (!网格) return;
+        
+        let vmin = 云图数据.stats?.vmin ?? 云图数据.metadata?.vmin;
+        let vmax = 云图数据.stats?.vmax ?? 云图数据.metadata?.vmax;
+        if (vmin === undefined || vmax === undefined) {
+            vmin = Infinity;
+            vmax = -Infinity;
+            for (const z of 网格.zi) {
+                if (!isNaN(z)) {
+                    vmin = Math.min(vmin, z);
+                    vmax = Math.max(vmax, z);
+                }
+            }
         }
-        
-        const { scale, offsetX, offsetY } = transform;
-        const vmin = 云图数据.stats?.vmin ?? 云图数据.metadata?.vmin ?? Math.min(...grid.zi.flat().filter(v => v !== null));
-        const vmax = 云图数据.stats?.vmax ?? 云图数据.metadata?.vmax ?? Math.max(...grid.zi.flat().filter(v => v !== null));
         const vrange = vmax - vmin || 1;
-
-        const rows = grid.zi.length;
-        const cols = grid.zi[0]?.length || 0;
+        const alpha = Math.round(显示设置.透明度 * 255);
+        
+        绘制网格图层(网格, transform, (k, 像素, p) => {
+            const z = 网格.zi[k];
+            if (isNaN(z)) return;
+            const color = 值到颜色((z - vmin) / vrange);
+            像素[p] = color[0];
+            像素[p + 1] = color[1];
+            像素[p + 2] = color[2];
+            像素[p + 3] = alpha;
+        });
+    }
+    
+    // ========== 绘制不确定度叠加层 ==========
+    function 绘制不确定度(transform) {
+        const 网格 = 云图数据.网格;
+        const umax = 云图数据.uncertainty?.max;
+        if (!网格?.uncertainty || !umax) return;
+        
+        绘制网格图层(网格, transform, (k, 像素, p) => {
+            const value = 网格.uncertainty[k];
+            if (isNaN(value) || value <= 0) return;
+            像素[p] = 255;
+            像素[p + 1] = 255;
+            像素[p + 2] = 255;
+            像素[p + 3] = Math.round(Math.min(value / umax, 1) * 不确定度最大透明度 * 255);
+        });
+    }
+    
+    // ========== 绘制网格图层 ==========
+    // 每个网格点对应一个像素，写入离屏画布后整体缩放绘制（代替逐格 fillRect）
+    // 着色(k, 像素, p)：k 为网格点序号（按行展开），像素[p..p+3] 写入 RGBA，不写则透明
+    function 绘制网格图层(网格, transform, 着色) {
+        const { rows, cols, x, y } = 网格;
+        if (rows < 2 || cols < 2) return;
         
-        if (rows === 0 || cols === 0) {
-            return;
-        }
+        const { scale, offsetX, offsetY } = transform;
+        const 图像 = new ImageData(cols, rows);
+        const 像素 = 图像.data;
         
-        // 计算像素大小
-        const dx = Math.abs((grid.xi[0][1] - grid.xi[0][0]) * scale);
-        const dy = Math.abs((grid.yi[1]?.[0] - grid.yi[0][0]) * scale);
-
-        // 绘制每个网格单元
+        // 网格第 0 行为 y 最小的一行，画在图像最下方（Y轴翻转）
         for (let i = 0; i < rows; i++) {
+            const 行起点 = (rows - 1 - i) * cols;
             for (let j = 0; j < cols; j++) {
-                const z = grid.zi[i][j];
-                if (z === null || z === undefined || isNaN(z)) continue;
-                
-                const dataX = grid.xi[i][j];
-                const dataY = grid.yi[i][j];
-                
-                // 转换坐标（Y轴翻转）
-                const x = dataX * scale + offsetX;
-                const y = offsetY - dataY * scale;  // Y轴翻转
-                
-                // 计算颜色
-                const normalized = (z - vmin) / vrange;
-                const color = 值到颜色(normalized);
-                
-                ctx.fillStyle = `rgba(${color[0]}, ${color[1]}, ${color[2]}, ${显示设置.透明度})`;
-                ctx.fillRect(x - dx/2, y - dy/2, dx + 1, dy + 1);
+                着色(i * cols + j, 像素, (行起点 + j) * 4);
             }
         }
-
+        
+        离屏画布.width = cols;
+        离屏画布.height = rows;
+        离屏画布.getContext('2d').putImageData(图像, 0, 0);
+        
+        // 每个网格点画成以自身为中心的一格
+        const dx = (x[cols - 1] - x[0]) / (cols - 1);
+        const dy = (y[rows - 1] - y[0]) / (rows - 1);
+        ctx.save();
+        ctx.imageSmoothingEnabled = false;
+        ctx.drawImage(
+            离屏画布,
+            (x[0] - dx / 2) * scale + offsetX,
+            offsetY - (y[rows - 1] + dy / 2) * scale,
+            (x[cols - 1] - x[0] + dx) * scale,
+            (y[rows - 1] - y[0] + dy) * scale
+        );
+        ctx.restore();
     }
     
     // ========== 值到颜色映射 ==========
@@ -930,7 +1040,11 @@ const FieldContour = (function() {
         ctx.font = '11px Arial';
         ctx.textAlign = 'left';
         // 从底部往上45px，确保可见
-        ctx.fillText(`插值: ${method} | ${confidenceText[confidence] || confidence}`, 10, height - paddingBottom + 45);
+        let 标签 = `插值: ${method} | ${confidenceText[confidence] || confidence}`;
+        if (云图数据?.uncertainty?.max) {
+            标签 += ` | 最大不确定度 ±${云图数据.uncertainty.max.toFixed(1)} MPa`;
+        }
+        ctx.fillText(标签, 10, height - paddingBottom + 45);
     }
     
     // ========== 交互处理 ==========
@@ -944,7 +1058,7 @@ const FieldContour = (function() {
             return;
         }
         
-        if (!云图数据?.grid) return;
+        if (!云图数据?.网格) return;
         
         const rect = canvas.getBoundingClientRect();
         const x = event.clientX - rect.left;
@@ -1033,7 +1147,8 @@ const FieldContour = (function() {
     }
     
     function 获取位置应力值(screenX, screenY) {
-        if (!云图数据?.grid) return null;
+        const 网格 = 云图数据?.网格;
+        if (!网格 || 网格.rows < 2 || 网格.cols < 2) return null;
         
         const width = canvas.width / (window.devicePixelRatio || 1);
         const height = canvas.height / (window.devicePixelRatio || 1);
@@ -1044,35 +1159,21 @@ const FieldContour = (function() {
         const dataX = (screenX - offsetX) / scale;
         const dataY = (offsetY - screenY) / scale;  // Y轴翻转：offsetY - screenY
         
-        // 在网格中查找最近的值
-        const grid = 云图数据.grid;
-        const rows = grid.zi.length;
-        const cols = grid.zi[0]?.length || 0;
-        
-        if (rows === 0 || cols === 0) return null;
-        
-        // 简单的最近邻查找
-        let minDist = Infinity;
-        let value = null;
-        
-        for (let i = 0; i < rows; i++) {
-            for (let j = 0; j < cols; j++) {
-                const gx = grid.xi[i][j];
-                const gy = grid.yi[i][j];
-                const dist = Math.sqrt((dataX - gx) ** 2 + (dataY - gy) ** 2);
-                
-                if (dist < minDist && grid.zi[i][j] !== null) {
-                    minDist = dist;
-                    value = grid.zi[i][j];
-                }
-            }
-        }
+        // 规则网格：直接按坐标计算最近的网格点
+        const { rows, cols, x, y } = 网格;
+        const dx = (x[cols - 1] - x[0]) / (cols - 1);
+        const dy = (y[rows - 1] - y[0]) / (rows - 1);
+        const j = Math.round((dataX - x[0]) / dx);
+        const i = Math.round((dataY - y[0]) / dy);
+        if (i < 0 || i >= rows || j < 0 || j >= cols) return null;
         
         // 如果距离太远，返回null（放宽阈值，单位是数据坐标）
         const threshold = 5 / scale;  // 5像素对应的数据坐标距离
-        if (minDist > threshold) return null;
+        const dist = Math.sqrt((dataX - x[j]) ** 2 + (dataY - y[i]) ** 2);
+        if (dist > threshold) return null;
         
-        return value;
+        const value = 网格.zi[i * cols + j];
+        return isNaN(value) ? null : value;
     }
     
     function 显示提示(x, y, value) {
@@ -1131,6 +1232,7 @@ const FieldContour = (function() {
         高亮测点,
         清空,
         导出云图图片,
-        重置视图
+        重置视图,
+        需要不确定度
     };
 })();
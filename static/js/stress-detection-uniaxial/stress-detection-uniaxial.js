@@ -53,6 +53,9 @@ const StressDetectionUniaxialModule = (function() {
     // 质量检查模式
     let 质量检查模式 = 'strict'; // 'strict' | 'fast'
     
+    // 更换基准点后查询重新计算进度的间隔（毫秒）
+    const 重新计算轮询间隔 = 250;
+    
     // ========== 初始化 ==========
     function 初始化() {
         // 缓存DOM元素
@@ -268,9 +271,11 @@ const StressDetectionUniaxialModule = (function() {
             if (!confirmed) return;
             
             try {
-                const result = await pywebview.api.set_baseline_point(pointNum);
+                const result = await 更换基准点(pointNum);
                 
-                if (result.success) {
+                if (result.cancelled) {
+                    显示状态信息('ℹ️', '已取消更换基准点', '基准点和应力值保持不变', 'info');
+                } else if (result.success) {
                     实验状态.基准点ID = pointNum;
                     实验状态.基准点已采集 = true;
                     更新基准点UI(pointNum, true, result.quality);
@@ -1382,7 +1387,9 @@ const StressDetectionUniaxialModule = (function() {
         }
         
         try {
-            const result = await pywebview.api.update_field_contour(expId);
+            const result = await pywebview.api.update_field_contour(expId, {
+                uncertainty: 子模块.云图显示?.需要不确定度?.() ?? false
+            });
 
             if (result.success) {
                 // update_field_contour 直接返回数据，不嵌套在 data 里
@@ -1406,6 +1413,45 @@ const StressDetectionUniaxialModule = (function() {
         子模块.采集面板?.更新当前测点(index);
     }
     
+    // ========== 更换基准点（后台重新计算） ==========
+    /**
+     * 更换基准点并等待后台重新计算完成
+     * 重新计算期间在状态栏显示进度，点击状态栏可取消（新基准在计算完成后才生效，取消或失败时基准点和应力值保持不变）
+     * @returns {Object} {success, message, recalculated_points, cancelled}
+     */
+    async function 更换基准点(pointNum) {
+        const result = await pywebview.api.set_baseline_point(pointNum, true);
+        if (!result.success || !result.recalculating) {
+            return result;
+        }
+        
+        const 状态栏 = elements.statusBar;
+        const 取消 = () => pywebview.api.cancel_recalculation();
+        if (状态栏) 状态栏.addEventListener('click', 取消);
+        
+        try {
+            while (true) {
+                const 进度结果 = await pywebview.api.get_recalculation_progress();
+                const 进度 = 进度结果.data || {};
+                
+                if (!进度.running) {
+                    return {
+                        success: !进度.failed && !进度.cancelled,
+                        message: 进度.message,
+                        recalculated_points: 进度.recalculated || 0,
+                        cancelled: !!进度.cancelled
+                    };
+                }
+                
+                显示状态信息('⏳', '正在重新计算应力值',
+                    `${进度.done || 0}/${进度.total || result.total || 0} 个测点（点击此处取消）`, 'info', 0);
+                await new Promise(resolve => setTimeout(resolve, 重新计算轮询间隔));
+            }
+        } finally {
+            if (状态栏) 状态栏.removeEventListener('click', 取消);
+        }
+    }
+    
     // ========== 确认对话框 ==========
     function 显示确认对话框(标题, 消息) {
         return new Promise((resolve) => {
@@ -1493,6 +1539,7 @@ const StressDetectionUniaxialModule = (function() {
         刷新数据表格,
         显示状态信息,
         显示确认对话框,
+        更换基准点,
         加载实验数据,
         清空实验数据,
         更新基准点UI,
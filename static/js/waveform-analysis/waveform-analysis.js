@@ -10,6 +10,15 @@ const WaveformAnalysis = (function() {
     let 当前视图 = 'original'; // 'original' 或 'denoised'
     let 调整动画ID = null; // 用于取消动画
     
+    // 大波形：全分辨率数据保留在服务端，按视窗请求抽取后的数据
+    const 服务端显示阈值 = 200000;  // 点数超过该值时启用
+    let 显示视窗 = null;          // 当前视窗数据 { 键, t_start, t_end, 宽度, decimated, time, voltage, 包络 }
+    let 视窗请求序号 = 0;
+    
+    // HDF5 文件打开时先显示的预览点数（完整数据加载完成前不能处理）
+    const 预览点数 = 4000;
+    let 加载序号 = 0;
+    
     // ========== DOM 元素 ==========
     let elements = {};
     
@@ -66,7 +75,8 @@ const WaveformAnalysis = (function() {
                 }
             },
             状态回调: 显示状态,
-            获取波形数据回调: () => 获取当前显示的波形数据(),
+            // 预览数据只用于显示，完整数据加载完成前不能处理
+            获取波形数据回调: () => (当前波形数据 && 当前波形数据.预览) ? null : 获取当前显示的波形数据(),
             获取缩放范围回调: () => WaveformZoom.获取缩放范围(),
             显示状态栏信息回调: 显示状态栏信息
         });
@@ -173,40 +183,36 @@ const WaveformAnalysis = (function() {
     }
     
     async function 加载并显示波形(filePath, fileName) {
+        const 序号 = ++加载序号;
+        let 已显示预览 = false;
         try {
             显示状态('正在加载...');
             
-            const result = await pywebview.api.加载波形文件(filePath);
-            
-            if (result.success) {
-                // 保存波形数据
-                当前波形数据 = result.data;
-                当前视图 = 'original';
-                
-                // 智能选择时间单位：优先使用微秒
-                // 计算时间范围（秒）
-                const 时间范围 = Math.max(...当前波形数据.time) - Math.min(...当前波形数据.time);
+            // HDF5 文件先显示最小/最大值金字塔预览（只读 KB 级数据），完整数据加载完成后再替换
+            if (/\.(h5|hdf5)$/i.test(filePath)) {
+                const 预览 = await BinaryTransport.调用('预览波形文件', filePath, 预览点数, true);
+                if (序号 !== 加载序号) return;
                 
-                // 如果时间范围在 0.1 μs 到 10 ms 之间，强制使用微秒
-                if (时间范围 >= 1e-7 && 时间范围 <= 1e-2) {
-                    当前波形数据.强制时间单位 = 'μs';
+                if (预览.success && 预览.data.decimated) {
+                    设置当前波形({ ...预览.data, points: 预览.data.source_points, 预览: true }, fileName);
+                    已显示预览 = true;
+                    绘制波形();
+                    显示状态栏信息('ℹ️', '已显示波形预览', '正在加载完整数据...', 'info', 3000);
                 }
+            }
+            
+            const result = await BinaryTransport.调用('加载波形文件', filePath, true, 服务端显示阈值);
+            if (序号 !== 加载序号) return;
+            
+            if (result.success) {
+                // 替换本次打开的预览时保留用户在预览上的缩放
+                设置当前波形(result.data, fileName, 已显示预览);
                 
-                // 清除所有模块的状态
-                WaveformZoom.清除缩放状态();
-                WaveformProcessing.清除处理状态();
-                WaveformCrossCorr.清除状态();
-                
-                // 更新UI
-                elements.selectedFileName.textContent = fileName;
-                elements.statusMessage.style.display = 'none';
-                if (elements.legend) {
-                    elements.legend.style.display = 'block';
+                // 服务端波形先取回整条波形的概览视窗
+                if (当前波形数据.serverSide) {
+                    await 刷新显示视窗(计算期望视窗());
                 }
                 
-                // 调整画布并绘制
-                调整画布大小();
-                
                 setTimeout(() => {
                     绘制波形();
                     显示状态('');
@@ -219,23 +225,138 @@ const WaveformAnalysis = (function() {
         }
     }
     
+    // 替换当前波形（预览或完整数据）并重置各模块状态
+    function 设置当前波形(data, fileName, 保留缩放 = false) {
+        当前波形数据 = data;
+        当前视图 = 'original';
+        显示视窗 = null;
+        
+        // 智能选择时间单位：优先使用微秒
+        // 计算时间范围（秒）
+        const 时间范围 = 当前波形数据.serverSide
+            ? 当前波形数据.timeRange[1] - 当前波形数据.timeRange[0]
+            : Math.max(...当前波形数据.time) - Math.min(...当前波形数据.time);
+        
+        // 如果时间范围在 0.1 μs 到 10 ms 之间，强制使用微秒
+        if (时间范围 >= 1e-7 && 时间范围 <= 1e-2) {
+            当前波形数据.强制时间单位 = 'μs';
+        }
+        
+        // 清除所有模块的状态
+        if (!保留缩放) {
+            WaveformZoom.清除缩放状态();
+        }
+        WaveformProcessing.清除处理状态();
+        WaveformCrossCorr.清除状态();
+        
+        // 更新UI
+        elements.selectedFileName.textContent = fileName;
+        elements.statusMessage.style.display = 'none';
+        if (elements.legend) {
+            elements.legend.style.display = 'block';
+        }
+        
+        调整画布大小();
+    }
+    
     // ========== 获取当前显示的波形数据 ==========
     function 获取当前显示的波形数据() {
         if (!当前波形数据) return null;
         
+        const 电压 = 获取当前电压();
+        
+        // 服务端波形：返回当前视窗的抽取数据，并附加全分辨率序列引用（处理接口回传引用，在服务端计算）
+        if (当前波形数据.serverSide) {
+            if (!显示视窗) return null;
+            const 时间范围 = 当前波形数据.timeRange;
+            return {
+                time: BinaryTransport.附加引用(显示视窗.time, 当前波形数据.time),
+                voltage: BinaryTransport.附加引用(显示视窗.voltage, 电压),
+                sample_rate: (当前波形数据.points - 1) / (时间范围[1] - 时间范围[0])
+            };
+        }
+        
+        return {
+            time: 当前波形数据.time,
+            voltage: 电压
+        };
+    }
+    
+    // 当前视图对应的电压（数组或服务端序列引用）
+    function 获取当前电压() {
         const 滤波后的波形 = WaveformProcessing.获取滤波后的波形();
         const 降噪后的波形 = WaveformProcessing.获取降噪后的波形();
         
-        let 电压 = 当前波形数据.voltage;
         if (当前视图 === 'bandpass' && 滤波后的波形) {
-            电压 = 滤波后的波形;
+            return 滤波后的波形;
         } else if (当前视图 === 'denoised' && 降噪后的波形) {
-            电压 = 降噪后的波形;
+            return 降噪后的波形;
         }
-        
+        return 当前波形数据.voltage;
+    }
+    
+    // ========== 服务端视窗 ==========
+    // 期望视窗：当前缩放范围（无缩放时为整条波形）及画布绘图区宽度
+    function 计算期望视窗() {
+        const 缩放范围 = WaveformZoom.获取缩放范围();
+        const 时间范围 = 当前波形数据.timeRange;
+        const rect = analysisCanvas.getBoundingClientRect();
+        const padding = { left: 50, right: 80 };
+        
+        const 包络 = WaveformProcessing.获取包络数据();
+        const 电压 = 获取当前电压();
         return {
-            time: 当前波形数据.time,
-            voltage: 电压
+            键: `${电压.id}/${包络 ? 包络.id : ''}`,
+            t_start: 缩放范围 ? 缩放范围.时间最小 : 时间范围[0],
+            t_end: 缩放范围 ? 缩放范围.时间最大 : 时间范围[1],
+            宽度: Math.max(Math.round(rect.width - padding.left - padding.right), 100),
+            电压,
+            包络
+        };
+    }
+    
+    // 当前视窗数据能否满足期望视窗（同一序列、覆盖范围、分辨率足够）
+    function 视窗可用(期望) {
+        if (!显示视窗 || 显示视窗.键 !== 期望.键) return false;
+        
+        // 超出波形两端的部分本来就没有数据，不要求覆盖
+        const 时间范围 = 当前波形数据.timeRange;
+        if (Math.max(期望.t_start, 时间范围[0]) < 显示视窗.t_start ||
+            Math.min(期望.t_end, 时间范围[1]) > 显示视窗.t_end) return false;
+        if (!显示视窗.decimated) return true;
+        
+        // 抽取数据的时间分辨率不低于期望视窗所需的一半
+        const 已有分辨率 = (显示视窗.t_end - 显示视窗.t_start) / 显示视窗.宽度;
+        const 需要分辨率 = (期望.t_end - 期望.t_start) / 期望.宽度;
+        return 已有分辨率 <= 需要分辨率 * 2;
+    }
+    
+    // 请求视窗：左右各多取一个视窗宽度，小范围拖动时无需重新请求
+    async function 刷新显示视窗(期望) {
+        const 序号 = ++视窗请求序号;
+        const 时间范围 = 当前波形数据.timeRange;
+        const 跨度 = 期望.t_end - 期望.t_start;
+        const t_start = Math.max(期望.t_start - 跨度, 时间范围[0]);
+        const t_end = Math.min(期望.t_end + 跨度, 时间范围[1]);
+        const 宽度 = Math.round(期望.宽度 * (t_end - t_start) / 跨度);
+        
+        const result = await BinaryTransport.调用('获取显示视窗',
+            当前波形数据.time, 期望.电压, t_start, t_end, 宽度, 'minmax',
+            期望.包络 ? { envelope: 期望.包络 } : null, true);
+        
+        // 只采用最新一次请求的结果
+        if (序号 !== 视窗请求序号 || !result.success) return;
+        
+        const 附加 = BinaryTransport.decodeFields(result.data.extra || {});
+        显示视窗 = {
+            键: 期望.键,
+            t_start,
+            t_end,
+            宽度,
+            decimated: result.data.decimated,
+            time: result.data.time,
+            voltage: result.data.voltage,
+            包络: 附加.envelope || null
         };
     }
     
@@ -245,8 +366,19 @@ const WaveformAnalysis = (function() {
             return;
         }
         
+        // 服务端波形：视窗不满足当前缩放范围时异步请求，先用已有数据绘制
+        if (当前波形数据.serverSide) {
+            const 期望 = 计算期望视窗();
+            if (!视窗可用(期望)) {
+                刷新显示视窗(期望).then(() => {
+                    if (视窗可用(期望)) 绘制波形();
+                }).catch(() => 显示状态('获取显示视窗失败'));
+            }
+        }
+        
         // 获取当前显示的波形数据
         const 波形数据 = 获取当前显示的波形数据();
+        if (!波形数据) return;
         
         // 获取框选坐标（如果正在框选）
         const 框选坐标 = WaveformZoom.是否正在框选() ? WaveformZoom.获取框选坐标() : { 框选起点: null, 框选终点: null };
@@ -254,7 +386,7 @@ const WaveformAnalysis = (function() {
         // 准备配置参数
         const 配置 = {
             缩放范围: WaveformZoom.获取缩放范围(),
-            包络数据: WaveformProcessing.获取包络数据(),
+            包络数据: 当前波形数据.serverSide ? (显示视窗 && 显示视窗.包络) : WaveformProcessing.获取包络数据(),
             显示包络: WaveformProcessing.是否显示包络(),
             Hilbert配置: WaveformProcessing.获取Hilbert配置(),
             选中的峰值: WaveformProcessing.获取选中的峰值(),
@@ -197,13 +197,13 @@ const WaveformProcessing = (function() {
             滤波配置.highcut = highcut;
             滤波配置.order = order;
             
-            // 计算采样率（从时间数组推算）
+            // 计算采样率（服务端波形的显示数据经过抽取，使用全分辨率采样率；否则从时间数组推算）
             const dt = 波形数据.time[1] - 波形数据.time[0]; // 秒
-            const fs = 1.0 / dt; // Hz
+            const fs = 波形数据.sample_rate || 1.0 / dt; // Hz
             
             // 调用后端 API
-            const result = await pywebview.api.带通滤波(
-                波形数据.voltage,
+            const result = await BinaryTransport.调用('带通滤波',
+                BinaryTransport.toWire(波形数据.voltage),
                 fs,
                 lowcut * 1e6,  // MHz -> Hz
                 highcut * 1e6, // MHz -> Hz
@@ -295,8 +295,8 @@ const WaveformProcessing = (function() {
             降噪配置.threshold_mode = threshold_mode;
             
             // 调用后端 API
-            const result = await pywebview.api.小波降噪(
-                波形数据.voltage,
+            const result = await BinaryTransport.调用('小波降噪',
+                BinaryTransport.toWire(波形数据.voltage),
                 降噪配置.wavelet,
                 降噪配置.level,
                 降噪配置.threshold_method,
@@ -363,7 +363,7 @@ const WaveformProcessing = (function() {
             Hilbert配置.lineWidth = parseInt(elements.envelopeWidth.value);
             Hilbert配置.showOriginal = elements.showOriginalCheck.checked;
             
-            const result = await pywebview.api.Hilbert变换(波形数据.voltage);
+            const result = await BinaryTransport.调用('Hilbert变换', BinaryTransport.toWire(波形数据.voltage));
             
             if (result.success) {
                 包络数据 = result.envelope;
@@ -505,8 +505,8 @@ const WaveformProcessing = (function() {
             const 点击时间 = 时间最小 + (相对X / chartWidth) * (时间最大 - 时间最小);
             
             const result = await pywebview.api.查找时间附近峰值(
-                波形数据.time,
-                波形数据.voltage,
+                BinaryTransport.toWire(波形数据.time),
+                BinaryTransport.toWire(波形数据.voltage),
                 点击时间
             );
             
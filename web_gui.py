@@ -11,9 +11,10 @@
 import webview
 import os
 from modules import OscilloscopeBase, RealtimeCapture, WaveformAnalysis, StressCalibration, SignalProcessingWrapper, UltrasonicPulserController
+from modules.core.binary_transport import decode_array, decode_codes, encode_waveform, measure_transport, transport_stats
 from modules.stress_detection_uniaxial import (
     FieldDatabaseManager, FieldExperimentHDF5, ShapeUtils, PointGenerator,
-    StressFieldInterpolation, ContourGenerator,
+    IncrementalFieldInterpolator, ContourGenerator,
     FieldExperiment, FieldCapture, DataValidator, DataExporter,
     ErrorCode, APIResponse, FieldLogger
 )
@@ -21,7 +22,7 @@ from modules.stress_detection_uniaxial import (
 
 class WebAPI:
     """Web界面API类，提供JavaScript调用的后端接口（路由层）"""
-
+    
     def __init__(self):
         # 创建各功能模块实例
         self.osc = OscilloscopeBase()
@@ -109,11 +110,32 @@ class WebAPI:
     
     def 断开连接(self):
         """断开示波器连接"""
+        if self.realtime:
+            self.realtime.停止后台采集()
         return self.osc.断开连接()
     
-    def 获取波形数据(self, 通道=1):
+    @measure_transport
+    def 获取波形数据(self, 通道=1, 二进制=False):
         """获取NORM模式波形数据（实时显示）"""
-        return self.osc.获取波形数据_NORM模式(通道)
+        if not 二进制:
+            return self.osc.获取波形数据_NORM模式(通道)
+        结果 = self.osc.采集NORM波形(通道)
+        if 结果["success"]:
+            return {"success": True, "data": encode_waveform(结果["waveform"])}
+        return 结果
+    
+    def 开始后台采集(self, 通道=1):
+        """启动后台采集线程（环形缓冲区）"""
+        return self.realtime.开始后台采集(通道)
+    
+    def 停止后台采集(self):
+        """停止后台采集线程"""
+        return self.realtime.停止后台采集()
+    
+    @measure_transport
+    def 获取最新帧(self, 通道=None, 最大点数=None, 上一帧序号=None, 二进制=False):
+        """获取后台采集的最新一帧（可抽取）"""
+        return self.realtime.获取最新帧(通道, 最大点数, 上一帧序号, 二进制)
     
     def 设置存储深度(self, 深度):
         """设置存储深度"""
@@ -255,9 +277,24 @@ class WebAPI:
         """保存波形数据到文件"""
         return self.realtime.保存波形到文件(文件路径, 通道, 格式)
     
-    def 获取RAW波形数据(self, 通道=1):
+    @measure_transport
+    def 获取RAW波形数据(self, 通道=1, 二进制=False):
         """🆕 获取RAW模式波形数据（12bit精度，完整存储深度）"""
-        return self.osc.获取波形数据_RAW模式_屏幕范围(通道)
+        if not 二进制:
+            return self.osc.获取波形数据_RAW模式_屏幕范围(通道)
+        结果 = self.osc.采集RAW波形_屏幕范围(通道)
+        if 结果["success"]:
+            return {"success": True, "data": encode_waveform(结果["waveform"])}
+        return 结果
+    
+    def 获取传输统计(self):
+        """获取各波形接口的传输字节数和耗时统计"""
+        return {"success": True, "data": transport_stats.summary()}
+    
+    def 重置传输统计(self):
+        """清空传输统计"""
+        transport_stats.reset()
+        return {"success": True, "message": "传输统计已重置"}
     
     # ==================== 波形分析功能 ====================
     
@@ -265,9 +302,21 @@ class WebAPI:
         """打开文件选择对话框"""
         return self.analysis.选择打开文件()
     
-    def 加载波形文件(self, 文件路径):
+    @measure_transport
+    def 加载波形文件(self, 文件路径, 二进制=False, 显示点数=None):
         """从NPY文件加载波形数据"""
-        return self.analysis.加载波形文件(文件路径)
+        return self.analysis.加载波形文件(文件路径, 二进制, 显示点数)
+    
+    @measure_transport
+    def 预览波形文件(self, 文件路径, 最大点数=2000, 二进制=False):
+        """读取HDF5波形文件的预览（最小/最大值金字塔）"""
+        return self.analysis.预览波形文件(文件路径, 最大点数, 二进制)
+    
+    @measure_transport
+    def 获取显示视窗(self, 时间数据, 电压数据, t_start=None, t_end=None, 宽度像素=1000,
+                    方法='minmax', 附加序列=None, 二进制=False):
+        """按显示视窗抽取波形（大波形缩放时按需请求）"""
+        return self.analysis.获取显示视窗(时间数据, 电压数据, t_start, t_end, 宽度像素, 方法, 附加序列, 二进制)
     
     # 🆕 波形分析模块 - 信号处理配置
     def 设置波形分析降噪配置(self, config):
@@ -286,6 +335,14 @@ class WebAPI:
         """获取波形分析模块的带通滤波配置"""
         return self.analysis.get_bandpass_config()
     
+    def 设置波形分析时延估计方法(self, method):
+        """设置波形分析模块的亚采样点时延估计方法"""
+        return self.analysis.set_delay_estimator(method)
+    
+    def 获取波形分析时延估计方法(self):
+        """获取波形分析模块的亚采样点时延估计方法"""
+        return self.analysis.get_delay_estimator()
+    
     # ==================== 应力系数标定功能 ====================
     
     def 计算互相关声时差(self, 基准波形, 测量波形, 采样率):
@@ -302,7 +359,7 @@ class WebAPI:
     
     # ==================== 单轴应力检测实验功能（新增）====================
     
-
+    
     
     def 检查方向是否存在(self, 材料名称, 方向名称):
         """🆕 检查指定材料的指定方向是否已存在于数据库中（只检查有基准波形的完整数据）"""
@@ -316,19 +373,23 @@ class WebAPI:
         """🆕 创建新的单轴应力检测实验"""
         return self.calibration.创建应力检测实验(材料名称, 测试方向列表)
     
+    @measure_transport
     def 保存基准波形数据(self, 实验ID, 方向名称, 电压数据, 时间数据, 示波器采样率=None):
         """🆕 保存基准波形数据（从订阅获取的波形，含带通滤波和降噪处理）
         
         注意：降噪和带通滤波配置从后端对象读取，不再通过参数传递
         """
-        return self.calibration.保存基准波形数据(实验ID, 方向名称, 电压数据, 时间数据, 示波器采样率)
+        return self.calibration.保存基准波形数据(
+            实验ID, 方向名称, decode_array(电压数据), decode_array(时间数据), 示波器采样率)
     
+    @measure_transport
     def 保存并分析应力波形数据(self, 实验ID, 方向名称, 应力值, 电压数据, 时间数据, 示波器采样率=None):
         """🆕 保存并分析应力波形数据（从订阅获取的波形）
         
         注意：降噪和带通滤波配置从后端对象读取，不再通过参数传递
         """
-        return self.calibration.保存并分析应力波形数据(实验ID, 方向名称, 应力值, 电压数据, 时间数据, 示波器采样率)
+        return self.calibration.保存并分析应力波形数据(
+            实验ID, 方向名称, 应力值, decode_array(电压数据), decode_array(时间数据), 示波器采样率)
     
     def 线性拟合应力时间差(self, 实验ID, 方向名称):
         """🆕 线性拟合应力-时间差数据"""
@@ -360,6 +421,22 @@ class WebAPI:
         """🆕 获取标定模块的带通滤波配置"""
         return self.calibration.get_bandpass_config()
     
+    def 设置标定门控配置(self, config):
+        """设置标定模块的回波门控配置"""
+        return self.calibration.set_gate_config(config)
+    
+    def 获取标定门控配置(self):
+        """获取标定模块的回波门控配置"""
+        return self.calibration.get_gate_config()
+    
+    def 设置标定时延估计方法(self, method):
+        """设置标定模块的亚采样点时延估计方法"""
+        return self.calibration.set_delay_estimator(method)
+    
+    def 获取标定时延估计方法(self):
+        """获取标定模块的亚采样点时延估计方法"""
+        return self.calibration.get_delay_estimator()
+    
     def 加载标定实验配置(self, 实验ID, 方向名称):
         """🆕 从已有实验的HDF5文件加载信号处理配置并恢复到后端对象"""
         return self.calibration.加载实验配置(实验ID, 方向名称)
@@ -388,6 +465,17 @@ class WebAPI:
         except Exception as e:
             return {"success": False, "message": f"获取实验列表失败: {str(e)}"}
     
+    def 获取实验列表分页(self, 页码=1, 每页数量=20, 仅已拟合=False):
+        """分页获取实验列表（结构同 获取所有实验列表，用于实验选择界面）"""
+        try:
+            from modules.stress_calibration.experiment_data_manager import ExperimentDataManager
+            dm = ExperimentDataManager()
+            分页结果 = dm.获取实验列表分页(页码, 每页数量, 仅已拟合)
+            dm.关闭()
+            return {"success": True, "data": 分页结果}
+        except Exception as e:
+            return {"success": False, "message": f"获取实验列表失败: {str(e)}"}
+    
     def 获取所有方向列表(self):
         """🆕 获取所有方向列表（扁平化结构，用于标定模块）"""
         try:
@@ -458,14 +546,17 @@ class WebAPI:
     
     # ==================== 信号处理功能 ====================
     
+    @measure_transport
     def 小波降噪(self, 信号数据, 小波类型='sym6', 分解层数=5, 阈值方法='soft', 阈值模式='heursure'):
         """应用小波降噪"""
         return self.signal_proc.小波降噪(信号数据, 小波类型, 分解层数, 阈值方法, 阈值模式)
     
+    @measure_transport
     def 带通滤波(self, 信号数据, 采样率, 低频截止, 高频截止, 滤波器阶数=6):
         """应用带通滤波"""
         return self.signal_proc.带通滤波(信号数据, 采样率, 低频截止, 高频截止, 滤波器阶数)
     
+    @measure_transport
     def Hilbert变换(self, 信号数据):
         """计算Hilbert包络"""
         return self.signal_proc.Hilbert变换(信号数据)
@@ -568,6 +659,8 @@ class WebAPI:
         Returns:
             {"success": bool, "message": str}
         """
+        IncrementalFieldInterpolator.discard(exp_id)
+        self._cancel_field_recalculation(exp_id)
         return self.field_experiment.delete_experiment(exp_id)
     
     def update_field_experiment(self, exp_id, updates):
@@ -591,6 +684,7 @@ class WebAPI:
         Returns:
             {"success": bool, "message": str}
         """
+        self._cancel_field_recalculation(exp_id)
         return self.field_experiment.complete_experiment(exp_id)
     
     def reset_field_experiment(self, exp_id=None):
@@ -602,14 +696,22 @@ class WebAPI:
         Returns:
             {"success": bool, "message": str}
         """
+        self._cancel_field_recalculation(exp_id)
         result = self.field_experiment.reset_experiment(exp_id)
         
         # 🔧 修复：清空field_capture中的基准波形缓存
         if result['success'] and self.field_capture:
             self.field_capture.baseline_waveform = None
+        if result['success']:
+            IncrementalFieldInterpolator.discard(exp_id or self.field_experiment.current_exp_id)
         
         return result
     
+    def _cancel_field_recalculation(self, exp_id=None):
+        """取消并等待当前实验的后台重新计算（删除、完成、重置实验前调用，避免写入已改变的实验）"""
+        if self.field_capture and (exp_id is None or exp_id == self.field_capture.current_exp_id):
+            self.field_capture.cancel_recalculation(wait=True)
+    
     def get_field_experiment_list(self):
         """获取所有应力场实验列表
         
@@ -689,7 +791,7 @@ class WebAPI:
         """
         return self.field_experiment.validate_calibration_data(calibration_data)
     
-
+    
     
     # ---------- 形状和布点 ----------
     
@@ -788,13 +890,14 @@ class WebAPI:
     
     # ---------- 数据采集 ----------
     
+    @measure_transport
     def capture_field_point_with_waveform(self, point_index, voltage_data, time_data, sample_rate, auto_denoise=True, bandpass_enabled=True):
         """采集单个测点（新接口，前端传入波形数据）
         
         Args:
             point_index: 测点索引
-            voltage_data: 电压数据数组
-            time_data: 时间数据数组
+            voltage_data: 电压数据数组（或二进制编码对象）
+            time_data: 时间数据数组（或二进制编码对象）
             sample_rate: 采样率
             auto_denoise: 是否自动降噪
             bandpass_enabled: 是否启用带通滤波
@@ -803,22 +906,38 @@ class WebAPI:
             {"success": bool, "data": {...}}
         """
         waveform = {
-            'time': time_data,
-            'voltage': voltage_data,
+            'time': decode_array(time_data),
+            'voltage': decode_array(voltage_data),
             'sample_rate': sample_rate
         }
+        # RAW 码值编码时同时保留 ADC 码值（HDF5 按 uint16 保存）
+        waveform.update(decode_codes(voltage_data) or {})
         return self.field_capture.capture_point_with_waveform(point_index, waveform, auto_denoise, bandpass_enabled)
     
-    def set_baseline_point(self, point_index):
+    def set_baseline_point(self, point_index, background=False):
         """设置基准测点（已采集的测点）
         
         Args:
             point_index: 测点索引
+            background: 是否在后台重新计算应力（立即返回，通过 get_recalculation_progress 轮询）
         
         Returns:
             {"success": bool, "message": str, "recalculated_points": int}
+            后台模式: {"success": bool, "message": str, "recalculating": bool, "total": int}
         """
-        return self.field_capture.set_baseline_point(point_index)
+        return self.field_capture.set_baseline_point(point_index, background)
+    
+    def get_recalculation_progress(self):
+        """获取后台重新计算应力的进度
+        
+        Returns:
+            {"success": bool, "data": {"running", "done", "total", "cancelled", "failed", "recalculated", "message"}}
+        """
+        return self.field_capture.get_recalculation_progress()
+    
+    def cancel_recalculation(self):
+        """取消后台重新计算应力（取消后数据库中的应力值保持不变）"""
+        return self.field_capture.cancel_recalculation()
     
     def set_baseline_stress_value(self, stress_value):
         """设置基准点应力值（用于绝对应力模式）
@@ -886,6 +1005,21 @@ class WebAPI:
         """
         return self.field_capture.recapture_point(point_index, auto_denoise)
     
+    @measure_transport
+    def get_field_waveform_preview(self, point_index=None, max_points=2000):
+        """读取测点（或基准）波形预览，只读取HDF5中的最小/最大值金字塔
+        
+        Args:
+            point_index: 测点索引，None 表示基准波形
+            max_points: 预览点数上限
+        
+        Returns:
+            {"success": bool, "data": {"time", "voltage", "factor", "source_points", "decimated"}}
+        """
+        if not self.field_capture or not self.field_capture.current_hdf5:
+            return {"success": False, "message": "HDF5文件未初始化"}
+        return self.field_capture.current_hdf5.load_waveform_preview(point_index, max_points)
+    
     def set_denoise_config(self, config):
         """设置降噪配置
         
@@ -928,6 +1062,49 @@ class WebAPI:
             return {"success": True, "data": self.field_capture.bandpass_config}
         return {"success": False, "message": "未初始化"}
     
+    def set_gate_config(self, config):
+        """设置回波门控配置
+        
+        Args:
+            config: 门控配置 {enabled, method, threshold_ratio, skip_us, pad_us, start_us, end_us}
+        
+        Returns:
+            {"success": bool, "message": str}
+        """
+        return self.field_capture.set_gate_config(config)
+    
+    def get_gate_config(self):
+        """获取回波门控配置
+        
+        Returns:
+            {"success": bool, "data": {...}}
+        """
+        if self.field_capture:
+            return {"success": True, "data": self.field_capture.gate_config}
+        return {"success": False, "message": "未初始化"}
+    
+    def set_delay_estimator(self, method):
+        """设置亚采样点时延估计方法
+        
+        Args:
+            method: parabolic / gaussian / cosine / upsampled_fft / phase_slope
+        
+        Returns:
+            {"success": bool, "message": str}
+        """
+        return self.field_capture.set_delay_estimator(method)
+    
+    def get_delay_estimator(self):
+        """获取亚采样点时延估计方法
+        
+        Returns:
+            {"success": bool, "data": {"method": str, "available": list}}
+        """
+        if self.field_capture:
+            from modules.core.signal_processing import SUBSAMPLE_ESTIMATORS
+            return {"success": True, "data": {"method": self.field_capture.delay_estimator, "available": list(SUBSAMPLE_ESTIMATORS)}}
+        return {"success": False, "message": "未初始化"}
+    
     def test_denoise_effect(self, waveform=None):
         """测试降噪效果
         
@@ -952,15 +1129,20 @@ class WebAPI:
     
     # ---------- 云图生成 ----------
     
+    @measure_transport
     def update_field_contour(self, exp_id=None, config=None):
         """更新云图
         
         Args:
             exp_id: 实验ID (可选，默认当前实验)
-            config: 配置参数 (可选) {method, resolution, smoothing, vmin, vmax}
+            config: 配置参数 (可选) {method, resolution, smoothing, vmin, vmax, options, uncertainty}
+                method: auto | linear | cubic | nearest | idw | rbf | kriging
+                options: 插值引擎参数，如 {"power": 2, "neighbors": 12}
+                uncertainty: 是否估计不确定度（默认 False，显示不确定度叠加层时才需要）
         
         Returns:
             {"success": bool, "mode": str, "grid": {...}, "method": str, "confidence": str}
+            grid 为 grid_payload 格式（1-D 坐标轴 + float32 数据层），前端用 BinaryTransport 解码
         """
         exp_id = exp_id or self.field_experiment.current_exp_id
         if not exp_id:
@@ -971,6 +1153,8 @@ class WebAPI:
         method = config.get('method', 'auto')
         resolution = config.get('resolution', 100)  # 默认100，与前端下拉框一致
         smoothing = config.get('smoothing', True)  # 默认启用平滑
+        options = config.get('options')  # 插值引擎参数（idw/rbf/kriging）
+        with_uncertainty = config.get('uncertainty', False)
         
         # 获取已测量的测点
         measured_points = self.field_experiment.db.get_measured_points(exp_id)
@@ -982,12 +1166,10 @@ class WebAPI:
                 "message": "没有已测量的测点"
             }
         
-        # 加载实验数据获取形状配置
-        exp_result = self.field_experiment.db.load_experiment(exp_id)
-        if not exp_result['success']:
-            return exp_result
-        
-        shape_config = exp_result['data']['experiment'].get('shape_config', {})
+        # 只读取形状配置（不加载整个实验）
+        shape_config = self.field_experiment.db.get_shape_config(exp_id)
+        if shape_config is None:
+            return {"success": False, "error_code": 1002, "message": f"实验 {exp_id} 不存在"}
         
         # 转换测点格式
         points = [{
@@ -996,9 +1178,10 @@ class WebAPI:
             'stress_value': p['stress_value']
         } for p in measured_points]
         
-        # 执行插值
-        interp_result = StressFieldInterpolation.interpolate_stress_field(
-            points, shape_config, resolution=resolution, method=method, smoothing=smoothing
+        # 执行插值（每个实验保留三角剖分和网格缓存，采集过程中只增量更新）
+        interp_result = IncrementalFieldInterpolator.for_experiment(exp_id, resolution).interpolate(
+            points, shape_config, resolution=resolution, method=method, smoothing=smoothing,
+            options=options, with_uncertainty=with_uncertainty
         )
         
         return interp_result
@@ -1007,13 +1190,13 @@ class WebAPI:
         """生成云图颜色数据
         
         Args:
-            grid_data: 插值网格数据 {xi, yi, zi}
+            grid_data: 插值网格数据（update_field_contour 返回的 grid）
             shape_config: 形状配置
             colormap: 色标名称
             vmin, vmax: 色标范围
         
         Returns:
-            {"success": bool, "colors": [...], "stats": {...}, "colorbar": {...}}
+            {"success": bool, "colors": RGBA uint8 编码数组, "shape": [ny, nx, 4], "stats": {...}, "colorbar": {...}}
         """
         if not self.contour_generator:
             exp_id = self.field_experiment.current_exp_id or 'temp'
@@ -1078,7 +1261,7 @@ class WebAPI:
             exp_id: 实验ID
             format: 图片格式 ('png' | 'svg')
             dpi: 分辨率
-            options: 导出选项 {show_points, show_colorbar, title, output_path, resolution}
+            options: 导出选项 {show_points, show_colorbar, show_uncertainty, title, output_path, resolution}
         
         Returns:
             {"success": bool, "file_path": str}
@@ -1093,7 +1276,10 @@ class WebAPI:
         export_resolution = options.get('resolution', 500)
         
         # 获取云图数据（使用高分辨率重新生成）
-        contour_result = self.update_field_contour(exp_id, config={'resolution': export_resolution})
+        contour_result = self.update_field_contour(exp_id, config={
+            'resolution': export_resolution,
+            'uncertainty': options.get('show_uncertainty', False)
+        })
         if not contour_result['success'] or contour_result.get('mode') == 'points_only':
             return {"success": False, "message": "没有足够的数据生成云图"}
         
@@ -1132,10 +1318,11 @@ class WebAPI:
             show_colorbar=options.get('show_colorbar', True),
             show_contour_lines=options.get('show_contour_lines', True),
             contour_levels=options.get('contour_levels', 8),
-            title=options.get('title')
+            title=options.get('title'),
+            show_uncertainty=options.get('show_uncertainty', False)
         )
     
-
+    
     
     # ---------- 数据验证和导出 ----------
     
@@ -1203,7 +1390,7 @@ class WebAPI:
 def 创建窗口():
     """创建单一窗口（直接加载主界面，开屏画面内嵌在主界面中）"""
     api = WebAPI()
-
+    
     # 获取static目录的绝对路径
     当前目录 = os.path.dirname(os.path.abspath(__file__))
     static目录 = os.path.join(当前目录, "static")
@@ -1228,7 +1415,7 @@ def 创建窗口():
     
     # 设置窗口引用到API对象
     api.set_window(窗口)
-
+    
     return 窗口
 
 
@@ -1260,7 +1447,7 @@ def 启动():
     
     logging.getLogger('pywebview').setLevel(logging.CRITICAL)
     warnings.filterwarnings('ignore')
-
+    
     try:
         # 创建单一窗口（开屏画面内嵌在主界面中）
         窗口 = 创建窗口()